@@ -23,6 +23,34 @@ async function parseJsonSafe(res: Response) {
   }
 }
 
+// Listings are paginated: follow X-Next-Cursor until the last page
+async function fetchAllPages<T>(url: string, label: string): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const pageUrl: string = cursor ? `${url}&cursor=${encodeURIComponent(cursor)}` : url;
+    const response = await fetch(pageUrl, {
+      method: 'GET',
+      cache: 'no-store',
+      headers: { 'Cache-Control': 'no-cache' },
+    });
+
+    if (!response.ok) {
+      const body = await parseJsonSafe(response);
+      throw new Error(`GET ${label} ${response.status} ${typeof body === 'string' ? body : ''}`);
+    }
+
+    const result = await parseJsonSafe(response);
+    if (Array.isArray(result)) {
+      items.push(...(result as T[]));
+    } else if (result?.success && Array.isArray(result.data)) {
+      items.push(...(result.data as T[]));
+    }
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return items;
+}
+
 export default function Home() {
   const [currentUser, setCurrentUser] = useState<User | null>(null);
   const [appointments, setAppointments] = useState<Appointment[]>([]);
@@ -34,25 +62,7 @@ export default function Home() {
     if (!currentUser) return;
     try {
       const url = `${APPOINTMENTS_API_URL}?user_id=${encodeURIComponent(currentUser.id)}&t=${Date.now()}`;
-      const response = await fetch(url, {
-        method: 'GET',
-        cache: 'no-store',
-        headers: { 'Cache-Control': 'no-cache' },
-      });
-
-      if (!response.ok) {
-        const body = await parseJsonSafe(response);
-        throw new Error(`GET /appointments ${response.status} ${typeof body === 'string' ? body : ''}`);
-      }
-
-      const result = await parseJsonSafe(response);
-      if (Array.isArray(result)) {
-        setAppointments(result as Appointment[]);
-      } else if (result?.success && Array.isArray(result.data)) {
-        setAppointments(result.data as Appointment[]);
-      } else {
-        setAppointments([]);
-      }
+      setAppointments(await fetchAllPages<Appointment>(url, '/appointments'));
     } catch (error) {
       console.error('Failed to fetch appointments:', error);
     }
@@ -62,25 +72,7 @@ export default function Home() {
     if (!currentUser) return;
     try {
       const url = `${FILES_API_URL}?user_id=${encodeURIComponent(currentUser.id)}&t=${Date.now()}`;
-      const response = await fetch(url, {
-        method: 'GET',
-        cache: 'no-store',
-        headers: { 'Cache-Control': 'no-cache' },
-      });
-
-      if (!response.ok) {
-        const body = await parseJsonSafe(response);
-        throw new Error(`GET /file/all ${response.status} ${typeof body === 'string' ? body : ''}`);
-      }
-
-      const result = await parseJsonSafe(response);
-      if (Array.isArray(result)) {
-        setAllFiles(result as FileData[]);
-      } else if (result?.success && Array.isArray(result.data)) {
-        setAllFiles(result.data as FileData[]);
-      } else {
-        setAllFiles([]);
-      }
+      setAllFiles(await fetchAllPages<FileData>(url, '/file/all'));
     } catch (error) {
       console.error('Failed to fetch all files:', error);
     }
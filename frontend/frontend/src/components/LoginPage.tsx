@@ -49,23 +49,31 @@ export default function LoginPage({ onUserSelect }: LoginPageProps) {
     setLoading(true);
     try {
       console.log('USERS_LIST_URL =', USERS_LIST_URL);
-      const res = await fetch(`${USERS_LIST_URL}?t=${Date.now()}`, {
-        method: 'GET',
-        cache: 'no-store',
-        headers: { 'Cache-Control': 'no-cache' },
-      });
-
-      if (!res.ok) {
-        const errText = await res.text();
-        throw new Error(`GET /users failed: ${res.status} ${errText}`);
-      }
-
-      const result = await res.json();
-      if (result?.success) {
-        setUsers(result.data);
-      } else {
-        console.warn('GET /users returned unexpected payload:', result);
-      }
+      // The listing is paginated: follow X-Next-Cursor until the last page
+      const allUsers: User[] = [];
+      let cursor: string | null = null;
+      do {
+        const pageUrl: string = `${USERS_LIST_URL}?t=${Date.now()}` + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '');
+        const res = await fetch(pageUrl, {
+          method: 'GET',
+          cache: 'no-store',
+          headers: { 'Cache-Control': 'no-cache' },
+        });
+
+        if (!res.ok) {
+          const errText = await res.text();
+          throw new Error(`GET /users failed: ${res.status} ${errText}`);
+        }
+
+        const result = await res.json();
+        if (!result?.success) {
+          console.warn('GET /users returned unexpected payload:', result);
+          return;
+        }
+        allUsers.push(...result.data);
+        cursor = res.headers.get('X-Next-Cursor');
+      } while (cursor);
+      setUsers(allUsers);
     } catch (error) {
       console.error('Failed to fetch users:', error);
     } finally {
@@ -9,7 +9,6 @@ export interface Appointment {
   id: string;
   name: string;
   date: string; // ISO date string
-  files: FileData[];
 }
 
 export interface FileData {
@@ -0,0 +1,27 @@
+"""make files.path non-unique for content-addressed object keys
+
+Revision ID: 2f8d6b0c4e17
+Revises: 7c41e2a9b5d3
+Create Date: 2026-10-19 11:02:47.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '2f8d6b0c4e17'
+down_revision: Union[str, None] = '7c41e2a9b5d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index(op.f('ix_files_path'), table_name='files')
+    op.create_index(op.f('ix_files_path'), 'files', ['path'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_files_path'), table_name='files')
+    op.create_index(op.f('ix_files_path'), 'files', ['path'], unique=True)
@@ -0,0 +1,27 @@
+"""add created_at to files for keyset-paginated listings
+
+Revision ID: 3a8f1e6d9b42
+Revises: 9c3e5b7a1d24
+Create Date: 2026-10-19 14:05:47.218803
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3a8f1e6d9b42'
+down_revision: Union[str, None] = '9c3e5b7a1d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows get the migration time; their ids still give them a stable order
+    op.add_column('files', sa.Column('created_at', sa.DateTime(), nullable=False,
+                                     server_default=sa.text('CURRENT_TIMESTAMP')))
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'created_at')
@@ -0,0 +1,31 @@
+"""add file integrity manifest
+
+Revision ID: 4e9a7d2c1f58
+Revises: d81f4a6c2b90
+Create Date: 2026-10-19 15:11:09.482133
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '4e9a7d2c1f58'
+down_revision: Union[str, None] = 'd81f4a6c2b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.add_column('files', sa.Column('integrity_status', sa.String(length=20), nullable=True))
+    op.add_column('files', sa.Column('integrity_checked_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_files_integrity_checked_at'), 'files', ['integrity_checked_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_files_integrity_checked_at'), table_name='files')
+    op.drop_column('files', 'integrity_checked_at')
+    op.drop_column('files', 'integrity_status')
+    op.drop_column('files', 'sha256')
@@ -0,0 +1,45 @@
+"""add composite indexes for the file, appointment and user listings
+
+Revision ID: 6b2d4f8a1c93
+Revises: 3a8f1e6d9b42
+Create Date: 2026-10-19 16:42:09.553610
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect as sa_inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '6b2d4f8a1c93'
+down_revision: Union[str, None] = '3a8f1e6d9b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Owner equality, then the keyset order; virus_scan_status last so infected rows are skipped in the index
+LISTING_INDEXES = [
+    ('ix_files_user_listing', 'files', ['user_id', 'created_at', 'id', 'virus_scan_status']),
+    ('ix_files_appointment_listing', 'files', ['appointment_id', 'created_at', 'id', 'virus_scan_status']),
+    ('ix_appointments_user_listing', 'appointments', ['user_id', 'date', 'id']),
+    ('ix_users_listing', 'users', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in LISTING_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    inspector = sa_inspect(op.get_bind())
+    for name, table, columns in reversed(LISTING_INDEXES):
+        # MySQL drops the implicit index of a foreign key once another index starts with its column;
+        # put a plain one back first, or the composite index could not be dropped
+        leading = columns[0]
+        fk_columns = {column for fk in inspector.get_foreign_keys(table) for column in fk['constrained_columns']}
+        others = [index for index in inspector.get_indexes(table)
+                  if index['name'] != name and index['column_names'][:1] == [leading]]
+        if leading in fk_columns and not others:
+            op.create_index(f'ix_{table}_{leading}', table, [leading], unique=False)
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,29 @@
+"""add row version and per-user/per-appointment file change counters
+
+Revision ID: 7c41e2a9b5d3
+Revises: d3b2a1c4f789
+Create Date: 2026-10-19 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41e2a9b5d3'
+down_revision: Union[str, None] = 'd3b2a1c4f789'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('appointments', sa.Column('files_version', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('users', sa.Column('files_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'files_version')
+    op.drop_column('appointments', 'files_version')
+    op.drop_column('files', 'version')
@@ -0,0 +1,30 @@
+"""add stored_at to blobs so uploads only deduplicate against stored objects
+
+Revision ID: 8e2c5a1f7b46
+Revises: 6b2d4f8a1c93
+Create Date: 2026-10-19 18:21:36.804517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2c5a1f7b46'
+down_revision: Union[str, None] = '6b2d4f8a1c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('blobs', sa.Column('stored_at', sa.DateTime(), nullable=True))
+    # Existing blobs count as stored once a file backed by them passed the upload's integrity check
+    op.execute(
+        "UPDATE blobs SET stored_at = created_at WHERE EXISTS "
+        "(SELECT 1 FROM files WHERE files.blob_id = blobs.id AND files.integrity_status = 'verified')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('blobs', 'stored_at')
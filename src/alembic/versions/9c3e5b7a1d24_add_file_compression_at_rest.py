@@ -0,0 +1,29 @@
+"""add file compression at rest
+
+Revision ID: 9c3e5b7a1d24
+Revises: 4e9a7d2c1f58
+Create Date: 2026-10-19 17:42:31.205817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5b7a1d24'
+down_revision: Union[str, None] = '4e9a7d2c1f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('content_encoding', sa.String(length=16), nullable=True))
+    op.add_column('files', sa.Column('stored_size', sa.Integer(), nullable=True))
+    op.add_column('files', sa.Column('compression_cpu_ms', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'compression_cpu_ms')
+    op.drop_column('files', 'stored_size')
+    op.drop_column('files', 'content_encoding')
@@ -0,0 +1,45 @@
+"""add blobs table for whole-file deduplication
+
+Revision ID: b5e0c39a7f21
+Revises: 2f8d6b0c4e17
+Create Date: 2026-10-19 13:26:05.870214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e0c39a7f21'
+down_revision: Union[str, None] = '2f8d6b0c4e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('blobs',
+    sa.Column('id', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('bucket', sa.String(length=63), nullable=False),
+    sa.Column('path', sa.VARCHAR(length=255), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('virus_scan_status', sa.String(length=20), nullable=False),
+    sa.Column('celery_task_id', sa.String(length=255), nullable=True),
+    sa.Column('dedup_hits', sa.Integer(), nullable=False),
+    sa.Column('bytes_deduplicated', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256', 'bucket', name='uq_blobs_sha256_bucket')
+    )
+    op.add_column('files', sa.Column('blob_id', sa.VARCHAR(length=36), nullable=True))
+    op.create_index(op.f('ix_files_blob_id'), 'files', ['blob_id'], unique=False)
+    op.create_foreign_key('fk_files_blob_id_blobs', 'files', 'blobs', ['blob_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_files_blob_id_blobs', 'files', type_='foreignkey')
+    op.drop_index(op.f('ix_files_blob_id'), table_name='files')
+    op.drop_column('files', 'blob_id')
+    op.drop_table('blobs')
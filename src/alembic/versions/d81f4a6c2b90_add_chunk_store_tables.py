@@ -0,0 +1,61 @@
+"""add chunk store tables
+
+Revision ID: d81f4a6c2b90
+Revises: b5e0c39a7f21
+Create Date: 2026-10-19 14:02:41.307512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f4a6c2b90'
+down_revision: Union[str, None] = 'b5e0c39a7f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('chunks',
+    sa.Column('id', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('bucket', sa.String(length=63), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('last_referenced_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bucket', 'sha256', name='uq_chunks_bucket_sha256')
+    )
+    op.create_index(op.f('ix_chunks_last_referenced_at'), 'chunks', ['last_referenced_at'], unique=False)
+    op.create_table('chunk_manifests',
+    sa.Column('id', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('bucket', sa.String(length=63), nullable=False),
+    sa.Column('object_name', sa.VARCHAR(length=255), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bucket', 'object_name', name='uq_chunk_manifests_bucket_object_name')
+    )
+    op.create_table('chunk_manifest_entries',
+    sa.Column('manifest_id', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('chunk_id', sa.VARCHAR(length=36), nullable=False),
+    sa.Column('offset', sa.BigInteger(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['chunk_id'], ['chunks.id'], ),
+    sa.ForeignKeyConstraint(['manifest_id'], ['chunk_manifests.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('manifest_id', 'seq')
+    )
+    op.create_index(op.f('ix_chunk_manifest_entries_chunk_id'), 'chunk_manifest_entries', ['chunk_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_chunk_manifest_entries_chunk_id'), table_name='chunk_manifest_entries')
+    op.drop_table('chunk_manifest_entries')
+    op.drop_table('chunk_manifests')
+    op.drop_index(op.f('ix_chunks_last_referenced_at'), table_name='chunks')
+    op.drop_table('chunks')
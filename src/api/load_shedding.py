@@ -0,0 +1,28 @@
+from starlette.types import ASGIApp, Scope, Receive, Send
+from fastapi import status
+from api.responses.response import ErrorResponse, response
+from constants.errors import Errors
+from core.config import config
+from infrastructure.load_monitor import loadMonitor, route_class
+
+
+class LoadSheddingMiddleware:
+    """Refuses low-priority requests with `503` while the load monitor reports overload, and counts those in flight."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not config.LOAD_SHED_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        if loadMonitor.should_shed(name):
+            shed = response.error(ErrorResponse(message=Errors.OVERLOADED),
+                                  status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                  headers={"Retry-After": str(config.LOAD_SHED_RETRY_AFTER_SECONDS)})
+            await shed(scope, receive, send)
+            return
+        with loadMonitor.track(name):
+            await self.app(scope, receive, send)
@@ -1,16 +1,25 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from constants.upload_stauts import UploadStatus
 
 
 class UploadInitResponse(BaseModel):
     chunk_size: int
     upload_id: str
+    # Known when the total size was declared; chunks past it and a different total at completion are rejected
+    total_chunks: Optional[int] = None
+    # Chunks the client may send concurrently, given the server load when the upload started
+    parallel_streams: int = 1
+    # `Content-Encoding` values accepted for chunk bodies; limits apply to the decoded size
+    content_encodings: List[str] = []
 
 
 class UploadChunkResponse(BaseModel):
     chunk_index: int
     upload_id: str
+    size: int
+    sha256: str
+    crc32c: Optional[str] = None
 
 
 class FileResponse(BaseModel):
@@ -22,6 +31,7 @@ class FileResponse(BaseModel):
     detail:  Optional[Dict[str, Any]]
     credential:  Optional[Dict[str, Any]]
     download_url: str
+    sha256: Optional[str] = None
     
     # Virus scanning fields
     virus_scan_status: str = 'pending'
@@ -29,5 +39,23 @@ class FileResponse(BaseModel):
     quarantine_reason: Optional[str] = None
 
 
+class BatchUploadItemResponse(BaseModel):
+    index: int
+    filename: Optional[str]
+    # stored, deduplicated, rejected (malware) or failed
+    status: str
+    file_id: Optional[str] = None
+    size: Optional[int] = None
+    sha256: Optional[str] = None
+    download_url: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchUploadResponse(BaseModel):
+    stored: int
+    failed: int
+    items: List[BatchUploadItemResponse]
+
+
 class UploadStatusResponse(BaseModel):
     status: UploadStatus
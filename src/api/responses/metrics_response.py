@@ -0,0 +1,93 @@
+from pydantic import BaseModel
+from typing import List, Optional, Dict
+
+
+class ObjectCacheStatsResponse(BaseModel):
+    enabled: bool
+    entries: int
+    bytes_cached: int
+    max_bytes: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    bytes_saved: int
+    evictions: int
+
+
+class DedupStatsResponse(BaseModel):
+    blobs: int
+    stored_bytes: int
+    logical_bytes: int
+    storage_saved_bytes: int
+    dedup_hits: int
+    bytes_not_transferred: int
+
+
+class CompressionExtensionStats(BaseModel):
+    extension: str
+    files: int
+    original_bytes: int
+    stored_bytes: int
+    ratio: float
+    compression_cpu_seconds: float
+
+
+class CompressionStatsResponse(BaseModel):
+    enabled: bool
+    extensions: List[CompressionExtensionStats]
+    # Spent by this API process serving compressed files to clients without zstd support
+    decompression_cpu_seconds: float
+    decompressed_bytes: int
+
+
+class StagingStatsResponse(BaseModel):
+    # Of the staging volume; None when it does not exist yet
+    free_percent: Optional[float]
+    accepting_uploads: bool
+    sweeps: int
+    sessions_removed: int
+    artifacts_removed: int
+    bytes_freed: int
+
+
+class UploadAdmissionStatsResponse(BaseModel):
+    reservations: int
+    reserved_bytes: int
+    max_bytes: int
+    users: int
+    max_bytes_per_user: int
+    admitted: int
+    rejected_global: int
+    rejected_user: int
+
+
+class LoadStatsResponse(BaseModel):
+    enabled: bool
+    # Largest of the signals below as a multiple of its threshold
+    pressure: float
+    lag_ms: float
+    # None when the broker could not be reached
+    queue_depth: Optional[int]
+    # Requests in flight per shedding class, and in total
+    inflight: Dict[str, int]
+    thresholds: Dict[str, float]
+    # Pressure from which each class is refused, and the classes refused right now
+    shed_at: Dict[str, float]
+    shedding: List[str]
+    # Requests refused per class since the process started
+    shed: Dict[str, int]
+
+
+class TaskDispatchStatsResponse(BaseModel):
+    enabled: bool
+    # Tasks waiting per lane (interactive, bulk), and the users they belong to
+    queued: Dict[str, int]
+    waiting_tenants: int
+    # Sent to Celery and not finished yet, and the users they belong to
+    running: int
+    running_tenants: int
+    window: int
+    max_per_tenant: int
+    # Per lane, since the process started
+    dispatched: Dict[str, int]
+    max_wait_seconds: Dict[str, float]
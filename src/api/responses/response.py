@@ -1,4 +1,4 @@
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response as HTTPResponse
 from typing import Any, TypeVar, Generic, Type, Optional, Sequence
 from pydantic import BaseModel
 
@@ -18,11 +18,14 @@ class ErrorResponse(BaseModel):
 
 
 class Response:
-    def success(self, content: SuccessResponse, status: int = 200) -> JSONResponse:
-        return JSONResponse(content=content.model_dump(), status_code=status)
+    def success(self, content: SuccessResponse, status: int = 200, headers: Optional[dict] = None) -> JSONResponse:
+        return JSONResponse(content=content.model_dump(), status_code=status, headers=headers)
 
-    def error(self, content: ErrorResponse, status: int = 400) -> JSONResponse:
-        return JSONResponse(content=content.model_dump(), status_code=status)
+    def error(self, content: ErrorResponse, status: int = 400, headers: Optional[dict] = None) -> JSONResponse:
+        return JSONResponse(content=content.model_dump(), status_code=status, headers=headers)
+
+    def not_modified(self, headers: Optional[dict] = None) -> HTTPResponse:
+        return HTTPResponse(status_code=304, headers=headers)
 
 
 response = Response()
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy.orm import Session
 from infrastructure.db.mysql import mysql
 from repositories.appointment_repository import AppointmentRepo
 from services.appointment_service import AppointmentService
 from dto.appointment_dto import Appointment, AppointmentCreate
 from api.responses.response import SuccessResponse, ErrorResponse
-from typing import List
+from typing import List, Optional
+from core.config import config
 
 router = APIRouter(
     prefix="/api/v1/appointments",
@@ -22,8 +23,14 @@ def create_appointment(appointment: AppointmentCreate, service: AppointmentServi
     return SuccessResponse(data=new_appointment)
 
 @router.get("/", response_model=SuccessResponse[List[Appointment]])
-def list_appointments(user_id: str, service: AppointmentService = Depends(get_appointment_service)):
-    appointments = service.list_appointments(user_id)
+def list_appointments(user_id: str, response: Response,
+                      limit: int = Query(config.LISTING_PAGE_SIZE, ge=1, le=config.LISTING_MAX_PAGE_SIZE),
+                      cursor: Optional[str] = Query(None),
+                      service: AppointmentService = Depends(get_appointment_service)):
+    """A page of the user's appointments, oldest first; the next page's `cursor` is in `X-Next-Cursor`."""
+    appointments, next_cursor = service.list_appointments(user_id, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return SuccessResponse(data=appointments)
 
 @router.delete("/{appointment_id}", response_model=SuccessResponse)
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, UploadFile, Form, Request, Depends
+from fastapi import APIRouter, UploadFile, Form, Request, Depends, Path, Query
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from infrastructure.db.mysql import mysql as db
 from repositories.file_repository import FileRepo
+from repositories.async_file_repository import AsyncFileRepo
 from services.file_service import FileService
 from handlers.file_handler import FileHandler
-from api.responses.file_response import FileResponse, UploadInitResponse, UploadChunkResponse, UploadStatusResponse
+from api.responses.file_response import FileResponse, UploadInitResponse, UploadChunkResponse, UploadStatusResponse, BatchUploadResponse
 from typing import Optional
 from api.responses.response import SuccessResponse, ErrorResponse
 from core.config import config
@@ -28,18 +30,99 @@ def get_file_handler(db: Session = Depends(mysql.get_db)) -> FileHandler:
     return handler
 
 
-@router.post("/upload/init/", response_model=SuccessResponse[UploadInitResponse])
-async def endpoint(file_handler: FileHandler = Depends(get_file_handler)):
-    return await file_handler.upload_initialize()
+# Read-only routes use the async engine when enabled; uploads and deletions keep the sync session
+get_read_db = mysql.get_async_db if config.DB_ASYNC_ENABLED else mysql.get_db
 
 
-@router.post("/upload/chunk/", response_model=SuccessResponse[UploadChunkResponse], responses={
+def get_read_file_handler(db: Session | AsyncSession = Depends(get_read_db)) -> FileHandler:
+    repo = AsyncFileRepo(db=db) if isinstance(db, AsyncSession) else FileRepo(db=db)
+    service = FileService(repo=repo)
+    handler = FileHandler(service=service)
+    return handler
+
+
+def get_upload_handler() -> FileHandler:
+    # Staging chunks never touches the database, so no session is opened
+    service = FileService(repo=None)
+    handler = FileHandler(service=service)
+    return handler
+
+
+@router.post("/upload/", response_model=SuccessResponse[FileResponse], responses={
+    413: {"model": ErrorResponse, "description": "Larger than one chunk; use the chunked upload"},
     422: {"model": ErrorResponse},
 })
-async def endpoint(chunk_size: int = Form(..., le=config.APP_MAX_CHUNK_SIZE),
+async def endpoint(file: UploadFile = Form(...), file_extension: FileExtension = Form(...),
+                   appointment_id: str = Form(...), user_id: str = Form(...),
+                   content_type: Optional[str] = Form(None), filename: Optional[str] = Form(None),
+                   credential: Optional[str] = Form(None), detail: Optional[str] = Form(None),
+                   file_handler: FileHandler = Depends(get_file_handler)):
+    """Upload a file of at most `chunk_size` bytes in a single request"""
+    return await file_handler.upload_small(file=file, file_extension=file_extension, content_type=content_type,
+                                           credential=credential, detail=detail, appointment_id=appointment_id,
+                                           user_id=user_id, filename=filename)
+
+
+@router.post("/upload/batch/", response_model=SuccessResponse[BatchUploadResponse], responses={
+    415: {"model": ErrorResponse, "description": "The body is neither `multipart/form-data` nor `application/x-tar`"},
+})
+async def endpoint(request: Request, appointment_id: str, user_id: str, credential: Optional[str] = None,
+                   file_handler: FileHandler = Depends(get_file_handler)):
+    """
+    Upload many small files in one request, as the file parts of a `multipart/form-data` body or the
+    members of an uncompressed tar archive. Each file must fit in one chunk; the outcome is reported per file.
+    """
+    return await file_handler.upload_batch(body=request.stream(), content_type=request.headers.get("content-type"),
+                                           appointment_id=appointment_id, user_id=user_id, credential=credential)
+
+
+@router.post("/upload/init/", response_model=SuccessResponse[UploadInitResponse], responses={
+    413: {"model": ErrorResponse, "description": "`total_size` is larger than an upload can ever be"},
+    429: {"model": ErrorResponse, "description": "Too many bytes in flight, overall or for `user_id`; see `Retry-After`"},
+    503: {"model": ErrorResponse, "description": "The staging volume is nearly full; see `Retry-After`"},
+})
+async def endpoint(total_size: Optional[int] = Form(None, ge=0), content_type: Optional[str] = Form(None),
+                   user_id: Optional[str] = Form(None), file_handler: FileHandler = Depends(get_upload_handler)):
+    """
+    Start a chunked upload. With `total_size`, the chunk size and number of parallel streams are
+    negotiated for the file, and later chunks and the completion are validated against them.
+    The declared size counts against the in-flight budgets, overall and for `user_id`, until the file is stored.
+    """
+    return await file_handler.upload_initialize(total_size=total_size, content_type=content_type, user_id=user_id)
+
+
+@router.post("/upload/chunk/", response_model=SuccessResponse[UploadChunkResponse], responses={
+    400: {"model": ErrorResponse, "description": "The `content_encoding` of the file part does not decode"},
+    415: {"model": ErrorResponse, "description": "Unsupported `content_encoding`; accepted ones are in `Accept-Encoding`"},
+    422: {"model": ErrorResponse, "description": "Invalid chunk, or checksum mismatch (resend the chunk in `X-Retry-Chunk`)"},
+})
+async def endpoint(chunk_size: int = Form(..., le=config.UPLOAD_MAX_CHUNK_SIZE),
                    upload_id: str = Form(...), chunk_index: int = Form(...), file: UploadFile = Form(...),
+                   checksum_algorithm: Optional[str] = Form(None), checksum: Optional[str] = Form(None),
+                   content_encoding: Optional[str] = Form(None),
                    file_handler: FileHandler = Depends(get_file_handler)):
-    return await file_handler.upload_chunk(chunk_size=chunk_size, upload_id=upload_id, chunk_index=chunk_index, file=file)
+    return await file_handler.upload_chunk(chunk_size=chunk_size, upload_id=upload_id, chunk_index=chunk_index, file=file,
+                                           checksum_algorithm=checksum_algorithm, checksum=checksum,
+                                           content_encoding=content_encoding)
+
+
+@router.put("/upload/{upload_id}/chunk/{chunk_index}", response_model=SuccessResponse[UploadChunkResponse], responses={
+    400: {"model": ErrorResponse, "description": "The body does not decode with its `Content-Encoding`"},
+    413: {"model": ErrorResponse},
+    415: {"model": ErrorResponse, "description": "Unsupported `Content-Encoding`; accepted ones are in `Accept-Encoding`"},
+    422: {"model": ErrorResponse, "description": "Invalid chunk, or checksum mismatch (resend the chunk in `X-Retry-Chunk`)"},
+})
+async def endpoint(upload_id: str, request: Request, chunk_index: int = Path(..., ge=0),
+                   file_handler: FileHandler = Depends(get_upload_handler)):
+    """
+    Upload a chunk as the raw request body; checksum in `X-Checksum-Algorithm` and `X-Checksum` headers.
+    The body may be sent with `Content-Encoding: gzip` or `zstd`; the checksum covers the decoded bytes.
+    """
+    return await file_handler.upload_chunk_stream(upload_id=upload_id, chunk_index=chunk_index, body=request.stream(),
+                                                  content_length=request.headers.get("content-length"),
+                                                  checksum_algorithm=request.headers.get("x-checksum-algorithm"),
+                                                  checksum=request.headers.get("x-checksum"),
+                                                  content_encoding=request.headers.get("content-encoding"))
 
 
 @router.post("/upload/complete/", response_model=SuccessResponse[FileResponse], responses={
@@ -58,23 +141,58 @@ async def endpoint(upload_id: str = Form(...), total_chunks: int = Form(...),
 
 
 @router.get('/get/{file_id}', response_model=SuccessResponse[FileResponse], responses={
+    304: {"description": "Not modified"},
     404: {"model": ErrorResponse},
     422: {"model": ErrorResponse},
     403: {"model": ErrorResponse}
 })
-async def endpoint(file_id: str, request: Request, file_handler: FileHandler = Depends(get_file_handler)) -> JSONResponse:
+async def endpoint(file_id: str, request: Request, file_handler: FileHandler = Depends(get_read_file_handler)) -> JSONResponse:
     credential = dict(request.query_params)
-    return await file_handler.get_file(file_id=file_id, credential=credential)
+    return await file_handler.get_file(file_id=file_id, credential=credential,
+                                       if_none_match=request.headers.get("if-none-match"))
 
 
-@router.get("/appointment/{appointment_id}", response_model=SuccessResponse[list[FileResponseDTO]])
-async def get_files_by_appointment(appointment_id: str, file_handler: FileHandler = Depends(get_file_handler)):
-    return await file_handler.get_files_by_appointment(appointment_id)
+@router.get('/download/{file_id}', responses={
+    206: {"description": "Partial content for single or multi-range requests"},
+    404: {"model": ErrorResponse},
+    403: {"model": ErrorResponse},
+    416: {"description": "Requested range not satisfiable"},
+})
+async def endpoint(file_id: str, request: Request, file_handler: FileHandler = Depends(get_file_handler)):
+    credential = dict(request.query_params)
+    return await file_handler.download_file(file_id=file_id, credential=credential,
+                                            range_header=request.headers.get("range"),
+                                            if_range=request.headers.get("if-range"),
+                                            accept_encoding=request.headers.get("accept-encoding"))
 
 
-@router.get("/all", response_model=SuccessResponse[list[FileResponseDTO]])
-async def list_all_files(user_id: str, file_handler: FileHandler = Depends(get_file_handler)):
-    return await file_handler.list_all_files(user_id)
+@router.get("/appointment/{appointment_id}", response_model=SuccessResponse[list[FileResponseDTO]], responses={
+    304: {"description": "Not modified"},
+    422: {"model": ErrorResponse, "description": "Invalid `limit` or `cursor`"},
+})
+async def get_files_by_appointment(appointment_id: str, request: Request,
+                                   limit: int = Query(config.LISTING_PAGE_SIZE, ge=1, le=config.LISTING_MAX_PAGE_SIZE),
+                                   cursor: Optional[str] = Query(None),
+                                   file_handler: FileHandler = Depends(get_read_file_handler)):
+    """
+    A page of the appointment's files, oldest first. When there are more, `X-Next-Cursor` holds
+    the `cursor` to request the next page with.
+    """
+    return await file_handler.get_files_by_appointment(appointment_id, limit=limit, cursor=cursor,
+                                                       if_none_match=request.headers.get("if-none-match"))
+
+
+@router.get("/all", response_model=SuccessResponse[list[FileResponseDTO]], responses={
+    304: {"description": "Not modified"},
+    422: {"model": ErrorResponse, "description": "Invalid `limit` or `cursor`"},
+})
+async def list_all_files(user_id: str, request: Request,
+                         limit: int = Query(config.LISTING_PAGE_SIZE, ge=1, le=config.LISTING_MAX_PAGE_SIZE),
+                         cursor: Optional[str] = Query(None),
+                         file_handler: FileHandler = Depends(get_read_file_handler)):
+    """A page of the user's files, oldest first; the next page's `cursor` is in `X-Next-Cursor`."""
+    return await file_handler.list_all_files(user_id, limit=limit, cursor=cursor,
+                                             if_none_match=request.headers.get("if-none-match"))
 
 
 @router.delete("/{file_id}", response_model=SuccessResponse)
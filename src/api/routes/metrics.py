@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from api.responses.response import SuccessResponse, response
+from api.responses.metrics_response import ObjectCacheStatsResponse, DedupStatsResponse, CompressionStatsResponse, StagingStatsResponse, UploadAdmissionStatsResponse, LoadStatsResponse, TaskDispatchStatsResponse
+from infrastructure.object_cache import objectCache
+from infrastructure.compression import decompressionStats
+from infrastructure.staging_area import stagingArea
+from infrastructure.upload_admission import uploadAdmission
+from infrastructure.load_monitor import loadMonitor
+from infrastructure.task_dispatcher import taskDispatcher
+from core.config import config
+from infrastructure.db.mysql import mysql
+from repositories.blob_repository import BlobRepo
+from repositories.file_repository import FileRepo
+
+router = APIRouter(
+    prefix="/api/v1/metrics",
+    tags=["metrics"]
+)
+
+
+@router.get("/cache", response_model=SuccessResponse[ObjectCacheStatsResponse])
+async def object_cache_stats() -> JSONResponse:
+    """Hit ratio and bytes saved by the download read-through cache"""
+    return response.success(SuccessResponse[ObjectCacheStatsResponse](data=ObjectCacheStatsResponse(**objectCache.stats())))
+
+
+@router.get("/dedup", response_model=SuccessResponse[DedupStatsResponse])
+async def dedup_stats(db: Session = Depends(mysql.get_db)) -> JSONResponse:
+    """Storage saved and upload bytes not transferred thanks to whole-file deduplication"""
+    return response.success(SuccessResponse[DedupStatsResponse](data=DedupStatsResponse(**BlobRepo(db=db).get_stats())))
+
+
+@router.get("/compression", response_model=SuccessResponse[CompressionStatsResponse])
+async def compression_stats(db: Session = Depends(mysql.get_db)) -> JSONResponse:
+    """Compression ratio and CPU time per file extension for files compressed at rest"""
+    return response.success(SuccessResponse[CompressionStatsResponse](data=CompressionStatsResponse(
+        enabled=config.COMPRESSION_AT_REST_ENABLED,
+        extensions=FileRepo(db=db).get_compression_stats(),
+        decompression_cpu_seconds=decompressionStats.cpu_seconds,
+        decompressed_bytes=decompressionStats.bytes_out,
+    )))
+
+
+@router.get("/staging", response_model=SuccessResponse[StagingStatsResponse])
+async def staging_stats() -> JSONResponse:
+    """Free space of the chunk staging area and what this process's janitor has removed from it"""
+    return response.success(SuccessResponse[StagingStatsResponse](data=StagingStatsResponse(**stagingArea.stats())))
+
+
+@router.get("/uploads", response_model=SuccessResponse[UploadAdmissionStatsResponse])
+async def upload_admission_stats() -> JSONResponse:
+    """Bytes reserved by uploads in flight against their budgets, and uploads refused for lack of budget"""
+    return response.success(SuccessResponse[UploadAdmissionStatsResponse](
+        data=UploadAdmissionStatsResponse(**uploadAdmission.stats())))
+
+
+@router.get("/load", response_model=SuccessResponse[LoadStatsResponse])
+async def load_stats() -> JSONResponse:
+    """Overload signals against their thresholds, and the requests shed because of them"""
+    return response.success(SuccessResponse[LoadStatsResponse](data=LoadStatsResponse(**loadMonitor.stats())))
+
+
+@router.get("/tasks", response_model=SuccessResponse[TaskDispatchStatsResponse])
+async def task_dispatch_stats() -> JSONResponse:
+    """Upload tasks waiting for their turn per lane, tasks running in Celery, and the longest waits so far"""
+    return response.success(SuccessResponse[TaskDispatchStatsResponse](
+        data=TaskDispatchStatsResponse(**taskDispatcher.stats())))
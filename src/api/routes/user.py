@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy.orm import Session
 from infrastructure.db.mysql import mysql
 from repositories.user_repository import UserRepo
 from services.user_service import UserService
 from dto.user_dto import User, UserCreate
 from api.responses.response import SuccessResponse, ErrorResponse
-from typing import List
+from typing import List, Optional
+from core.config import config
 
 router = APIRouter(
     prefix="/api/v1/users",
@@ -22,8 +23,14 @@ def create_user(user: UserCreate, service: UserService = Depends(get_user_servic
     return SuccessResponse(data=new_user)
 
 @router.get("/", response_model=SuccessResponse[List[User]])
-def list_users(service: UserService = Depends(get_user_service)):
-    users = service.list_users()
+def list_users(response: Response,
+               limit: int = Query(config.LISTING_PAGE_SIZE, ge=1, le=config.LISTING_MAX_PAGE_SIZE),
+               cursor: Optional[str] = Query(None),
+               service: UserService = Depends(get_user_service)):
+    """A page of users, oldest first; the next page's `cursor` is in `X-Next-Cursor`."""
+    users, next_cursor = service.list_users(limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return SuccessResponse(data=users)
 
 @router.delete("/{user_id}", response_model=SuccessResponse)
@@ -0,0 +1,91 @@
+"""
+Benchmark: dedup ratio and throughput of the chunk store on edited revisions.
+
+Builds a synthetic corpus of one random base file and a chain of revisions, each
+derived from the previous one by a few small inserts, deletes and overwrites, then
+compares how many bytes whole-file, fixed-size and content-defined chunking store.
+Runs offline; nothing is uploaded.
+
+    python -m benchmarks.chunk_dedup_benchmark --size-mb 16 --revisions 10
+"""
+import argparse
+import hashlib
+import io
+import random
+import time
+from infrastructure.chunker import Chunker
+
+KIB = 1024
+
+
+def build_corpus(size: int, revisions: int, edits: int, seed: int) -> list[bytes]:
+    rng = random.Random(seed)
+    corpus = [rng.randbytes(size)]
+    for _ in range(revisions):
+        data = bytearray(corpus[-1])
+        for _ in range(edits):
+            position = rng.randrange(len(data))
+            length = rng.randint(1, 4 * KIB)
+            action = rng.choice(("insert", "delete", "overwrite"))
+            if action == "insert":
+                data[position:position] = rng.randbytes(length)
+            elif action == "delete":
+                del data[position:position + length]
+            else:
+                data[position:position + length] = rng.randbytes(len(data[position:position + length]))
+        corpus.append(bytes(data))
+    return corpus
+
+
+def stored_bytes(chunks_per_file: list[list[bytes]]) -> int:
+    unique = {}
+    for chunks in chunks_per_file:
+        for chunk in chunks:
+            unique[hashlib.sha256(chunk).digest()] = len(chunk)
+    return sum(unique.values())
+
+
+def run(size_mb: int, revisions: int, edits: int, min_kib: int, avg_kib: int, max_kib: int, seed: int) -> None:
+    corpus = build_corpus(size_mb * 1024 * KIB, revisions, edits, seed)
+    logical = sum(len(data) for data in corpus)
+
+    started = time.perf_counter()
+    for data in corpus:
+        hashlib.sha256(data).digest()
+    hash_elapsed = time.perf_counter() - started
+
+    fixed = [[data[i:i + avg_kib * KIB] for i in range(0, len(data), avg_kib * KIB)] for data in corpus]
+
+    chunker = Chunker(min_kib * KIB, avg_kib * KIB, max_kib * KIB)
+    started = time.perf_counter()
+    content_defined = [list(chunker.iter_chunks(io.BytesIO(data))) for data in corpus]
+    cdc_elapsed = time.perf_counter() - started
+
+    rows = [
+        ("whole file", stored_bytes([[data] for data in corpus])),
+        (f"fixed {avg_kib}KiB", stored_bytes(fixed)),
+        (f"cdc ~{avg_kib}KiB", stored_bytes(content_defined)),
+    ]
+    chunk_count = sum(len(chunks) for chunks in content_defined)
+
+    print(f"corpus: {len(corpus)} files, {logical / 2 ** 20:.1f} MiB logical, {edits} edits per revision")
+    print(f"{'strategy':<16}{'stored MiB':>12}{'dedup ratio':>14}")
+    for name, stored in rows:
+        print(f"{name:<16}{stored / 2 ** 20:>12.1f}{logical / stored:>13.2f}x")
+    print(f"cdc chunks: {chunk_count}, mean size {logical / chunk_count / KIB:.0f} KiB")
+    print(f"{'throughput':<16}{'MiB/s':>12}")
+    print(f"{'sha256 only':<16}{logical / 2 ** 20 / hash_elapsed:>12.1f}")
+    print(f"{'cdc chunking':<16}{logical / 2 ** 20 / cdc_elapsed:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=16)
+    parser.add_argument("--revisions", type=int, default=10)
+    parser.add_argument("--edits", type=int, default=5)
+    parser.add_argument("--min-kib", type=int, default=256)
+    parser.add_argument("--avg-kib", type=int, default=1024)
+    parser.add_argument("--max-kib", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    run(args.size_mb, args.revisions, args.edits, args.min_kib, args.avg_kib, args.max_kib, args.seed)
@@ -0,0 +1,75 @@
+"""
+Benchmark: form-based `POST /upload/chunk/` vs raw-body `PUT /upload/{id}/chunk/{index}`.
+
+Runs against a live API (uploads are staged only; nothing is completed or stored),
+with 1, 10 and 100 concurrent clients by default.
+
+    python -m benchmarks.chunk_upload_benchmark --url http://localhost:8000 --chunk-kib 1024
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import aiohttp
+
+
+async def init_upload(session: aiohttp.ClientSession, url: str) -> str:
+    async with session.post(f"{url}/api/v1/file/upload/init/") as response:
+        return (await response.json())["data"]["upload_id"]
+
+
+async def send_form(session: aiohttp.ClientSession, url: str, upload_id: str, index: int, data: bytes) -> None:
+    form = aiohttp.FormData()
+    form.add_field("chunk_size", str(len(data)))
+    form.add_field("upload_id", upload_id)
+    form.add_field("chunk_index", str(index))
+    form.add_field("file", data, filename=f"{index}.part", content_type="application/octet-stream")
+    async with session.post(f"{url}/api/v1/file/upload/chunk/", data=form) as response:
+        response.raise_for_status()
+        await response.read()
+
+
+async def send_raw(session: aiohttp.ClientSession, url: str, upload_id: str, index: int, data: bytes) -> None:
+    async with session.put(f"{url}/api/v1/file/upload/{upload_id}/chunk/{index}", data=data) as response:
+        response.raise_for_status()
+        await response.read()
+
+
+async def run_case(url: str, send, concurrency: int, chunks: int, data: bytes) -> tuple[float, list[float]]:
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        upload_ids = [await init_upload(session, url) for _ in range(concurrency)]
+        latencies: list[float] = []
+
+        async def client(upload_id: str) -> None:
+            for index in range(chunks):
+                started = time.perf_counter()
+                await send(session, url, upload_id, index, data)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(upload_id) for upload_id in upload_ids))
+        return time.perf_counter() - started, latencies
+
+
+async def run(url: str, concurrency_levels: list[int], chunks: int, chunk_kib: int) -> None:
+    data = os.urandom(chunk_kib * 1024)
+    print(f"{'endpoint':<10}{'clients':>8}{'chunks':>8}{'MiB/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for concurrency in concurrency_levels:
+        for name, send in (("form", send_form), ("raw put", send_raw)):
+            elapsed, latencies = await run_case(url, send, concurrency, chunks, data)
+            total = concurrency * chunks
+            quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else latencies * 19
+            print(f"{name:<10}{concurrency:>8}{total:>8}{total * len(data) / 2 ** 20 / elapsed:>10.1f}"
+                  f"{statistics.median(latencies) * 1000:>10.1f}{quantiles[18] * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--chunks", type=int, default=20, help="chunks sent by each client")
+    parser.add_argument("--chunk-kib", type=int, default=1024)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.chunks, args.chunk_kib))
@@ -0,0 +1,67 @@
+"""
+Benchmark: `GET /get/{file_id}` and `GET /all` throughput on the sync (PyMySQL) and async (aiomysql) stacks.
+
+Runs against a live API with an existing user and one of their files. Start the API once with
+`DB_ASYNC_ENABLED=false` and once with `DB_ASYNC_ENABLED=true`, run the benchmark against each with
+`--stack` naming the one being measured, and compare the rows. Keep `DB_POOL_SIZE`/`DB_MAX_OVERFLOW`
+identical between the two runs.
+
+    python -m benchmarks.db_stack_benchmark --stack sync --file-id <id> --user-id <id> --concurrency 1 16 64
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import aiohttp
+
+
+async def get_file(session: aiohttp.ClientSession, url: str, file_id: str, user_id: str) -> None:
+    async with session.get(f"{url}/api/v1/file/get/{file_id}") as response:
+        response.raise_for_status()
+        await response.read()
+
+
+async def list_all(session: aiohttp.ClientSession, url: str, file_id: str, user_id: str) -> None:
+    async with session.get(f"{url}/api/v1/file/all", params={"user_id": user_id}) as response:
+        response.raise_for_status()
+        await response.read()
+
+
+async def run_case(url: str, request, concurrency: int, requests: int, file_id: str,
+                   user_id: str) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+        async def client() -> None:
+            for _ in range(requests):
+                started = time.perf_counter()
+                await request(session, url, file_id, user_id)
+                latencies.append(time.perf_counter() - started)
+
+        # Fill the connection pools on both sides before measuring
+        await asyncio.gather(*(request(session, url, file_id, user_id) for _ in range(concurrency)))
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies
+
+
+async def run(url: str, stack: str, concurrency_levels: list[int], requests: int, file_id: str, user_id: str) -> None:
+    print(f"{'stack':<7}{'route':<10}{'clients':>8}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for concurrency in concurrency_levels:
+        for name, request in (("get", get_file), ("all", list_all)):
+            elapsed, latencies = await run_case(url, request, concurrency, requests, file_id, user_id)
+            quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else latencies * 19
+            print(f"{stack:<7}{name:<10}{concurrency:>8}{len(latencies):>10}{len(latencies) / elapsed:>10.1f}"
+                  f"{statistics.median(latencies) * 1000:>10.1f}{quantiles[18] * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--stack", choices=["sync", "async"], required=True,
+                        help="label of the stack the API was started with (DB_ASYNC_ENABLED)")
+    parser.add_argument("--file-id", required=True)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="requests made by each client")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.stack, args.concurrency, args.requests, args.file_id, args.user_id))
@@ -0,0 +1,45 @@
+"""
+Micro-benchmark: presigned GET URLs per second, MinIO SDK vs `PresignEngine`.
+
+Runs offline (signing needs no network once the region is fixed).
+
+    python -m benchmarks.presign_benchmark --count 20000
+"""
+import argparse
+import time
+from datetime import timedelta
+from minio import Minio
+from infrastructure.minio import PresignEngine
+
+ACCESS_KEY = "minioadmin"
+SECRET_KEY = "minioadmin"
+REGION = "us-east-1"
+
+
+def run(count: int, endpoint: str) -> None:
+    items = [(f"{i:08d}-upload.pdf", {"response-content-disposition": f"inline; filename=\"file-{i}.pdf\""})
+             for i in range(count)]
+
+    client = Minio(endpoint, access_key=ACCESS_KEY, secret_key=SECRET_KEY, secure=True, region=REGION)
+    started = time.perf_counter()
+    for object_name, headers in items:
+        client.get_presigned_url("GET", "public", object_name, timedelta(days=7), response_headers=dict(headers))
+    sdk_elapsed = time.perf_counter() - started
+
+    engine = PresignEngine(endpoint, ACCESS_KEY, SECRET_KEY, secure=True, region=REGION)
+    started = time.perf_counter()
+    engine.presign_batch("GET", "public", items)
+    engine_elapsed = time.perf_counter() - started
+
+    print(f"{'signer':<16}{'urls':>10}{'seconds':>10}{'urls/s':>12}")
+    print(f"{'minio sdk':<16}{count:>10}{sdk_elapsed:>10.3f}{count / sdk_elapsed:>12.0f}")
+    print(f"{'presign engine':<16}{count:>10}{engine_elapsed:>10.3f}{count / engine_elapsed:>12.0f}")
+    print(f"speedup: {sdk_elapsed / engine_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--endpoint", default="files.example.com")
+    args = parser.parse_args()
+    run(args.count, args.endpoint)
@@ -0,0 +1,172 @@
+"""
+Benchmark: query plans and latency of the hot file listing queries on a large synthetic `files` table.
+
+Creates a scratch database (`--database`, never the application's), migrates it with Alembic so the
+indexes are the ones production gets, and seeds `--files` rows spread over `--users` users with a
+skewed distribution: one user owns `--heavy-share` of the files, in a few large appointments, and 1%
+of the files are infected. Each hot query is built exactly as the repositories build it and run for
+the heavy and a light owner, on the first page and one deep in the listing. The benchmark reports the
+plan MySQL picks and the median latency, and exits non-zero if a query does not use its intended
+index or needs a filesort.
+
+    python -m benchmarks.query_plan_benchmark --files 2000000
+    python -m benchmarks.query_plan_benchmark --skip-seed    # re-check plans on the seeded database
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+BATCH = 10_000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="filemanager_plan_bench")
+    parser.add_argument("--files", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--appointments-per-user", type=int, default=10)
+    parser.add_argument("--heavy-share", type=float, default=0.2, help="fraction of the files owned by one user")
+    parser.add_argument("--limit", type=int, default=100, help="page size of the listings")
+    parser.add_argument("--repeat", type=int, default=20, help="runs of each query for the latency")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the database seeded by an earlier run")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+# The database is chosen through the environment, so it is set before the app's config is imported
+args = parse_args()
+load_dotenv()
+if args.database in (os.getenv("MYSQL_DATABASE", "filemanager"), os.getenv("MYSQL_TEST_DATABASE", "filemanager_test")):
+    sys.exit("--database must be a scratch database; it is dropped and reseeded")
+os.environ["ENV"] = "benchmark"
+os.environ["MYSQL_DATABASE"] = args.database
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy import create_engine, text, select, func, Select  # noqa: E402
+from sqlalchemy.engine import Connection  # noqa: E402
+from core.config import config  # noqa: E402
+from entities import User, Appointment, File  # noqa: E402
+from repositories.file_repository import appointment_listing, user_listing  # noqa: E402
+
+# Index each listing must use on `files`
+INTENDED = {"user_listing": "ix_files_user_listing", "appointment_listing": "ix_files_appointment_listing"}
+
+
+def recreate_database() -> None:
+    server = create_engine(str(config.MYSQL_DATABASE_URL).rsplit("/", 1)[0] + "/")
+    with server.begin() as connection:
+        connection.execute(text(f"DROP DATABASE IF EXISTS `{args.database}`"))
+        connection.execute(text(f"CREATE DATABASE `{args.database}`"))
+    server.dispose()
+    # Run from src/, like the app, so Alembic finds its scripts
+    command.upgrade(Config("alembic.ini"), "head")
+
+
+def seed(connection: Connection) -> None:
+    rng = random.Random(args.seed)
+    users = [str(uuid.uuid4()) for _ in range(args.users)]
+    connection.execute(User.__table__.insert(), [{"id": id, "name": f"user {index}", "created_at": datetime(2026, 1, 1),
+                                                  "updated_at": datetime(2026, 1, 1)} for index, id in enumerate(users)])
+    appointments = {user: [str(uuid.uuid4()) for _ in range(args.appointments_per_user)] for user in users}
+    connection.execute(Appointment.__table__.insert(), [
+        {"id": id, "name": f"appointment {index}", "user_id": user, "date": datetime(2026, 1, 1)}
+        for user, ids in appointments.items() for index, id in enumerate(ids)])
+
+    started, created = time.perf_counter(), datetime(2026, 1, 1)
+    for offset in range(0, args.files, BATCH):
+        rows = []
+        for _ in range(min(BATCH, args.files - offset)):
+            user = users[0] if rng.random() < args.heavy_share else rng.choice(users[1:])
+            # The heavy user's files go mostly to their first appointments
+            appointment = appointments[user][min(int(rng.expovariate(1.0)), args.appointments_per_user - 1)]
+            created += timedelta(milliseconds=rng.randint(0, 2000))
+            file_id = str(uuid.uuid4())
+            rows.append({
+                "id": file_id, "upload_id": file_id, "filename": f"{file_id[:8]}.pdf", "appointment_id": appointment,
+                "user_id": user, "path": f"public/{file_id}.pdf", "content_type": "application/pdf",
+                "size": rng.randint(1_000, 10_000_000), "virus_scan_status": "infected" if rng.random() < 0.01 else "clean",
+                "is_quarantined": False, "sha256": f"{rng.getrandbits(256):064x}", "created_at": created,
+            })
+        connection.execute(File.__table__.insert(), rows)
+        done = offset + len(rows)
+        print(f"\rseeded {done}/{args.files} files ({done / (time.perf_counter() - started):.0f} rows/s)", end="")
+    print()
+    connection.execute(text("ANALYZE TABLE files, appointments, users"))
+
+
+def explain(connection: Connection, statement: Select) -> list[dict]:
+    compiled = statement.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    return [dict(row) for row in connection.exec_driver_sql(f"EXPLAIN {compiled}", params).mappings()]
+
+
+def latency_ms(connection: Connection, statement: Select) -> float:
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        connection.execute(statement).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def deep_cursor(connection: Connection, column, value) -> tuple[datetime, str]:
+    """The `(created_at, id)` of the row halfway through an owner's listing."""
+    count = connection.execute(select(func.count()).select_from(File).filter(column == value)).scalar()
+    return connection.execute(select(File.created_at, File.id).filter(column == value)
+                              .order_by(File.created_at, File.id).offset(count // 2).limit(1)).one()
+
+
+def cases(connection: Connection) -> list[tuple[str, str, Select]]:
+    owners = connection.execute(text(
+        "SELECT user_id, count(*) AS files FROM files GROUP BY user_id ORDER BY files DESC")).all()
+    heavy_user, light_user = owners[0][0], owners[-1][0]
+    heavy_appointment = connection.execute(text(
+        "SELECT appointment_id FROM files WHERE user_id = :user GROUP BY appointment_id ORDER BY count(*) DESC LIMIT 1"),
+        {"user": heavy_user}).scalar()
+    light_appointment = connection.execute(select(File.appointment_id).filter(File.user_id == light_user).limit(1)).scalar()
+
+    user_deep = deep_cursor(connection, File.user_id, heavy_user)
+    appointment_deep = deep_cursor(connection, File.appointment_id, heavy_appointment)
+    return [
+        ("user_listing", "heavy, first page", user_listing(heavy_user, args.limit + 1)),
+        ("user_listing", "heavy, deep page", user_listing(heavy_user, args.limit + 1, user_deep)),
+        ("user_listing", "light, first page", user_listing(light_user, args.limit + 1)),
+        ("appointment_listing", "heavy, first page", appointment_listing(heavy_appointment, args.limit + 1)),
+        ("appointment_listing", "heavy, deep page", appointment_listing(heavy_appointment, args.limit + 1, appointment_deep)),
+        ("appointment_listing", "light, first page", appointment_listing(light_appointment, args.limit + 1)),
+    ]
+
+
+def main() -> int:
+    if not args.skip_seed:
+        recreate_database()
+    engine = create_engine(str(config.MYSQL_DATABASE_URL))
+    failures = 0
+    with engine.connect() as connection:
+        if not args.skip_seed:
+            seed(connection)
+            connection.commit()
+        total = connection.execute(text("SELECT count(*) FROM files")).scalar()
+        print(f"files: {total} rows, page size {args.limit}")
+        print(f"{'query':<21}{'case':<19}{'key':<30}{'rows':>9}{'filesort':>10}{'p50 ms':>9}  ")
+        for name, case, statement in cases(connection):
+            plan = explain(connection, statement)
+            files = next(row for row in plan if row["table"] == "files")
+            filesort = any("filesort" in (row["Extra"] or "") for row in plan)
+            ok = files["key"] == INTENDED[name] and not filesort
+            failures += not ok
+            print(f"{name:<21}{case:<19}{str(files['key']):<30}{files['rows']:>9}{str(filesort):>10}"
+                  f"{latency_ms(connection, statement):>9.2f}  {'ok' if ok else 'WRONG PLAN, expected ' + INTENDED[name]}")
+    engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
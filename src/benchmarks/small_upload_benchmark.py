@@ -0,0 +1,87 @@
+"""
+Benchmark: single-request `POST /upload/` vs the three-step init/chunk/complete flow for small files.
+
+Runs against a live API with an existing appointment and user; every upload creates a file record.
+
+    python -m benchmarks.small_upload_benchmark --appointment-id <id> --user-id <id> --size-kib 64
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import aiohttp
+
+
+async def upload_single(session: aiohttp.ClientSession, url: str, data: bytes, appointment_id: str, user_id: str) -> None:
+    form = aiohttp.FormData()
+    form.add_field("file", data, filename="small.txt", content_type="text/plain")
+    form.add_field("file_extension", "txt")
+    form.add_field("appointment_id", appointment_id)
+    form.add_field("user_id", user_id)
+    async with session.post(f"{url}/api/v1/file/upload/", data=form) as response:
+        response.raise_for_status()
+        await response.read()
+
+
+async def upload_three_step(session: aiohttp.ClientSession, url: str, data: bytes, appointment_id: str, user_id: str) -> None:
+    async with session.post(f"{url}/api/v1/file/upload/init/") as response:
+        response.raise_for_status()
+        upload_id = (await response.json())["data"]["upload_id"]
+
+    form = aiohttp.FormData()
+    form.add_field("chunk_size", str(len(data)))
+    form.add_field("upload_id", upload_id)
+    form.add_field("chunk_index", "0")
+    form.add_field("file", data, filename="0.part", content_type="application/octet-stream")
+    async with session.post(f"{url}/api/v1/file/upload/chunk/", data=form) as response:
+        response.raise_for_status()
+        await response.read()
+
+    form = aiohttp.FormData()
+    for name, value in (("upload_id", upload_id), ("total_chunks", "1"), ("total_size", str(len(data))),
+                        ("file_extension", "txt"), ("content_type", "text/plain"), ("appointment_id", appointment_id),
+                        ("user_id", user_id), ("filename", "small.txt")):
+        form.add_field(name, value)
+    async with session.post(f"{url}/api/v1/file/upload/complete/", data=form) as response:
+        response.raise_for_status()
+        await response.read()
+
+
+async def run_case(url: str, upload, concurrency: int, uploads: int, size: int, appointment_id: str,
+                   user_id: str) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+        async def client() -> None:
+            for _ in range(uploads):
+                # Fresh content each time so deduplication does not short-circuit either flow
+                data = os.urandom(size)
+                started = time.perf_counter()
+                await upload(session, url, data, appointment_id, user_id)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies
+
+
+async def run(url: str, concurrency_levels: list[int], uploads: int, size_kib: int, appointment_id: str, user_id: str) -> None:
+    print(f"{'flow':<12}{'clients':>8}{'uploads':>9}{'files/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for concurrency in concurrency_levels:
+        for name, upload in (("three-step", upload_three_step), ("single", upload_single)):
+            elapsed, latencies = await run_case(url, upload, concurrency, uploads, size_kib * 1024, appointment_id, user_id)
+            quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else latencies * 19
+            print(f"{name:<12}{concurrency:>8}{len(latencies):>9}{len(latencies) / elapsed:>10.1f}"
+                  f"{statistics.median(latencies) * 1000:>10.1f}{quantiles[18] * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--appointment-id", required=True)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--uploads", type=int, default=20, help="uploads made by each client")
+    parser.add_argument("--size-kib", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.uploads, args.size_kib, args.appointment_id, args.user_id))
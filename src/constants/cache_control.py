@@ -0,0 +1,6 @@
+class CacheControl:
+    # File metadata only changes with its row version; allow a short private reuse window
+    FILE_METADATA: str = "private, max-age=30, must-revalidate"
+    # Listings must show new uploads and deletes immediately: always revalidate
+    APPOINTMENT_FILES: str = "private, no-cache"
+    USER_FILES: str = "private, no-cache"
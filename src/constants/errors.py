@@ -5,8 +5,20 @@ class Errors:
     FILE_NOT_FOUND: str = "File directory not found. Please initialize first!"
     FILE_UPLOADED_SUCCESSFULLY : str = "File uploaded previously!"
     FILE_PENDING_UPLOAD : str = "File is uploading!"
+    CHUNK_CHECKSUM_MISMATCH : str = "Chunk checksum mismatch. Resend this chunk!"
+    UNSUPPORTED_CONTENT_ENCODING : str = "Unsupported chunk content encoding"
+    INVALID_CONTENT_ENCODING : str = "Chunk body could not be decoded"
+    STAGING_AREA_FULL : str = "Upload storage is full. Try again later!"
+    UPLOAD_BUDGET_EXCEEDED : str = "Too many uploads in progress. Try again later!"
+    OVERLOADED : str = "Server is busy. Try again later!"
 
 class ValidatonErrors:
     INVALID_JSON_DETAIL: str = "Invalid JSON format for detail"
     INVALID_JSON_CREDENTIAL: str = "Invalid JSON format for credential"
     LE_CHUNCK_SIZE: str = "File sile is larger than valid chunk size"
+    INVALID_CHECKSUM: str = "Invalid chunk checksum"
+    UNSUPPORTED_FILE_EXTENSION: str = "Unsupported file extension"
+    BATCH_FILE_LIMIT: str = "Too many files in one batch"
+    INVALID_BATCH_BODY: str = "Batch body could not be read"
+    UPLOAD_SESSION_MISMATCH: str = "Does not match the upload negotiated at init"
+    INVALID_CURSOR: str = "Invalid page cursor"
@@ -4,4 +4,6 @@ class UploadStatus(str, Enum):
     SUCCESS = "SUCCESS"
     FAILURE = "FAILURE"
     PENDING = "PENDING"
-    STARTED = "STARTED"
\ No newline at end of file
+    STARTED = "STARTED"
+    # Stored object does not match the integrity manifest recorded at ingest
+    CORRUPTED = "CORRUPTED"
\ No newline at end of file
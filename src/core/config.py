@@ -8,6 +8,82 @@ load_dotenv()
 class Config:
     APP_UPLOAD_DIR = os.getenv("APP_UPLOAD_DIR")
     APP_MAX_CHUNK_SIZE = int(os.getenv("APP_MAX_CHUNK_SIZE"))
+    # Chunk size negotiation at upload init: larger files get larger chunks, up to this size,
+    # aiming at about UPLOAD_TARGET_CHUNKS chunks; clients are told to use up to UPLOAD_MAX_PARALLEL_STREAMS
+    UPLOAD_MAX_CHUNK_SIZE = max(int(os.getenv("UPLOAD_MAX_CHUNK_SIZE", str(64 * 1024 * 1024))), APP_MAX_CHUNK_SIZE)
+    UPLOAD_TARGET_CHUNKS = int(os.getenv("UPLOAD_TARGET_CHUNKS", "64"))
+    UPLOAD_MAX_PARALLEL_STREAMS = int(os.getenv("UPLOAD_MAX_PARALLEL_STREAMS", "4"))
+    # Chunk bodies are read at most this fast overall (0 is unlimited), split evenly among the users
+    # receiving one; each may get ahead by INGEST_BURST_SECONDS of its share before being slowed down
+    INGEST_MAX_BYTES_PER_SECOND = int(os.getenv("INGEST_MAX_BYTES_PER_SECOND", "0"))
+    INGEST_BURST_SECONDS = float(os.getenv("INGEST_BURST_SECONDS", "0.25"))
+    # Admission control: bytes of chunked uploads in flight (declared at init, until their staging directory
+    # is removed), overall and per user; 0 is unlimited. Rejected uploads are told to retry after this long
+    UPLOAD_INFLIGHT_MAX_BYTES = int(os.getenv("UPLOAD_INFLIGHT_MAX_BYTES", str(50 * 1024 ** 3)))
+    UPLOAD_INFLIGHT_MAX_BYTES_PER_USER = int(os.getenv("UPLOAD_INFLIGHT_MAX_BYTES_PER_USER", str(10 * 1024 ** 3)))
+    UPLOAD_ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("UPLOAD_ADMISSION_RETRY_AFTER_SECONDS", "30"))
+    # Staging janitor: upload directories idle this long are removed, as are leftover assembled files;
+    # below the high watermark (percent of the volume free) idle ones go sooner, below the low one new uploads are refused
+    STAGING_JANITOR_ENABLED = os.getenv("STAGING_JANITOR_ENABLED", "true").lower() == "true"
+    STAGING_JANITOR_INTERVAL_SECONDS = int(os.getenv("STAGING_JANITOR_INTERVAL_SECONDS", "300"))
+    STAGING_SESSION_TTL_SECONDS = int(os.getenv("STAGING_SESSION_TTL_SECONDS", str(24 * 3600)))
+    STAGING_PRESSURE_TTL_SECONDS = int(os.getenv("STAGING_PRESSURE_TTL_SECONDS", "3600"))
+    STAGING_ARTIFACT_TTL_SECONDS = int(os.getenv("STAGING_ARTIFACT_TTL_SECONDS", "3600"))
+    STAGING_HIGH_WATERMARK_FREE_PERCENT = float(os.getenv("STAGING_HIGH_WATERMARK_FREE_PERCENT", "20"))
+    STAGING_LOW_WATERMARK_FREE_PERCENT = float(os.getenv("STAGING_LOW_WATERMARK_FREE_PERCENT", "5"))
+    # Bytes read from the request body per iteration while staging a chunk
+    APP_UPLOAD_READ_SIZE = int(os.getenv("APP_UPLOAD_READ_SIZE", str(1024 * 1024)))
+    # Compressed chunk bodies decoding beyond this many times their size are rejected as decompression bombs
+    APP_UPLOAD_MAX_COMPRESSION_RATIO = int(os.getenv("APP_UPLOAD_MAX_COMPRESSION_RATIO", "100"))
+    # Batch uploads: files scanned and stored concurrently (and held in memory at once), and files per request
+    BATCH_UPLOAD_CONCURRENCY = int(os.getenv("BATCH_UPLOAD_CONCURRENCY", "8"))
+    BATCH_UPLOAD_MAX_FILES = int(os.getenv("BATCH_UPLOAD_MAX_FILES", "1000"))
+    # Load shedding: listings, then chunk uploads, then completions are refused with 503 as event-loop lag,
+    # Celery queue depth or requests in flight reach (multiples of) these thresholds
+    LOAD_SHED_ENABLED = os.getenv("LOAD_SHED_ENABLED", "true").lower() == "true"
+    LOAD_SHED_LAG_MS = float(os.getenv("LOAD_SHED_LAG_MS", "200"))
+    LOAD_SHED_QUEUE_DEPTH = int(os.getenv("LOAD_SHED_QUEUE_DEPTH", "500"))
+    LOAD_SHED_MAX_INFLIGHT = int(os.getenv("LOAD_SHED_MAX_INFLIGHT", "256"))
+    LOAD_SHED_QUEUE_POLL_SECONDS = float(os.getenv("LOAD_SHED_QUEUE_POLL_SECONDS", "5"))
+    LOAD_SHED_RETRY_AFTER_SECONDS = int(os.getenv("LOAD_SHED_RETRY_AFTER_SECONDS", "5"))
+    # Fair queuing of upload tasks: at most TASK_FAIR_QUEUE_WINDOW unfinished in Celery (match the worker concurrency),
+    # TASK_FAIR_QUEUE_MAX_PER_TENANT of them per user; files up to TASK_FAIR_QUEUE_INTERACTIVE_MAX_BYTES go first.
+    # Both limits are per API process: with N processes, up to N times as many tasks are unfinished
+    TASK_FAIR_QUEUE_ENABLED = os.getenv("TASK_FAIR_QUEUE_ENABLED", "true").lower() == "true"
+    TASK_FAIR_QUEUE_WINDOW = int(os.getenv("TASK_FAIR_QUEUE_WINDOW", "8"))
+    TASK_FAIR_QUEUE_MAX_PER_TENANT = int(os.getenv("TASK_FAIR_QUEUE_MAX_PER_TENANT", "4"))
+    TASK_FAIR_QUEUE_INTERACTIVE_MAX_BYTES = int(os.getenv("TASK_FAIR_QUEUE_INTERACTIVE_MAX_BYTES", str(16 * 1024 * 1024)))
+    TASK_FAIR_QUEUE_INTERACTIVE_WEIGHT = int(os.getenv("TASK_FAIR_QUEUE_INTERACTIVE_WEIGHT", "4"))
+    TASK_FAIR_QUEUE_INTERACTIVE_RESERVED = int(os.getenv("TASK_FAIR_QUEUE_INTERACTIVE_RESERVED", "2"))
+    TASK_FAIR_QUEUE_POLL_SECONDS = float(os.getenv("TASK_FAIR_QUEUE_POLL_SECONDS", "1"))
+    TASK_FAIR_QUEUE_LEASE_SECONDS = int(os.getenv("TASK_FAIR_QUEUE_LEASE_SECONDS", "3600"))
+    # Connection pool of each SQLAlchemy engine; connections are recycled before MySQL's wait_timeout drops them
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "3600"))
+    DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    # Serve the read-only file routes (get, listings) from an aiomysql engine instead of the PyMySQL one
+    DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "false").lower() == "true"
+    # File, appointment and user listings: rows per page when the client gives no `limit`, and the largest `limit`
+    LISTING_PAGE_SIZE = int(os.getenv("LISTING_PAGE_SIZE", "100"))
+    LISTING_MAX_PAGE_SIZE = int(os.getenv("LISTING_MAX_PAGE_SIZE", "1000"))
+    # Threads per blocking dependency called from the event loop; at most the connections each client pools
+    EXECUTOR_DB_WORKERS = int(os.getenv("EXECUTOR_DB_WORKERS", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+    EXECUTOR_MINIO_WORKERS = int(os.getenv("EXECUTOR_MINIO_WORKERS", "10"))
+    EXECUTOR_BROKER_WORKERS = int(os.getenv("EXECUTOR_BROKER_WORKERS", "4"))
+    EXECUTOR_FILESYSTEM_WORKERS = int(os.getenv("EXECUTOR_FILESYSTEM_WORKERS", "8"))
+    # Debugging: log the stack of the event loop whenever it is blocked for longer than this; 0 disables
+    BLOCKING_DETECTOR_MS = float(os.getenv("BLOCKING_DETECTOR_MS", "0"))
+    # Bytes read from MinIO per iteration when proxying downloads; bounds memory per connection
+    APP_DOWNLOAD_CHUNK_SIZE = int(os.getenv("APP_DOWNLOAD_CHUNK_SIZE", str(64 * 1024)))
+    APP_DOWNLOAD_MAX_RANGES = int(os.getenv("APP_DOWNLOAD_MAX_RANGES", "16"))
+    # Base URL of this API, used for download links of files that are only reachable through the proxy
+    APP_PUBLIC_URL = os.getenv("APP_PUBLIC_URL", "")
+    # On-disk read-through cache for objects served by the download proxy
+    OBJECT_CACHE_ENABLED = os.getenv("OBJECT_CACHE_ENABLED", "true").lower() == "true"
+    OBJECT_CACHE_DIR = os.getenv("OBJECT_CACHE_DIR", "/tmp/filemanager-object-cache")
+    OBJECT_CACHE_MAX_BYTES = int(os.getenv("OBJECT_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))  # 1GB default
+    OBJECT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("OBJECT_CACHE_MAX_ENTRY_BYTES", str(64 * 1024 * 1024)))
     ENV = os.getenv("ENV")
     print("ENV:", ENV)
 
@@ -20,6 +96,30 @@ class Config:
     MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY")
     MINIO_PUBLIC_BUCKET = os.getenv('MINIO_PUBLIC_BUCKET', 'public')
     MINIO_PRIVATE_BUCKET = os.getenv('MINIO_PRIVATE_BUCKET', 'private')
+    # Store objects under `sha256/<aa>/<digest>.<ext>` keys with immutable cache headers
+    MINIO_CONTENT_ADDRESSED_KEYS = os.getenv("MINIO_CONTENT_ADDRESSED_KEYS", "false").lower() == "true"
+    MINIO_IMMUTABLE_CACHE_CONTROL = os.getenv("MINIO_IMMUTABLE_CACHE_CONTROL", "public, max-age=31536000, immutable")
+    # Store new files as manifests of content-defined chunks, each chunk kept once per bucket
+    CHUNK_STORE_ENABLED = os.getenv("CHUNK_STORE_ENABLED", "false").lower() == "true"
+    CHUNK_STORE_MIN_SIZE = int(os.getenv("CHUNK_STORE_MIN_SIZE", str(256 * 1024)))
+    CHUNK_STORE_AVG_SIZE = int(os.getenv("CHUNK_STORE_AVG_SIZE", str(1024 * 1024)))
+    CHUNK_STORE_MAX_SIZE = int(os.getenv("CHUNK_STORE_MAX_SIZE", str(4 * 1024 * 1024)))
+    # Unreferenced chunks younger than this are kept for uploads that are about to reuse them
+    CHUNK_STORE_GC_GRACE_SECONDS = int(os.getenv("CHUNK_STORE_GC_GRACE_SECONDS", "3600"))
+    # Background integrity verifier: read budget per run and the rate it is spread over
+    INTEGRITY_VERIFY_BYTES_PER_SECOND = int(os.getenv("INTEGRITY_VERIFY_BYTES_PER_SECOND", str(8 * 1024 * 1024)))
+    INTEGRITY_VERIFY_BYTES_PER_RUN = int(os.getenv("INTEGRITY_VERIFY_BYTES_PER_RUN", str(1024 * 1024 * 1024)))
+    # Store text-like uploads zstd-compressed; matched by file extension or content type prefix
+    COMPRESSION_AT_REST_ENABLED = os.getenv("COMPRESSION_AT_REST_ENABLED", "false").lower() == "true"
+    COMPRESSION_AT_REST_EXTENSIONS = os.getenv("COMPRESSION_AT_REST_EXTENSIONS", "txt,csv,json,xml,html,svg,eps")
+    COMPRESSION_AT_REST_CONTENT_TYPES = os.getenv("COMPRESSION_AT_REST_CONTENT_TYPES",
+                                                  "text/,application/json,application/xml,image/svg+xml")
+    COMPRESSION_AT_REST_MIN_SIZE = int(os.getenv("COMPRESSION_AT_REST_MIN_SIZE", str(4 * 1024)))
+    COMPRESSION_AT_REST_LEVEL = int(os.getenv("COMPRESSION_AT_REST_LEVEL", "3"))
+    # Reuse the stored object of an identical, already scanned upload instead of storing it again
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    # Region used for SigV4 signing; setting it avoids a bucket-location lookup per client.
+    MINIO_REGION = os.getenv("MINIO_REGION", "us-east-1")
 
     MYSQL_USER = os.getenv('MYSQL_USER', 'root')
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', 'password')
@@ -49,6 +149,17 @@ class Config:
             path=path
         )
     @property
+    def MYSQL_ASYNC_DATABASE_URL(self):
+        return MultiHostUrl.build(
+            scheme="mysql+aiomysql",
+            username=self.MYSQL_USER,
+            password=self.MYSQL_PASSWORD,
+            host=self.MYSQL_HOST,
+            port=int(self.MYSQL_PORT),
+            path=self.MYSQL_TEST_DATABASE if self.ENV == "testing" else self.MYSQL_DATABASE
+        )
+
+    @property
     def CELERY_BACKEND_ENDPOINT(self):
         if self.ENV == "testing":
             path = self.MYSQL_TEST_DATABASE
@@ -1,7 +1,5 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import List
-from .file_dto import FileResponseDTO
 
 class AppointmentBase(BaseModel):
     name: str
@@ -10,8 +8,8 @@ class AppointmentCreate(AppointmentBase):
     user_id: str
 
 class Appointment(AppointmentBase):
+    # Without its files, which are listed, paginated, by `/api/v1/file/appointment/{id}`
     id: str
     date: datetime
-    files: List[FileResponseDTO] = []
     
     model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
@@ -9,6 +9,9 @@ class UploadChunkDTO(BaseModel):
     file: UploadFile
     upload_id: str
     chunk_index: int
+    checksum_algorithm: Optional[str] = None
+    checksum: Optional[str] = None
+    content_encoding: Optional[str] = None
 
 class UploadFileDTO(BaseModel):
     upload_id: str
@@ -42,6 +45,18 @@ class FileBaseDTO(BaseModel):
     is_quarantined: bool = False
     quarantine_reason: Optional[str] = None
 
+    # Whole-file deduplication
+    blob_id: Optional[str] = None
+
+    # Integrity manifest
+    sha256: Optional[str] = None
+    integrity_status: Optional[str] = None
+
+    # Compression at rest
+    content_encoding: Optional[str] = None
+    stored_size: Optional[int] = None
+    compression_cpu_ms: Optional[int] = None
+
 class FileResponseDTO(BaseModel):
     id: str
     filename: str
@@ -49,6 +64,7 @@ class FileResponseDTO(BaseModel):
     size: int
     download_url: Optional[str] = None
     appointment_name: Optional[str] = None
+    sha256: Optional[str] = None
     
     # Virus scanning fields
     virus_scan_status: str = 'pending'
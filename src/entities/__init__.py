@@ -2,5 +2,8 @@ from .celery_task import CeleryTask
 from .file import File
 from .appointment import Appointment
 from .user import User
+from .blob import Blob
+from .chunk import Chunk
+from .chunk_manifest import ChunkManifest, ChunkManifestEntry
 
-__all__ = ['CeleryTask', 'File', 'Appointment', 'User']
+__all__ = ['CeleryTask', 'File', 'Appointment', 'User', 'Blob', 'Chunk', 'ChunkManifest', 'ChunkManifestEntry']
@@ -1,5 +1,5 @@
 from infrastructure.db.mysql import mysql as db
-from sqlalchemy import Column, String, DateTime, VARCHAR, ForeignKey
+from sqlalchemy import Column, String, DateTime, VARCHAR, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
@@ -7,12 +7,16 @@ from datetime import datetime
 
 class Appointment(db.Base):
     __tablename__ = "appointments"
+    __table_args__ = (Index("ix_appointments_user_listing", "user_id", "date", "id"),)
     id = Column(VARCHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     # Appointment name is not unique
     name = Column(String(255), nullable=False, index=True)
     date = Column(DateTime, nullable=False, default=datetime.utcnow)
     user_id = Column(VARCHAR(36), ForeignKey("users.id"), nullable=False)
+    # Bumped whenever one of its files is created, changed or deleted; used for listing ETags
+    files_version = Column(Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
-    files = relationship("File", back_populates="appointment", lazy="joined", cascade="all, delete-orphan")
+    # Not loaded with the appointment; queries that need the files ask for them with `with_files`
+    files = relationship("File", back_populates="appointment", lazy="select", cascade="all, delete-orphan")
     user = relationship("User", back_populates="appointments") 
\ No newline at end of file
@@ -0,0 +1,32 @@
+from infrastructure.db.mysql import mysql as db
+from sqlalchemy import Column, String, Integer, BigInteger, VARCHAR, DateTime, UniqueConstraint
+from sqlalchemy.orm import relationship
+import uuid
+from datetime import datetime
+
+
+class Blob(db.Base):
+    """A stored object shared by every file with the same content in the same bucket."""
+    __tablename__ = "blobs"
+    __table_args__ = (UniqueConstraint("sha256", "bucket", name="uq_blobs_sha256_bucket"),)
+
+    id = Column(VARCHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    sha256 = Column(String(64), nullable=False)
+    bucket = Column(String(63), nullable=False)
+    path = Column(VARCHAR(255), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    # References taken by uploads of this content, each carried by a File row; the object is removed
+    # when it drops to zero
+    ref_count = Column(Integer, nullable=False, default=0)
+    virus_scan_status = Column(String(20), nullable=False)
+    # Celery task that stored the object; deduplicated files report its status
+    celery_task_id = Column(String(255))
+    # Uploads answered from this blob and the bytes they did not store or transfer again
+    dedup_hits = Column(Integer, nullable=False, default=0)
+    bytes_deduplicated = Column(BigInteger, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Set once the object is stored and verified; uploads are only deduplicated against such blobs
+    stored_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    files = relationship("File", back_populates="blob")
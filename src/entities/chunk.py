@@ -0,0 +1,20 @@
+from infrastructure.db.mysql import mysql as db
+from sqlalchemy import Column, String, Integer, VARCHAR, DateTime, UniqueConstraint
+import uuid
+from datetime import datetime
+
+
+class Chunk(db.Base):
+    """A content-defined chunk stored once per bucket under `chunks/<aa>/<sha256>`."""
+    __tablename__ = "chunks"
+    __table_args__ = (UniqueConstraint("bucket", "sha256", name="uq_chunks_bucket_sha256"),)
+
+    id = Column(VARCHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    bucket = Column(String(63), nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    # Manifest entries pointing at the chunk; unreferenced chunks are removed by the garbage collector
+    ref_count = Column(Integer, nullable=False, default=0)
+    # Last time the chunk was written, reused or released; protects in-flight uploads from collection
+    last_referenced_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
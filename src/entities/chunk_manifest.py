@@ -0,0 +1,37 @@
+from infrastructure.db.mysql import mysql as db
+from sqlalchemy import Column, String, Integer, BigInteger, VARCHAR, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.orm import relationship
+import uuid
+from datetime import datetime
+
+
+class ChunkManifest(db.Base):
+    """Ordered list of chunks that make up a logical object stored by the chunk store."""
+    __tablename__ = "chunk_manifests"
+    __table_args__ = (UniqueConstraint("bucket", "object_name", name="uq_chunk_manifests_bucket_object_name"),)
+
+    id = Column(VARCHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    bucket = Column(String(63), nullable=False)
+    object_name = Column(VARCHAR(255), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # Relationships
+    entries = relationship("ChunkManifestEntry", back_populates="manifest", cascade="all, delete-orphan",
+                           order_by="ChunkManifestEntry.seq")
+
+
+class ChunkManifestEntry(db.Base):
+    __tablename__ = "chunk_manifest_entries"
+
+    manifest_id = Column(VARCHAR(36), ForeignKey("chunk_manifests.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    chunk_id = Column(VARCHAR(36), ForeignKey("chunks.id"), nullable=False, index=True)
+    # Position of the chunk within the logical object
+    offset = Column(BigInteger, nullable=False)
+    size = Column(Integer, nullable=False)
+
+    # Relationships
+    manifest = relationship("ChunkManifest", back_populates="entries")
+    chunk = relationship("Chunk")
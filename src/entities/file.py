@@ -1,5 +1,5 @@
 from infrastructure.db.mysql import mysql as db
-from sqlalchemy import Column, String, JSON, Integer, VARCHAR, ForeignKey, Boolean, DateTime
+from sqlalchemy import Column, String, JSON, Integer, VARCHAR, ForeignKey, Boolean, DateTime, Index, func
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
@@ -7,6 +7,11 @@ from datetime import datetime
 
 class File(db.Base):
     __tablename__ = "files"
+    # Listings filter on the owner and read in (created_at, id) order; infected rows are skipped in the index
+    __table_args__ = (
+        Index("ix_files_user_listing", "user_id", "created_at", "id", "virus_scan_status"),
+        Index("ix_files_appointment_listing", "appointment_id", "created_at", "id", "virus_scan_status"),
+    )
     id = Column(VARCHAR(36), nullable=False, primary_key=True, unique=True,
                 index=True, default=lambda: str(uuid.uuid4()))
     upload_id = Column(String(36), nullable=False, unique=True, index=True)
@@ -14,8 +19,8 @@ class File(db.Base):
     appointment_id = Column(VARCHAR(36), ForeignKey("appointments.id"), nullable=False)
     user_id = Column(VARCHAR(36), ForeignKey("users.id"), nullable=False)
     credential = Column(JSON(none_as_null=True))
-    # Path must be globally unique per stored object
-    path = Column(VARCHAR(255), nullable=False, unique=True, index=True)
+    # Content-addressed objects can be shared by several files, so path is not unique
+    path = Column(VARCHAR(255), nullable=False, index=True)
     content_type = Column(String(32), nullable=False)
     size = Column(Integer)
     detail = Column(JSON(none_as_null=True))
@@ -29,7 +34,29 @@ class File(db.Base):
     is_quarantined = Column(Boolean, default=False)           # If file is quarantined
     quarantine_reason = Column(String(500))                   # Why file was quarantined
 
+    # Shared object backing this file when whole-file deduplication stored it
+    blob_id = Column(VARCHAR(36), ForeignKey("blobs.id"), nullable=True, index=True)
+
+    # Integrity manifest: digest of the bytes received, checked against storage after upload and by the verifier
+    sha256 = Column(String(64))
+    integrity_status = Column(String(20))                      # 'pending', 'verified', 'mismatch', 'missing'
+    integrity_checked_at = Column(DateTime, index=True)        # Last comparison with the stored object
+
+    # Compression at rest: `size` stays the original size, `stored_size` is what the object takes in MinIO
+    content_encoding = Column(String(16))                      # 'zstd', or NULL when stored as uploaded
+    stored_size = Column(Integer)
+    compression_cpu_ms = Column(Integer)
+
+    # Listing order, with `id` to break ties; see `FileRepo.list_all_files`
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=func.now())
+
+    # Row version, bumped by SQLAlchemy on every UPDATE; used for metadata ETags
+    version = Column(Integer, nullable=False, server_default='1')
+
     # Relationships
     appointment = relationship("Appointment", back_populates="files")
     user = relationship("User", back_populates="files")
-    # Relationship to CeleryTask is optional and no longer enforced via FK
\ No newline at end of file
+    blob = relationship("Blob", back_populates="files")
+    # Relationship to CeleryTask is optional and no longer enforced via FK
+
+    __mapper_args__ = {"version_id_col": version}
\ No newline at end of file
@@ -1,5 +1,5 @@
 from infrastructure.db.mysql import mysql as db
-from sqlalchemy import Column, String, DateTime, VARCHAR
+from sqlalchemy import Column, String, DateTime, VARCHAR, Integer, Index
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
@@ -7,11 +7,14 @@ from datetime import datetime
 
 class User(db.Base):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_listing", "created_at", "id"),)
     id = Column(VARCHAR(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     # Name is not required to be unique globally
     name = Column(String(255), nullable=False, index=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped whenever one of its files is created, changed or deleted; used for listing ETags
+    files_version = Column(Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     appointments = relationship("Appointment", back_populates="user", cascade="all, delete-orphan")
@@ -29,4 +29,50 @@ class FilePendingUploadException(BaseException):
     def __init__(self) -> None:
         message = Errors.FILE_PENDING_UPLOAD
         status = http_status.HTTP_400_BAD_REQUEST
-        super().__init__(message, status)
\ No newline at end of file
+        super().__init__(message, status)
+
+class ChunkChecksumMismatchException(BaseException):
+    def __init__(self, chunk_index: int, algorithm: str, expected: str, actual: str) -> None:
+        message = Errors.CHUNK_CHECKSUM_MISMATCH
+        status = http_status.HTTP_422_UNPROCESSABLE_ENTITY
+        self.chunk_index = chunk_index
+        self.algorithm = algorithm
+        self.expected = expected
+        self.actual = actual
+        super().__init__(message, status)
+
+class ChunkEncodingException(BaseException):
+    def __init__(self, message: str, status: int, detail: str) -> None:
+        self.detail = detail
+        super().__init__(message, status)
+
+class UnsupportedChunkEncodingException(ChunkEncodingException):
+    def __init__(self, detail: str) -> None:
+        message = Errors.UNSUPPORTED_CONTENT_ENCODING
+        status = http_status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        super().__init__(message, status, detail)
+
+class InvalidChunkEncodingException(ChunkEncodingException):
+    def __init__(self, detail: str) -> None:
+        message = Errors.INVALID_CONTENT_ENCODING
+        status = http_status.HTTP_400_BAD_REQUEST
+        super().__init__(message, status, detail)
+
+class BatchEntryException(BaseException):
+    def __init__(self, message: str) -> None:
+        status = http_status.HTTP_422_UNPROCESSABLE_ENTITY
+        super().__init__(message, status)
+
+class StagingAreaFullException(BaseException):
+    def __init__(self) -> None:
+        message = Errors.STAGING_AREA_FULL
+        status = http_status.HTTP_503_SERVICE_UNAVAILABLE
+        super().__init__(message, status)
+
+class UploadBudgetExceededException(BaseException):
+    def __init__(self, scope: str) -> None:
+        message = Errors.UPLOAD_BUDGET_EXCEEDED
+        status = http_status.HTTP_429_TOO_MANY_REQUESTS
+        # "global" or "user": which in-flight budget the upload did not fit in
+        self.scope = scope
+        super().__init__(message, status)
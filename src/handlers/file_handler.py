@@ -1,46 +1,85 @@
 from services.file_service import FileService
 from fastapi import UploadFile, status
+from fastapi.exceptions import RequestValidationError
 from constants.messages import Message
 from dto.file_dto import UploadFileDTO, UploadChunkDTO, RetryUploadFileDTO
-from api.responses.file_response import FileResponse, UploadInitResponse, UploadChunkResponse, UploadStatusResponse
+from api.responses.file_response import FileResponse, UploadInitResponse, UploadChunkResponse, UploadStatusResponse, BatchUploadResponse, BatchUploadItemResponse
 from handlers.base_handler import BaseHandler
 from api.responses.response import SuccessResponse, ErrorResponse
-from fastapi.responses import JSONResponse
-from exceptions.http_exception import BaseException
+from fastapi.responses import JSONResponse, Response, StreamingResponse, FileResponse as FileStreamResponse
+from starlette.background import BackgroundTask
+from exceptions.http_exception import BaseException, ChunkChecksumMismatchException, ChunkEncodingException, StagingAreaFullException, UploadBudgetExceededException
 from exceptions.virus_exception import VirusDetectedException, VirusScanException
 from constants.file_extensions import FileExtension
-from constants.errors import Errors
-from typing import Dict, Any
+from constants.errors import Errors, ValidatonErrors
+from typing import Dict, Any, AsyncIterator
 from core.config import config
-from utils import parse_json_to_dict
+from utils import parse_json_to_dict, parse_range_header, etag_matches, accepts_encoding
+from constants.cache_control import CacheControl
+from email.utils import format_datetime
+import uuid
 import logging
 import traceback
 from dto.file_dto import FileResponseDTO
 from infrastructure.virus_scanner import virus_scanner
+from infrastructure.content_encoding import SUPPORTED_ENCODINGS
+from infrastructure.batch_reader import iter_multipart_entries, iter_tar_entries
+from infrastructure.upload_session import UploadTooLarge
 from api.responses.quarantine_response import VirusScanHealthResponse
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+BATCH_TAR_CONTENT_TYPES = ("application/x-tar", "application/tar")
+
 class FileHandler(BaseHandler[FileService]):
     def __init__(self, service: FileService) -> None:
         super().__init__(service=service)
 
-    async def upload_initialize(self):
-        upload_id = await self.service.upload_initialize()
+    async def upload_initialize(self, total_size: int | None = None, content_type: str | None = None,
+                                user_id: str | None = None):
+        try:
+            upload_id, session = await self.service.upload_initialize(total_size, content_type, user_id)
+        except UploadTooLarge as exc:
+            return self.response.error(ErrorResponse(message=str(exc)), status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except StagingAreaFullException as exc:
+            logger.warning("Refusing new upload: staging area is below its low free-space watermark")
+            response = self.response.error(ErrorResponse(message=exc.message), status=exc.status)
+            response.headers["Retry-After"] = str(config.STAGING_JANITOR_INTERVAL_SECONDS)
+            return response
+        except UploadBudgetExceededException as exc:
+            logger.warning(f"Refusing upload of {total_size} bytes for user {user_id}: {exc.scope} in-flight budget exhausted")
+            return self.upload_budget_error(exc)
         return self.response.success(content=SuccessResponse[UploadInitResponse](data=UploadInitResponse(
-            chunk_size=config.APP_MAX_CHUNK_SIZE,
-            upload_id=upload_id
+            chunk_size=session.chunk_size,
+            upload_id=upload_id,
+            total_chunks=session.total_chunks,
+            parallel_streams=session.parallel_streams,
+            content_encodings=list(SUPPORTED_ENCODINGS)
         )))
 
-    async def upload_chunk(self, chunk_size: int, upload_id: str, chunk_index: int, file: UploadFile):
+    async def upload_chunk(self, chunk_size: int, upload_id: str, chunk_index: int, file: UploadFile,
+                           checksum_algorithm: str | None = None, checksum: str | None = None,
+                           content_encoding: str | None = None):
         payload = UploadChunkDTO(
-            chunk_size=chunk_size, file=file, upload_id=upload_id, chunk_index=chunk_index)
+            chunk_size=chunk_size, file=file, upload_id=upload_id, chunk_index=chunk_index,
+            checksum_algorithm=checksum_algorithm, checksum=checksum, content_encoding=content_encoding)
         try:
-            await self.service.upload_chunk(payload)
+            digest = await self.service.upload_chunk(payload)
             return self.response.success(content=SuccessResponse[UploadChunkResponse](
-                data=UploadChunkResponse(chunk_index=chunk_index, upload_id=upload_id), message=Message.UPLOADED_CHUNK
+                data=UploadChunkResponse(chunk_index=chunk_index, upload_id=upload_id, **digest), message=Message.UPLOADED_CHUNK
             ))
+        except RequestValidationError:
+            raise
+        except ChunkChecksumMismatchException as exc:
+            logger.warning(f"Checksum mismatch for chunk {chunk_index} of upload {upload_id}")
+            return self.chunk_checksum_error(exc)
+        except ChunkEncodingException as exc:
+            logger.warning(f"Undecodable chunk {chunk_index} of upload {upload_id}: {exc.detail}")
+            return self.chunk_encoding_error(exc)
+        except UploadBudgetExceededException as exc:
+            logger.warning(f"Refusing chunk {chunk_index} of upload {upload_id}: {exc.scope} in-flight budget exhausted")
+            return self.upload_budget_error(exc)
         except FileNotFoundError as exc:
             logger.error(f"File not found error in upload_chunk: {str(exc)}")
             return self.response.error(ErrorResponse(message=Errors.FILE_NOT_FOUND), status=status.HTTP_422_UNPROCESSABLE_ENTITY)
@@ -48,6 +87,38 @@ class FileHandler(BaseHandler[FileService]):
             logger.error(f"Unexpected error in upload_chunk: {str(exc)}\n{traceback.format_exc()}")
             return self.response.error(ErrorResponse(message="An error occurred during chunk upload"), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    async def upload_chunk_stream(self, upload_id: str, chunk_index: int, body: AsyncIterator[bytes],
+                                  content_length: str | None, checksum_algorithm: str | None = None,
+                                  checksum: str | None = None, content_encoding: str | None = None):
+        # Refuse before reading any of the body; an encoded body is only limited once decoded
+        if (not content_encoding and content_length and content_length.isdigit()
+                and int(content_length) > await self.service.max_chunk_size(upload_id)):
+            return self.response.error(ErrorResponse(message=ValidatonErrors.LE_CHUNCK_SIZE),
+                                       status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        try:
+            digest = await self.service.stage_chunk(upload_id, chunk_index, body, checksum_algorithm, checksum,
+                                                    content_encoding)
+            return self.response.success(content=SuccessResponse[UploadChunkResponse](
+                data=UploadChunkResponse(chunk_index=chunk_index, upload_id=upload_id, **digest), message=Message.UPLOADED_CHUNK
+            ))
+        except RequestValidationError:
+            raise
+        except ChunkChecksumMismatchException as exc:
+            logger.warning(f"Checksum mismatch for chunk {chunk_index} of upload {upload_id}")
+            return self.chunk_checksum_error(exc)
+        except ChunkEncodingException as exc:
+            logger.warning(f"Undecodable chunk {chunk_index} of upload {upload_id}: {exc.detail}")
+            return self.chunk_encoding_error(exc)
+        except UploadBudgetExceededException as exc:
+            logger.warning(f"Refusing chunk {chunk_index} of upload {upload_id}: {exc.scope} in-flight budget exhausted")
+            return self.upload_budget_error(exc)
+        except FileNotFoundError as exc:
+            logger.error(f"File not found error in upload_chunk_stream: {str(exc)}")
+            return self.response.error(ErrorResponse(message=Errors.FILE_NOT_FOUND), status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        except Exception as exc:
+            logger.error(f"Unexpected error in upload_chunk_stream: {str(exc)}\n{traceback.format_exc()}")
+            return self.response.error(ErrorResponse(message="An error occurred during chunk upload"), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     async def upload_complete(self, upload_id: str, total_chunks: int, total_size: int, file_extension: FileExtension,
                               content_type: str, credential: str, detail: str, appointment_id: str, user_id: str, filename: str, size: int = 0) -> JSONResponse:
         logger.info("=== UPLOAD_COMPLETE HANDLER CALLED ===")
@@ -71,22 +142,7 @@ class FileHandler(BaseHandler[FileService]):
             logger.info(f"Calling service.upload_complete with payload: {payload}")
             file = await self.service.upload_complete(payload=payload)
             logger.info(f"File created successfully: {file.id}")
-            
-            download_url = await self.service.get_download_link(file)
-            data = FileResponse(
-                id=file.id, 
-                path=file.path, 
-                credential=file.credential,
-                content_type=file.content_type, 
-                detail=file.detail, 
-                download_url=download_url,
-                filename=file.filename, 
-                size=file.size,
-                virus_scan_status=file.virus_scan_status,
-                is_quarantined=file.is_quarantined,
-                quarantine_reason=file.quarantine_reason
-            )
-            return self.response.success(content=SuccessResponse[FileResponse](data=data))
+            return await self.uploaded_file_response(file)
             
         except VirusDetectedException as exc:
             logger.error(f"Virus detected during upload: {str(exc)}")
@@ -106,6 +162,11 @@ class FileHandler(BaseHandler[FileService]):
                 ),
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        except ChunkChecksumMismatchException as exc:
+            logger.error(f"Staged chunk {exc.chunk_index} of upload {upload_id} no longer matches its checksum")
+            return self.chunk_checksum_error(exc)
+        except RequestValidationError:
+            raise
         except FileNotFoundError as exc:
             logger.error(f"File not found error in upload_complete: {str(exc)}")
             return self.response.error(ErrorResponse(message=Errors.FILE_NOT_FOUND), status=status.HTTP_422_UNPROCESSABLE_ENTITY)
@@ -114,8 +175,114 @@ class FileHandler(BaseHandler[FileService]):
             # Return a generic error message but log the specific error
             return self.response.error(ErrorResponse(message="An error occurred during upload completion"), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    async def get_file(self, file_id: str, credential=Dict[str, Any]) -> JSONResponse:
+    async def upload_small(self, file: UploadFile, file_extension: FileExtension, content_type: str | None,
+                           credential: str | None, detail: str | None, appointment_id: str, user_id: str,
+                           filename: str | None) -> JSONResponse:
+        # One byte past the limit is enough to tell the file does not fit in a single chunk
+        content = await file.read(config.APP_MAX_CHUNK_SIZE + 1)
+        if len(content) > config.APP_MAX_CHUNK_SIZE:
+            return self.response.error(ErrorResponse(message=ValidatonErrors.LE_CHUNCK_SIZE),
+                                       status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        upload_id = str(uuid.uuid4())
+        try:
+            payload = UploadFileDTO(upload_id=upload_id, total_chunks=1, total_size=len(content), size=len(content),
+                                    file_extension=file_extension,
+                                    content_type=content_type or file.content_type or "application/octet-stream",
+                                    credential=parse_json_to_dict(credential, 'credential') if credential else None,
+                                    detail=parse_json_to_dict(detail, 'detail') if detail else None,
+                                    appointment_id=appointment_id, user_id=user_id,
+                                    filename=filename or file.filename or f"{upload_id}.{file_extension.value}")
+            file = await self.service.upload_small(payload, content)
+            return await self.uploaded_file_response(file)
+        except RequestValidationError:
+            raise
+        except VirusDetectedException as exc:
+            logger.error(f"Virus detected during upload: {str(exc)}")
+            return self.response.error(
+                ErrorResponse(
+                    message=f"File rejected: {exc.message}",
+                    errors=[f"Virus detected: {exc.virus_name}" if exc.virus_name else "Malware detected"]
+                ),
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        except Exception as exc:
+            logger.error(f"Unexpected error in upload_small: {str(exc)}\n{traceback.format_exc()}")
+            return self.response.error(ErrorResponse(message="An error occurred during upload"), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    async def upload_batch(self, body: AsyncIterator[bytes], content_type: str | None, appointment_id: str,
+                           user_id: str, credential: str | None) -> JSONResponse:
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        if media_type == "multipart/form-data":
+            entries = iter_multipart_entries(body, content_type, config.APP_MAX_CHUNK_SIZE)
+        elif media_type in BATCH_TAR_CONTENT_TYPES:
+            entries = iter_tar_entries(body, config.APP_MAX_CHUNK_SIZE)
+        else:
+            return self.response.error(
+                ErrorResponse(message=f"Unsupported batch content type: {media_type or '(none)'}"),
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        try:
+            results = await self.service.upload_batch(
+                entries, appointment_id=appointment_id, user_id=user_id,
+                credential=parse_json_to_dict(credential, 'credential') if credential else None)
+        except RequestValidationError:
+            raise
+        except Exception as exc:
+            logger.error(f"Unexpected error in upload_batch: {str(exc)}\n{traceback.format_exc()}")
+            return self.response.error(ErrorResponse(message="An error occurred during upload"), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        items = [BatchUploadItemResponse(**result) for result in results]
+        stored = sum(1 for item in items if item.file_id)
+        return self.response.success(content=SuccessResponse[BatchUploadResponse](
+            data=BatchUploadResponse(stored=stored, failed=len(items) - stored, items=items)))
+
+    async def uploaded_file_response(self, file) -> JSONResponse:
+        download_url = await self.service.get_download_link(file)
+        data = FileResponse(
+            id=file.id,
+            path=file.path,
+            credential=file.credential,
+            content_type=file.content_type,
+            detail=file.detail,
+            download_url=download_url,
+            sha256=file.sha256,
+            filename=file.filename,
+            size=file.size,
+            virus_scan_status=file.virus_scan_status,
+            is_quarantined=file.is_quarantined,
+            quarantine_reason=file.quarantine_reason
+        )
+        return self.response.success(content=SuccessResponse[FileResponse](data=data))
+
+    def chunk_checksum_error(self, exc: ChunkChecksumMismatchException) -> JSONResponse:
+        """Tell the client which single chunk to resend instead of restarting the upload."""
+        return self.response.error(
+            ErrorResponse(
+                message=exc.message,
+                errors=[f"{exc.algorithm} mismatch for chunk {exc.chunk_index}: expected {exc.expected}, got {exc.actual}"]
+            ),
+            status=exc.status,
+            headers={"X-Retry-Chunk": str(exc.chunk_index)}
+        )
+
+    def upload_budget_error(self, exc: UploadBudgetExceededException) -> JSONResponse:
+        response = self.response.error(ErrorResponse(message=exc.message), status=exc.status)
+        response.headers["Retry-After"] = str(config.UPLOAD_ADMISSION_RETRY_AFTER_SECONDS)
+        return response
+
+    def chunk_encoding_error(self, exc: ChunkEncodingException) -> JSONResponse:
+        # RFC 7694: list the accepted encodings so the client can retry with one of them
+        return self.response.error(
+            ErrorResponse(message=exc.message, errors=[exc.detail]),
+            status=exc.status,
+            headers={"Accept-Encoding": ", ".join(SUPPORTED_ENCODINGS)}
+        )
+
+    async def get_file(self, file_id: str, credential=Dict[str, Any], if_none_match: str | None = None) -> JSONResponse:
         try:
+            if if_none_match:
+                # Answer revalidations from the row version alone, before loading or serializing the file
+                etag = await self.service.get_file_etag(id=file_id, credential=credential)
+                if etag_matches(if_none_match, etag):
+                    return self.response.not_modified(headers={"ETag": etag, "Cache-Control": CacheControl.FILE_METADATA})
             file = await self.service.get_file(id=file_id, credential=credential)
             download_url = await self.service.get_download_link(file)
             data = FileResponse(
@@ -125,13 +292,15 @@ class FileHandler(BaseHandler[FileService]):
                 content_type=file.content_type, 
                 detail=file.detail, 
                 download_url=download_url,
+                sha256=file.sha256,
                 filename=file.filename, 
                 size=file.size,
                 virus_scan_status=file.virus_scan_status,
                 is_quarantined=file.is_quarantined,
                 quarantine_reason=file.quarantine_reason
             )
-            return self.response.success(SuccessResponse[FileResponse](data=data))
+            headers = {"ETag": self.service.file_etag(file), "Cache-Control": CacheControl.FILE_METADATA}
+            return self.response.success(SuccessResponse[FileResponse](data=data), headers=headers)
         except BaseException as exception:
             return self.response.error(ErrorResponse(message=exception.message), status=exception.status)
 
@@ -158,6 +327,7 @@ class FileHandler(BaseHandler[FileService]):
                 content_type=file.content_type, 
                 detail=file.detail, 
                 download_url=download_url,
+                sha256=file.sha256,
                 filename=file.filename, 
                 size=file.size,
                 virus_scan_status=file.virus_scan_status,
@@ -168,26 +338,39 @@ class FileHandler(BaseHandler[FileService]):
         except BaseException as exception:
             return self.response.error(ErrorResponse(message=exception.message), status=exception.status)
 
-    async def get_files_by_appointment(self, appointment_id: str) -> JSONResponse:
-        files = await self.service.get_files_by_appointment(appointment_id)
-        files_response = []
-        for file in files:
-            download_url = await self.service.get_download_link(file)
-            file_resp = FileResponseDTO.from_orm(file)
-            file_resp.download_url = download_url
-            files_response.append(file_resp)
-        return self.response.success(content=SuccessResponse[list[FileResponseDTO]](data=files_response))
+    async def get_files_by_appointment(self, appointment_id: str, limit: int = config.LISTING_PAGE_SIZE,
+                                       cursor: str | None = None, if_none_match: str | None = None) -> JSONResponse:
+        headers = {"Cache-Control": CacheControl.APPOINTMENT_FILES}
+        etag = await self.service.get_appointment_files_etag(appointment_id, limit, cursor)
+        if etag:
+            headers["ETag"] = etag
+            if etag_matches(if_none_match, etag):
+                return self.response.not_modified(headers=headers)
+        rows, next_cursor = await self.service.get_files_by_appointment(appointment_id, limit=limit, cursor=cursor)
+        return await self._listing(rows, next_cursor, headers)
 
-    async def list_all_files(self, user_id: str) -> JSONResponse:
-        file_tuples = await self.service.list_all_files(user_id)
+    async def list_all_files(self, user_id: str, limit: int = config.LISTING_PAGE_SIZE, cursor: str | None = None,
+                             if_none_match: str | None = None) -> JSONResponse:
+        headers = {"Cache-Control": CacheControl.USER_FILES}
+        etag = await self.service.get_user_files_etag(user_id, limit, cursor)
+        if etag:
+            headers["ETag"] = etag
+            if etag_matches(if_none_match, etag):
+                return self.response.not_modified(headers=headers)
+        rows, next_cursor = await self.service.list_all_files(user_id, limit=limit, cursor=cursor)
+        return await self._listing(rows, next_cursor, headers)
+
+    async def _listing(self, rows: list, next_cursor: str | None, headers: dict) -> JSONResponse:
+        """A page of listing rows with their download URLs; the next page's cursor goes in `X-Next-Cursor`."""
+        download_urls = await self.service.get_download_links(rows)
         files_response = []
-        for file, appointment_name in file_tuples:
-            download_url = await self.service.get_download_link(file)
-            file_resp = FileResponseDTO.from_orm(file)
+        for row, download_url in zip(rows, download_urls):
+            file_resp = FileResponseDTO.from_orm(row)
             file_resp.download_url = download_url
-            file_resp.appointment_name = appointment_name
             files_response.append(file_resp)
-        return self.response.success(content=SuccessResponse[list[FileResponseDTO]](data=files_response))
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return self.response.success(content=SuccessResponse[list[FileResponseDTO]](data=files_response), headers=headers)
 
     async def delete_file(self, file_id: str) -> JSONResponse:
         deleted_file = await self.service.delete_file(file_id)
@@ -195,6 +378,105 @@ class FileHandler(BaseHandler[FileService]):
             return self.response.error(ErrorResponse(message="File not found"), status=status.HTTP_404_NOT_FOUND)
         return self.response.success(content=SuccessResponse(message="File deleted successfully."))
 
+    async def download_file(self, file_id: str, credential: Dict[str, Any], range_header: str | None,
+                            if_range: str | None, accept_encoding: str | None = None) -> Response:
+        try:
+            file, stat = await self.service.get_download_object(id=file_id, credential=credential)
+        except BaseException as exception:
+            return self.response.error(ErrorResponse(message=exception.message), status=exception.status)
+
+        # Files compressed at rest are sent as stored when the client accepts the encoding,
+        # otherwise decompressed; ranges always apply to the representation being sent
+        decompress = bool(file.content_encoding) and not accepts_encoding(accept_encoding, file.content_encoding)
+        size = file.size if decompress else stat.size
+        etag = f'"{stat.etag}-identity"' if decompress else f'"{stat.etag}"'
+        last_modified = format_datetime(stat.last_modified, usegmt=True)
+        content_type = file.content_type or "application/octet-stream"
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+            "Last-Modified": last_modified,
+            "Content-Disposition": self.service.get_content_disposition(file),
+        }
+        if file.content_encoding:
+            headers["Vary"] = "Accept-Encoding"
+            if not decompress:
+                headers["Content-Encoding"] = file.content_encoding
+
+        # Hot objects are served from the local read-through cache instead of MinIO. A range request
+        # does not wait for a miss to fetch the whole object; it is cached in the background instead
+        cached_path = await self.service.get_cached_object_path(file, stat, wait=not range_header)
+        streams = []
+
+        def iter_range(start: int, end: int):
+            if decompress:
+                stream = self.service.iter_decompressed(file, cached_path, start, end)
+            elif cached_path:
+                stream = self.service.iter_cached_object(cached_path, start, end)
+            else:
+                stream = self.service.iter_object(file, start, end)
+            streams.append(stream)
+            return stream
+
+        async def finish() -> None:
+            # A body left unfinished by a disconnect is closed now rather than by garbage collection,
+            # then the cached copy it read from is unpinned
+            for stream in streams:
+                await stream.aclose()
+            if cached_path:
+                self.service.release_cached_object(cached_path)
+
+        background = BackgroundTask(finish)
+
+        # If-Range only honours the Range header while the representation is unchanged
+        ranges = None
+        if range_header and (not if_range or if_range in (etag, last_modified)):
+            ranges = parse_range_header(range_header, size, config.APP_DOWNLOAD_MAX_RANGES)
+
+        if ranges is None:
+            headers["Content-Length"] = str(size)
+            if cached_path and not decompress:
+                # FileResponse hands the path to the server (`http.response.pathsend`) for sendfile when supported
+                return FileStreamResponse(cached_path, media_type=content_type, headers=headers, background=background)
+            return StreamingResponse(iter_range(0, size - 1), media_type=content_type, headers=headers,
+                                     background=background)
+
+        if not ranges:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers,
+                            background=background)
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(iter_range(start, end), media_type=content_type,
+                                     headers=headers, status_code=status.HTTP_206_PARTIAL_CONTENT, background=background)
+
+        boundary = uuid.uuid4().hex
+        part_headers = [
+            (f"--{boundary}\r\nContent-Type: {content_type}\r\n"
+             f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n").encode()
+            for start, end in ranges
+        ]
+        closing = f"\r\n--{boundary}--\r\n".encode()
+        headers["Content-Length"] = str(
+            sum(len(part) + end - start + 1 for part, (start, end) in zip(part_headers, ranges))
+            + 2 * (len(ranges) - 1) + len(closing)
+        )
+
+        async def multipart_body():
+            for index, (part, (start, end)) in enumerate(zip(part_headers, ranges)):
+                yield (b"\r\n" if index else b"") + part
+                async for data in iter_range(start, end):
+                    yield data
+            yield closing
+
+        body = multipart_body()
+        streams.insert(0, body)
+        return StreamingResponse(body, media_type=f"multipart/byteranges; boundary={boundary}",
+                                 headers=headers, status_code=status.HTTP_206_PARTIAL_CONTENT, background=background)
+
     async def virus_scanner_health(self) -> JSONResponse:
         """Check the health status of the virus scanner"""
         try:
@@ -0,0 +1,187 @@
+import tarfile
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+_BLOCK = tarfile.BLOCKSIZE
+
+
+class BatchFormatError(ValueError):
+    """The batch body is not a well-formed multipart or tar stream."""
+
+
+@dataclass
+class BatchEntry:
+    index: int
+    filename: str
+    content_type: Optional[str]
+    size: int
+    # None when the entry is larger than the reader's `max_size`; its bytes are skipped, not kept
+    data: Optional[bytes]
+
+
+async def iter_multipart_entries(body: AsyncIterator[bytes], content_type: str,
+                                 max_size: int) -> AsyncIterator[BatchEntry]:
+    """
+    Yield the file parts of a `multipart/form-data` body one at a time, as they finish arriving.
+
+    Only the part being received is buffered, and no more than `max_size + 1` bytes of it;
+    parts without a filename (plain form fields) are ignored.
+    """
+    _, options = parse_options_header(content_type)
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise BatchFormatError("Missing multipart boundary")
+
+    ready: deque[BatchEntry] = deque()
+    state = {"index": 0}
+
+    def on_part_begin() -> None:
+        state.update(headers=[], field=b"", value=b"", data=bytearray(), size=0)
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        state["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        state["value"] += data[start:end]
+
+    def on_header_end() -> None:
+        state["headers"].append((state["field"].lower(), state["value"]))
+        state.update(field=b"", value=b"")
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        state["size"] += end - start
+        if state["size"] <= max_size:
+            state["data"] += data[start:end]
+
+    def on_part_end() -> None:
+        headers = dict(state["headers"])
+        _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+        filename = disposition.get(b"filename")
+        if filename is None:
+            return
+        part_type = headers.get(b"content-type")
+        ready.append(BatchEntry(
+            index=state["index"],
+            filename=filename.decode("utf-8", errors="replace"),
+            content_type=part_type.decode("latin-1") if part_type else None,
+            size=state["size"],
+            data=bytes(state["data"]) if state["size"] <= max_size else None,
+        ))
+        state["index"] += 1
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in body:
+            parser.write(chunk)
+            while ready:
+                yield ready.popleft()
+        parser.finalize()
+    except BatchFormatError:
+        raise
+    except Exception as exc:
+        raise BatchFormatError(f"Malformed multipart body: {exc}") from exc
+    while ready:
+        yield ready.popleft()
+
+
+class _StreamBuffer:
+    """Exact-size reads over an async byte stream, holding at most one incoming message beyond the request."""
+
+    def __init__(self, body: AsyncIterator[bytes]) -> None:
+        self._body = body.__aiter__()
+        self._buffer = bytearray()
+
+    async def _fill(self, size: int) -> bool:
+        while len(self._buffer) < size:
+            try:
+                self._buffer += await self._body.__anext__()
+            except StopAsyncIteration:
+                return False
+        return True
+
+    async def read(self, size: int) -> bytes:
+        if not await self._fill(size):
+            raise BatchFormatError("Unexpected end of tar stream")
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    async def skip(self, size: int) -> None:
+        while size > 0:
+            step = min(size, 1024 * 1024)
+            await self.read(step)
+            size -= step
+
+    async def at_end(self) -> bool:
+        return not await self._fill(1)
+
+
+def _padded(size: int) -> int:
+    return -(-size // _BLOCK) * _BLOCK
+
+
+async def iter_tar_entries(body: AsyncIterator[bytes], max_size: int) -> AsyncIterator[BatchEntry]:
+    """
+    Yield the regular files of an uncompressed tar stream one at a time.
+
+    Handles ustar, GNU long names and pax `path` records; directories, links and other
+    member types are skipped. Only files of at most `max_size` bytes are held in memory.
+    """
+    stream = _StreamBuffer(body)
+    index = 0
+    long_name: Optional[str] = None
+    while not await stream.at_end():
+        header = await stream.read(_BLOCK)
+        if header == tarfile.NUL * _BLOCK:
+            # End-of-archive marker
+            break
+        try:
+            info = tarfile.TarInfo.frombuf(header, "utf-8", "surrogateescape")
+        except tarfile.HeaderError as exc:
+            raise BatchFormatError(f"Malformed tar header: {exc}") from exc
+
+        if info.type in (tarfile.GNUTYPE_LONGNAME, tarfile.XHDTYPE):
+            if info.size > 64 * 1024:
+                raise BatchFormatError("Oversized tar extended header")
+            data = (await stream.read(_padded(info.size)))[:info.size]
+            if info.type == tarfile.GNUTYPE_LONGNAME:
+                long_name = data.rstrip(tarfile.NUL).decode("utf-8", errors="replace")
+            else:
+                long_name = _pax_path(data) or long_name
+            continue
+
+        name, long_name = long_name or info.name, None
+        if info.type not in tarfile.REGULAR_TYPES:
+            await stream.skip(_padded(info.size))
+            continue
+        data = None
+        if info.size <= max_size:
+            data = (await stream.read(_padded(info.size)))[:info.size]
+        else:
+            await stream.skip(_padded(info.size))
+        yield BatchEntry(index=index, filename=name.rsplit("/", 1)[-1], content_type=None, size=info.size, data=data)
+        index += 1
+
+
+def _pax_path(data: bytes) -> Optional[str]:
+    """The `path` record of a pax extended header, if any (records are `<length> <key>=<value>\\n`)."""
+    offset = 0
+    while offset < len(data):
+        length, _, rest = data[offset:].partition(b" ")
+        if not length.isdigit() or int(length) <= 0:
+            break
+        record = data[offset + len(length) + 1:offset + int(length)]
+        key, _, value = record.rstrip(b"\n").partition(b"=")
+        if key == b"path":
+            return value.decode("utf-8", errors="replace")
+        offset += int(length)
+    return None
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Self, Optional
+from core.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class BlockingDetector:
+    """
+    Debug aid that logs where the event loop is stuck whenever it stops running callbacks for
+    more than `BLOCKING_DETECTOR_MS`.
+
+    A task on the loop records a heartbeat; a watchdog thread checks it and, once it is overdue,
+    logs the stack of the loop thread, which points at the blocking call. Each stall is logged
+    once, then again with its total duration when the loop resumes.
+    """
+
+    _instance: Self = None
+
+    def __new__(cls: Self) -> Self:
+        if cls._instance == None:
+            cls._instance = super().__new__(cls)
+            cls._instance.__initialize()
+        return cls._instance
+
+    def __initialize(self) -> None:
+        self._heartbeat = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self.stalls = 0
+
+    def _watch(self, threshold: float, interval: float, stopped: threading.Event) -> None:
+        reported = None
+        while not stopped.wait(interval):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - interval
+            if blocked > threshold and reported != heartbeat:
+                reported = heartbeat
+                self.stalls += 1
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame else "(no frame)\n"
+                logger.warning(f"Event loop blocked for {blocked * 1000:.0f} ms so far, in:\n{stack}")
+
+    async def run(self) -> None:
+        """Watch the running loop until cancelled."""
+        threshold = config.BLOCKING_DETECTOR_MS / 1000
+        interval = threshold / 4
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        stopped = threading.Event()
+        watchdog = threading.Thread(target=self._watch, args=(threshold, interval, stopped),
+                                    name="blocking-detector", daemon=True)
+        watchdog.start()
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                now = time.monotonic()
+                blocked = now - self._heartbeat - interval
+                if blocked > threshold:
+                    logger.warning(f"Event loop was blocked for {blocked * 1000:.0f} ms")
+                self._heartbeat = now
+        finally:
+            stopped.set()
+
+
+blockingDetector = BlockingDetector()
@@ -0,0 +1,135 @@
+import base64
+import binascii
+import hashlib
+import zlib
+from typing import Optional
+
+try:
+    # Hardware-accelerated C implementation from `google-crc32c`, a requirement of the service;
+    # the table-driven fallback below, used without it, takes about 1.7 s of CPU per 10 MiB
+    import google_crc32c
+except ImportError:
+    google_crc32c = None
+
+SUPPORTED_ALGORITHMS = ("sha256", "crc32c")
+_DIGEST_SIZES = {"sha256": 32, "crc32c": 4}
+
+
+def _crc32c_table() -> tuple[int, ...]:
+    table = []
+    for value in range(256):
+        for _ in range(8):
+            value = (value >> 1) ^ 0x82F63B78 if value & 1 else value >> 1
+        table.append(value)
+    return tuple(table)
+
+
+_CRC32C_TABLE = _crc32c_table()
+
+
+def crc32c(data: bytes, value: int = 0) -> int:
+    """CRC-32C (Castagnoli) of `data`, continuing from a previous `value`."""
+    if google_crc32c is not None:
+        return google_crc32c.extend(value, data)
+    crc = value ^ 0xFFFFFFFF
+    table = _CRC32C_TABLE
+    for byte in data:
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+def parse_checksum(algorithm: str, value: str) -> str:
+    """
+    Normalize a client checksum to lowercase hex.
+
+    Accepts hex or base64 (the encoding S3 uses for `x-amz-checksum-*` headers).
+    Raises ValueError for unknown algorithms and malformed values.
+    """
+    algorithm = algorithm.lower()
+    if algorithm not in SUPPORTED_ALGORITHMS:
+        raise ValueError(f"Unsupported checksum algorithm: {algorithm}")
+    size = _DIGEST_SIZES[algorithm]
+    value = value.strip()
+    if len(value) == size * 2:
+        try:
+            return bytes.fromhex(value).hex()
+        except ValueError:
+            pass
+    try:
+        digest = base64.b64decode(value, validate=True)
+    except binascii.Error:
+        raise ValueError(f"Malformed {algorithm} checksum")
+    if len(digest) != size:
+        raise ValueError(f"Malformed {algorithm} checksum")
+    return digest.hex()
+
+
+class ChunkDigest:
+    """
+    Incremental SHA-256, plus CRC-32C when the client asked for it, of data streamed to disk.
+
+    zlib's CRC-32 is kept as well, for checking the staged data again at a fraction of the cost of SHA-256.
+    """
+
+    def __init__(self, crc32c_enabled: bool = False) -> None:
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._crc32 = 0
+        self._crc32c: Optional[int] = 0 if crc32c_enabled else None
+
+    def update(self, data: bytes) -> None:
+        self.size += len(data)
+        self._sha256.update(data)
+        self._crc32 = zlib.crc32(data, self._crc32)
+        if self._crc32c is not None:
+            self._crc32c = crc32c(data, self._crc32c)
+
+    def hexdigest(self, algorithm: str) -> str:
+        if algorithm == "crc32c":
+            return f"{self._crc32c:08x}"
+        return self._sha256.hexdigest()
+
+    def to_dict(self) -> dict:
+        digest = {"size": self.size, "sha256": self._sha256.hexdigest()}
+        if self._crc32c is not None:
+            digest["crc32c"] = f"{self._crc32c:08x}"
+        return digest
+
+    def record(self) -> dict:
+        """`to_dict` plus the CRC-32 a staged chunk is checked against when it is assembled."""
+        return {**self.to_dict(), "crc32": f"{self._crc32:08x}"}
+
+
+class MultipartETag:
+    """
+    The ETag S3/MinIO will report for data uploaded with `put_object(length=-1, part_size=...)`.
+
+    Objects up to one part are sent with a single PUT and get the MD5 of the data;
+    larger ones get the MD5 of the concatenated part MD5s, suffixed with the part count.
+    """
+
+    def __init__(self, part_size: int) -> None:
+        self.part_size = part_size
+        self.size = 0
+        self._part_digests: list[bytes] = []
+        self._part = hashlib.md5()
+        self._part_filled = 0
+
+    def update(self, data: bytes) -> None:
+        self.size += len(data)
+        view = memoryview(data)
+        while view:
+            if self._part_filled == self.part_size:
+                self._part_digests.append(self._part.digest())
+                self._part = hashlib.md5()
+                self._part_filled = 0
+            take = min(len(view), self.part_size - self._part_filled)
+            self._part.update(view[:take])
+            self._part_filled += take
+            view = view[take:]
+
+    def hexdigest(self) -> str:
+        if not self._part_digests:
+            return self._part.hexdigest()
+        digests = self._part_digests + [self._part.digest()]
+        return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
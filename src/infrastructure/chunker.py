@@ -0,0 +1,73 @@
+import hashlib
+from typing import BinaryIO, Iterator
+
+_MASK64 = (1 << 64) - 1
+
+# Gear table for the rolling hash; derived from SHA-256 so boundaries are stable across processes and releases
+GEAR = tuple(int.from_bytes(hashlib.sha256(bytes([value])).digest()[:8], "big") for value in range(256))
+
+
+def _mask(bits: int) -> int:
+    """Mask over the `bits` highest bits of the 64-bit fingerprint."""
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+class Chunker:
+    """
+    Content-defined chunking with a Gear rolling hash (FastCDC-style).
+
+    Boundaries depend only on the bytes preceding them, so an insertion or deletion
+    in a file changes the chunks around the edit and leaves the rest identical.
+    Normalized chunking uses a stricter mask before `avg_size` and a looser one after
+    it, keeping chunk sizes close to the average between `min_size` and `max_size`.
+    """
+
+    def __init__(self, min_size: int, avg_size: int, max_size: int) -> None:
+        if not 0 < min_size <= avg_size <= max_size:
+            raise ValueError("Chunk sizes must satisfy 0 < min_size <= avg_size <= max_size")
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        bits = max(avg_size.bit_length() - 1, 2)
+        self.mask_small = _mask(bits + 1)
+        self.mask_large = _mask(bits - 1)
+
+    def find_boundary(self, data: bytes | bytearray | memoryview) -> int:
+        """Length of the first chunk of `data`; the whole buffer if no boundary is found."""
+        length = len(data)
+        if length <= self.min_size:
+            return length
+        end = min(length, self.max_size)
+        normal = min(self.avg_size, end)
+        gear = GEAR
+        fingerprint = 0
+        # A byte leaves the 64-bit fingerprint after 64 shifts; bytes before that cannot affect a cut
+        for index in range(max(0, self.min_size - 64), self.min_size):
+            fingerprint = ((fingerprint << 1) + gear[data[index]]) & _MASK64
+        mask = self.mask_small
+        for index in range(self.min_size, normal):
+            fingerprint = ((fingerprint << 1) + gear[data[index]]) & _MASK64
+            if not fingerprint & mask:
+                return index + 1
+        mask = self.mask_large
+        for index in range(normal, end):
+            fingerprint = ((fingerprint << 1) + gear[data[index]]) & _MASK64
+            if not fingerprint & mask:
+                return index + 1
+        return end
+
+    def iter_chunks(self, stream: BinaryIO) -> Iterator[bytes]:
+        """Split a binary stream into content-defined chunks, holding at most two `max_size` reads."""
+        buffer = bytearray()
+        eof = False
+        while True:
+            while not eof and len(buffer) < self.max_size:
+                data = stream.read(self.max_size)
+                if not data:
+                    eof = True
+                buffer += data
+            if not buffer:
+                return
+            cut = len(buffer) if eof and len(buffer) <= self.min_size else self.find_boundary(buffer)
+            yield bytes(buffer[:cut])
+            del buffer[:cut]
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from typing import BinaryIO, Callable, Optional
+import zstandard
+from core.config import config
+
+# Encoding of objects compressed at rest, as named in `Content-Encoding`
+ENCODING = "zstd"
+STORED_CONTENT_TYPE = "application/zstd"
+
+_READ_SIZE = 1024 * 1024
+
+
+def _csv_setting(value: str) -> tuple[str, ...]:
+    return tuple(item.strip().lower() for item in value.split(",") if item.strip())
+
+
+def should_compress(extension: str, content_type: Optional[str], size: int) -> bool:
+    """Whether an upload is stored compressed, by `COMPRESSION_AT_REST_*` policy."""
+    if not config.COMPRESSION_AT_REST_ENABLED or size < config.COMPRESSION_AT_REST_MIN_SIZE:
+        return False
+    if extension.lower() in _csv_setting(config.COMPRESSION_AT_REST_EXTENSIONS):
+        return True
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return bool(media_type) and media_type.startswith(_csv_setting(config.COMPRESSION_AT_REST_CONTENT_TYPES))
+
+
+def compress_file(source_path: str, target_path: str, level: int,
+                  observe: Optional[Callable[[bytes], None]] = None) -> tuple[int, float]:
+    """
+    Compress `source_path` into a single zstd frame at `target_path`.
+
+    `observe` sees every compressed block as it is written, e.g. to compute the
+    object's ETag in the same pass. Returns the compressed size and the CPU seconds spent.
+    """
+    started = time.thread_time()
+    written = 0
+    with open(source_path, "rb") as source, open(target_path, "wb") as target:
+        compressor = zstandard.ZstdCompressor(level=level).compressobj(size=os.fstat(source.fileno()).st_size)
+
+        def emit(data: bytes) -> None:
+            nonlocal written
+            if data:
+                if observe:
+                    observe(data)
+                target.write(data)
+                written += len(data)
+
+        while data := source.read(_READ_SIZE):
+            emit(compressor.compress(data))
+        emit(compressor.flush())
+    return written, time.thread_time() - started
+
+
+def compress_bytes(data: bytes, level: int) -> tuple[bytes, float]:
+    """Compress an in-memory object into a single zstd frame; returns it and the CPU seconds spent."""
+    started = time.thread_time()
+    compressed = zstandard.ZstdCompressor(level=level).compress(data)
+    return compressed, time.thread_time() - started
+
+
+class DecompressionStats:
+    """CPU time this process spends decompressing stored objects for clients without zstd support."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.cpu_seconds = 0.0
+        self.bytes_out = 0
+
+    def record(self, cpu_seconds: float, size: int) -> None:
+        with self._lock:
+            self.cpu_seconds += cpu_seconds
+            self.bytes_out += size
+
+
+decompressionStats = DecompressionStats()
+
+
+class DecompressedReader:
+    """
+    Blocking reader over the decompressed bytes of a zstd stream read from `source`.
+
+    Reads never return more than asked for, however well the data compressed.
+    """
+
+    def __init__(self, source: BinaryIO) -> None:
+        self._reader = zstandard.ZstdDecompressor().stream_reader(source, read_size=_READ_SIZE, closefd=False)
+
+    def read(self, size: int) -> bytes:
+        started = time.thread_time()
+        data = self._reader.read(size)
+        decompressionStats.record(time.thread_time() - started, len(data))
+        return data
+
+    def skip(self, size: int) -> None:
+        """Decompress and discard `size` bytes; zstd frames cannot be entered mid-stream."""
+        while size > 0:
+            data = self.read(min(size, _READ_SIZE))
+            if not data:
+                break
+            size -= len(data)
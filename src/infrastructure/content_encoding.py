@@ -0,0 +1,119 @@
+import zlib
+from typing import Optional
+import zstandard
+
+# Encodings accepted for chunk bodies, in order of preference
+SUPPORTED_ENCODINGS = ("zstd", "gzip")
+IDENTITY = "identity"
+
+# Most bytes a single inflate step may produce
+_GZIP_OUTPUT_SIZE = 256 * 1024
+# zstd cannot cap the output of a step, so input is fed in slices small enough that even
+# a run of RLE blocks (4 bytes in, 128 KiB out) stays bounded: 256 bytes -> at most 8 MiB
+_ZSTD_FEED_SIZE = 256
+# Below this many decompressed bytes the ratio is not checked; small repetitive chunks are harmless
+_RATIO_GRACE_BYTES = 1024 * 1024
+
+
+class ContentEncodingError(ValueError):
+    """The body is not valid for its declared encoding, or decodes beyond the allowed ratio."""
+
+
+class UnsupportedEncodingError(ContentEncodingError):
+    pass
+
+
+class DecompressedSizeExceeded(ContentEncodingError):
+    pass
+
+
+def normalize_encoding(value: Optional[str]) -> Optional[str]:
+    """
+    Lower-cased encoding named by a `Content-Encoding` value, or None for an identity body.
+
+    Stacked encodings (`gzip, zstd`) are not accepted; chunks are small enough that one pass suffices.
+    """
+    encoding = (value or "").strip().lower()
+    if encoding in ("", IDENTITY):
+        return None
+    if encoding == "x-gzip":
+        return "gzip"
+    if encoding not in SUPPORTED_ENCODINGS:
+        raise UnsupportedEncodingError(f"Unsupported content encoding: {value}")
+    return encoding
+
+
+class StreamDecoder:
+    """
+    Incremental gzip/zstd decoder that refuses to produce more than `max_size` bytes,
+    or more than `max_ratio` times the compressed input once past a small grace size.
+
+    Output is produced in bounded steps, so a decompression bomb is stopped after at
+    most one step beyond the limit instead of being inflated in full. A bomb trips the
+    ratio (`ContentEncodingError`) well before `max_size`; `DecompressedSizeExceeded` is
+    for ordinarily compressed bodies that are simply too large.
+    """
+
+    def __init__(self, encoding: str, max_size: int, max_ratio: int) -> None:
+        self.encoding = encoding
+        self.max_size = max_size
+        self.max_ratio = max_ratio
+        self.compressed_size = 0
+        self.size = 0
+        self._decompressor = self._new_decompressor()
+
+    def _new_decompressor(self):
+        if self.encoding == "gzip":
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def _account(self, data: bytes) -> bytes:
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise DecompressedSizeExceeded(f"Decoded body exceeds {self.max_size} bytes")
+        if self.size > _RATIO_GRACE_BYTES and self.size > self.compressed_size * self.max_ratio:
+            raise ContentEncodingError(f"Compression ratio exceeds {self.max_ratio}:1")
+        return data
+
+    def _next_member(self) -> bytes:
+        # Concatenated gzip members / zstd frames decode as one stream
+        data = self._decompressor.unused_data
+        self._decompressor = self._new_decompressor()
+        return data
+
+    def decompress(self, data: bytes) -> list[bytes]:
+        self.compressed_size += len(data)
+        try:
+            if self.encoding == "gzip":
+                return self._inflate(data)
+            return self._decompress_zstd(data)
+        except (zlib.error, zstandard.ZstdError) as exc:
+            raise ContentEncodingError(f"Invalid {self.encoding} body: {exc}") from exc
+
+    def _inflate(self, data: bytes) -> list[bytes]:
+        pieces = []
+        while data:
+            pieces.append(self._account(self._decompressor.decompress(data, _GZIP_OUTPUT_SIZE)))
+            data = self._decompressor.unconsumed_tail
+            if self._decompressor.eof and self._decompressor.unused_data:
+                data = self._next_member()
+        return [piece for piece in pieces if piece]
+
+    def _decompress_zstd(self, data: bytes) -> list[bytes]:
+        pieces = []
+        view = memoryview(data)
+        offset = 0
+        while offset < len(view):
+            if self._decompressor.eof:
+                # The previous frame ended exactly at the end of the last slice or body message
+                self._decompressor = self._new_decompressor()
+            pieces.append(self._account(self._decompressor.decompress(view[offset:offset + _ZSTD_FEED_SIZE])))
+            offset += _ZSTD_FEED_SIZE
+            while self._decompressor.eof and self._decompressor.unused_data:
+                pieces.append(self._account(self._decompressor.decompress(self._next_member())))
+        return [piece for piece in pieces if piece]
+
+    def finish(self) -> None:
+        """Raise unless the body ended on a complete gzip member or zstd frame."""
+        if not self._decompressor.eof:
+            raise ContentEncodingError(f"Truncated {self.encoding} body")
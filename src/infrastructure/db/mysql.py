@@ -1,8 +1,9 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from core.config import config
-from typing import Self, Generator
+from typing import Self, Generator, AsyncGenerator, Optional, Dict, Any
 
 class MySQLDB:
     _instance: Self = None
@@ -14,9 +15,25 @@ class MySQLDB:
         return cls._instance
 
     def __initialize(self) -> None:
-        self.engine = create_engine(str(config.MYSQL_DATABASE_URL))
+        self.engine = create_engine(str(config.MYSQL_DATABASE_URL), **self._pool_options())
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         self.Base = declarative_base()
+        self._async_engine: Optional[AsyncEngine] = None
+        self._async_session: Optional[async_sessionmaker] = None
+
+    @staticmethod
+    def _pool_options() -> Dict[str, Any]:
+        return dict(pool_size=config.DB_POOL_SIZE, max_overflow=config.DB_MAX_OVERFLOW,
+                    pool_recycle=config.DB_POOL_RECYCLE_SECONDS, pool_timeout=config.DB_POOL_TIMEOUT_SECONDS)
+
+    @property
+    def AsyncSessionLocal(self) -> async_sessionmaker:
+        """Sessions of the aiomysql engine, created on first use so the driver is only needed with `DB_ASYNC_ENABLED`."""
+        if self._async_session is None:
+            self._async_engine = create_async_engine(str(config.MYSQL_ASYNC_DATABASE_URL), **self._pool_options())
+            # Attributes cannot be lazily refreshed after a commit without an await, so they are not expired
+            self._async_session = async_sessionmaker(self._async_engine, autoflush=False, expire_on_commit=False)
+        return self._async_session
 
     def get_db(self) -> Generator[Session, None, None]:
         db = self.SessionLocal()
@@ -24,5 +41,13 @@ class MySQLDB:
             yield db
         finally:
             db.close()
+
+    async def get_async_db(self) -> AsyncGenerator[AsyncSession, None]:
+        async with self.AsyncSessionLocal() as db:
+            yield db
+
+    async def dispose(self) -> None:
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
     
-mysql = MySQLDB()
\ No newline at end of file
+mysql = MySQLDB()
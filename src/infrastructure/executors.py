@@ -0,0 +1,122 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Self, Optional, Dict, Any, Callable, TypeVar
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import config
+
+T = TypeVar("T")
+
+# One bounded pool per blocking dependency, so a slow one cannot take the threads of the others
+DB = "db"
+MINIO = "minio"
+BROKER = "broker"
+FILESYSTEM = "filesystem"
+
+
+class Executors:
+    """
+    Thread pools for the blocking clients used from the event loop, sized by `EXECUTOR_*_WORKERS`.
+
+    Each pool is no larger than the connections its client can use at once (the SQLAlchemy pool,
+    the MinIO HTTP pool), so calls queue here instead of inside the client. CPU-bound work keeps
+    using `run_in_threadpool`.
+    """
+
+    _instance: Self = None
+
+    def __new__(cls: Self) -> Self:
+        if cls._instance == None:
+            cls._instance = super().__new__(cls)
+            cls._instance.__initialize()
+        return cls._instance
+
+    def __initialize(self) -> None:
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._pending: Dict[str, int] = {}
+
+    @staticmethod
+    def _workers(pool: str) -> int:
+        return {
+            DB: config.EXECUTOR_DB_WORKERS,
+            MINIO: config.EXECUTOR_MINIO_WORKERS,
+            BROKER: config.EXECUTOR_BROKER_WORKERS,
+            FILESYSTEM: config.EXECUTOR_FILESYSTEM_WORKERS,
+        }[pool]
+
+    def _pool(self, pool: str) -> ThreadPoolExecutor:
+        if pool not in self._pools:
+            self._pools[pool] = ThreadPoolExecutor(max_workers=self._workers(pool), thread_name_prefix=f"{pool}-io")
+        return self._pools[pool]
+
+    async def run(self, pool: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call `func` in the executor of `pool`, with the caller's context variables."""
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        self._pending[pool] = self._pending.get(pool, 0) + 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(pool), call)
+        finally:
+            self._pending[pool] -= 1
+
+    def shutdown(self) -> None:
+        for executor in self._pools.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            pool: {'workers': self._workers(pool), 'pending': self._pending.get(pool, 0)}
+            for pool in (DB, MINIO, BROKER, FILESYSTEM)
+        }
+
+
+executors = Executors()
+
+
+def _session_lock(session: Any) -> Optional[asyncio.Lock]:
+    """The lock serializing executor calls on a SQLAlchemy session, which is not thread-safe."""
+    info = getattr(session, "info", None)
+    if not isinstance(info, dict):
+        return None
+    return info.setdefault("executor_lock", asyncio.Lock())
+
+
+async def run_in_session(session: Any, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call `func`, which uses `session`, in the DB executor after the session's earlier calls."""
+    lock = _session_lock(session)
+    if lock is None:
+        return await executors.run(DB, func, *args, **kwargs)
+    async with lock:
+        return await executors.run(DB, func, *args, **kwargs)
+
+
+class AsyncProxy:
+    """Awaitable versions of the methods of `target`, each called in the executor of `pool`."""
+
+    def __init__(self, target: Any, pool: str, session: Any = None) -> None:
+        self._target = target
+        self._pool = pool
+        self._session = session
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            if self._pool == DB:
+                return await run_in_session(self._session, attribute, *args, **kwargs)
+            return await executors.run(self._pool, attribute, *args, **kwargs)
+        return call
+
+
+def async_repo(repo: Any) -> Any:
+    """
+    Awaitable versions of a repository's methods, run in the DB executor one at a time per session;
+    repositories on an `AsyncSession` are already awaitable and returned as they are.
+    """
+    session = getattr(repo, "db", None)
+    if isinstance(session, AsyncSession):
+        return repo
+    return AsyncProxy(repo, DB, session=session)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Self, Dict, AsyncIterator, Callable, Awaitable
+from core.config import config
+
+# Buckets idle this long are forgotten; by then they hold no debt worth keeping
+_IDLE_SECONDS = 60.0
+
+
+@dataclass
+class _Bucket:
+    # Time at which the bytes granted so far will have drained at the user's rate
+    drained_at: float
+    streams: int = 0
+
+
+class IngestScheduler:
+    """
+    Per-user token buckets sharing `INGEST_MAX_BYTES_PER_SECOND` evenly among the users with chunk
+    bodies being received.
+
+    A user's streams draw from the same bucket, so parallel streams add no bandwidth. Bytes over
+    the user's share are not rejected: the stream waits before reading more of the body, which
+    pushes back on the client through TCP flow control. Up to `INGEST_BURST_SECONDS` worth of
+    bytes may pass without waiting.
+    """
+
+    _instance: Self = None
+
+    def __new__(cls: Self) -> Self:
+        if cls._instance == None:
+            cls._instance = super().__new__(cls)
+            cls._instance.__initialize()
+        return cls._instance
+
+    def __initialize(self) -> None:
+        self._buckets: Dict[str, _Bucket] = {}
+        self.throttled_seconds = 0.0
+
+    def active_users(self) -> int:
+        return sum(1 for bucket in self._buckets.values() if bucket.streams)
+
+    def _forget_idle(self, now: float) -> None:
+        for key in [key for key, bucket in self._buckets.items()
+                    if not bucket.streams and bucket.drained_at < now - _IDLE_SECONDS]:
+            del self._buckets[key]
+
+    async def _acquire(self, bucket: _Bucket, size: int) -> None:
+        rate = config.INGEST_MAX_BYTES_PER_SECOND / max(self.active_users(), 1)
+        now = time.monotonic()
+        bucket.drained_at = max(bucket.drained_at, now) + size / rate
+        delay = bucket.drained_at - now - config.INGEST_BURST_SECONDS
+        if delay > 0:
+            self.throttled_seconds += delay
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def stream(self, user_key: str) -> AsyncIterator[Callable[[int], Awaitable[None]]]:
+        """
+        Register a body being received for `user_key`; yields a coroutine function to await
+        with the size of each piece read, before reading the next one.
+        """
+        if config.INGEST_MAX_BYTES_PER_SECOND <= 0:
+            async def unlimited(size: int) -> None:
+                return None
+            yield unlimited
+            return
+
+        now = time.monotonic()
+        self._forget_idle(now)
+        bucket = self._buckets.setdefault(user_key, _Bucket(drained_at=now))
+        bucket.streams += 1
+        try:
+            yield lambda size: self._acquire(bucket, size)
+        finally:
+            bucket.streams -= 1
+
+
+ingestScheduler = IngestScheduler()
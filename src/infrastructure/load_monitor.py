@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import re
+from contextlib import contextmanager
+from typing import Self, Optional, Dict, Any, Iterator
+from core.config import config
+from infrastructure.celery import celery
+from infrastructure.executors import executors, BROKER
+
+logger = logging.getLogger(__name__)
+
+# Shed routes, lowest priority first, with the pressure at which each class starts being refused
+LISTING = "listing"
+CHUNK = "chunk"
+COMPLETE = "complete"
+SHED_AT = {LISTING: 1.0, CHUNK: 1.5, COMPLETE: 2.0}
+
+_ROUTE_CLASSES = [
+    (LISTING, "GET", re.compile(r"^/api/v1/(file/appointment/[^/]+|file/all|appointments|users)/?$")),
+    (CHUNK, "POST", re.compile(r"^/api/v1/file/upload(/init|/chunk|/batch)?/?$")),
+    (CHUNK, "PUT", re.compile(r"^/api/v1/file/upload/[^/]+/chunk/[^/]+$")),
+    (COMPLETE, "POST", re.compile(r"^/api/v1/file/upload/(complete|retry)/?$")),
+]
+
+_LAG_INTERVAL_SECONDS = 0.1
+# Weight of the newest lag sample; smooths out single slow iterations
+_LAG_SMOOTHING = 0.3
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """The shedding class of a request; None for requests never shed (downloads, metrics, ...)."""
+    for name, route_method, pattern in _ROUTE_CLASSES:
+        if method == route_method and pattern.match(path):
+            return name
+    return None
+
+
+def celery_queue_depth() -> int:
+    """Messages waiting in the default Celery queue; blocking."""
+    with celery.connection_for_read() as connection:
+        return connection.default_channel.queue_declare(
+            queue=celery.conf.task_default_queue, passive=True).message_count
+
+
+class LoadMonitor:
+    """
+    Overload signals of this API process, and which request classes to shed because of them.
+
+    Pressure is the largest of event-loop lag, Celery queue depth and requests in flight,
+    each as a multiple of its `LOAD_SHED_*` threshold. Listing requests are refused from a
+    pressure of 1, chunk uploads from 1.5 and upload completions from 2, so the work closest
+    to finishing is the last to go.
+    """
+
+    _instance: Self = None
+
+    def __new__(cls: Self) -> Self:
+        if cls._instance == None:
+            cls._instance = super().__new__(cls)
+            cls._instance.__initialize()
+        return cls._instance
+
+    def __initialize(self) -> None:
+        self.lag_ms = 0.0
+        self.queue_depth: Optional[int] = None
+        self.inflight: Dict[str, int] = {name: 0 for name in SHED_AT}
+        self.inflight_total = 0
+        self.shed: Dict[str, int] = {name: 0 for name in SHED_AT}
+
+    def pressure(self) -> float:
+        signals = [self.lag_ms / config.LOAD_SHED_LAG_MS, self.inflight_total / config.LOAD_SHED_MAX_INFLIGHT]
+        if self.queue_depth is not None:
+            signals.append(self.queue_depth / config.LOAD_SHED_QUEUE_DEPTH)
+        return max(signals)
+
+    def should_shed(self, name: Optional[str]) -> bool:
+        """Whether to refuse a request of class `name`, counting the refusal."""
+        if name is None or self.pressure() < SHED_AT[name]:
+            return False
+        self.shed[name] += 1
+        return True
+
+    @contextmanager
+    def track(self, name: Optional[str]) -> Iterator[None]:
+        self.inflight_total += 1
+        if name:
+            self.inflight[name] += 1
+        try:
+            yield
+        finally:
+            self.inflight_total -= 1
+            if name:
+                self.inflight[name] -= 1
+
+    async def run(self) -> None:
+        """Sample event-loop lag continuously and the Celery queue every `LOAD_SHED_QUEUE_POLL_SECONDS`."""
+        await asyncio.gather(self._sample_lag(), self._poll_queue())
+
+    async def _sample_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(_LAG_INTERVAL_SECONDS)
+            lag_ms = max(loop.time() - started - _LAG_INTERVAL_SECONDS, 0) * 1000
+            self.lag_ms += _LAG_SMOOTHING * (lag_ms - self.lag_ms)
+
+    async def _poll_queue(self) -> None:
+        while True:
+            try:
+                self.queue_depth = await executors.run(BROKER, celery_queue_depth)
+            except Exception as exc:
+                # An unreachable broker is not a reason to shed; the other signals still apply
+                logger.warning(f"Could not read the Celery queue depth: {str(exc)}")
+                self.queue_depth = None
+            await asyncio.sleep(config.LOAD_SHED_QUEUE_POLL_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        pressure = self.pressure()
+        return {
+            'enabled': config.LOAD_SHED_ENABLED,
+            'pressure': round(pressure, 3),
+            'lag_ms': round(self.lag_ms, 1),
+            'queue_depth': self.queue_depth,
+            'inflight': dict(self.inflight, total=self.inflight_total),
+            'thresholds': {
+                'lag_ms': config.LOAD_SHED_LAG_MS,
+                'queue_depth': config.LOAD_SHED_QUEUE_DEPTH,
+                'inflight': config.LOAD_SHED_MAX_INFLIGHT,
+            },
+            'shed_at': SHED_AT,
+            'shedding': [name for name, level in SHED_AT.items() if pressure >= level],
+            'shed': dict(self.shed),
+        }
+
+
+loadMonitor = LoadMonitor()
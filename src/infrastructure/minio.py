@@ -1,16 +1,144 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from core.config import config
+from infrastructure.executors import AsyncProxy, MINIO
 from minio import Minio
+from minio.commonconfig import CopySource, REPLACE
 from minio.helpers import ObjectWriteResult
-from typing import Self
+from typing import Self, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import hmac
 import json
-from urllib.parse import urlsplit, urlunsplit
+import threading
+from urllib.parse import quote, urlsplit, urlunsplit
+
+
+class PresignEngine:
+    """
+    Batch SigV4 query-string presigner for path-style (MinIO) endpoints.
+
+    Produces the same URLs as `Minio.get_presigned_url` but keeps the
+    date/region/service signing key for the whole day and reuses the
+    per-bucket canonical request template, so signing a listing is one
+    HMAC per URL instead of five plus a full URL rebuild.
+    """
+
+    SERVICE = "s3"
+    ALGORITHM = "AWS4-HMAC-SHA256"
+
+    def __init__(self, endpoint: str, access_key: str, secret_key: str, secure: bool, region: str) -> None:
+        """
+        :param endpoint: Host and optional port of the S3 service.
+        :param access_key: Access key used in the credential scope.
+        :param secret_key: Secret key the signing key is derived from.
+        :param secure: Sign `https` URLs instead of `http`.
+        :param region: Region of the buckets.
+        """
+        scheme = "https" if secure else "http"
+        url = urlsplit(f"{scheme}://{endpoint}")
+        netloc = url.netloc
+        if (scheme == "http" and url.port == 80) or (scheme == "https" and url.port == 443):
+            netloc = url.hostname
+        self.scheme = scheme
+        self.netloc = netloc
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self._lock = threading.Lock()
+        self._signing_key: Tuple[str, bytes] | None = None
+        self._templates: Dict[str, str] = {}
+
+    def _get_signing_key(self, signer_date: str) -> bytes:
+        cached = self._signing_key
+        if cached and cached[0] == signer_date:
+            return cached[1]
+        with self._lock:
+            date_key = hmac.new(("AWS4" + self.secret_key).encode(), signer_date.encode(), hashlib.sha256).digest()
+            region_key = hmac.new(date_key, self.region.encode(), hashlib.sha256).digest()
+            service_key = hmac.new(region_key, self.SERVICE.encode(), hashlib.sha256).digest()
+            signing_key = hmac.new(service_key, b"aws4_request", hashlib.sha256).digest()
+            self._signing_key = (signer_date, signing_key)
+        return signing_key
+
+    def _get_path_prefix(self, bucket_name: str) -> str:
+        prefix = self._templates.get(bucket_name)
+        if prefix is None:
+            prefix = f"/{bucket_name}/"
+            self._templates[bucket_name] = prefix
+        return prefix
+
+    def presign_batch(self, method: str, bucket_name: str, items: Iterable[Tuple[str, Optional[Dict[str, str]]]],
+                      expires: timedelta = timedelta(days=7), request_date: datetime | None = None) -> List[str]:
+        """
+        Presign many objects of one bucket with a single request date.
+
+        :param method: HTTP method.
+        :param bucket_name: Name of the bucket.
+        :param items: `(object_name, query_params)` pairs; query params carry
+                      response headers, version id and extra parameters.
+        :param expires: Expiry; between 1 second and 7 days.
+        :param request_date: Signing date. Default is current date.
+        :return: List of URL strings in the order of `items`.
+        """
+        seconds = int(expires.total_seconds())
+        if expires.total_seconds() < 1 or expires.total_seconds() > 604800:
+            raise ValueError("expires must be between 1 second to 7 days")
+        date = (request_date or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        signer_date = date.strftime("%Y%m%d")
+        amz_date = date.strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{signer_date}/{self.region}/{self.SERVICE}/aws4_request"
+        signing_key = self._get_signing_key(signer_date)
+
+        # Everything except the path and the caller's parameters is shared by the batch.
+        amz_pairs = [
+            ("X-Amz-Algorithm", self.ALGORITHM),
+            ("X-Amz-Credential", quote(f"{self.access_key}/{scope}", safe="")),
+            ("X-Amz-Date", amz_date),
+            ("X-Amz-Expires", str(seconds)),
+            ("X-Amz-SignedHeaders", "host"),
+        ]
+        amz_query = "&".join(f"{key}={value}" for key, value in amz_pairs)
+        request_suffix = f"\nhost:{self.netloc}\n\nhost\nUNSIGNED-PAYLOAD"
+        string_to_sign_prefix = f"{self.ALGORITHM}\n{amz_date}\n{scope}\n"
+        path_prefix = self._get_path_prefix(bucket_name)
+        base = f"{self.scheme}://{self.netloc}"
+
+        urls = []
+        for object_name, query_params in items:
+            if not object_name:
+                raise ValueError("object name must be a non-empty string")
+            path = path_prefix + quote(object_name, safe="/")
+            pairs = []
+            for key, values in sorted((query_params or {}).items()):
+                values = values if isinstance(values, (list, tuple)) else [values]
+                pairs += [(quote(key, safe=""), quote(value, safe="")) for value in sorted(values)]
+            query = "&".join(f"{key}={value}" for key, value in pairs)
+            query = f"{query}&{amz_query}" if query else amz_query
+            canonical_query = "&".join(f"{key}={value}" for key, value in sorted(pairs + amz_pairs))
+            canonical_request = f"{method}\n{path}\n{canonical_query}{request_suffix}"
+            string_to_sign = string_to_sign_prefix + hashlib.sha256(canonical_request.encode()).hexdigest()
+            signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+            urls.append(f"{base}{path}?{query}&X-Amz-Signature={signature}")
+        return urls
+
+    def presign(self, method: str, bucket_name: str, object_name: str, expires: timedelta = timedelta(days=7),
+                query_params: Optional[Dict[str, str]] = None, request_date: datetime | None = None) -> str:
+        """
+        Presign a single object. See `presign_batch`.
+        """
+        return self.presign_batch(method, bucket_name, [(object_name, query_params)], expires, request_date)[0]
 
 
 class MinioStorage:
 
     _instance: Self = None
 
+    CONTENT_ADDRESSED_PREFIX = "sha256/"
+    # Logical objects stored as a manifest of deduplicated chunks; no object exists under the key itself
+    CHUNKED_PREFIX = "cdc/"
+    CHUNK_PREFIX = "chunks/"
+    # Objects stored zstd-compressed; served only through the download proxy
+    COMPRESSED_SUFFIX = ".zst"
+
     def __new__(cls: Self) -> Self:
         """
         `MinioStorage` class the main entrypoint to use minio
@@ -33,9 +161,18 @@ class MinioStorage:
             access_key=config.MINIO_ACCESS_KEY,
             secret_key=config.MINIO_SECRET_KEY,
             secure=False,
+            region=config.MINIO_REGION,
         )
         self.public_bucket = config.MINIO_PUBLIC_BUCKET
         self.private_bucket = config.MINIO_PRIVATE_BUCKET
+        # If an external endpoint is configured, sign with that endpoint so the Host header
+        # in the signature matches what the browser will request (always HTTPS).
+        if config.MINIO_EXTERNAL_ENDPOINT:
+            self.presigner = PresignEngine(config.MINIO_EXTERNAL_ENDPOINT, config.MINIO_ACCESS_KEY,
+                                           config.MINIO_SECRET_KEY, secure=True, region=config.MINIO_REGION)
+        else:
+            self.presigner = PresignEngine(config.MINIO_ENDPOINT, config.MINIO_ACCESS_KEY,
+                                           config.MINIO_SECRET_KEY, secure=False, region=config.MINIO_REGION)
 
     def setup_buckets(self):
         # This policy allows anyone to read objects from the public bucket
@@ -128,42 +265,135 @@ class MinioStorage:
         :param extra_query_params: Extra query parameters for advanced usage.
         :return: URL string.
         """
-        # If an external endpoint is configured, generate the signature using that endpoint
-        # so the Host header in the signature matches what the browser will request.
-        if config.MINIO_EXTERNAL_ENDPOINT:
-            # Always use HTTPS when generating browser-facing URLs in production
-            external_client = Minio(
-                config.MINIO_EXTERNAL_ENDPOINT,
-                access_key=config.MINIO_ACCESS_KEY,
-                secret_key=config.MINIO_SECRET_KEY,
-                secure=True,
-            )
-            return external_client.get_presigned_url(
-                method,
-                bucket_name,
-                object_name,
-                expires,
-                response_headers,
-                request_date,
-                version_id,
-                extra_query_params,
-            )
-
-        # Default: sign with the internal client/endpoint
-        return self.client.get_presigned_url(
+        return self.presigner.presign(
             method,
             bucket_name,
             object_name,
             expires,
-            response_headers,
+            self._presign_query_params(response_headers, version_id, extra_query_params),
+            request_date,
+        )
+
+    def get_presigned_urls(self, method, bucket_name, items, expires=timedelta(days=7), request_date=None) -> List[str]:
+        """
+        Get presigned URLs for many objects of one bucket in one call.
+
+        :param method: HTTP method.
+        :param bucket_name: Name of the bucket.
+        :param items: Iterable of `(object_name, response_headers, extra_query_params)`.
+        :param expires: Expiry in seconds; defaults to 7 days.
+        :param request_date: Optional request_date shared by the whole batch.
+        :return: List of URL strings in the order of `items`.
+        """
+        return self.presigner.presign_batch(
+            method,
+            bucket_name,
+            [(object_name, self._presign_query_params(response_headers, None, extra_query_params))
+             for object_name, response_headers, extra_query_params in items],
+            expires,
             request_date,
-            version_id,
-            extra_query_params,
         )
 
+    @staticmethod
+    def _presign_query_params(response_headers, version_id, extra_query_params) -> Dict[str, str]:
+        # Same precedence as the SDK: extra params, then version id, then response headers.
+        query_params = dict(extra_query_params or {})
+        query_params.update({"versionId": version_id} if version_id else {})
+        query_params.update(response_headers or {})
+        return query_params
+
+    def stat_object(self, bucket_name, object_name):
+        """
+        Get object information and metadata of an object.
+
+        :param bucket_name: Name of the bucket.
+        :param object_name: Object name in the bucket.
+        :return: :class:`Object` with size, etag, last_modified and content_type.
+        """
+        return self.client.stat_object(bucket_name, object_name)
+
+    def get_object(self, bucket_name, object_name, offset=0, length=0):
+        """
+        Get data of an object. The returned response must be closed and its
+        connection released with `release_conn()` after use.
+
+        :param bucket_name: Name of the bucket.
+        :param object_name: Object name in the bucket.
+        :param offset: Start byte position of object data.
+        :param length: Number of bytes of object data from offset; 0 reads to the end.
+        :return: :class:`urllib3.response.BaseHTTPResponse` object.
+        """
+        return self.client.get_object(bucket_name, object_name, offset=offset, length=length)
+
     def get_url(self, bucket_name, object_name):
         return f"{config.MINIO_URL}/{bucket_name}/{object_name}"
 
+    def get_public_url(self, bucket_name, object_name) -> str:
+        """
+        Unsigned URL of an object in a public-read bucket. It never changes for
+        a given key, so browsers and CDNs can cache content-addressed objects.
+        """
+        if config.MINIO_EXTERNAL_ENDPOINT:
+            return f"https://{config.MINIO_EXTERNAL_ENDPOINT}/{bucket_name}/{quote(object_name)}"
+        return self.get_url(bucket_name, quote(object_name))
+
+    def content_addressed_name(self, sha256: str, extension: str) -> str:
+        """
+        Immutable object name derived from the content hash.
+
+        :param sha256: Hex SHA-256 digest of the object data.
+        :param extension: File extension without the dot.
+        """
+        return f"{self.CONTENT_ADDRESSED_PREFIX}{sha256[:2]}/{sha256}.{extension}"
+
+    def is_content_addressed(self, object_name: str) -> bool:
+        return object_name.startswith(self.CONTENT_ADDRESSED_PREFIX)
+
+    def chunked_name(self, object_name: str) -> str:
+        """Logical object name for a file stored by the chunk store."""
+        return f"{self.CHUNKED_PREFIX}{object_name}"
+
+    def is_chunked(self, object_name: str) -> bool:
+        return object_name.startswith(self.CHUNKED_PREFIX)
+
+    def compressed_name(self, object_name: str) -> str:
+        """Object name for a file stored compressed at rest."""
+        return f"{object_name}{self.COMPRESSED_SUFFIX}"
+
+    def uncompressed_name(self, object_name: str) -> str:
+        return object_name.removesuffix(self.COMPRESSED_SUFFIX)
+
+    def is_compressed(self, object_name: str) -> bool:
+        return object_name.endswith(self.COMPRESSED_SUFFIX)
+
+    def chunk_object_name(self, sha256: str, chunk_id: str) -> str:
+        """
+        Object name of a single content-defined chunk, shared across files in the bucket.
+
+        The chunk row id is part of the key, so a chunk collected and stored again
+        never shares an object with its removed predecessor.
+        """
+        return f"{self.CHUNK_PREFIX}{sha256[:2]}/{sha256}.{chunk_id}"
+
+    def copy_object(self, bucket_name, object_name, source_bucket_name, source_object_name, metadata=None):
+        """
+        Server-side copy of an object, replacing its metadata when given.
+
+        :param bucket_name: Name of the destination bucket.
+        :param object_name: Object name in the destination bucket.
+        :param source_bucket_name: Name of the source bucket.
+        :param source_object_name: Object name in the source bucket.
+        :param metadata: Headers/metadata for the copy; replaces the source metadata.
+        :return: :class:`ObjectWriteResult` object.
+        """
+        return self.client.copy_object(
+            bucket_name,
+            object_name,
+            CopySource(source_bucket_name, source_object_name),
+            metadata=metadata,
+            metadata_directive=REPLACE if metadata else None,
+        )
+
     def remove_object(self, bucket_name, object_name):
         """
         Remove an object from a bucket.
@@ -175,3 +405,5 @@ class MinioStorage:
 
 
 minioStorage = MinioStorage()
+# Awaitable MinioStorage methods, run in the MinIO executor
+asyncMinioStorage = AsyncProxy(minioStorage, MINIO)
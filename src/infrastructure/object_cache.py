@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Self, Dict, Any, Callable, Awaitable, Optional, Set
+from core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Cache files are named by their key, object path hash then ETag hash, so `evict` also finds the
+# entries adopted from an earlier process; anything else in the directory is a leftover
+_ENTRY_NAME = re.compile(r"[0-9a-f]{64}-[0-9a-f]{32}")
+
+
+@dataclass
+class CacheEntry:
+    size: int
+    file_path: str
+
+
+class ObjectCache:
+    """
+    On-disk LRU read-through cache for objects served by the download proxy.
+
+    Entries are keyed by object path and ETag, so a rewritten object is never
+    served stale. Concurrent misses for the same key share a single fetch.
+
+    A path handed out by `get_path` or `lookup` is pinned until `release` is called
+    with it: evicting a pinned entry only drops it from the index, and its file is
+    removed when the last reader releases it.
+
+    Fetches run on the event loop; the index is also changed by `evict` from worker
+    threads, so it is only read or changed under a lock, never held across an await.
+    """
+
+    _instance: Self = None
+
+    def __new__(cls: Self) -> Self:
+        if cls._instance == None:
+            cls._instance = super().__new__(cls)
+            cls._instance.__initialize()
+        return cls._instance
+
+    def __initialize(self) -> None:
+        self.enabled = config.OBJECT_CACHE_ENABLED
+        self.directory = config.OBJECT_CACHE_DIR
+        self.max_bytes = config.OBJECT_CACHE_MAX_BYTES
+        self.max_entry_bytes = min(config.OBJECT_CACHE_MAX_ENTRY_BYTES, self.max_bytes)
+        # Guards the index, pins and counters; `evict` is also called from worker threads
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pins: Dict[str, int] = {}
+        # Files of evicted entries still pinned by a reader
+        self._retired: Set[str] = set()
+        self._fills: Set[asyncio.Task] = set()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            self._adopt_existing()
+
+    def _adopt_existing(self) -> None:
+        """
+        Take over the entries left by an earlier process, least recently used first, and
+        remove partial fetches and entries the current limits no longer allow.
+        """
+        found = []
+        for name in os.listdir(self.directory):
+            file_path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(file_path)
+                if _ENTRY_NAME.fullmatch(name) and stat.st_size <= self.max_entry_bytes:
+                    found.append((stat.st_atime, name, stat.st_size))
+                else:
+                    os.remove(file_path)
+            except OSError as e:
+                logger.warning(f"Failed to prune cached object {file_path}: {str(e)}")
+        with self._lock:
+            for _, key, size in sorted(found):
+                self._entries[key] = CacheEntry(size=size, file_path=os.path.join(self.directory, key))
+                self.current_bytes += size
+            self._evict_to_budget()
+
+    @staticmethod
+    def _path_key(object_path: str) -> str:
+        return hashlib.sha256(object_path.encode()).hexdigest()
+
+    @classmethod
+    def _key(cls, object_path: str, etag: str) -> str:
+        return f"{cls._path_key(object_path)}-{hashlib.sha256(etag.encode()).hexdigest()[:32]}"
+
+    def accepts(self, size: int) -> bool:
+        return self.enabled and size <= self.max_entry_bytes
+
+    def lookup(self, object_path: str, etag: str, size: int) -> Optional[str]:
+        """Return the pinned local path of a cached object, or `None` on a miss."""
+        if not self.accepts(size):
+            return None
+        key = self._key(object_path, etag)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.bytes_saved += entry.size
+            return self._pin(entry.file_path)
+
+    def fill(self, object_path: str, etag: str, size: int, fetch: Callable[[str], Awaitable[None]]) -> None:
+        """Cache an object in the background, without making the caller wait for the fetch."""
+        if not self.accepts(size) or self._key(object_path, etag) in self._inflight:
+            return
+
+        async def run() -> None:
+            try:
+                file_path = await self.get_path(object_path, etag, size, fetch)
+            except Exception as e:
+                logger.warning(f"Failed to cache {object_path}: {str(e)}")
+                return
+            if file_path:
+                self.release(file_path)
+
+        task = asyncio.create_task(run())
+        self._fills.add(task)
+        task.add_done_callback(self._fills.discard)
+
+    async def get_path(self, object_path: str, etag: str, size: int,
+                       fetch: Callable[[str], Awaitable[None]]) -> Optional[str]:
+        """
+        Return the local path of a cached object, fetching it on a miss.
+
+        :param object_path: `bucket/object` path of the object.
+        :param etag: Current ETag of the object.
+        :param size: Object size in bytes.
+        :param fetch: Coroutine function writing the object to the given path.
+        :return: Pinned local file path, or `None` when the object is not cacheable.
+        """
+        if not self.accepts(size):
+            return None
+        key = self._key(object_path, etag)
+
+        while True:
+            file_path = self.lookup(object_path, etag, size)
+            if file_path:
+                return file_path
+
+            pending = self._inflight.get(key)
+            if not pending:
+                break
+            try:
+                await asyncio.shield(pending)
+            except BaseException:
+                if pending.cancelled():
+                    # The request that owned the fetch went away; take over the fetch
+                    continue
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        with self._lock:
+            self.misses += 1
+        file_path = os.path.join(self.directory, key)
+        temp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            await fetch(temp_path)
+            os.replace(temp_path, file_path)
+            with self._lock:
+                # Same key, same content: readers still holding an evicted copy of it now read this one
+                self._retired.discard(file_path)
+                self._entries[key] = CacheEntry(size=size, file_path=file_path)
+                self.current_bytes += size
+                self._pin(file_path)
+                self._evict_to_budget()
+            future.set_result(file_path)
+            return file_path
+        except BaseException as exc:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+                # Mark the exception as retrieved when no other request was waiting for it
+                future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _pin(self, file_path: str) -> str:
+        self._pins[file_path] = self._pins.get(file_path, 0) + 1
+        return file_path
+
+    def release(self, file_path: str) -> None:
+        """Unpin a path returned by `get_path` or `lookup` once its reader is done with it."""
+        with self._lock:
+            pins = self._pins.get(file_path, 0) - 1
+            if pins > 0:
+                self._pins[file_path] = pins
+                return
+            self._pins.pop(file_path, None)
+            if file_path in self._retired:
+                self._retired.discard(file_path)
+                self._delete(file_path)
+
+    def evict(self, object_path: str) -> None:
+        """Drop every cached version of an object; callable from any thread."""
+        prefix = f"{self._path_key(object_path)}-"
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def _evict_to_budget(self) -> None:
+        while self.current_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+        if self._pins.get(entry.file_path):
+            self._retired.add(entry.file_path)
+        else:
+            self._delete(entry.file_path)
+
+    @staticmethod
+    def _delete(file_path: str) -> None:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove cached object {file_path}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'pinned': len(self._pins),
+                'bytes_cached': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'evictions': self.evictions,
+            }
+
+
+objectCache = ObjectCache()
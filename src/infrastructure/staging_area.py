@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Self, Optional, Dict, Any
+from core.config import config
+from infrastructure.upload_admission import uploadAdmission
+from infrastructure.task_dispatcher import DISPATCH_FILE
+from infrastructure.upload_session import COMPLETED_FILE
+from infrastructure.executors import executors, FILESYSTEM
+
+logger = logging.getLogger(__name__)
+
+# Files rebuilt from the staged chunks whenever they are needed again
+ARTIFACTS = ("assembled_for_scan", "final_file", "final_file.zst")
+
+
+@dataclass
+class StagedUpload:
+    path: str
+    last_activity: float
+    size: int
+    # Completed, with its upload task waiting to be sent or running
+    accepted: bool = False
+
+
+class StagingArea:
+    """
+    Janitor for the chunk staging area in `APP_UPLOAD_DIR`.
+
+    Each sweep removes artifacts left by interrupted completions and upload tasks, expires
+    upload directories idle for `STAGING_SESSION_TTL_SECONDS`, and, while free space is below
+    the high watermark, also expires the least recently active ones idle for
+    `STAGING_PRESSURE_TTL_SECONDS`. Below the low watermark no new uploads are accepted.
+    """
+
+    _instance: Self = None
+
+    def __new__(cls: Self) -> Self:
+        if cls._instance == None:
+            cls._instance = super().__new__(cls)
+            cls._instance.__initialize()
+        return cls._instance
+
+    def __initialize(self) -> None:
+        self.sweeps = 0
+        self.sessions_removed = 0
+        self.artifacts_removed = 0
+        self.bytes_freed = 0
+        self.last_sweep: Optional[float] = None
+
+    def free_percent(self) -> float:
+        usage = shutil.disk_usage(config.APP_UPLOAD_DIR)
+        return 100 * usage.free / usage.total
+
+    def accepts_uploads(self) -> bool:
+        try:
+            return self.free_percent() >= config.STAGING_LOW_WATERMARK_FREE_PERCENT
+        except OSError:
+            # No staging volume yet; staging will fail on its own if it cannot be created
+            return True
+
+    def _scan(self, path: str, now: float) -> StagedUpload:
+        """Size and last activity of an upload directory, removing stale artifacts on the way."""
+        # Not the directory's own mtime, which removing artifacts would bump
+        last_activity = None
+        size = 0
+        accepted = False
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                stale = now - stat.st_mtime > config.STAGING_ARTIFACT_TTL_SECONDS
+                if stale and (entry.name in ARTIFACTS or entry.name.endswith(".tmp")):
+                    self._remove(entry.path)
+                    self.artifacts_removed += 1
+                    self.bytes_freed += stat.st_size
+                    continue
+                accepted = accepted or entry.name in (DISPATCH_FILE, COMPLETED_FILE)
+                if entry.name not in ARTIFACTS:
+                    last_activity = max(last_activity or 0, stat.st_mtime)
+                size += stat.st_size
+        if last_activity is None:
+            last_activity = os.stat(path).st_mtime
+        return StagedUpload(path=path, last_activity=last_activity, size=size, accepted=accepted)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _expire(self, upload: StagedUpload, reason: str) -> None:
+        logger.info(f"Expiring staged upload {os.path.basename(upload.path)} ({upload.size} bytes, {reason})")
+        self._remove(upload.path)
+        self.sessions_removed += 1
+        self.bytes_freed += upload.size
+
+    def sweep(self, now: Optional[float] = None) -> None:
+        """One janitor pass over the staging area; blocking, run it off the event loop."""
+        now = time.time() if now is None else now
+        uploads = []
+        try:
+            with os.scandir(config.APP_UPLOAD_DIR) as entries:
+                # Dot directories are not uploads, e.g. the task dispatcher's queue
+                paths = [entry.path for entry in entries
+                         if entry.is_dir(follow_symlinks=False) and not entry.name.startswith(".")]
+        except FileNotFoundError:
+            return
+        for path in paths:
+            try:
+                upload = self._scan(path, now)
+            except FileNotFoundError:
+                # Completed and removed by its upload task meanwhile
+                continue
+            if upload.accepted:
+                # Accepted uploads are never expired, however long their task waits
+                continue
+            if now - upload.last_activity > config.STAGING_SESSION_TTL_SECONDS:
+                self._expire(upload, "idle")
+            else:
+                uploads.append(upload)
+
+        uploads.sort(key=lambda upload: upload.last_activity)
+        for upload in uploads:
+            if self.free_percent() >= config.STAGING_HIGH_WATERMARK_FREE_PERCENT:
+                break
+            if now - upload.last_activity > config.STAGING_PRESSURE_TTL_SECONDS:
+                self._expire(upload, "disk pressure")
+
+        uploadAdmission.release_missing()
+        self.sweeps += 1
+        self.last_sweep = now
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            free_percent = round(self.free_percent(), 2)
+        except OSError:
+            free_percent = None
+        return {
+            'free_percent': free_percent,
+            'accepting_uploads': self.accepts_uploads(),
+            'sweeps': self.sweeps,
+            'sessions_removed': self.sessions_removed,
+            'artifacts_removed': self.artifacts_removed,
+            'bytes_freed': self.bytes_freed,
+        }
+
+    async def run(self) -> None:
+        """Sweep every `STAGING_JANITOR_INTERVAL_SECONDS` until cancelled."""
+        while True:
+            try:
+                await executors.run(FILESYSTEM, self.sweep)
+            except Exception as exc:
+                logger.error(f"Staging janitor sweep failed: {str(exc)}")
+            await asyncio.sleep(config.STAGING_JANITOR_INTERVAL_SECONDS)
+
+
+stagingArea = StagingArea()
@@ -0,0 +1,263 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, asdict, field
+from typing import Self, Optional, Dict, Any, Deque, List
+from celery import states
+from core.config import config
+from infrastructure.celery import celery
+from infrastructure.executors import executors, BROKER, FILESYSTEM
+
+logger = logging.getLogger(__name__)
+
+# Kept in the staging directory of an upload while its task waits to be sent, so a restart resends it
+DISPATCH_FILE = "dispatch.json"
+# Where waiting tasks without a staging directory are kept instead, e.g. retries of stored uploads;
+# under APP_UPLOAD_DIR, which upload ids never start with a dot in
+QUEUE_DIR = ".dispatch"
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+
+@dataclass
+class QueuedTask:
+    task_id: str
+    task_name: str
+    tenant: str
+    size: int
+    kwargs: Dict[str, Any]
+    upload_id: Optional[str] = None
+    queued_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def lane(self) -> str:
+        return INTERACTIVE if self.size <= config.TASK_FAIR_QUEUE_INTERACTIVE_MAX_BYTES else BULK
+
+    def _paths(self) -> List[str]:
+        """Where the task may be kept: its upload's staging directory, then the queue directory."""
+        paths = [os.path.join(config.APP_UPLOAD_DIR, QUEUE_DIR, f"{self.task_id}.json")]
+        if self.upload_id:
+            paths.insert(0, os.path.join(config.APP_UPLOAD_DIR, self.upload_id, DISPATCH_FILE))
+        return paths
+
+    def save(self) -> None:
+        path = self._paths()[0]
+        if not os.path.isdir(os.path.dirname(path)):
+            path = self._paths()[-1]
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as dispatch_file:
+            json.dump({key: value for key, value in asdict(self).items() if key != "queued_at"}, dispatch_file)
+
+    def discard(self) -> None:
+        for path in self._paths():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def load(cls, path: str) -> Optional["QueuedTask"]:
+        try:
+            with open(path) as dispatch_file:
+                return cls(**json.load(dispatch_file))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+
+class TaskDispatcher:
+    """
+    Fair queue in front of the Celery broker for per-user background tasks.
+
+    Tasks wait here, one FIFO per tenant, and are sent to the broker only while fewer than
+    `TASK_FAIR_QUEUE_WINDOW` of them are unfinished, so one user's burst cannot build a
+    broker backlog everyone else queues behind. Tenants are served round robin and never have
+    more than `TASK_FAIR_QUEUE_MAX_PER_TENANT` tasks unfinished. Both limits are counted by each
+    API process on its own. Tasks for files of up to
+    `TASK_FAIR_QUEUE_INTERACTIVE_MAX_BYTES` go through an interactive lane that gets
+    `TASK_FAIR_QUEUE_INTERACTIVE_WEIGHT` dispatches for each bulk one and
+    `TASK_FAIR_QUEUE_INTERACTIVE_RESERVED` slots of the window bulk tasks cannot take.
+    """
+
+    _instance: Self = None
+
+    def __new__(cls: Self) -> Self:
+        if cls._instance == None:
+            cls._instance = super().__new__(cls)
+            cls._instance.__initialize()
+        return cls._instance
+
+    def __initialize(self) -> None:
+        self._queues: Dict[str, OrderedDict[str, Deque[QueuedTask]]] = {INTERACTIVE: OrderedDict(), BULK: OrderedDict()}
+        # Sent and unfinished tasks, with the time they were sent
+        self._running: Dict[str, tuple[QueuedTask, float]] = {}
+        self._running_per_tenant: Dict[str, int] = {}
+        self._interactive_streak = 0
+        self._wakeup = asyncio.Event()
+        self.dispatched = {INTERACTIVE: 0, BULK: 0}
+        self.max_wait_seconds = {INTERACTIVE: 0.0, BULK: 0.0}
+
+    async def submit(self, task: Any, tenant: str, size: int, kwargs: Dict[str, Any], upload_id: Optional[str] = None,
+                     task_id: Optional[str] = None) -> str:
+        """
+        Queue a call of the Celery `task` for `tenant`; returns its task id, which is valid right away.
+        The call is kept on disk until it is sent: in the staging directory of `upload_id` while
+        there is one, otherwise in the queue directory.
+        """
+        queued = QueuedTask(task_id=task_id or str(uuid.uuid4()), task_name=task.name, tenant=tenant, size=size,
+                            kwargs=kwargs, upload_id=upload_id)
+        if not config.TASK_FAIR_QUEUE_ENABLED:
+            await executors.run(BROKER, self._send, queued)
+            return queued.task_id
+        await executors.run(FILESYSTEM, queued.save)
+        self._enqueue(queued)
+        return queued.task_id
+
+    def _enqueue(self, queued: QueuedTask, front: bool = False) -> None:
+        tenants = self._queues[queued.lane]
+        tasks = tenants.setdefault(queued.tenant, deque())
+        if front:
+            tasks.appendleft(queued)
+        else:
+            tasks.append(queued)
+        self._wakeup.set()
+
+    def restore_from_staging(self) -> None:
+        """Queue again the tasks that were not sent before the process stopped; blocking."""
+        try:
+            paths = [os.path.join(entry.path, DISPATCH_FILE) for entry in os.scandir(config.APP_UPLOAD_DIR)
+                     if entry.is_dir() and entry.name != QUEUE_DIR]
+        except FileNotFoundError:
+            return
+        try:
+            paths += [entry.path for entry in os.scandir(os.path.join(config.APP_UPLOAD_DIR, QUEUE_DIR))]
+        except FileNotFoundError:
+            pass
+        restored = 0
+        for path in paths:
+            queued = QueuedTask.load(path)
+            if queued:
+                self._enqueue(queued)
+                restored += 1
+        logger.info(f"Restored {restored} queued background tasks")
+
+    def _eligible(self, lane: str) -> Optional[str]:
+        """The next tenant of `lane` in round-robin order that is under its cap."""
+        for tenant in self._queues[lane]:
+            if self._running_per_tenant.get(tenant, 0) < config.TASK_FAIR_QUEUE_MAX_PER_TENANT:
+                return tenant
+        return None
+
+    def next_task(self, now: Optional[float] = None) -> Optional[QueuedTask]:
+        """Take the next task to send, counting it as running; None when the window or every tenant is full."""
+        if len(self._running) >= config.TASK_FAIR_QUEUE_WINDOW:
+            return None
+        bulk_slots = config.TASK_FAIR_QUEUE_WINDOW - config.TASK_FAIR_QUEUE_INTERACTIVE_RESERVED
+        running_bulk = sum(1 for queued, _ in self._running.values() if queued.lane == BULK)
+        interactive = self._eligible(INTERACTIVE)
+        bulk = self._eligible(BULK) if running_bulk < bulk_slots else None
+        if interactive and (not bulk or self._interactive_streak < config.TASK_FAIR_QUEUE_INTERACTIVE_WEIGHT):
+            lane, tenant = INTERACTIVE, interactive
+            self._interactive_streak += 1
+        elif bulk:
+            lane, tenant = BULK, bulk
+            self._interactive_streak = 0
+        else:
+            return None
+
+        tenants = self._queues[lane]
+        queued = tenants[tenant].popleft()
+        if tenants[tenant]:
+            tenants.move_to_end(tenant)
+        else:
+            del tenants[tenant]
+        now = time.monotonic() if now is None else now
+        # A retry of a task whose end was not polled yet
+        self.finished(queued.task_id)
+        self._running[queued.task_id] = (queued, now)
+        self._running_per_tenant[tenant] = self._running_per_tenant.get(tenant, 0) + 1
+        self.dispatched[lane] += 1
+        self.max_wait_seconds[lane] = max(self.max_wait_seconds[lane], now - queued.queued_at)
+        return queued
+
+    def finished(self, task_id: str) -> None:
+        running = self._running.pop(task_id, None)
+        if running is None:
+            return
+        tenant = running[0].tenant
+        self._running_per_tenant[tenant] -= 1
+        if not self._running_per_tenant[tenant]:
+            del self._running_per_tenant[tenant]
+        self._wakeup.set()
+
+    def _unsent(self, queued: QueuedTask) -> None:
+        """Put back a task the broker did not take, ahead of its tenant's other tasks."""
+        self.finished(queued.task_id)
+        self.dispatched[queued.lane] -= 1
+        self._enqueue(queued, front=True)
+
+    @staticmethod
+    def _send(queued: QueuedTask) -> None:
+        celery.send_task(queued.task_name, kwargs=queued.kwargs, task_id=queued.task_id)
+
+    @staticmethod
+    def _finished_task_ids(running: List[tuple[str, float]], now: float) -> List[str]:
+        """Of the running tasks (task id, time sent), those that finished or ran past their lease; blocking."""
+        finished = []
+        for task_id, sent_at in running:
+            # A lost result must not hold its slot forever. Any state past the unready ones is final,
+            # custom ones like CORRUPTED included, which `ready()` does not count as finished
+            if now - sent_at > config.TASK_FAIR_QUEUE_LEASE_SECONDS \
+                    or celery.AsyncResult(task_id).state not in states.UNREADY_STATES:
+                finished.append(task_id)
+        return finished
+
+    async def _dispatch(self) -> None:
+        while queued := self.next_task():
+            try:
+                await executors.run(BROKER, self._send, queued)
+            except Exception as exc:
+                logger.error(f"Sending task {queued.task_id} to the broker failed: {str(exc)}")
+                self._unsent(queued)
+                return
+            await executors.run(FILESYSTEM, queued.discard)
+
+    async def run(self) -> None:
+        """Send queued tasks as the window allows until cancelled, polling for finished tasks every
+        `TASK_FAIR_QUEUE_POLL_SECONDS`."""
+        # Bound to the running loop; submissions before it only needed the flag
+        self._wakeup = asyncio.Event()
+        while True:
+            self._wakeup.clear()
+            try:
+                running = [(task_id, sent_at) for task_id, (_, sent_at) in self._running.items()]
+                for task_id in await executors.run(BROKER, self._finished_task_ids, running, time.monotonic()):
+                    self.finished(task_id)
+                await self._dispatch()
+            except Exception as exc:
+                logger.error(f"Task dispatch failed: {str(exc)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), config.TASK_FAIR_QUEUE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        queued = {lane: sum(len(tasks) for tasks in tenants.values()) for lane, tenants in self._queues.items()}
+        return {
+            'enabled': config.TASK_FAIR_QUEUE_ENABLED,
+            'queued': queued,
+            'waiting_tenants': len(set().union(*self._queues.values())),
+            'running': len(self._running),
+            'running_tenants': len(self._running_per_tenant),
+            'window': config.TASK_FAIR_QUEUE_WINDOW,
+            'max_per_tenant': config.TASK_FAIR_QUEUE_MAX_PER_TENANT,
+            'dispatched': dict(self.dispatched),
+            'max_wait_seconds': {lane: round(wait, 3) for lane, wait in self.max_wait_seconds.items()},
+        }
+
+
+taskDispatcher = TaskDispatcher()
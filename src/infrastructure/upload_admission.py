@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Self, Optional, Dict, Any
+from core.config import config
+from infrastructure.upload_session import UploadSession
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Reserving the upload would exceed the in-flight budget named by `scope` ("global" or "user")."""
+
+    def __init__(self, scope: str) -> None:
+        self.scope = scope
+        super().__init__(f"In-flight upload budget exceeded ({scope})")
+
+
+@dataclass
+class Reservation:
+    upload_id: str
+    user_id: Optional[str]
+    size: int
+    # Decoded size of each staged chunk; the reservation grows when they add up to more
+    chunks: Dict[int, int] = field(default_factory=dict)
+
+
+class UploadAdmission:
+    """
+    In-flight byte budget for chunked uploads, global and per user.
+
+    `upload_initialize` reserves the declared size of each upload, or one chunk when no size
+    is declared, and each staged chunk is charged against it, growing the reservation when the
+    staged bytes outgrow it. The reservation lasts as long as its staging directory, which the
+    upload task removes once the file is stored and the staging janitor removes when the upload
+    is abandoned. Reservations of removed directories are dropped by each janitor sweep, and on
+    demand when a budget is exceeded. A budget of 0 is unlimited.
+    """
+
+    _instance: Self = None
+
+    def __new__(cls: Self) -> Self:
+        if cls._instance == None:
+            cls._instance = super().__new__(cls)
+            cls._instance.__initialize()
+        return cls._instance
+
+    def __initialize(self) -> None:
+        # Also used from the janitor's worker thread
+        self._lock = threading.Lock()
+        self._reservations: Dict[str, Reservation] = {}
+        self._user_bytes: Dict[str, int] = {}
+        self.reserved_bytes = 0
+        self.admitted = 0
+        self.rejected_global = 0
+        self.rejected_user = 0
+
+    @staticmethod
+    def _over(budget: int, reserved: int, size: int) -> bool:
+        return budget > 0 and reserved + size > budget
+
+    def _rejection(self, user_id: Optional[str], size: int) -> Optional[str]:
+        if self._over(config.UPLOAD_INFLIGHT_MAX_BYTES, self.reserved_bytes, size):
+            return "global"
+        if user_id and self._over(config.UPLOAD_INFLIGHT_MAX_BYTES_PER_USER, self._user_bytes.get(user_id, 0), size):
+            return "user"
+        return None
+
+    @staticmethod
+    def fits(size: int) -> bool:
+        """Whether an upload of `size` bytes could ever be admitted, with nothing else in flight."""
+        budgets = [budget for budget in (config.UPLOAD_INFLIGHT_MAX_BYTES, config.UPLOAD_INFLIGHT_MAX_BYTES_PER_USER)
+                   if budget > 0]
+        return all(size <= budget for budget in budgets)
+
+    def _admit(self, user_id: Optional[str], size: int) -> None:
+        scope = self._rejection(user_id, size)
+        if scope:
+            # Budgets may only look exhausted because finished uploads were not swept yet
+            self._release_missing()
+            scope = self._rejection(user_id, size)
+        if scope:
+            if scope == "global":
+                self.rejected_global += 1
+            else:
+                self.rejected_user += 1
+            raise AdmissionRejected(scope)
+
+    def reserve(self, upload_id: str, user_id: Optional[str], size: int) -> None:
+        """
+        Reserve `size` bytes for an upload, or raise `AdmissionRejected` when a budget is
+        exhausted; blocking.
+        """
+        with self._lock:
+            self._admit(user_id, size)
+            self._add(Reservation(upload_id=upload_id, user_id=user_id, size=size))
+            self.admitted += 1
+
+    def charge(self, upload_id: str, user_id: Optional[str], chunk_index: int, size: int) -> None:
+        """
+        Count a staged chunk of `size` bytes against its upload's reservation, replacing an earlier
+        copy of the chunk. Raise `AdmissionRejected` when the reservation would have to grow past
+        a budget; blocking.
+        """
+        with self._lock:
+            reservation = self._reservations.get(upload_id) or Reservation(upload_id=upload_id, user_id=user_id, size=0)
+            chunks = {**reservation.chunks, chunk_index: size}
+            growth = max(sum(chunks.values()) - reservation.size, 0)
+            if growth:
+                self._admit(reservation.user_id, growth)
+            self._release(upload_id)
+            self._add(Reservation(upload_id=upload_id, user_id=reservation.user_id, size=reservation.size + growth,
+                                  chunks=chunks))
+
+    def restore(self, upload_id: str, user_id: Optional[str], size: int, chunks: Optional[Dict[int, int]] = None) -> None:
+        """Track an upload staged before this process started, whatever the budgets."""
+        with self._lock:
+            if upload_id not in self._reservations:
+                chunks = chunks or {}
+                self._add(Reservation(upload_id=upload_id, user_id=user_id, size=max(size, sum(chunks.values())),
+                                      chunks=chunks))
+
+    def _add(self, reservation: Reservation) -> None:
+        self._reservations[reservation.upload_id] = reservation
+        self.reserved_bytes += reservation.size
+        if reservation.user_id:
+            self._user_bytes[reservation.user_id] = self._user_bytes.get(reservation.user_id, 0) + reservation.size
+
+    def restore_from_staging(self) -> None:
+        """Reserve the uploads already staged, e.g. by a previous process; blocking."""
+        try:
+            upload_ids = [entry.name for entry in os.scandir(config.APP_UPLOAD_DIR)
+                          if entry.is_dir() and not entry.name.startswith(".")]
+        except FileNotFoundError:
+            return
+        for upload_id in upload_ids:
+            upload_dir = os.path.join(config.APP_UPLOAD_DIR, upload_id)
+            session = UploadSession.load(upload_dir)
+            if session:
+                self.restore(upload_id, session.user_id, session.total_size or session.chunk_size,
+                             self._staged_chunks(upload_dir))
+        logger.info(f"Restored {len(self._reservations)} in-flight upload reservations ({self.reserved_bytes} bytes)")
+
+    @staticmethod
+    def _staged_chunks(upload_dir: str) -> Dict[int, int]:
+        chunks = {}
+        for entry in os.scandir(upload_dir):
+            index, _, suffix = entry.name.partition(".")
+            if suffix == "part" and index.isdigit():
+                chunks[int(index)] = entry.stat().st_size
+        return chunks
+
+    def release(self, upload_id: str) -> None:
+        with self._lock:
+            self._release(upload_id)
+
+    def _release(self, upload_id: str) -> None:
+        reservation = self._reservations.pop(upload_id, None)
+        if reservation is None:
+            return
+        self.reserved_bytes -= reservation.size
+        if reservation.user_id:
+            remaining = self._user_bytes[reservation.user_id] - reservation.size
+            if remaining:
+                self._user_bytes[reservation.user_id] = remaining
+            else:
+                del self._user_bytes[reservation.user_id]
+
+    def release_missing(self) -> None:
+        """Drop the reservations of uploads whose staging directory is gone."""
+        with self._lock:
+            self._release_missing()
+
+    def _release_missing(self) -> None:
+        for upload_id in list(self._reservations):
+            if not os.path.isdir(os.path.join(config.APP_UPLOAD_DIR, upload_id)):
+                self._release(upload_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'reservations': len(self._reservations),
+                'reserved_bytes': self.reserved_bytes,
+                'max_bytes': config.UPLOAD_INFLIGHT_MAX_BYTES,
+                'users': len(self._user_bytes),
+                'max_bytes_per_user': config.UPLOAD_INFLIGHT_MAX_BYTES_PER_USER,
+                'admitted': self.admitted,
+                'rejected_global': self.rejected_global,
+                'rejected_user': self.rejected_user,
+            }
+
+
+uploadAdmission = UploadAdmission()
@@ -0,0 +1,108 @@
+import json
+import math
+import os
+from dataclasses import dataclass, asdict
+from typing import Optional
+from core.config import config
+
+# S3/MinIO multipart limits
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10_000
+
+SESSION_FILE = "session.json"
+# Present from completion until the upload task stores the upload, which removes the directory,
+# or gives up on it; the staging janitor never expires a directory holding it
+COMPLETED_FILE = "completed"
+
+_ALIGN = 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """The declared size cannot be uploaded within the chunk size and part count limits."""
+
+
+@dataclass
+class UploadSession:
+    """Upload parameters negotiated at init, kept in the staging directory to validate later calls."""
+    chunk_size: int
+    parallel_streams: int
+    total_size: Optional[int] = None
+    total_chunks: Optional[int] = None
+    content_type: Optional[str] = None
+    user_id: Optional[str] = None
+
+    def save(self, upload_dir: str) -> None:
+        with open(os.path.join(upload_dir, SESSION_FILE), "w") as session_file:
+            json.dump(asdict(self), session_file)
+
+    @classmethod
+    def load(cls, upload_dir: str) -> Optional["UploadSession"]:
+        """The session of a staging directory; None for uploads initialized without one."""
+        try:
+            with open(os.path.join(upload_dir, SESSION_FILE)) as session_file:
+                return cls(**json.load(session_file))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+
+def mark_completed(upload_dir: str) -> None:
+    """Record that the upload in `upload_dir` is handed to its task; a no-op once the directory is gone."""
+    try:
+        open(os.path.join(upload_dir, COMPLETED_FILE), "w").close()
+    except FileNotFoundError:
+        pass
+
+
+def clear_completed(upload_dir: str) -> None:
+    """Let the janitor expire `upload_dir` again, e.g. after its task failed."""
+    try:
+        os.remove(os.path.join(upload_dir, COMPLETED_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def _round_up(size: int, multiple: int) -> int:
+    return -(-size // multiple) * multiple
+
+
+def server_load() -> float:
+    """One-minute load average per CPU; 0 where the platform does not report it."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+def negotiate(total_size: Optional[int], content_type: Optional[str] = None,
+              load: Optional[float] = None) -> UploadSession:
+    """
+    Pick the chunk size and parallel streams for an upload of `total_size` bytes.
+
+    Files that fit in `APP_MAX_CHUNK_SIZE` are sent as a single chunk of their own size.
+    Larger files aim at `UPLOAD_TARGET_CHUNKS` chunks of whole MiB, no smaller than a
+    multipart part (5 MiB) nor larger than `UPLOAD_MAX_CHUNK_SIZE`, and never more than
+    10,000 of them. Streams shrink from `UPLOAD_MAX_PARALLEL_STREAMS` to one as the
+    server load approaches one runnable process per CPU.
+    """
+    load = server_load() if load is None else load
+    streams = max(1, math.ceil(config.UPLOAD_MAX_PARALLEL_STREAMS * min(max(1 - load, 0), 1)))
+    if total_size is None:
+        return UploadSession(chunk_size=config.APP_MAX_CHUNK_SIZE, parallel_streams=streams, content_type=content_type)
+    if total_size <= config.APP_MAX_CHUNK_SIZE:
+        return UploadSession(chunk_size=max(total_size, 1), parallel_streams=1, total_size=total_size,
+                             total_chunks=1, content_type=content_type)
+
+    floor = max(config.APP_MAX_CHUNK_SIZE, MIN_PART_SIZE)
+    ceiling = max(config.UPLOAD_MAX_CHUNK_SIZE, floor)
+    chunk_size = _round_up(math.ceil(total_size / config.UPLOAD_TARGET_CHUNKS), _ALIGN)
+    chunk_size = min(max(chunk_size, floor), ceiling)
+    total_chunks = math.ceil(total_size / chunk_size)
+    if total_chunks > MAX_PARTS:
+        raise UploadTooLarge(f"{total_size} bytes need more than {MAX_PARTS} chunks of {ceiling} bytes")
+    return UploadSession(chunk_size=chunk_size, parallel_streams=min(streams, total_chunks), total_size=total_size,
+                         total_chunks=total_chunks, content_type=content_type)
+
+
+def multipart_part_size(size: int, default: int) -> int:
+    """Part size for storing an object of `size` bytes in at most 10,000 parts, `default` when that suffices."""
+    return max(default, _round_up(math.ceil(size / MAX_PARTS), _ALIGN))
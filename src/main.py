@@ -1,12 +1,22 @@
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
-from api.routes import file, appointment, user
+from api.routes import file, appointment, user, metrics
 from exceptions.handler import ExceptionHandler
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from contextlib import asynccontextmanager
 from infrastructure.minio import minioStorage
+from infrastructure.staging_area import stagingArea
+from infrastructure.upload_admission import uploadAdmission
+from infrastructure.load_monitor import loadMonitor
+from infrastructure.task_dispatcher import taskDispatcher
+from infrastructure.executors import executors
+from infrastructure.blocking_detector import blockingDetector
+from api.load_shedding import LoadSheddingMiddleware
+from fastapi.concurrency import run_in_threadpool
+from core.config import config
 from api.responses.response import ErrorResponse
+import asyncio
 import logging
 import traceback
 import sys
@@ -48,13 +58,26 @@ async def lifespan(app: FastAPI):
     finally:
         db_session.close()
         
+    await run_in_threadpool(uploadAdmission.restore_from_staging)
+    await run_in_threadpool(taskDispatcher.restore_from_staging)
+    janitor = asyncio.create_task(stagingArea.run()) if config.STAGING_JANITOR_ENABLED else None
+    monitor = asyncio.create_task(loadMonitor.run()) if config.LOAD_SHED_ENABLED else None
+    dispatcher = asyncio.create_task(taskDispatcher.run()) if config.TASK_FAIR_QUEUE_ENABLED else None
+    detector = asyncio.create_task(blockingDetector.run()) if config.BLOCKING_DETECTOR_MS > 0 else None
     yield
-    # Code to run on shutdown could go here if needed.
+    for task in (janitor, monitor, dispatcher, detector):
+        if task:
+            task.cancel()
+    executors.shutdown()
+    await mysql.dispose()
 
 
 def create_application() -> FastAPI:
     app = FastAPI(lifespan=lifespan)
 
+    # Innermost, so shed responses still get CORS headers
+    app.add_middleware(LoadSheddingMiddleware)
+
     # Honor X-Forwarded-Proto/For from Caddy so generated redirects use https
     app.add_middleware(ProxyHeadersMiddleware)
 
@@ -69,6 +92,8 @@ def create_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Paginated listings return the next page's cursor in a header
+        expose_headers=["X-Next-Cursor"],
     )
     
     # Global exception handler to ensure CORS headers are always present
@@ -98,6 +123,7 @@ def create_application() -> FastAPI:
     app.include_router(file.router)
     app.include_router(appointment.router)
     app.include_router(user.router)
+    app.include_router(metrics.router)
     ExceptionHandler(app)
     return app
 
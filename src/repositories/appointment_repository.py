@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Session
-from .base_repository import BaseRepo
+from .base_repository import BaseRepo, keyset_after
+from .file_repository import with_files
 from entities.appointment import Appointment
 from dto.appointment_dto import AppointmentCreate
-from typing import List
+from typing import List, Optional, Tuple
+from datetime import datetime
 
 class AppointmentRepo(BaseRepo[Appointment]):
     def __init__(self, db: Session):
@@ -15,11 +17,24 @@ class AppointmentRepo(BaseRepo[Appointment]):
     def get_appointment_by_name(self, name: str) -> Appointment:
         return self.db.query(self.model).filter(self.model.name == name).first()
 
-    def list_appointments(self, user_id: str) -> List[Appointment]:
-        return self.db.query(self.model).filter(self.model.user_id == user_id).all()
+    def list_appointments(self, user_id: str, limit: int, after: Optional[Tuple[datetime, str]] = None) -> List[Appointment]:
+        """Up to `limit` of a user's appointments after the `(date, id)` of `after`."""
+        return (
+            self.db
+            .query(self.model)
+            .filter(self.model.user_id == user_id, keyset_after(self.model.date, self.model.id, after))
+            .order_by(self.model.date, self.model.id)
+            .limit(limit)
+            .all()
+        )
+
+    def get_with_files(self, appointment_id: str) -> Appointment:
+        """An appointment with its files, for deleting them; their JSON columns are not loaded."""
+        # Taken from the session without a query when the caller already loaded it
+        return self.db.get(self.model, appointment_id, options=[with_files(self.model.files)])
 
     def delete_appointment(self, appointment_id: str) -> Appointment:
-        appointment = self.get(id=appointment_id)
+        appointment = self.get_with_files(appointment_id)
         if appointment:
             self.db.delete(appointment)
             self.db.commit()
@@ -0,0 +1,43 @@
+from typing import Type, Generic, TypeVar
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+import logging
+import traceback
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class AsyncBaseRepo(Generic[T]):
+    """`BaseRepo` on an `AsyncSession`; every method is a coroutine."""
+
+    def __init__(self, model: Type[T], db: AsyncSession) -> None:
+        self.model = model
+        self.db = db
+
+    async def create(self, entity: T) -> T:
+        try:
+            logger.info(f"Creating entity: {entity}")
+            self.db.add(entity)
+            await self.db.commit()
+            await self.db.refresh(entity)
+            logger.info(f"Entity created successfully with ID: {getattr(entity, 'id', 'N/A')}")
+            return entity
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in create: {str(e)}\n{traceback.format_exc()}")
+            await self.db.rollback()
+            raise e
+        except Exception as e:
+            logger.error(f"Unexpected error in create: {str(e)}\n{traceback.format_exc()}")
+            await self.db.rollback()
+            raise e
+
+    async def get(self, id: str) -> T:
+        try:
+            result = (await self.db.execute(select(self.model).filter(self.model.id == id))).scalars().first()
+            logger.info(f"Retrieved entity with ID {id}: {'Found' if result else 'Not found'}")
+            return result
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get: {str(e)}\n{traceback.format_exc()}")
+            raise e
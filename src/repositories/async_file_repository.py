@@ -0,0 +1,40 @@
+from .async_base_repository import AsyncBaseRepo
+from .file_repository import appointment_listing, user_listing
+from entities.file import File
+from entities.appointment import Appointment
+from entities.user import User
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+
+
+class AsyncFileRepo(AsyncBaseRepo[File]):
+    """
+    The read queries of `FileRepo` on the async engine, for the get and listing routes.
+
+    Uploads, deletions and the background tasks keep using `FileRepo`.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        super().__init__(File, db)
+
+    async def get_file(self, id: str) -> File:
+        return await self.get(id=id)
+
+    async def get_file_version(self, id: str) -> tuple | None:
+        """Return `(version, credential)` of a file without loading the full row."""
+        return (await self.db.execute(
+            select(self.model.version, self.model.credential).filter(self.model.id == id))).first()
+
+    async def get_appointment_files_version(self, appointment_id: str) -> int | None:
+        return await self.db.scalar(select(Appointment.files_version).filter(Appointment.id == appointment_id))
+
+    async def get_user_files_version(self, user_id: str) -> int | None:
+        return await self.db.scalar(select(User.files_version).filter(User.id == user_id))
+
+    async def get_files_by_appointment(self, appointment_id: str, limit: int,
+                                       after: tuple[datetime, str] | None = None) -> list[tuple]:
+        return list((await self.db.execute(appointment_listing(appointment_id, limit, after))).all())
+
+    async def list_all_files(self, user_id: str, limit: int, after: tuple[datetime, str] | None = None) -> list[tuple]:
+        return list((await self.db.execute(user_listing(user_id, limit, after))).all())
@@ -1,4 +1,6 @@
-from typing import Type, Generic, TypeVar
+from typing import Type, Generic, TypeVar, Optional, Tuple, Any
+from datetime import datetime
+from sqlalchemy import and_, or_, true
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 import logging
@@ -8,6 +10,17 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+
+def keyset_after(created: Any, id: Any, after: Optional[Tuple[datetime, str]]) -> Any:
+    """
+    Filter for the rows after `(created, id)` in listing order, ascending on both; None is the first page.
+    Spelled out rather than as a row comparison so MySQL can range-scan an index ending in these columns.
+    """
+    if after is None:
+        return true()
+    created_at, last_id = after
+    return or_(created > created_at, and_(created == created_at, id > last_id))
+
 class BaseRepo(Generic[T]):
     def __init__(self, model: Type[T], db: Session) -> None:
         self.model = model
@@ -0,0 +1,104 @@
+from .base_repository import BaseRepo
+from entities.blob import Blob
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime
+
+
+class BlobRepo(BaseRepo[Blob]):
+    def __init__(self, db: Session) -> None:
+        super().__init__(Blob, db)
+
+    def get_blob(self, id: str) -> Blob:
+        return self.get(id=id)
+
+    def acquire(self, sha256: str, bucket: str, scan_statuses: tuple[str, ...], size: int) -> Blob | None:
+        """
+        Take a reference to the stored blob with this content for a new file and count the hit;
+        committed here. Returns None, with nothing changed, when there is no such blob.
+
+        The row stays locked from the lookup to the commit, so a concurrent `release` either runs
+        first and deletes it, or sees the new reference and keeps it.
+        """
+        blob = (
+            self.db
+            .query(self.model)
+            .filter(self.model.sha256 == sha256, self.model.bucket == bucket,
+                    self.model.stored_at.isnot(None), self.model.virus_scan_status.in_(scan_statuses))
+            .with_for_update()
+            .first()
+        )
+        if blob is None:
+            self.db.rollback()
+            return None
+        self.db.query(self.model).filter(self.model.id == blob.id).update({
+            self.model.ref_count: self.model.ref_count + 1,
+            self.model.dedup_hits: self.model.dedup_hits + 1,
+            self.model.bytes_deduplicated: self.model.bytes_deduplicated + size,
+        }, synchronize_session=False)
+        self.db.commit()
+        self.db.refresh(blob)
+        return blob
+
+    def create_blob(self, sha256: str, bucket: str, path: str, size: int, virus_scan_status: str,
+                    celery_task_id: str | None, stored: bool = False) -> Blob:
+        """
+        Record the object of a new upload, holding that upload's reference. Unless `stored`, the
+        object is still being uploaded and `mark_stored` confirms it once it is verified.
+        """
+        return self.create(Blob(
+            sha256=sha256,
+            bucket=bucket,
+            path=path,
+            size=size,
+            ref_count=1,
+            virus_scan_status=virus_scan_status,
+            celery_task_id=celery_task_id,
+            dedup_hits=0,
+            bytes_deduplicated=0,
+            stored_at=datetime.utcnow() if stored else None,
+        ))
+
+    def mark_stored(self, path: str) -> None:
+        self.db.query(self.model).filter(self.model.path == path, self.model.stored_at.is_(None)).update(
+            {self.model.stored_at: datetime.utcnow()}, synchronize_session=False)
+        self.db.commit()
+
+    def release(self, id: str) -> bool:
+        """
+        Drop one reference to a blob; committed with the caller's change.
+
+        Returns True when that was the last reference, in which case the blob row is
+        deleted and the caller is responsible for removing the stored object.
+        """
+        # The UPDATE holds the row lock until commit, so concurrent releases are serialized
+        self.db.query(self.model).filter(self.model.id == id).update(
+            {self.model.ref_count: self.model.ref_count - 1}, synchronize_session=False)
+        remaining = self.db.query(self.model.ref_count).filter(self.model.id == id).scalar()
+        if remaining is None:
+            return True
+        if remaining > 0:
+            return False
+        self.db.delete(self.get(id=id))
+        return True
+
+    def update_path(self, old_path: str, path: str) -> None:
+        self.db.query(self.model).filter(self.model.path == old_path).update(
+            {self.model.path: path}, synchronize_session=False)
+
+    def get_stats(self) -> dict:
+        blobs, stored_bytes, logical_bytes, hits, transferred_saved = self.db.query(
+            func.count(self.model.id),
+            func.coalesce(func.sum(self.model.size), 0),
+            func.coalesce(func.sum(self.model.size * self.model.ref_count), 0),
+            func.coalesce(func.sum(self.model.dedup_hits), 0),
+            func.coalesce(func.sum(self.model.bytes_deduplicated), 0),
+        ).one()
+        return {
+            "blobs": int(blobs),
+            "stored_bytes": int(stored_bytes),
+            "logical_bytes": int(logical_bytes),
+            "storage_saved_bytes": int(logical_bytes) - int(stored_bytes),
+            "dedup_hits": int(hits),
+            "bytes_not_transferred": int(transferred_saved),
+        }
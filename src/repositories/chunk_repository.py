@@ -0,0 +1,100 @@
+from .base_repository import BaseRepo
+from entities.chunk import Chunk
+from entities.chunk_manifest import ChunkManifest, ChunkManifestEntry
+from collections import Counter
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+
+class ChunkRepo(BaseRepo[Chunk]):
+    def __init__(self, db: Session) -> None:
+        super().__init__(Chunk, db)
+
+    def get_by_hash(self, bucket: str, sha256: str) -> Chunk | None:
+        return self.db.query(self.model).filter(self.model.bucket == bucket, self.model.sha256 == sha256).first()
+
+    def touch(self, id: str) -> bool:
+        """Mark a chunk as in use; False if the garbage collector removed it in the meantime."""
+        updated = self.db.query(self.model).filter(self.model.id == id).update(
+            {self.model.last_referenced_at: datetime.utcnow()}, synchronize_session=False)
+        self.db.commit()
+        return updated == 1
+
+    def create_chunk(self, id: str, bucket: str, sha256: str, size: int) -> Chunk | None:
+        """Record a stored chunk; None when a concurrent upload recorded the same content first."""
+        try:
+            return self.create(Chunk(id=id, bucket=bucket, sha256=sha256, size=size, ref_count=0,
+                                     last_referenced_at=datetime.utcnow()))
+        except IntegrityError:
+            return None
+
+    def get_manifest(self, bucket: str, object_name: str) -> ChunkManifest | None:
+        return (
+            self.db
+            .query(ChunkManifest)
+            .filter(ChunkManifest.bucket == bucket, ChunkManifest.object_name == object_name)
+            .first()
+        )
+
+    def create_manifest(self, bucket: str, object_name: str, size: int, sha256: str,
+                        entries: list[tuple[str, int, int]]) -> ChunkManifest:
+        """Store a manifest from `(chunk_id, offset, size)` entries and reference its chunks."""
+        manifest = ChunkManifest(bucket=bucket, object_name=object_name, size=size, sha256=sha256)
+        manifest.entries = [
+            ChunkManifestEntry(seq=seq, chunk_id=chunk_id, offset=offset, size=chunk_size)
+            for seq, (chunk_id, offset, chunk_size) in enumerate(entries)
+        ]
+        self._add_references([chunk_id for chunk_id, _, _ in entries], 1)
+        return self.create(manifest)
+
+    def get_range_entries(self, manifest_id: str, start: int, end: int) -> list[tuple[int, int, str, str]]:
+        """`(offset, size, sha256, chunk_id)` of the chunks overlapping the inclusive byte range, in order."""
+        return (
+            self.db
+            .query(ChunkManifestEntry.offset, ChunkManifestEntry.size, Chunk.sha256, Chunk.id)
+            .join(Chunk, ChunkManifestEntry.chunk_id == Chunk.id)
+            .filter(
+                ChunkManifestEntry.manifest_id == manifest_id,
+                ChunkManifestEntry.offset <= end,
+                ChunkManifestEntry.offset + ChunkManifestEntry.size > start,
+            )
+            .order_by(ChunkManifestEntry.seq)
+            .all()
+        )
+
+    def release_manifest(self, bucket: str, object_name: str) -> None:
+        """Delete a manifest and drop its chunk references; committed with the caller's change."""
+        manifest = self.get_manifest(bucket, object_name)
+        if manifest is None:
+            return
+        self._add_references([entry.chunk_id for entry in manifest.entries], -1)
+        self.db.delete(manifest)
+
+    def _add_references(self, chunk_ids: list[str], sign: int) -> None:
+        now = datetime.utcnow()
+        for chunk_id, count in Counter(chunk_ids).items():
+            self.db.query(self.model).filter(self.model.id == chunk_id).update({
+                self.model.ref_count: self.model.ref_count + sign * count,
+                self.model.last_referenced_at: now,
+            }, synchronize_session=False)
+
+    def list_unreferenced(self, before: datetime, limit: int) -> list[Chunk]:
+        return (
+            self.db
+            .query(self.model)
+            .filter(self.model.ref_count <= 0, self.model.last_referenced_at < before)
+            .order_by(self.model.last_referenced_at)
+            .limit(limit)
+            .all()
+        )
+
+    def delete_if_unreferenced(self, id: str, before: datetime) -> bool:
+        """Delete a chunk row unless it was referenced or reused since `before`."""
+        deleted = self.db.query(self.model).filter(
+            self.model.id == id,
+            self.model.ref_count <= 0,
+            self.model.last_referenced_at < before,
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted == 1
@@ -1,9 +1,59 @@
 from infrastructure.db.mysql import MySQLDB
-from .base_repository import BaseRepo
+from .base_repository import BaseRepo, keyset_after
+from .blob_repository import BlobRepo
+from .chunk_repository import ChunkRepo
+from infrastructure.minio import minioStorage
 from entities.file import File
 from entities.appointment import Appointment
+from entities.user import User
 from dto.file_dto import FileBaseDTO
-from sqlalchemy.orm import Session
+from sqlalchemy import select, Select
+from sqlalchemy.orm import Session, selectinload, defer
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Any
+import uuid
+from datetime import datetime
+
+# What a listing reads of a file: the `FileResponseDTO` fields, what presigning its download URL needs and its cursor
+LISTING_COLUMNS = (File.id, File.filename, File.content_type, File.size, File.sha256, File.virus_scan_status,
+                   File.is_quarantined, File.quarantine_reason, File.path, File.credential, File.created_at)
+
+# JSON columns of a file none of the callers loading files along with their appointment or user read
+HEAVY_COLUMNS = (File.virus_scan_result, File.credential, File.detail)
+
+
+def with_files(relationship: Any) -> Any:
+    """Loader option for a relationship to files: one `SELECT ... IN` for all parents, without `HEAVY_COLUMNS`."""
+    return selectinload(relationship).options(*(defer(column) for column in HEAVY_COLUMNS))
+
+
+def appointment_listing(appointment_id: str, limit: int, after: tuple[datetime, str] | None = None) -> Select:
+    """Up to `limit` listing rows of an appointment's files after the `(created_at, id)` of `after`."""
+    return (
+        select(*LISTING_COLUMNS)
+        .filter(
+            File.appointment_id == appointment_id,
+            File.virus_scan_status != 'infected',
+            keyset_after(File.created_at, File.id, after)
+        )
+        .order_by(File.created_at, File.id)
+        .limit(limit)
+    )
+
+
+def user_listing(user_id: str, limit: int, after: tuple[datetime, str] | None = None) -> Select:
+    """Up to `limit` listing rows of a user's files, with `appointment_name`, after the `(created_at, id)` of `after`."""
+    return (
+        select(*LISTING_COLUMNS, Appointment.name.label("appointment_name"))
+        .join(Appointment, File.appointment_id == Appointment.id)
+        .filter(
+            File.user_id == user_id,
+            File.virus_scan_status != 'infected',
+            keyset_after(File.created_at, File.id, after)
+        )
+        .order_by(File.created_at, File.id)
+        .limit(limit)
+    )
 
 
 class FileRepo(BaseRepo[File]):
@@ -14,7 +64,33 @@ class FileRepo(BaseRepo[File]):
         return self.get(id=id)
 
     def create_file(self, file: FileBaseDTO) -> File:
-        db_file = File(
+        # A blob reference is taken by `BlobRepo.create_blob` or `acquire`; the row only carries it
+        db_file = self._to_entity(file)
+        self.bump_files_version(appointment_id=file.appointment_id, user_id=file.user_id)
+        return self.create(db_file)
+
+    def create_files(self, files: list[FileBaseDTO]) -> list[File]:
+        """
+        Insert many file rows in one transaction, with their listing versions; the rows go out
+        as a single multi-row INSERT and are read back with one SELECT.
+        """
+        db_files = [self._to_entity(file, id=str(uuid.uuid4())) for file in files]
+        for appointment_id, user_id in {(file.appointment_id, file.user_id) for file in files}:
+            self.bump_files_version(appointment_id=appointment_id, user_id=user_id)
+        try:
+            self.db.add_all(db_files)
+            self.db.commit()
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+        # Refreshes the expired instances in place
+        self.db.query(self.model).filter(self.model.id.in_([file.id for file in db_files])).all()
+        return db_files
+
+    @staticmethod
+    def _to_entity(file: FileBaseDTO, **extra) -> File:
+        return File(
+            **extra,
             upload_id=file.upload_id,
             path=file.path,
             credential=file.credential,
@@ -29,36 +105,168 @@ class FileRepo(BaseRepo[File]):
             virus_scan_result=file.virus_scan_result,
             virus_scan_date=file.virus_scan_date,
             is_quarantined=file.is_quarantined,
-            quarantine_reason=file.quarantine_reason
+            quarantine_reason=file.quarantine_reason,
+            blob_id=file.blob_id,
+            sha256=file.sha256,
+            integrity_status=file.integrity_status,
+            content_encoding=file.content_encoding,
+            stored_size=file.stored_size,
+            compression_cpu_ms=file.compression_cpu_ms
         )
-        return self.create(db_file)
 
-    def get_files_by_appointment(self, appointment_id: str) -> list[File]:
+    def bump_files_version(self, appointment_id: str, user_id: str) -> None:
+        """Invalidate listing ETags of an appointment and a user; committed with the caller's change."""
+        self.db.query(Appointment).filter(Appointment.id == appointment_id).update(
+            {Appointment.files_version: Appointment.files_version + 1}, synchronize_session=False)
+        self.db.query(User).filter(User.id == user_id).update(
+            {User.files_version: User.files_version + 1}, synchronize_session=False)
+
+    def get_file_version(self, id: str) -> tuple | None:
+        """Return `(version, credential)` of a file without loading the full row."""
+        return self.db.query(self.model.version, self.model.credential).filter(self.model.id == id).first()
+
+    def get_appointment_files_version(self, appointment_id: str) -> int | None:
+        return self.db.query(Appointment.files_version).filter(Appointment.id == appointment_id).scalar()
+
+    def get_user_files_version(self, user_id: str) -> int | None:
+        return self.db.query(User.files_version).filter(User.id == user_id).scalar()
+
+    def get_files_by_appointment(self, appointment_id: str, limit: int,
+                                 after: tuple[datetime, str] | None = None) -> list[tuple]:
+        return self.db.execute(appointment_listing(appointment_id, limit, after)).all()
+
+    def list_all_files(self, user_id: str, limit: int, after: tuple[datetime, str] | None = None) -> list[tuple]:
+        return self.db.execute(user_listing(user_id, limit, after)).all()
+
+    def shared_paths(self, paths: set[str], exclude_file_ids: list[str]) -> set[str]:
+        """Of the stored objects at `paths`, those referenced by any file other than the excluded ones."""
+        if not paths:
+            return set()
+        return {
+            path for path, in
+            self.db.query(self.model.path)
+            .filter(self.model.path.in_(paths), self.model.id.notin_(exclude_file_ids))
+            .distinct()
+        }
+
+    def release_objects(self, files: list[File]) -> set[str]:
+        """
+        Drop the references the given files hold on stored objects, ahead of deleting them.
+
+        Returns the paths no other file references anymore, which the caller should remove
+        from storage. Blob rows and chunk manifests are released in the caller's transaction;
+        chunked paths are not returned since their chunks are removed by garbage collection.
+        """
+        blob_repo = BlobRepo(db=self.db)
+        file_ids = [file.id for file in files]
+        shared = self.shared_paths({file.path for file in files if not file.blob_id}, exclude_file_ids=file_ids)
+        unreferenced = set()
+        for file in files:
+            if file.blob_id:
+                if blob_repo.release(file.blob_id):
+                    unreferenced.add(file.path)
+            elif file.path not in shared:
+                unreferenced.add(file.path)
+        chunk_repo = ChunkRepo(db=self.db)
+        for path in list(unreferenced):
+            bucket_name, _, object_name = path.partition("/")
+            if minioStorage.is_chunked(object_name):
+                chunk_repo.release_manifest(bucket_name, object_name)
+                unreferenced.discard(path)
+        return unreferenced
+
+    def list_files_to_rekey(self, after_id: str, limit: int) -> list[File]:
+        """Stored, non-quarantined files whose object key is not yet content-addressed, in id order."""
         return (
             self.db
             .query(self.model)
             .filter(
-                self.model.appointment_id == appointment_id,
-                self.model.virus_scan_status != 'infected'
+                self.model.id > after_id,
+                self.model.is_quarantined.isnot(True),
+                self.model.path.like("%/%"),
+                self.model.path.notlike("%/sha256/%"),
+                self.model.path.notlike(f"%/{minioStorage.CHUNKED_PREFIX}%"),
             )
+            .order_by(self.model.id)
+            .limit(limit)
             .all()
         )
 
-    def list_all_files(self, user_id: str) -> list[tuple]:
+    def repoint_path(self, old_path: str, path: str) -> None:
+        """Move every file and blob stored at `old_path` to `path` in one transaction."""
+        for file in self.db.query(self.model).filter(self.model.path == old_path).all():
+            file.path = path
+            self.bump_files_version(appointment_id=file.appointment_id, user_id=file.user_id)
+        BlobRepo(db=self.db).update_path(old_path, path)
+        self.db.commit()
+
+    def list_files_to_verify(self, limit: int) -> list[File]:
+        """Stored files with an integrity manifest, never or least recently verified first."""
         return (
             self.db
-            .query(self.model, Appointment.name)
-            .join(Appointment, self.model.appointment_id == Appointment.id)
+            .query(self.model)
             .filter(
-                self.model.user_id == user_id,
-                self.model.virus_scan_status != 'infected'
+                self.model.sha256.isnot(None),
+                self.model.is_quarantined.isnot(True),
+                self.model.path.like("%/%"),
             )
+            .order_by(self.model.integrity_checked_at.is_(None).desc(), self.model.integrity_checked_at)
+            .limit(limit)
             .all()
         )
 
+    def set_integrity_status(self, status: str, file_id: str | None = None, upload_id: str | None = None) -> int:
+        """
+        Record the outcome of an integrity check. A bulk update, so the row version and
+        with it the metadata ETag stay unchanged; returns the number of rows updated.
+        """
+        query = self.db.query(self.model)
+        query = query.filter(self.model.id == file_id) if file_id else query.filter(self.model.upload_id == upload_id)
+        updated = query.update({
+            self.model.integrity_status: status,
+            self.model.integrity_checked_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        self.db.commit()
+        return updated
+
+    def set_compression_stats(self, upload_id: str, stored_size: int, cpu_ms: int) -> int:
+        """Record the compressed size and cost of a stored object, as a bulk update like `set_integrity_status`."""
+        updated = self.db.query(self.model).filter(self.model.upload_id == upload_id).update({
+            self.model.stored_size: stored_size,
+            self.model.compression_cpu_ms: cpu_ms,
+        }, synchronize_session=False)
+        self.db.commit()
+        return updated
+
+    def get_compression_stats(self) -> list[dict]:
+        """
+        Compression ratio and CPU time per file extension, over the objects this
+        service compressed; files deduplicated against them are not counted again.
+        """
+        totals: dict[str, dict] = {}
+        rows = (
+            self.db
+            .query(self.model.path, self.model.size, self.model.stored_size, self.model.compression_cpu_ms)
+            .filter(self.model.content_encoding.isnot(None), self.model.stored_size.isnot(None))
+            .yield_per(1000)
+        )
+        for path, size, stored_size, cpu_ms in rows:
+            name = minioStorage.uncompressed_name(path.rsplit("/", 1)[-1])
+            extension = name.rsplit(".", 1)[-1] if "." in name else ""
+            entry = totals.setdefault(extension, {"extension": extension, "files": 0, "original_bytes": 0,
+                                                  "stored_bytes": 0, "compression_cpu_seconds": 0.0})
+            entry["files"] += 1
+            entry["original_bytes"] += size or 0
+            entry["stored_bytes"] += stored_size
+            entry["compression_cpu_seconds"] += (cpu_ms or 0) / 1000
+        for entry in totals.values():
+            entry["ratio"] = entry["original_bytes"] / entry["stored_bytes"] if entry["stored_bytes"] else 0.0
+        return sorted(totals.values(), key=lambda entry: entry["original_bytes"], reverse=True)
+
     def delete_file(self, file_id: str):
         file_to_delete = self.get(id=file_id)
         if file_to_delete:
+            self.bump_files_version(appointment_id=file_to_delete.appointment_id, user_id=file_to_delete.user_id)
             self.db.delete(file_to_delete)
             self.db.commit()
         return file_to_delete
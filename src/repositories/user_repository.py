@@ -1,7 +1,11 @@
 from sqlalchemy.orm import Session
-from .base_repository import BaseRepo
+from .base_repository import BaseRepo, keyset_after
+from .file_repository import with_files
+from entities.appointment import Appointment
+from sqlalchemy.orm import selectinload
 from entities.user import User
-from typing import List
+from typing import List, Optional, Tuple
+from datetime import datetime
 
 
 class UserRepo(BaseRepo[User]):
@@ -15,11 +19,30 @@ class UserRepo(BaseRepo[User]):
     def get_user_by_name(self, name: str) -> User:
         return self.db.query(self.model).filter(self.model.name == name).first()
 
-    def list_users(self) -> List[User]:
-        return self.db.query(self.model).all()
+    def list_users(self, limit: int, after: Optional[Tuple[datetime, str]] = None) -> List[User]:
+        """Up to `limit` users after the `(created_at, id)` of `after`."""
+        return (
+            self.db
+            .query(self.model)
+            .filter(keyset_after(self.model.created_at, self.model.id, after))
+            .order_by(self.model.created_at, self.model.id)
+            .limit(limit)
+            .all()
+        )
+
+    def get_with_files(self, user_id: str) -> User:
+        """
+        A user with its appointments and files, for deleting them; both paths to the files are loaded
+        since the delete cascades along each. The files' JSON columns are not loaded.
+        """
+        # Taken from the session without a query when the caller already loaded it
+        return self.db.get(self.model, user_id, options=[
+            with_files(self.model.files),
+            selectinload(self.model.appointments).options(with_files(Appointment.files)),
+        ])
 
     def delete_user(self, user_id: str) -> User:
-        user = self.get(id=user_id)
+        user = self.get_with_files(user_id)
         if user:
             self.db.delete(user)
             self.db.commit()
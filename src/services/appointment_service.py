@@ -1,8 +1,11 @@
 from repositories.appointment_repository import AppointmentRepo
+from repositories.file_repository import FileRepo
 from services.base_service import BaseService
 from dto.appointment_dto import AppointmentCreate, Appointment
-from typing import List
+from typing import List, Optional
 from infrastructure.minio import minioStorage
+from infrastructure.object_cache import objectCache
+from utils import decode_cursor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,26 +25,33 @@ class AppointmentService(BaseService[AppointmentRepo]):
         # In a real app, you'd add more validation here
         return self.repo.create_appointment(appointment, user_id)
 
-    def list_appointments(self, user_id: str) -> List[Appointment]:
-        return self.repo.list_appointments(user_id)
+    def list_appointments(self, user_id: str, limit: int, cursor: Optional[str] = None) -> tuple[List[Appointment], Optional[str]]:
+        """A page of the user's appointments, oldest first, and the cursor of the next page."""
+        after = decode_cursor(cursor) if cursor else None
+        return self._page(self.repo.list_appointments(user_id, limit=limit + 1, after=after), limit, created="date")
 
     def delete_appointment(self, appointment_id: str) -> Appointment:
         # First get the appointment to access its files
-        appointment = self.repo.get(id=appointment_id)
+        appointment = self.repo.get_with_files(appointment_id)
         if not appointment:
             return None
             
         # Delete all files associated with this appointment
-        for file in appointment.files:
+        file_repo = FileRepo(db=self.repo.db)
+        # Deduplicated and content-addressed objects may also back files outside this appointment
+        for path in file_repo.release_objects(appointment.files):
             try:
                 # Delete from MinIO
-                bucket_name = file.path.split("/")[0]
-                object_name = "/".join(file.path.split("/")[1:])
+                bucket_name = path.split("/")[0]
+                object_name = "/".join(path.split("/")[1:])
                 minioStorage.remove_object(bucket_name, object_name)
                 logger.info(f"Deleted file from MinIO: {bucket_name}/{object_name}")
             except Exception as e:
                 logger.error(f"Failed to delete file from MinIO: {str(e)}")
                 # Continue with deletion even if MinIO deletion fails
+            objectCache.evict(path)
         
+        # The owner's file listing loses these files; committed with the delete
+        file_repo.bump_files_version(appointment_id, appointment.user_id)
         # Delete the appointment (cascade will delete associated files from DB)
         return self.repo.delete_appointment(appointment_id) 
\ No newline at end of file
@@ -1,7 +1,19 @@
-from typing import TypeVar, Generic, Type
+from typing import TypeVar, Generic, Type, Optional, Any
+from utils import encode_cursor
 
 T = TypeVar("T")
 
 class BaseService(Generic[T]):
     def __init__(self, repo: Type[T]) -> None:
-        self.repo = repo
\ No newline at end of file
+        self.repo = repo
+
+    @staticmethod
+    def _page(rows: list[Any], limit: int, created: str = "created_at") -> tuple[list[Any], Optional[str]]:
+        """
+        Split the `limit + 1` rows read for a listing page into the page and the cursor of the next
+        one, None on the last page; `created` names the attribute the listing is ordered by before `id`.
+        """
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(getattr(rows[-1], created), rows[-1].id)
@@ -0,0 +1,130 @@
+from repositories.chunk_repository import ChunkRepo
+from services.base_service import BaseService
+from infrastructure.chunker import Chunker
+from infrastructure.minio import minioStorage
+from entities.chunk_manifest import ChunkManifest
+from core.config import config
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+from minio import S3Error
+import hashlib
+import io
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChunkedObjectStat:
+    """The subset of a MinIO object stat the download proxy needs, for manifest-backed objects."""
+    size: int
+    etag: str
+    last_modified: datetime
+
+
+class ChunkStoreService(BaseService[ChunkRepo]):
+    """
+    Storage engine that keeps files as manifests of content-defined chunks.
+
+    Each distinct chunk is stored once per bucket, so revisions of a large file
+    only add the chunks around their edits. Chunks are never deleted inline;
+    `collect_garbage` removes those no manifest has referenced for a grace period.
+    """
+
+    def __init__(self, repo: ChunkRepo) -> None:
+        super().__init__(repo=repo)
+        self.chunker = Chunker(config.CHUNK_STORE_MIN_SIZE, config.CHUNK_STORE_AVG_SIZE, config.CHUNK_STORE_MAX_SIZE)
+
+    def store(self, bucket_name: str, object_name: str, source_path: str) -> ChunkManifest:
+        """Chunk a local file, upload the chunks not yet stored in the bucket and record its manifest."""
+        existing = self.repo.get_manifest(bucket_name, object_name)
+        if existing:
+            # Retried upload task; the object is already complete
+            return existing
+
+        content_hash = hashlib.sha256()
+        entries = []
+        offset = 0
+        uploaded = 0
+        with open(source_path, "rb") as source:
+            for data in self.chunker.iter_chunks(source):
+                content_hash.update(data)
+                chunk_sha256 = hashlib.sha256(data).hexdigest()
+                chunk_id = self._reuse_chunk(bucket_name, chunk_sha256)
+                if chunk_id is None:
+                    chunk_id = self._upload_chunk(bucket_name, chunk_sha256, data)
+                    uploaded += len(data)
+                entries.append((chunk_id, offset, len(data)))
+                offset += len(data)
+
+        logger.info(f"Stored {bucket_name}/{object_name} as {len(entries)} chunks, "
+                    f"uploaded {uploaded} of {offset} bytes")
+        return self.repo.create_manifest(bucket_name, object_name, offset, content_hash.hexdigest(), entries)
+
+    def _reuse_chunk(self, bucket_name: str, chunk_sha256: str) -> Optional[str]:
+        chunk = self.repo.get_by_hash(bucket_name, chunk_sha256)
+        if chunk is None or not self.repo.touch(chunk.id):
+            return None
+        return chunk.id
+
+    def _upload_chunk(self, bucket_name: str, chunk_sha256: str, data: bytes) -> str:
+        chunk_id = str(uuid.uuid4())
+        object_name = minioStorage.chunk_object_name(chunk_sha256, chunk_id)
+        minioStorage.put_object(bucket_name, object_name, io.BytesIO(data), len(data))
+        if self.repo.create_chunk(chunk_id, bucket_name, chunk_sha256, len(data)):
+            return chunk_id
+        # Lost the race against a concurrent upload of the same chunk; use its copy instead
+        minioStorage.remove_object(bucket_name, object_name)
+        chunk_id = self._reuse_chunk(bucket_name, chunk_sha256)
+        if chunk_id is None:
+            raise RuntimeError(f"Chunk {chunk_sha256} disappeared while storing {bucket_name}")
+        return chunk_id
+
+    def stat(self, bucket_name: str, object_name: str) -> Optional[ChunkedObjectStat]:
+        manifest = self.repo.get_manifest(bucket_name, object_name)
+        if manifest is None:
+            return None
+        return ChunkedObjectStat(size=manifest.size, etag=manifest.sha256, last_modified=manifest.created_at)
+
+    def iter_range(self, bucket_name: str, object_name: str, start: int, end: int) -> Iterator[bytes]:
+        """
+        Reassemble the inclusive byte range `start..end` of a chunked object.
+
+        The manifest is resolved before returning, so the returned iterator only
+        talks to MinIO and can be consumed from a worker thread.
+        """
+        manifest = self.repo.get_manifest(bucket_name, object_name)
+        if manifest is None or end < start:
+            return iter(())
+        entries = self.repo.get_range_entries(manifest.id, start, end)
+        return self._iter_chunks(bucket_name, entries, start, end)
+
+    @staticmethod
+    def _iter_chunks(bucket_name: str, entries: list[tuple[int, int, str, str]], start: int, end: int) -> Iterator[bytes]:
+        for chunk_offset, chunk_size, chunk_sha256, chunk_id in entries:
+            first = max(start, chunk_offset) - chunk_offset
+            last = min(end, chunk_offset + chunk_size - 1) - chunk_offset
+            response = minioStorage.get_object(bucket_name, minioStorage.chunk_object_name(chunk_sha256, chunk_id),
+                                               offset=first, length=last - first + 1)
+            try:
+                yield from response.stream(config.APP_DOWNLOAD_CHUNK_SIZE)
+            finally:
+                response.close()
+                response.release_conn()
+
+    def collect_garbage(self, limit: int) -> int:
+        """Remove up to `limit` chunks left unreferenced for longer than the grace period."""
+        before = datetime.utcnow() - timedelta(seconds=config.CHUNK_STORE_GC_GRACE_SECONDS)
+        removed = 0
+        for chunk in self.repo.list_unreferenced(before=before, limit=limit):
+            # The row goes first: an upload reusing the chunk afterwards sees it missing and stores a new copy
+            if not self.repo.delete_if_unreferenced(chunk.id, before=before):
+                continue
+            try:
+                minioStorage.remove_object(chunk.bucket, minioStorage.chunk_object_name(chunk.sha256, chunk.id))
+            except S3Error as exc:
+                logger.warning(f"Failed to remove chunk {chunk.bucket}/{chunk.sha256}: {str(exc)}")
+            removed += 1
+        return removed
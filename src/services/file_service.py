@@ -1,59 +1,259 @@
 from repositories.file_repository import FileRepo
+from repositories.blob_repository import BlobRepo
+from repositories.chunk_repository import ChunkRepo
 from dto.file_dto import UploadFileDTO, UploadChunkDTO, RetryUploadFileDTO
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, AsyncIterator, Iterator
 from entities.file import File
 import os
+import shutil
 import aiofiles
 from fastapi.exceptions import RequestValidationError
 from constants.errors import ValidatonErrors
 from infrastructure.minio import minioStorage
+from infrastructure.object_cache import objectCache
+from infrastructure.checksums import ChunkDigest, MultipartETag, parse_checksum
+from infrastructure.compression import (DecompressedReader, should_compress, compress_bytes, ENCODING as STORED_ENCODING,
+                                        STORED_CONTENT_TYPE)
+from infrastructure.batch_reader import BatchEntry, BatchFormatError
+from infrastructure.upload_session import UploadSession, UploadTooLarge, negotiate, mark_completed, clear_completed
+from infrastructure.upload_admission import uploadAdmission, AdmissionRejected
+from infrastructure.staging_area import stagingArea
+from infrastructure.ingest_scheduler import ingestScheduler
+from infrastructure.task_dispatcher import taskDispatcher
+from infrastructure.executors import executors, async_repo, run_in_session, FILESYSTEM, MINIO, BROKER
+from infrastructure.minio import asyncMinioStorage
+from infrastructure.content_encoding import (StreamDecoder, ContentEncodingError, DecompressedSizeExceeded,
+                                             UnsupportedEncodingError, normalize_encoding)
 from dto.file_dto import FileBaseDTO
 from services.base_service import BaseService
-from exceptions.http_exception import PermissionException, FileNotFoundException, FileUploadedException, FilePendingUploadException
+from services.chunk_store_service import ChunkStoreService
+from exceptions.http_exception import PermissionException, FileNotFoundException, FileUploadedException, FilePendingUploadException, ChunkChecksumMismatchException, UnsupportedChunkEncodingException, InvalidChunkEncodingException, BatchEntryException, StagingAreaFullException, UploadBudgetExceededException
 from exceptions.virus_exception import VirusDetectedException, VirusScanException
-from tasks.file_upload_task import upload_file_task
+from tasks.file_upload_task import upload_file_task, PART_SIZE
+import io
 import uuid
+import asyncio
+import mimetypes
+import hashlib
+import zlib
+import json
 from core.config import config
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from minio import S3Error
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from celery.result import AsyncResult
 from tasks import celery
 from constants.upload_stauts import UploadStatus
+from constants.file_extensions import FileExtension
 from infrastructure.virus_scanner import virus_scanner
 import logging
 import traceback
 from datetime import datetime
-from urllib.parse import quote
+from urllib.parse import quote, urlencode
+from utils import make_etag, decode_cursor, presign_window
 
 logger = logging.getLogger(__name__)
 
 class FileService(BaseService[FileRepo]):
+    # Scan outcomes whose stored objects may be shared by later uploads of the same content
+    DEDUP_SCAN_STATUSES = ('clean', 'disabled')
+
     def __init__(self, repo: FileRepo) -> None:
         super().__init__(repo=repo)
 
-    async def upload_initialize(self) -> str:
+    @property
+    def blob_repo(self) -> BlobRepo:
+        return BlobRepo(db=self.repo.db)
+
+    @property
+    def chunk_store(self) -> ChunkStoreService:
+        return ChunkStoreService(repo=ChunkRepo(db=self.repo.db))
+
+    async def upload_initialize(self, total_size: Optional[int] = None, content_type: Optional[str] = None,
+                                user_id: Optional[str] = None) -> tuple[str, UploadSession]:
+        """
+        Open a staging directory with the chunk parameters negotiated for the declared size,
+        once the size is reserved against the in-flight upload budgets. Without a declared
+        size one chunk is reserved, and the reservation grows as chunks are staged.
+        """
+        if not stagingArea.accepts_uploads():
+            raise StagingAreaFullException()
+        session = negotiate(total_size, content_type)
+        session.user_id = user_id
+        reserved = total_size or session.chunk_size
+        if not uploadAdmission.fits(reserved):
+            raise UploadTooLarge(f"{reserved} bytes exceed the in-flight upload budget")
         upload_id = str(uuid.uuid4())
-        os.makedirs(os.path.join(
-            config.APP_UPLOAD_DIR, upload_id), exist_ok=True)
-        return upload_id
-
-    async def upload_chunk(self, payload: UploadChunkDTO) -> None:
-        upload_dir = os.path.join(config.APP_UPLOAD_DIR, payload.upload_id)
-        chunk_path = os.path.join(upload_dir, f"{payload.chunk_index}.part")
-        async with aiofiles.open(chunk_path, "wb") as chunk_file:
-            content = await payload.file.read()
-            if len(content) > config.APP_MAX_CHUNK_SIZE:
+        upload_dir = os.path.join(config.APP_UPLOAD_DIR, upload_id)
+        await executors.run(FILESYSTEM, os.makedirs, upload_dir, exist_ok=True)
+        await executors.run(FILESYSTEM, session.save, upload_dir)
+        # Reserved once the directory exists, as reservations without one are released
+        try:
+            await executors.run(FILESYSTEM, uploadAdmission.reserve, upload_id, user_id, reserved)
+        except AdmissionRejected as exc:
+            await executors.run(FILESYSTEM, shutil.rmtree, upload_dir, ignore_errors=True)
+            raise UploadBudgetExceededException(exc.scope)
+        return upload_id, session
+
+    async def upload_chunk(self, payload: UploadChunkDTO) -> Dict[str, Any]:
+        async def body() -> AsyncIterator[bytes]:
+            while data := await payload.file.read(config.APP_UPLOAD_READ_SIZE):
+                yield data
+
+        return await self.stage_chunk(payload.upload_id, payload.chunk_index, body(),
+                                      payload.checksum_algorithm, payload.checksum, payload.content_encoding)
+
+    @staticmethod
+    def _chunk_too_large() -> RequestValidationError:
+        return RequestValidationError(errors=[{
+            'loc': ('body', 'file'),
+            'msg': ValidatonErrors.LE_CHUNCK_SIZE,
+            'type': 'value_error'
+        }],
+            body={"file": "invalid_size"})
+
+    @staticmethod
+    def _max_chunk_size(session: Optional[UploadSession]) -> int:
+        return session.chunk_size if session else config.APP_MAX_CHUNK_SIZE
+
+    async def max_chunk_size(self, upload_id: str) -> int:
+        """Largest chunk accepted for an upload: the negotiated size, or `APP_MAX_CHUNK_SIZE` without a session."""
+        session = await executors.run(FILESYSTEM, UploadSession.load, os.path.join(config.APP_UPLOAD_DIR, upload_id))
+        return self._max_chunk_size(session)
+
+    @staticmethod
+    def _discard(path: str) -> None:
+        """Remove a file if it is still there."""
+        if os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def _session_mismatch(field: str, value: Any) -> RequestValidationError:
+        return RequestValidationError(errors=[{
+            'loc': ('body', field),
+            'msg': ValidatonErrors.UPLOAD_SESSION_MISMATCH,
+            'type': 'value_error'
+        }],
+            body={field: value})
+
+    @staticmethod
+    async def _throttled_body(body: AsyncIterator[bytes], user_key: str) -> AsyncIterator[bytes]:
+        async with ingestScheduler.stream(user_key) as throttle:
+            async for data in body:
+                await throttle(len(data))
+                yield data
+
+    @staticmethod
+    async def _decode_body(body: AsyncIterator[bytes], decoder: StreamDecoder) -> AsyncIterator[bytes]:
+        async for data in body:
+            for piece in await run_in_threadpool(decoder.decompress, data):
+                yield piece
+        decoder.finish()
+
+    async def stage_chunk(self, upload_id: str, chunk_index: int, body: AsyncIterator[bytes],
+                          checksum_algorithm: Optional[str] = None, checksum: Optional[str] = None,
+                          content_encoding: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Stream a chunk to the staging area, verifying the client checksum on the way.
+
+        The chunk only replaces `<index>.part` once it is complete and verified, and
+        its digests are kept next to it in `<index>.part.json` so assembly can check
+        the staged data again without a separate read. Returns those digests.
+
+        A gzip or zstd `content_encoding` is decoded as the body arrives; the size limit
+        and the checksum apply to the decoded bytes, which are what gets staged.
+
+        The size limit and the chunk count are those negotiated at init, if any. The body is read
+        no faster than the ingest scheduler allows for the upload's user (its upload id without one).
+        """
+        upload_dir = os.path.join(config.APP_UPLOAD_DIR, upload_id)
+        session = await executors.run(FILESYSTEM, UploadSession.load, upload_dir)
+        max_chunk_size = self._max_chunk_size(session)
+        if session and session.total_chunks is not None and chunk_index >= session.total_chunks:
+            raise self._session_mismatch('chunk_index', chunk_index)
+        # Throttled as received, before decoding: the budget is network bandwidth
+        body = self._throttled_body(body, session.user_id if session and session.user_id else upload_id)
+
+        try:
+            encoding = normalize_encoding(content_encoding)
+        except UnsupportedEncodingError as exc:
+            raise UnsupportedChunkEncodingException(str(exc))
+        if encoding:
+            body = self._decode_body(body, StreamDecoder(encoding, max_chunk_size,
+                                                         config.APP_UPLOAD_MAX_COMPRESSION_RATIO))
+
+        algorithm = expected = None
+        if checksum:
+            algorithm = (checksum_algorithm or "sha256").lower()
+            try:
+                expected = parse_checksum(algorithm, checksum)
+            except ValueError as exc:
                 raise RequestValidationError(errors=[{
-                    'loc': ('body', 'file'),
-                    'msg': ValidatonErrors.LE_CHUNCK_SIZE,
+                    'loc': ('body', 'checksum'),
+                    'msg': f"{ValidatonErrors.INVALID_CHECKSUM}: {exc}",
                     'type': 'value_error'
                 }],
-                    body={"file": "invalid_size"})
-            await chunk_file.write(content)
+                    body={"checksum": checksum})
+
+        chunk_path = os.path.join(upload_dir, f"{chunk_index}.part")
+        staging_path = f"{chunk_path}.{uuid.uuid4().hex}.tmp"
+        digest = ChunkDigest(crc32c_enabled=algorithm == "crc32c")
+        try:
+            async with aiofiles.open(staging_path, "wb") as chunk_file:
+                async def flush(data: bytes) -> None:
+                    await run_in_threadpool(digest.update, data)
+                    if digest.size > max_chunk_size:
+                        raise self._chunk_too_large()
+                    await chunk_file.write(data)
 
-    async def _assemble_chunks_for_scanning(self, upload_path: str, total_chunks: int) -> str:
-        """Assemble chunks into a single file for virus scanning"""
+                # Coalesce small body messages so hashing and disk writes happen in large blocks
+                pending = bytearray()
+                async for data in body:
+                    pending += data
+                    if len(pending) >= config.APP_UPLOAD_READ_SIZE:
+                        await flush(bytes(pending))
+                        pending.clear()
+                if pending:
+                    await flush(bytes(pending))
+
+            if expected and digest.hexdigest(algorithm) != expected:
+                raise ChunkChecksumMismatchException(chunk_index, algorithm, expected, digest.hexdigest(algorithm))
+            try:
+                await executors.run(FILESYSTEM, uploadAdmission.charge, upload_id, session.user_id if session else None,
+                                    chunk_index, digest.size)
+            except AdmissionRejected as exc:
+                raise UploadBudgetExceededException(exc.scope)
+
+            await executors.run(FILESYSTEM, os.replace, staging_path, chunk_path)
+            async with aiofiles.open(f"{chunk_path}.json", "w") as digest_file:
+                await digest_file.write(json.dumps(digest.record()))
+            return digest.to_dict()
+        except DecompressedSizeExceeded:
+            raise self._chunk_too_large()
+        except ContentEncodingError as exc:
+            raise InvalidChunkEncodingException(str(exc))
+        finally:
+            await executors.run(FILESYSTEM, self._discard, staging_path)
+
+    @staticmethod
+    def _read_chunk_digest(chunk_path: str) -> Optional[Dict[str, Any]]:
+        """Digests recorded when the chunk was received; None for chunks staged before they were kept."""
+        try:
+            with open(f"{chunk_path}.json") as digest_file:
+                return json.load(digest_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    async def _assemble_chunks_for_scanning(self, upload_path: str, total_chunks: int) -> tuple[str, str, int]:
+        """Assemble chunks into a single file for virus scanning, returning its path, SHA-256 and size"""
+        return await executors.run(FILESYSTEM, self._assemble_chunks, upload_path, total_chunks)
+
+    def _assemble_chunks(self, upload_path: str, total_chunks: int) -> tuple[str, str, int]:
         assembled_file_path = os.path.join(upload_path, "assembled_for_scan")
         
         try:
+            content_hash = hashlib.sha256()
+            content_size = 0
             with open(assembled_file_path, "wb") as assembled_file:
                 for i in range(total_chunks):
                     chunk_path = os.path.join(upload_path, f"{i}.part")
@@ -61,10 +261,21 @@ class FileService(BaseService[FileRepo]):
                         raise FileNotFoundError(f"Missing chunk {i} for upload")
                     
                     with open(chunk_path, "rb") as chunk_file:
-                        assembled_file.write(chunk_file.read())
+                        content = chunk_file.read()
+
+                    # Catch staging corruption before the chunk is stored, with the CRC-32 recorded when it
+                    # was received rather than a second SHA-256 pass; older chunks have none and are not checked
+                    recorded = self._read_chunk_digest(chunk_path)
+                    if recorded and "crc32" in recorded:
+                        actual = f"{zlib.crc32(content):08x}"
+                        if actual != recorded["crc32"]:
+                            raise ChunkChecksumMismatchException(i, "crc32", recorded["crc32"], actual)
+                    content_hash.update(content)
+                    content_size += len(content)
+                    assembled_file.write(content)
             
             logger.info(f"Assembled {total_chunks} chunks into {assembled_file_path}")
-            return assembled_file_path
+            return assembled_file_path, content_hash.hexdigest(), content_size
             
         except Exception as e:
             logger.error(f"Failed to assemble chunks: {str(e)}")
@@ -79,108 +290,84 @@ class FileService(BaseService[FileRepo]):
             logger.info(f"Starting upload_complete for upload_id: {payload.upload_id}")
 
             # First, check if a file record with this upload_id already exists (idempotency)
-            existing_file = self.repo.db.query(File).filter(File.upload_id == payload.upload_id).first()
+            existing_file = await run_in_session(
+                self.repo.db, lambda: self.repo.db.query(File).filter(File.upload_id == payload.upload_id).first())
             if existing_file:
                 logger.warning(f"File with upload_id {payload.upload_id} already exists. Returning existing file record.")
                 return existing_file
 
             # Check if upload directory exists
             upload_path = os.path.join(config.APP_UPLOAD_DIR, payload.upload_id)
-            if not os.path.exists(upload_path):
+            if not await executors.run(FILESYSTEM, os.path.exists, upload_path):
                 logger.error(f"Upload directory not found: {upload_path}")
                 raise FileNotFoundError(f"Upload directory not found for upload_id: {payload.upload_id}")
 
+            session = await executors.run(FILESYSTEM, UploadSession.load, upload_path)
+            if session:
+                for field in ('total_size', 'total_chunks', 'content_type'):
+                    negotiated = getattr(session, field)
+                    if negotiated is not None and negotiated != getattr(payload, field):
+                        raise self._session_mismatch(field, getattr(payload, field))
+
             # Assemble chunks for virus scanning
-            assembled_file_path = await self._assemble_chunks_for_scanning(upload_path, payload.total_chunks)
-            
-            # VIRUS SCAN - Scan the assembled file
-            scan_result = await virus_scanner.scan_file(assembled_file_path)
-            logger.info(f"Virus scan result for {payload.upload_id}: {scan_result}")
-            
-            # Initialize virus scan fields
-            virus_scan_status = 'clean'
-            virus_scan_date = datetime.utcnow()
-            is_quarantined = False
-            quarantine_reason = None
-            
-            # Check if file is infected
-            if scan_result.get('is_infected'):
-                virus_scan_status = 'infected'
-                is_quarantined = config.QUARANTINE_INFECTED_FILES
-                quarantine_reason = f"Virus detected: {scan_result.get('virus_name', 'Unknown threat')}"
-                
-                logger.error(f"VIRUS DETECTED in upload {payload.upload_id}: {scan_result.get('virus_name')}")
-                
-                # Clean up assembled file immediately
-                if assembled_file_path and os.path.exists(assembled_file_path):
-                    os.remove(assembled_file_path)
-                    assembled_file_path = None
-                
-                # Create quarantined file record
-                file_dto = FileBaseDTO(
-                    upload_id=payload.upload_id,
-                    path="QUARANTINED" if config.QUARANTINE_INFECTED_FILES else "DELETED",
-                    content_type=payload.content_type,
-                    size=payload.total_size,
-                    appointment_id=payload.appointment_id,
-                    user_id=payload.user_id,
-                    filename=payload.filename,
-                    credential=payload.credential,
-                    detail=payload.detail,
-                    celery_task_id="",  # No Celery task for infected files
-                    virus_scan_status=virus_scan_status,
-                    virus_scan_result=scan_result,
-                    virus_scan_date=virus_scan_date,
-                    is_quarantined=is_quarantined,
-                    quarantine_reason=quarantine_reason
-                )
-                
-                file = self.repo.create_file(file_dto)
-                
-                # Raise exception to prevent further processing
-                raise VirusDetectedException(
-                    message=quarantine_reason,
-                    virus_name=scan_result.get('virus_name'),
-                    scan_result=scan_result
-                )
-            
-            elif scan_result.get('scan_result') == 'SCAN_ERROR':
-                # Handle scan errors
-                virus_scan_status = 'error'
-                quarantine_reason = f"Scan failed: {scan_result.get('error', 'Unknown error')}"
-                logger.warning(f"Virus scan failed for {payload.upload_id}: {quarantine_reason}")
-                
-                # Depending on configuration, we might want to quarantine or allow
-                if config.QUARANTINE_INFECTED_FILES:  # Use same setting for scan errors
-                    is_quarantined = True
-                    logger.warning(f"Quarantining file due to scan error: {payload.upload_id}")
-            
-            elif scan_result.get('scan_result') == 'SCAN_DISABLED':
-                virus_scan_status = 'disabled'
-                logger.info(f"Virus scanning disabled for {payload.upload_id}")
-            
-            # File is clean or scan was disabled - proceed with normal upload
+            # The integrity manifest is what was actually received, not what the client declared
+            assembled_file_path, content_sha256, content_size = await self._assemble_chunks_for_scanning(
+                upload_path, payload.total_chunks)
+
             # Determine bucket
             if not payload.credential:
                 bucket = minioStorage.public_bucket
             else:
                 bucket = minioStorage.private_bucket
 
-            filename = f"{payload.upload_id}.{payload.file_extension.value}"
+            # Identical content already stored and scanned in this bucket: reference it instead
+            if config.DEDUP_ENABLED:
+                file = await run_in_session(self.repo.db, self._complete_from_blob, payload, bucket, content_sha256,
+                                            content_size)
+                if file:
+                    return file
+            
+            # VIRUS SCAN - Scan the assembled file
+            scan_result = await virus_scanner.scan_file(assembled_file_path)
+            logger.info(f"Virus scan result for {payload.upload_id}: {scan_result}")
+            virus_scan_status, virus_scan_date, is_quarantined, quarantine_reason = await run_in_session(
+                self.repo.db, self._apply_scan_result, payload, scan_result, content_sha256, content_size)
+
+            # File is clean or scan was disabled - proceed with normal upload
+            filename, metadata, content_encoding = self._object_name(payload, content_sha256, content_size,
+                                                                     chunked=config.CHUNK_STORE_ENABLED)
             logger.info(f"Creating Celery task for bucket: {bucket}, filename: {filename}")
 
             # Create Celery task (only if not quarantined)
             celery_task_id = ""
+            blob_id = None
             if not is_quarantined:
-                celery_task = upload_file_task.delay(
-                    bucket=bucket,
-                    upload_id=payload.upload_id,
-                    total_chunks=payload.total_chunks,
-                    filename=filename,
-                    content_type=payload.content_type,
-                )
-                celery_task_id = celery_task.id
-                logger.info(f"Celery task created with ID: {celery_task.id}")
+                # Registered before the task is queued, so the task always finds the blob to confirm it
+                celery_task_id = str(uuid.uuid4())
+                blob_id = await run_in_session(self.repo.db, self._create_blob, payload, bucket, f"{bucket}/{filename}",
+                                               content_sha256, content_size, virus_scan_status, celery_task_id)
+                # Keeps the janitor off the staged chunks until the task is done with them, also once it
+                # has left the dispatcher's queue
+                await executors.run(FILESYSTEM, mark_completed, upload_path)
+                try:
+                    # Queued fairly among users; the task id is known before the task reaches the broker
+                    celery_task_id = await taskDispatcher.submit(upload_file_task, tenant=payload.user_id,
+                                                                 size=content_size, upload_id=payload.upload_id,
+                                                                 task_id=celery_task_id, kwargs=dict(
+                        bucket=bucket,
+                        upload_id=payload.upload_id,
+                        total_chunks=payload.total_chunks,
+                        filename=filename,
+                        content_type=payload.content_type,
+                        metadata=metadata,
+                        expected_sha256=content_sha256,
+                        expected_size=content_size,
+                        content_encoding=content_encoding,
+                    ))
+                except Exception:
+                    await executors.run(FILESYSTEM, clear_completed, upload_path)
+                    raise
+                logger.info(f"Celery task created with ID: {celery_task_id}")
 
             # Create file record in database with scan results
             file_dto = FileBaseDTO(
@@ -188,7 +375,7 @@ class FileService(BaseService[FileRepo]):
                 path=f"{bucket}/{filename}" if not is_quarantined else "QUARANTINED",
                 content_type=payload.content_type,
                 detail=payload.detail,
-                size=payload.total_size,
+                size=content_size,
                 credential=payload.credential,
                 celery_task_id=celery_task_id,
                 appointment_id=payload.appointment_id,
@@ -198,17 +385,21 @@ class FileService(BaseService[FileRepo]):
                 virus_scan_result=scan_result,
                 virus_scan_date=virus_scan_date,
                 is_quarantined=is_quarantined,
-                quarantine_reason=quarantine_reason
+                quarantine_reason=quarantine_reason,
+                blob_id=blob_id,
+                sha256=content_sha256,
+                integrity_status=None if is_quarantined else 'pending',
+                content_encoding=None if is_quarantined else content_encoding
             )
             logger.info(f"Creating file record with DTO: {file_dto}")
 
-            file = self.repo.create_file(file_dto)
+            file = await async_repo(self.repo).create_file(file_dto)
             logger.info(f"File record created successfully with ID: {file.id}")
             
             return file
 
-        except VirusDetectedException:
-            # Re-raise virus exceptions
+        except (VirusDetectedException, ChunkChecksumMismatchException):
+            # Re-raise virus and checksum exceptions
             raise
         except FileNotFoundError:
             # Re-raise FileNotFoundError as is
@@ -219,51 +410,585 @@ class FileService(BaseService[FileRepo]):
             raise
         finally:
             # Clean up assembled file if it still exists
-            if assembled_file_path and os.path.exists(assembled_file_path):
+            if assembled_file_path and await executors.run(FILESYSTEM, os.path.exists, assembled_file_path):
                 try:
-                    os.remove(assembled_file_path)
+                    await executors.run(FILESYSTEM, os.remove, assembled_file_path)
                     logger.info(f"Cleaned up assembled file: {assembled_file_path}")
                 except Exception as e:
                     logger.warning(f"Failed to clean up assembled file {assembled_file_path}: {str(e)}")
 
+    async def upload_small(self, payload: UploadFileDTO, content: bytes) -> File:
+        """
+        Store a file of at most one chunk within the request: scan it in memory, put the object
+        and create the `File` row, with no staging directory and no Celery task.
+
+        Such files are stored as plain objects even when the chunk store is enabled.
+        """
+        return await async_repo(self.repo).create_file(await self._store_in_memory(payload, content))
+
+    async def upload_batch(self, entries: AsyncIterator[BatchEntry], appointment_id: str, user_id: str,
+                           credential: Optional[Dict[str, Any]]) -> list[Dict[str, Any]]:
+        """
+        Scan and store the files of a batch upload, reporting the outcome of each one.
+
+        Entries are handed to `BATCH_UPLOAD_CONCURRENCY` workers through a queue of the same size,
+        so reading the body waits while they are busy and memory stays bounded however many files
+        the batch holds. The rows of all stored files are inserted together once the body is read;
+        when that does not happen, what was stored for them is removed again.
+        """
+        results: list[Dict[str, Any]] = []
+        stored: list[tuple[Dict[str, Any], FileBaseDTO]] = []
+        queue: asyncio.Queue = asyncio.Queue(maxsize=config.BATCH_UPLOAD_CONCURRENCY)
+
+        async def worker() -> None:
+            while (item := await queue.get()) is not None:
+                entry, result = item
+                try:
+                    file_dto = await self._store_batch_entry(entry, appointment_id, user_id, credential)
+                    deduplicated = (file_dto.virus_scan_result or {}).get("scan_result") == "DEDUPLICATED"
+                    result.update(status="deduplicated" if deduplicated else "stored",
+                                  size=file_dto.size, sha256=file_dto.sha256)
+                    stored.append((result, file_dto))
+                except BatchEntryException as exc:
+                    result.update(status="failed", error=exc.message)
+                except VirusDetectedException as exc:
+                    result.update(status="rejected", error=f"File rejected: {exc.message}")
+                except Exception as exc:
+                    logger.error(f"Batch upload of {entry.filename} failed: {str(exc)}\n{traceback.format_exc()}")
+                    result.update(status="failed", error="An error occurred during upload")
+
+        workers = [asyncio.create_task(worker()) for _ in range(config.BATCH_UPLOAD_CONCURRENCY)]
+        inserted = False
+        try:
+            try:
+                async for entry in entries:
+                    result = {"index": entry.index, "filename": entry.filename}
+                    results.append(result)
+                    if entry.index >= config.BATCH_UPLOAD_MAX_FILES:
+                        result.update(status="failed", error=ValidatonErrors.BATCH_FILE_LIMIT)
+                        continue
+                    await queue.put((entry, result))
+            except BatchFormatError as exc:
+                logger.warning(f"Batch body for appointment {appointment_id} is malformed: {str(exc)}")
+                results.append({"index": len(results), "filename": None, "status": "failed",
+                                "error": ValidatonErrors.INVALID_BATCH_BODY})
+            finally:
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+
+            if stored:
+                try:
+                    files = await async_repo(self.repo).create_files([file_dto for _, file_dto in stored])
+                except SQLAlchemyError as exc:
+                    logger.error(f"Creating the rows of a batch for appointment {appointment_id} failed: {str(exc)}")
+                    for result, _ in stored:
+                        result.pop("size", None)
+                        result.pop("sha256", None)
+                        result.update(status="failed", error="An error occurred during upload")
+                    return results
+                inserted = True
+                download_urls = await self.get_download_links(files)
+                for (result, _), file, download_url in zip(stored, files, download_urls):
+                    result.update(file_id=file.id, download_url=download_url)
+            return results
+        finally:
+            # Failed insert, disconnect or error: nothing references what the workers stored
+            if stored and not inserted:
+                await self._discard_stored([file_dto for _, file_dto in stored])
+
+    async def _discard_stored(self, files: list[FileBaseDTO]) -> None:
+        """Undo `_store_in_memory` for files whose rows were never created; errors are only logged."""
+        try:
+            paths = await run_in_session(self.repo.db, self._release_unrecorded, files)
+        except Exception as exc:
+            logger.error(f"Releasing the blobs of {len(files)} unrecorded files failed: {str(exc)}")
+            return
+        for path in paths:
+            bucket_name, _, object_name = path.partition("/")
+            try:
+                await asyncMinioStorage.remove_object(bucket_name, object_name)
+                logger.info(f"Removed unrecorded object {path}")
+            except Exception as exc:
+                logger.error(f"Failed to remove unrecorded object {path}: {str(exc)}")
+
+    def _release_unrecorded(self, files: list[FileBaseDTO]) -> set[str]:
+        """Drop the blob references of files without rows; returns the paths nothing references anymore."""
+        stored = [file for file in files if not file.is_quarantined]
+        shared = self.repo.shared_paths({file.path for file in stored if not file.blob_id}, exclude_file_ids=[])
+        unreferenced = set()
+        for file in stored:
+            if file.blob_id:
+                if self.blob_repo.release(file.blob_id):
+                    unreferenced.add(file.path)
+            elif file.path not in shared:
+                unreferenced.add(file.path)
+        self.repo.db.commit()
+        return unreferenced
+
+    async def _store_batch_entry(self, entry: BatchEntry, appointment_id: str, user_id: str,
+                                 credential: Optional[Dict[str, Any]]) -> FileBaseDTO:
+        if entry.data is None:
+            raise BatchEntryException(ValidatonErrors.LE_CHUNCK_SIZE)
+        extension = os.path.splitext(entry.filename)[1][1:].lower()
+        try:
+            file_extension = FileExtension(extension)
+        except ValueError:
+            raise BatchEntryException(f"{ValidatonErrors.UNSUPPORTED_FILE_EXTENSION}: {extension or entry.filename}")
+        content_type = entry.content_type or mimetypes.guess_type(entry.filename)[0]
+        if not content_type or len(content_type) > File.content_type.type.length:
+            # Longer types (e.g. OOXML documents) do not fit the column; the extension still identifies the file
+            content_type = "application/octet-stream"
+        payload = UploadFileDTO(upload_id=str(uuid.uuid4()), total_chunks=1, total_size=entry.size, size=entry.size,
+                                file_extension=file_extension, content_type=content_type, detail=None,
+                                credential=credential, appointment_id=appointment_id, user_id=user_id,
+                                filename=entry.filename)
+        return await self._store_in_memory(payload, entry.data)
+
+    async def _store_in_memory(self, payload: UploadFileDTO, content: bytes) -> FileBaseDTO:
+        """Scan and store an in-memory file, returning the row to create for it; infected files are recorded and rejected."""
+        content_sha256 = await run_in_threadpool(lambda: hashlib.sha256(content).hexdigest())
+        content_size = len(content)
+        bucket = minioStorage.private_bucket if payload.credential else minioStorage.public_bucket
+
+        if config.DEDUP_ENABLED:
+            file_dto = await run_in_session(self.repo.db, self._blob_file_dto, payload, bucket, content_sha256,
+                                            content_size)
+            if file_dto:
+                return file_dto
+
+        scan_result = await virus_scanner.scan_file_content(content, payload.filename)
+        logger.info(f"Virus scan result for {payload.upload_id}: {scan_result}")
+        virus_scan_status, virus_scan_date, is_quarantined, quarantine_reason = await run_in_session(
+            self.repo.db, self._apply_scan_result, payload, scan_result, content_sha256, content_size)
+
+        path = "QUARANTINED"
+        blob_id = content_encoding = stored_size = compression_cpu_ms = None
+        if not is_quarantined:
+            filename, metadata, content_encoding = self._object_name(payload, content_sha256, content_size, chunked=False)
+            stored = content
+            if content_encoding:
+                stored, cpu_seconds = await run_in_threadpool(compress_bytes, content, config.COMPRESSION_AT_REST_LEVEL)
+                stored_size, compression_cpu_ms = len(stored), round(cpu_seconds * 1000)
+            etag = MultipartETag(PART_SIZE)
+            await run_in_threadpool(etag.update, stored)
+            result = await asyncMinioStorage.put_object(
+                bucket, filename, io.BytesIO(stored), len(stored),
+                content_type=STORED_CONTENT_TYPE if content_encoding else payload.content_type,
+                metadate=metadata, part_size=PART_SIZE)
+            # Same check as the upload task: the ETag MinIO computed must match the bytes we sent
+            if result.etag.strip('"') != etag.hexdigest():
+                await asyncMinioStorage.remove_object(bucket, filename)
+                raise IOError(f"Stored object {bucket}/{filename} does not match the uploaded content")
+            path = f"{bucket}/{filename}"
+            # The object is already verified, so identical uploads can reference it right away
+            blob_id = await run_in_session(self.repo.db, self._create_blob, payload, bucket, path, content_sha256,
+                                           content_size, virus_scan_status, "", stored=True)
+
+        file_dto = FileBaseDTO(
+            upload_id=payload.upload_id,
+            path=path,
+            content_type=payload.content_type,
+            detail=payload.detail,
+            size=content_size,
+            credential=payload.credential,
+            # Stored synchronously; there is no task to track
+            celery_task_id="",
+            appointment_id=payload.appointment_id,
+            user_id=payload.user_id,
+            filename=payload.filename,
+            virus_scan_status=virus_scan_status,
+            virus_scan_result=scan_result,
+            virus_scan_date=virus_scan_date,
+            is_quarantined=is_quarantined,
+            quarantine_reason=quarantine_reason,
+            blob_id=blob_id,
+            sha256=content_sha256,
+            integrity_status=None if is_quarantined else 'verified',
+            content_encoding=content_encoding,
+            stored_size=stored_size,
+            compression_cpu_ms=compression_cpu_ms
+        )
+        return file_dto
+
+    def _apply_scan_result(self, payload: UploadFileDTO, scan_result: Dict[str, Any], content_sha256: str,
+                           content_size: int) -> tuple[str, datetime, bool, Optional[str]]:
+        """
+        Turn a virus scan result into the file's scan fields: status, date, quarantine flag and reason.
+
+        Infected uploads are recorded as quarantined and rejected with `VirusDetectedException`.
+        """
+        virus_scan_status = 'clean'
+        virus_scan_date = datetime.utcnow()
+        is_quarantined = False
+        quarantine_reason = None
+
+        # Check if file is infected
+        if scan_result.get('is_infected'):
+            virus_scan_status = 'infected'
+            is_quarantined = config.QUARANTINE_INFECTED_FILES
+            quarantine_reason = f"Virus detected: {scan_result.get('virus_name', 'Unknown threat')}"
+
+            logger.error(f"VIRUS DETECTED in upload {payload.upload_id}: {scan_result.get('virus_name')}")
+
+            # Create quarantined file record
+            file_dto = FileBaseDTO(
+                upload_id=payload.upload_id,
+                path="QUARANTINED" if config.QUARANTINE_INFECTED_FILES else "DELETED",
+                content_type=payload.content_type,
+                size=content_size,
+                appointment_id=payload.appointment_id,
+                user_id=payload.user_id,
+                filename=payload.filename,
+                credential=payload.credential,
+                detail=payload.detail,
+                celery_task_id="",  # No Celery task for infected files
+                virus_scan_status=virus_scan_status,
+                virus_scan_result=scan_result,
+                virus_scan_date=virus_scan_date,
+                is_quarantined=is_quarantined,
+                quarantine_reason=quarantine_reason,
+                sha256=content_sha256
+            )
+
+            self.repo.create_file(file_dto)
+
+            # Raise exception to prevent further processing
+            raise VirusDetectedException(
+                message=quarantine_reason,
+                virus_name=scan_result.get('virus_name'),
+                scan_result=scan_result
+            )
+
+        elif scan_result.get('scan_result') == 'SCAN_ERROR':
+            # Handle scan errors
+            virus_scan_status = 'error'
+            quarantine_reason = f"Scan failed: {scan_result.get('error', 'Unknown error')}"
+            logger.warning(f"Virus scan failed for {payload.upload_id}: {quarantine_reason}")
+
+            # Depending on configuration, we might want to quarantine or allow
+            if config.QUARANTINE_INFECTED_FILES:  # Use same setting for scan errors
+                is_quarantined = True
+                logger.warning(f"Quarantining file due to scan error: {payload.upload_id}")
+
+        elif scan_result.get('scan_result') == 'SCAN_DISABLED':
+            virus_scan_status = 'disabled'
+            logger.info(f"Virus scanning disabled for {payload.upload_id}")
+
+        return virus_scan_status, virus_scan_date, is_quarantined, quarantine_reason
+
+    def _object_name(self, payload: UploadFileDTO, content_sha256: str, content_size: int,
+                     chunked: bool) -> tuple[str, Optional[Dict[str, str]], Optional[str]]:
+        """Object name, object metadata and at-rest content encoding for a new upload."""
+        metadata = None
+        if config.MINIO_CONTENT_ADDRESSED_KEYS:
+            # Identical content always maps to the same immutable key
+            filename = minioStorage.content_addressed_name(content_sha256, payload.file_extension.value)
+            metadata = {"Cache-Control": config.MINIO_IMMUTABLE_CACHE_CONTROL}
+        else:
+            filename = f"{payload.upload_id}.{payload.file_extension.value}"
+        if chunked:
+            # Served through the download proxy, so object-level cache headers do not apply
+            return minioStorage.chunked_name(filename), None, None
+        if should_compress(payload.file_extension.value, payload.content_type, content_size):
+            # Compressed objects are only served through the download proxy as well
+            return minioStorage.compressed_name(filename), None, STORED_ENCODING
+        return filename, metadata, None
+
+    def _create_blob(self, payload: UploadFileDTO, bucket: str, path: str, content_sha256: str, content_size: int,
+                     virus_scan_status: str, celery_task_id: str, stored: bool = False) -> Optional[str]:
+        """
+        Register the object of a new upload for whole-file deduplication; returns the blob id, if any.
+
+        Unless `stored`, identical uploads only reference it once the upload task confirms the object.
+        """
+        if not config.DEDUP_ENABLED or virus_scan_status not in self.DEDUP_SCAN_STATUSES:
+            return None
+        try:
+            return self.blob_repo.create_blob(
+                sha256=content_sha256,
+                bucket=bucket,
+                path=path,
+                size=content_size,
+                virus_scan_status=virus_scan_status,
+                celery_task_id=celery_task_id,
+                stored=stored,
+            ).id
+        except IntegrityError:
+            # A concurrent upload of the same content won the race; store this copy unshared
+            logger.warning(f"Blob for {content_sha256} in {bucket} already exists, storing {payload.upload_id} separately")
+            return None
+
+    def _complete_from_blob(self, payload: UploadFileDTO, bucket: str, content_sha256: str,
+                            content_size: int) -> Optional[File]:
+        """
+        Create a file record referencing a stored blob with the same content, skipping the scan and
+        the object upload; returns None when there is no such blob.
+        """
+        file_dto = self._blob_file_dto(payload, bucket, content_sha256, content_size)
+        if not file_dto:
+            return None
+        file = self.repo.create_file(file_dto)
+
+        # The staged chunks are not needed anymore; nothing will upload them
+        upload_path = os.path.join(config.APP_UPLOAD_DIR, payload.upload_id)
+        shutil.rmtree(upload_path, ignore_errors=True)
+        uploadAdmission.release(payload.upload_id)
+        return file
+
+    def _blob_file_dto(self, payload: UploadFileDTO, bucket: str, content_sha256: str,
+                       content_size: int) -> Optional[FileBaseDTO]:
+        """
+        Take a reference to a stored blob with the same content and describe a file backed by it;
+        returns None when there is no such blob.
+        """
+        blob = self.blob_repo.acquire(content_sha256, bucket, self.DEDUP_SCAN_STATUSES, content_size)
+        if not blob:
+            return None
+        logger.info(f"Upload {payload.upload_id} deduplicated against blob {blob.id} ({blob.path})")
+        file_dto = FileBaseDTO(
+            upload_id=payload.upload_id,
+            path=blob.path,
+            content_type=payload.content_type,
+            detail=payload.detail,
+            size=content_size,
+            credential=payload.credential,
+            # Upload status follows the task that stored the shared object
+            celery_task_id=blob.celery_task_id or "",
+            appointment_id=payload.appointment_id,
+            user_id=payload.user_id,
+            filename=payload.filename,
+            virus_scan_status=blob.virus_scan_status,
+            virus_scan_result={"scan_result": "DEDUPLICATED", "blob_id": blob.id},
+            virus_scan_date=datetime.utcnow(),
+            blob_id=blob.id,
+            sha256=content_sha256,
+            integrity_status='pending',
+            content_encoding=STORED_ENCODING if minioStorage.is_compressed(blob.path) else None
+        )
+        return file_dto
+
     async def get_download_link(self, file: File) -> str:
-        bucket_name = file.path.split("/")[0]
-        object_name = "/".join(file.path.split("/")[1:])
+        return (await self.get_download_links([file]))[0]
 
-        # Choose inline vs attachment based on content type
-        disposition_type = self._should_display_inline(file.content_type)
+    async def get_download_links(self, files: list[File]) -> list[str]:
+        """Presign download URLs for many files, one signing batch per bucket."""
+        links: list[Optional[str]] = [None] * len(files)
+        batches: Dict[str, list[tuple[int, str, Dict[str, str], Optional[Dict[str, str]]]]] = {}
+        for index, file in enumerate(files):
+            bucket_name = file.path.split("/")[0]
+            object_name = "/".join(file.path.split("/")[1:])
 
-        # Set filename via Content-Disposition for correct save-as name
-        # Use both filename and RFC 5987 filename* for better compatibility
-        safe_filename = file.filename or object_name
-        disposition = f"{disposition_type}; filename=\"{safe_filename}\"; filename*=UTF-8''{quote(safe_filename)}"
+            disposition = self.get_content_disposition(file)
+
+            if minioStorage.is_chunked(object_name) or minioStorage.is_compressed(object_name):
+                # Chunked files have no object of their own and are reassembled by the download proxy;
+                # compressed ones are decompressed there for clients that do not accept zstd
+                links[index] = self.get_proxy_download_url(file)
+                continue
 
-        if not file.credential:
-            # Prefer presigned URL (for filename headers). Fallback to direct HTTPS URL if signing fails.
+            if not file.credential and minioStorage.is_content_addressed(object_name):
+                # Immutable public objects get a stable unsigned URL that browsers and CDNs can cache
+                links[index] = minioStorage.get_public_url(bucket_name, object_name)
+                continue
+
+            extra_query_params = None
+            if file.credential:
+                # Ensure credential values are strings for signing
+                extra_query_params = {key: value if isinstance(value, str) else str(value)
+                                      for key, value in file.credential.items()}
+            batches.setdefault(bucket_name, []).append(
+                (index, object_name, {"response-content-disposition": disposition}, extra_query_params))
+
+        # Signed at the start of the window the ETags are built for, so a revalidated body's URLs are still current
+        request_date = presign_window()
+        for bucket_name, batch in batches.items():
             try:
-                return minioStorage.get_presigned_url(
+                urls = minioStorage.get_presigned_urls(
                     method="GET",
                     bucket_name=bucket_name,
-                    object_name=object_name,
-                    response_headers={"response-content-disposition": disposition},
+                    items=[(object_name, headers, params) for _, object_name, headers, params in batch],
+                    request_date=request_date,
                 )
             except Exception as e:
-                logger.error(f"Presign failed for public object {bucket_name}/{object_name}: {str(e)}")
+                if any(params for _, _, _, params in batch):
+                    # For private files, presign is required; let exceptions bubble up to surface the error
+                    raise
+                logger.error(f"Presign failed for public objects in {bucket_name}: {str(e)}")
                 # Fallback to direct external URL (no Content-Disposition control)
-                return f"https://{config.MINIO_EXTERNAL_ENDPOINT}/{bucket_name}/{object_name}"
+                urls = [f"https://{config.MINIO_EXTERNAL_ENDPOINT}/{bucket_name}/{object_name}"
+                        for _, object_name, _, _ in batch]
+            for (index, _, _, _), url in zip(batch, urls):
+                links[index] = url
+        return links
+
+    def get_proxy_download_url(self, file: File) -> str:
+        url = f"{config.APP_PUBLIC_URL}/api/v1/file/download/{file.id}"
+        if file.credential:
+            url += "?" + urlencode({key: value if isinstance(value, str) else str(value)
+                                    for key, value in file.credential.items()})
+        return url
+
+    def get_content_disposition(self, file: File) -> str:
+        # Choose inline vs attachment based on content type
+        disposition_type = self._should_display_inline(file.content_type)
+
+        # Set filename via Content-Disposition for correct save-as name
+        # Use both filename and RFC 5987 filename* for better compatibility
+        safe_filename = file.filename or "/".join(file.path.split("/")[1:])
+        return f"{disposition_type}; filename=\"{safe_filename}\"; filename*=UTF-8''{quote(safe_filename)}"
+
+    async def get_download_object(self, id: str, credential=Dict[str, Any]):
+        """Authorize a download and return the file record with the stored object's stat."""
+        file = await self.get_file(id=id, credential=credential)
+        if file.is_quarantined or "/" not in file.path:
+            raise FileNotFoundException()
+        bucket_name = file.path.split("/")[0]
+        object_name = "/".join(file.path.split("/")[1:])
+        if minioStorage.is_chunked(object_name):
+            stat = await run_in_session(self.repo.db, self.chunk_store.stat, bucket_name, object_name)
+            if stat is None:
+                raise FileNotFoundException()
+            return file, stat
+        try:
+            stat = await asyncMinioStorage.stat_object(bucket_name, object_name)
+        except S3Error as exc:
+            if exc.code in ("NoSuchKey", "NoSuchBucket"):
+                raise FileNotFoundException()
+            raise
+        return file, stat
+
+    async def iter_object(self, file: File, start: int, end: int) -> AsyncIterator[bytes]:
+        """
+        Stream the inclusive byte range `start..end` of a stored file.
+
+        At most `APP_DOWNLOAD_CHUNK_SIZE` bytes are held at a time. The MinIO connection is
+        released when iteration stops or the generator is closed with `aclose`; when that
+        happens during a read, which keeps running in the executor, only once the read returns.
+        """
+        if end < start:
+            return
+        bucket_name = file.path.split("/")[0]
+        object_name = "/".join(file.path.split("/")[1:])
+        if minioStorage.is_chunked(object_name):
+            async for data in iterate_in_threadpool(self.chunk_store.iter_range(bucket_name, object_name, start, end)):
+                yield data
+            return
+        response = await asyncMinioStorage.get_object(bucket_name, object_name, offset=start, length=end - start + 1)
+        read = None
+        try:
+            while True:
+                read = asyncio.ensure_future(executors.run(MINIO, response.read, config.APP_DOWNLOAD_CHUNK_SIZE))
+                data = await asyncio.shield(read)
+                if not data:
+                    break
+                yield data
+        finally:
+            if read and not read.done():
+                read.add_done_callback(lambda _: self._close_object(response))
+            else:
+                self._close_object(response)
+
+    @staticmethod
+    def _close_object(response) -> None:
+        response.close()
+        response.release_conn()
+
+    async def iter_decompressed(self, file: File, cached_path: Optional[str], start: int, end: int) -> AsyncIterator[bytes]:
+        """
+        Stream the inclusive byte range `start..end` of a compressed file's original content.
+
+        The object is decompressed from its start, from the local cache when available;
+        bytes before `start` are decoded and dropped, so ranges late in a file cost more CPU.
+        As in `iter_object`, the source is closed once a read still running in the threadpool
+        returns, rather than under it.
+        """
+        if end < start:
+            return
+        bucket_name = file.path.split("/")[0]
+        object_name = "/".join(file.path.split("/")[1:])
+        if cached_path:
+            source = await executors.run(FILESYSTEM, open, cached_path, "rb")
+            close = source.close
         else:
-            # Ensure credential values are strings for signing
-            for key, value in file.credential.items():
-                if not isinstance(value, str):
-                    file.credential[key] = str(value)
-            # For private files, presign is required; let exceptions bubble up to surface the error
-            return minioStorage.get_presigned_url(
-                method="GET",
-                bucket_name=bucket_name,
-                object_name=object_name,
-                response_headers={"response-content-disposition": disposition},
-                extra_query_params=file.credential,
-            )
+            source = await asyncMinioStorage.get_object(bucket_name, object_name)
+            close = lambda: self._close_object(source)
+        read = None
+        try:
+            reader = DecompressedReader(source)
+            read = asyncio.ensure_future(run_in_threadpool(reader.skip, start))
+            await asyncio.shield(read)
+            remaining = end - start + 1
+            while remaining > 0:
+                read = asyncio.ensure_future(
+                    run_in_threadpool(reader.read, min(config.APP_DOWNLOAD_CHUNK_SIZE, remaining)))
+                data = await asyncio.shield(read)
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+        finally:
+            if read and not read.done():
+                read.add_done_callback(lambda _: close())
+            else:
+                close()
+
+    async def get_cached_object_path(self, file: File, stat, wait: bool = True) -> Optional[str]:
+        """
+        Return a local copy of a stored file from the read-through cache, or None if not cacheable.
+
+        The path is pinned until `release_cached_object` is called with it. Without `wait`,
+        a miss returns None at once and the object is cached in the background.
+        """
+        bucket_name = file.path.split("/")[0]
+        object_name = "/".join(file.path.split("/")[1:])
+
+        async def fetch(target_path: str) -> None:
+            if minioStorage.is_chunked(object_name):
+                chunks = self.chunk_store.iter_range(bucket_name, object_name, 0, stat.size - 1)
+                await run_in_threadpool(self._write_chunks, chunks, target_path)
+            else:
+                await executors.run(MINIO, self._download_object, bucket_name, object_name, target_path)
+
+        if wait:
+            return await objectCache.get_path(file.path, stat.etag, stat.size, fetch)
+        cached_path = objectCache.lookup(file.path, stat.etag, stat.size)
+        if not cached_path:
+            objectCache.fill(file.path, stat.etag, stat.size, fetch)
+        return cached_path
+
+    @staticmethod
+    def release_cached_object(cached_path: str) -> None:
+        objectCache.release(cached_path)
+
+    @staticmethod
+    def _download_object(bucket_name: str, object_name: str, target_path: str) -> None:
+        response = minioStorage.get_object(bucket_name, object_name)
+        try:
+            with open(target_path, "wb") as target:
+                for data in response.stream(config.APP_DOWNLOAD_CHUNK_SIZE):
+                    target.write(data)
+        finally:
+            response.close()
+            response.release_conn()
+
+    @staticmethod
+    def _write_chunks(chunks: Iterator[bytes], target_path: str) -> None:
+        with open(target_path, "wb") as target:
+            for data in chunks:
+                target.write(data)
+
+    async def iter_cached_object(self, cached_path: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Stream the inclusive byte range `start..end` of a cached file in bounded reads."""
+        async with aiofiles.open(cached_path, "rb") as cached_file:
+            await cached_file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = await cached_file.read(min(config.APP_DOWNLOAD_CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
 
     def _should_display_inline(self, content_type: Optional[str]) -> str:
         """Return 'inline' for content types we want to display in-browser, else 'attachment'."""
@@ -276,51 +1001,97 @@ class FileService(BaseService[FileRepo]):
         return "attachment"
 
 
-    async def get_files_by_appointment(self, appointment_id: str) -> list[File]:
+    async def get_files_by_appointment(self, appointment_id: str, limit: int,
+                                       cursor: Optional[str] = None) -> tuple[list[tuple], Optional[str]]:
+        """A page of an appointment's listing rows and the cursor of the next page, None on the last one."""
         # In a real app, you'd validate the appointment name here
-        return self.repo.get_files_by_appointment(appointment_id)
+        after = decode_cursor(cursor) if cursor else None
+        rows = await async_repo(self.repo).get_files_by_appointment(appointment_id, limit=limit + 1, after=after)
+        return self._page(rows, limit)
 
-    async def list_all_files(self, user_id: str) -> list[tuple]:
-        return self.repo.list_all_files(user_id)
+    async def list_all_files(self, user_id: str, limit: int,
+                             cursor: Optional[str] = None) -> tuple[list[tuple], Optional[str]]:
+        """A page of a user's listing rows, with `appointment_name`, and the cursor of the next page."""
+        after = decode_cursor(cursor) if cursor else None
+        rows = await async_repo(self.repo).list_all_files(user_id, limit=limit + 1, after=after)
+        return self._page(rows, limit)
 
     async def delete_file(self, file_id: str):
         # First get the file record to extract MinIO path info
-        file = self.repo.get_file(file_id)
+        file = await async_repo(self.repo).get_file(file_id)
         if file:
-            # Delete from MinIO
-            try:
-                bucket_name = file.path.split("/")[0]
-                object_name = "/".join(file.path.split("/")[1:])
-                minioStorage.remove_object(bucket_name, object_name)
-                logger.info(f"Deleted file from MinIO: {bucket_name}/{object_name}")
-            except Exception as e:
-                logger.error(f"Failed to delete file from MinIO: {str(e)}")
-                # Continue with DB deletion even if MinIO deletion fails
+            # Deduplicated and content-addressed objects may back several file records; keep them while referenced
+            if not await async_repo(self.repo).release_objects([file]):
+                logger.info(f"Keeping shared MinIO object {file.path}")
+            else:
+                # Delete from MinIO
+                try:
+                    bucket_name = file.path.split("/")[0]
+                    object_name = "/".join(file.path.split("/")[1:])
+                    await asyncMinioStorage.remove_object(bucket_name, object_name)
+                    logger.info(f"Deleted file from MinIO: {bucket_name}/{object_name}")
+                except Exception as e:
+                    logger.error(f"Failed to delete file from MinIO: {str(e)}")
+                    # Continue with DB deletion even if MinIO deletion fails
+                objectCache.evict(file.path)
             
             # Delete from database
-            return self.repo.delete_file(file_id)
+            return await async_repo(self.repo).delete_file(file_id)
         return None
     async def get_file(self, id: id, credential=Dict[str, Any]) -> File:
-        file = self.repo.get_file(id=id)
+        file = await async_repo(self.repo).get_file(id=id)
         if file == None:
             raise FileNotFoundException
         if file.credential and credential != file.credential:
             raise PermissionException()
         return file
 
+    async def get_file_etag(self, id: str, credential=Dict[str, Any]) -> str:
+        """Authorize like `get_file` and return the file's ETag from its row version only."""
+        row = await async_repo(self.repo).get_file_version(id=id)
+        if row == None:
+            raise FileNotFoundException
+        version, file_credential = row
+        if file_credential and credential != file_credential:
+            raise PermissionException()
+        return make_etag("file", id, version)
+
+    def file_etag(self, file: File) -> str:
+        return make_etag("file", file.id, file.version)
+
+    async def get_appointment_files_etag(self, appointment_id: str, *page: object) -> Optional[str]:
+        """ETag of a listing page, given by its `limit` and `cursor`, from the appointment's files version."""
+        version = await async_repo(self.repo).get_appointment_files_version(appointment_id)
+        return None if version is None else make_etag("appointment", appointment_id, version, *page)
+
+    async def get_user_files_etag(self, user_id: str, *page: object) -> Optional[str]:
+        version = await async_repo(self.repo).get_user_files_version(user_id)
+        return None if version is None else make_etag("user", user_id, version, *page)
+
     async def get_upload_status(self, file_id: str, credential=Dict[str, Any]) -> str:
         file = await self.get_file(id=file_id, credential=credential)
-        result = AsyncResult(file.celery_task_id)
-        return result.state
+        if file.integrity_status in ('mismatch', 'missing'):
+            # Flagged by the background verifier after the upload itself succeeded
+            return UploadStatus.CORRUPTED.value
+        if not file.celery_task_id and not file.is_quarantined:
+            # Stored within the upload request by the small-file fast path
+            return UploadStatus.SUCCESS.value
+        return await executors.run(BROKER, lambda: AsyncResult(file.celery_task_id).state)
 
     async def retry_upload(self, payload: RetryUploadFileDTO):
         file = await self.get_file(id=payload.id, credential=payload.credential)
-        result = AsyncResult(file.celery_task_id)
-        if result.status == UploadStatus.SUCCESS.value:
+        if not file.celery_task_id and not file.is_quarantined:
+            raise FileUploadedException()
+        status = await executors.run(BROKER, lambda: AsyncResult(file.celery_task_id).status)
+        if status == UploadStatus.SUCCESS.value:
             raise FileUploadedException()
-        if result.status == UploadStatus.PENDING.value or result.status == UploadStatus.STARTED.value:
+        if status == UploadStatus.PENDING.value or status == UploadStatus.STARTED.value:
             raise FilePendingUploadException()
-        meta = celery.backend.get_task_meta(file.celery_task_id)
-        upload_file_task.apply_async(
-            args=meta['args'], kwargs=meta['kwargs'], task_id=file.celery_task_id)
+        meta = await executors.run(BROKER, celery.backend.get_task_meta, file.celery_task_id)
+        upload_id = meta['kwargs'].get('upload_id')
+        if upload_id:
+            # The failed task released the staged chunks to the janitor; they are in use again
+            await executors.run(FILESYSTEM, mark_completed, os.path.join(config.APP_UPLOAD_DIR, upload_id))
+        await taskDispatcher.submit(upload_file_task, tenant=file.user_id, size=file.size or 0, kwargs=meta['kwargs'],
+                                    upload_id=upload_id, task_id=file.celery_task_id)
         return file
@@ -1,8 +1,11 @@
 from repositories.user_repository import UserRepo
+from repositories.file_repository import FileRepo
 from services.base_service import BaseService
 from dto.user_dto import UserCreate, User
-from typing import List
+from typing import List, Optional
 from infrastructure.minio import minioStorage
+from infrastructure.object_cache import objectCache
+from utils import decode_cursor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,27 +18,32 @@ class UserService(BaseService[UserRepo]):
     def create_user(self, user: UserCreate) -> User:
         return self.repo.create_user(user.name)
 
-    def list_users(self) -> List[User]:
-        return self.repo.list_users()
+    def list_users(self, limit: int, cursor: Optional[str] = None) -> tuple[List[User], Optional[str]]:
+        """A page of users, oldest first, and the cursor of the next page."""
+        after = decode_cursor(cursor) if cursor else None
+        return self._page(self.repo.list_users(limit=limit + 1, after=after), limit)
 
     def delete_user(self, user_id: str) -> User:
         # First get the user to access its appointments and files
-        user = self.repo.get(id=user_id)
+        user = self.repo.get_with_files(user_id)
         if not user:
             return None
             
         # Delete all files associated with this user from MinIO
-        for appointment in user.appointments:
-            for file in appointment.files:
-                try:
-                    # Delete from MinIO
-                    bucket_name = file.path.split("/")[0]
-                    object_name = "/".join(file.path.split("/")[1:])
-                    minioStorage.remove_object(bucket_name, object_name)
-                    logger.info(f"Deleted file from MinIO: {bucket_name}/{object_name}")
-                except Exception as e:
-                    logger.error(f"Failed to delete file from MinIO: {str(e)}")
-                    # Continue with deletion even if MinIO deletion fails
+        file_repo = FileRepo(db=self.repo.db)
+        user_files = [file for appointment in user.appointments for file in appointment.files]
+        # Deduplicated and content-addressed objects may also back other users' files
+        for path in file_repo.release_objects(user_files):
+            try:
+                # Delete from MinIO
+                bucket_name = path.split("/")[0]
+                object_name = "/".join(path.split("/")[1:])
+                minioStorage.remove_object(bucket_name, object_name)
+                logger.info(f"Deleted file from MinIO: {bucket_name}/{object_name}")
+            except Exception as e:
+                logger.error(f"Failed to delete file from MinIO: {str(e)}")
+                # Continue with deletion even if MinIO deletion fails
+            objectCache.evict(path)
         
         # Delete the user (cascade will delete associated appointments and files from DB)
         return self.repo.delete_user(user_id)
\ No newline at end of file
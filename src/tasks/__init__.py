@@ -4,4 +4,7 @@ from core.config import config
 import os
 
 from . import file_upload_task
+from . import object_key_migration_task
 
+from . import chunk_gc_task
+from . import integrity_verifier_task
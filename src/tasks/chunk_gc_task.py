@@ -0,0 +1,33 @@
+from . import celery
+from infrastructure.db.mysql import mysql
+from repositories.chunk_repository import ChunkRepo
+from services.chunk_store_service import ChunkStoreService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task()
+def collect_chunks_task(batch_size: int = 500):
+    """
+    Remove chunk-store chunks that no manifest references anymore.
+
+    Deleting a chunked file only drops its chunk references; this task removes
+    the chunks afterwards and re-enqueues itself while full batches are found.
+    Run it periodically, e.g. from cron with `python -m tasks.chunk_gc_task`.
+    """
+    db = next(mysql.get_db())
+    try:
+        removed = ChunkStoreService(repo=ChunkRepo(db=db)).collect_garbage(limit=batch_size)
+        logger.info(f"Chunk garbage collection removed {removed} chunks")
+        if removed == batch_size:
+            collect_chunks_task.delay(batch_size=batch_size)
+        return removed
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # Enqueue under the worker's task name rather than `__main__`
+    from tasks.chunk_gc_task import collect_chunks_task as registered_task
+    registered_task.delay()
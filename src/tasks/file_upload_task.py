@@ -1,31 +1,139 @@
 from . import celery, minioStorage, config, os
 from minio import S3Error
+from celery.exceptions import Ignore
+import hashlib
+import logging
+import shutil
+from infrastructure.db.mysql import mysql
+from infrastructure.checksums import MultipartETag
+from infrastructure.compression import compress_file, STORED_CONTENT_TYPE
+from infrastructure.upload_session import multipart_part_size, clear_completed
+from repositories.chunk_repository import ChunkRepo
+from repositories.blob_repository import BlobRepo
+from repositories.file_repository import FileRepo
+from services.chunk_store_service import ChunkStoreService
+from entities.chunk_manifest import ChunkManifest
+from constants.upload_stauts import UploadStatus
 
+logger = logging.getLogger(__name__)
 
-@celery.task()
-def upload_file_task(bucket: str, upload_id: str, total_chunks: int, filename: str, content_type: str | None = None):
+
+# Part size used for object uploads; also determines the ETag MinIO reports
+PART_SIZE = 10 * 1024 * 1024
+
+
+@celery.task(bind=True)
+def upload_file_task(self, bucket: str, upload_id: str, total_chunks: int, filename: str, content_type: str | None = None,
+                     metadata: dict | None = None, expected_sha256: str | None = None, expected_size: int | None = None,
+                     content_encoding: str | None = None):
     upload_dir = os.path.join(config.APP_UPLOAD_DIR, upload_id)
     final_file_path = os.path.join(upload_dir, "final_file")
+    chunk_paths = [os.path.join(upload_dir, f"{i}.part") for i in range(total_chunks)]
+    # Large negotiated uploads can exceed 10,000 parts of the default size
+    part_size = multipart_part_size(sum(os.path.getsize(chunk_path) for chunk_path in chunk_paths), PART_SIZE)
+    content_hash = hashlib.sha256()
+    etag = MultipartETag(part_size)
     with open(final_file_path, "wb") as final_file:
-        for i in range(total_chunks):
-            chunk_path = os.path.join(upload_dir, f"{i}.part")
+        for chunk_path in chunk_paths:
             with open(chunk_path, "rb") as chunk_file:
                 content = chunk_file.read()
+                content_hash.update(content)
+                etag.update(content)
                 final_file.write(content)
+
+    # Staged chunks changed since the manifest was recorded at upload completion
+    if expected_sha256 and (content_hash.hexdigest() != expected_sha256 or etag.size != expected_size):
+        flag_corrupted(self, upload_id, "staged data does not match the integrity manifest")
+
+    compression = None
+    if content_encoding:
+        # The stored object is the compressed file, so its ETag is computed over the compressed bytes
+        etag = MultipartETag(part_size)
+        compressed_path = f"{final_file_path}.zst"
+        stored_size, cpu_seconds = compress_file(final_file_path, compressed_path,
+                                                 config.COMPRESSION_AT_REST_LEVEL, etag.update)
+        compression = (stored_size, round(cpu_seconds * 1000))
+        final_file_path = compressed_path
+
     with open(final_file_path, 'rb') as file:
         try:
-            minioStorage.put_object(
-                bucket,
-                filename,
-                file,
-                length=-1,
-                part_size=10 * 1024 * 1024,
-                content_type=content_type or "application/octet-stream",
-            )
-            for i in range(total_chunks):
-                chunk_path = os.path.join(upload_dir, f"{i}.part")
-                os.remove(chunk_path)
-            os.remove(final_file_path)
-            os.removedirs(upload_dir)
+            if minioStorage.is_chunked(filename):
+                manifest = store_chunked(bucket, filename, final_file_path)
+                stored = (manifest.sha256, manifest.size)
+                expected = (content_hash.hexdigest(), etag.size)
+            else:
+                minioStorage.put_object(
+                    bucket,
+                    filename,
+                    file,
+                    length=-1,
+                    part_size=part_size,
+                    content_type=STORED_CONTENT_TYPE if content_encoding else content_type or "application/octet-stream",
+                    metadate=metadata,
+                )
+                stat = minioStorage.stat_object(bucket, filename)
+                stored = (stat.etag, stat.size)
+                expected = (etag.hexdigest(), etag.size)
         except S3Error as exc:
-            return 0
\ No newline at end of file
+            logger.error(f"Storing upload {upload_id} failed: {str(exc)}")
+            # The chunks stay for a retry, which assembles again; the staging janitor expires them otherwise
+            for artifact in (os.path.join(upload_dir, "final_file"), os.path.join(upload_dir, "final_file.zst")):
+                if os.path.exists(artifact):
+                    os.remove(artifact)
+            clear_completed(upload_dir)
+            return 0
+
+    if expected_sha256 and stored != expected:
+        # Keep the staged chunks so a retry can upload them again
+        flag_corrupted(self, upload_id, f"stored object {stored} does not match {expected}")
+    if expected_sha256:
+        set_integrity_status(upload_id, "verified")
+    if compression:
+        set_compression_stats(upload_id, *compression)
+    # Identical uploads are deduplicated against the object from now on; failed uploads never get here
+    set_blob_stored(f"{bucket}/{filename}")
+    # Also drops the per-chunk digest files kept next to the chunks
+    shutil.rmtree(upload_dir, ignore_errors=True)
+
+
+def flag_corrupted(task, upload_id: str, reason: str):
+    """Leave the task in the CORRUPTED state, which the upload status endpoint reports as is."""
+    logger.error(f"Integrity check failed for upload {upload_id}: {reason}")
+    set_integrity_status(upload_id, "mismatch")
+    # The staged chunks are kept for a retry, until the staging janitor expires them
+    clear_completed(os.path.join(config.APP_UPLOAD_DIR, upload_id))
+    task.update_state(state=UploadStatus.CORRUPTED.value, meta={"reason": reason})
+    raise Ignore()
+
+
+def set_integrity_status(upload_id: str, status: str) -> None:
+    db = next(mysql.get_db())
+    try:
+        # The file row may not be committed yet; the background verifier covers that case
+        FileRepo(db=db).set_integrity_status(status, upload_id=upload_id)
+    finally:
+        db.close()
+
+
+def set_compression_stats(upload_id: str, stored_size: int, cpu_ms: int) -> None:
+    db = next(mysql.get_db())
+    try:
+        FileRepo(db=db).set_compression_stats(upload_id, stored_size, cpu_ms)
+    finally:
+        db.close()
+
+
+def set_blob_stored(path: str) -> None:
+    db = next(mysql.get_db())
+    try:
+        BlobRepo(db=db).mark_stored(path)
+    finally:
+        db.close()
+
+
+def store_chunked(bucket: str, object_name: str, source_path: str) -> ChunkManifest:
+    db = next(mysql.get_db())
+    try:
+        return ChunkStoreService(repo=ChunkRepo(db=db)).store(bucket, object_name, source_path)
+    finally:
+        db.close()
@@ -0,0 +1,101 @@
+from . import celery, minioStorage, config
+from infrastructure.db.mysql import mysql
+from repositories.file_repository import FileRepo
+from repositories.chunk_repository import ChunkRepo
+from services.chunk_store_service import ChunkStoreService
+from infrastructure.compression import DecompressedReader
+from minio import S3Error
+from typing import Iterator
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Storage errors saying the object is gone, rather than that storage could not be read right now
+MISSING_OBJECT_CODES = ("NoSuchKey", "NoSuchBucket")
+
+
+@celery.task()
+def verify_objects_task(batch_size: int = 100):
+    """
+    Re-read stored objects and compare them with the integrity manifest on `File`.
+
+    Files never verified come first, then the least recently verified ones. Reads are
+    paced at `INTEGRITY_VERIFY_BYTES_PER_SECOND` and a run stops after
+    `INTEGRITY_VERIFY_BYTES_PER_RUN`, so the verifier can run continuously, e.g. from
+    cron with `python -m tasks.integrity_verifier_task`, without competing with downloads.
+    """
+    db = next(mysql.get_db())
+    try:
+        repo = FileRepo(db=db)
+        started = time.monotonic()
+        bytes_read = 0
+        verified = 0
+        for file in repo.list_files_to_verify(limit=batch_size):
+            if bytes_read >= config.INTEGRITY_VERIFY_BYTES_PER_RUN:
+                break
+            file_id, path, expected, status = file.id, file.path, (file.sha256, file.size), file.integrity_status
+            content_hash = hashlib.sha256()
+            size = 0
+            try:
+                for data in read_stored_object(db, path):
+                    content_hash.update(data)
+                    size += len(data)
+                    bytes_read += len(data)
+                    # Sleep off any lead over the configured byte rate
+                    ahead = bytes_read / config.INTEGRITY_VERIFY_BYTES_PER_SECOND - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+            except S3Error as exc:
+                if exc.code not in MISSING_OBJECT_CODES:
+                    logger.warning(f"Skipping integrity check of {path}: {str(exc)}")
+                    continue
+                if status == "pending":
+                    # Upload still in flight: recording the check moves the file behind the others
+                    repo.set_integrity_status("pending", file_id=file_id)
+                else:
+                    logger.error(f"Stored object of file {file_id} at {path} is missing: {str(exc)}")
+                    repo.set_integrity_status("missing", file_id=file_id)
+                verified += 1
+                continue
+
+            if (content_hash.hexdigest(), size) == expected:
+                repo.set_integrity_status("verified", file_id=file_id)
+            else:
+                logger.error(f"Integrity mismatch for file {file_id} at {path}: "
+                             f"expected {expected}, stored {(content_hash.hexdigest(), size)}")
+                repo.set_integrity_status("mismatch", file_id=file_id)
+            verified += 1
+        return verified
+    finally:
+        db.close()
+
+
+def read_stored_object(db, path: str) -> Iterator[bytes]:
+    bucket_name = path.split("/")[0]
+    object_name = "/".join(path.split("/")[1:])
+    if minioStorage.is_chunked(object_name):
+        chunk_store = ChunkStoreService(repo=ChunkRepo(db=db))
+        stat = chunk_store.stat(bucket_name, object_name)
+        if stat is not None:
+            yield from chunk_store.iter_range(bucket_name, object_name, 0, stat.size - 1)
+        return
+    response = minioStorage.get_object(bucket_name, object_name)
+    try:
+        if minioStorage.is_compressed(object_name):
+            # The manifest describes the uploaded bytes, not the compressed object
+            reader = DecompressedReader(response)
+            while data := reader.read(config.APP_DOWNLOAD_CHUNK_SIZE):
+                yield data
+            return
+        yield from response.stream(config.APP_DOWNLOAD_CHUNK_SIZE)
+    finally:
+        response.close()
+        response.release_conn()
+
+
+if __name__ == "__main__":
+    # Enqueue under the worker's task name rather than `__main__`
+    from tasks.integrity_verifier_task import verify_objects_task as registered_task
+    registered_task.delay()
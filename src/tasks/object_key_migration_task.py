@@ -0,0 +1,71 @@
+from . import celery, minioStorage, config
+from infrastructure.db.mysql import mysql
+from repositories.file_repository import FileRepo
+from infrastructure.compression import STORED_CONTENT_TYPE
+from minio import S3Error
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task()
+def rekey_objects_task(after_id: str = "", batch_size: int = 100):
+    """
+    Move stored objects to content-addressed keys in the background.
+
+    Each run hashes one batch of objects, server-side copies them to their
+    `sha256/` key with immutable cache headers, repoints every file and blob
+    stored there, removes the old object and re-enqueues itself for the next batch.
+    """
+    db = next(mysql.get_db())
+    try:
+        repo = FileRepo(db=db)
+        files = repo.list_files_to_rekey(after_id=after_id, limit=batch_size)
+        for file in files:
+            bucket_name = file.path.split("/")[0]
+            object_name = "/".join(file.path.split("/")[1:])
+            if minioStorage.is_content_addressed(object_name):
+                # Already moved along with another file sharing its object earlier in this batch
+                continue
+            try:
+                content_hash = hashlib.sha256()
+                response = minioStorage.get_object(bucket_name, object_name)
+                try:
+                    for data in response.stream(config.APP_DOWNLOAD_CHUNK_SIZE):
+                        content_hash.update(data)
+                finally:
+                    response.close()
+                    response.release_conn()
+
+                compressed = minioStorage.is_compressed(object_name)
+                base_name = minioStorage.uncompressed_name(object_name)
+                extension = base_name.rsplit(".", 1)[-1] if "." in base_name else "bin"
+                new_object_name = minioStorage.content_addressed_name(content_hash.hexdigest(), extension)
+                if compressed:
+                    # Keep the suffix that marks the object as compressed at rest
+                    new_object_name = minioStorage.compressed_name(new_object_name)
+                minioStorage.copy_object(bucket_name, new_object_name, bucket_name, object_name, metadata={
+                    "Content-Type": STORED_CONTENT_TYPE if compressed else file.content_type or "application/octet-stream",
+                    "Cache-Control": config.MINIO_IMMUTABLE_CACHE_CONTROL,
+                })
+                # Deduplicated files share the object, so all of them move together with their blob
+                new_path = f"{bucket_name}/{new_object_name}"
+                repo.repoint_path(file.path, new_path)
+                minioStorage.remove_object(bucket_name, object_name)
+                logger.info(f"Re-keyed {bucket_name}/{object_name} to {new_path}")
+            except S3Error as exc:
+                # Uploads still in flight or objects already gone are picked up by a later run
+                logger.warning(f"Skipping re-key of {file.path}: {str(exc)}")
+
+        if len(files) == batch_size:
+            rekey_objects_task.delay(after_id=files[-1].id, batch_size=batch_size)
+        return len(files)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # `python -m tasks.object_key_migration_task` enqueues the first batch under the worker's task name
+    from tasks.object_key_migration_task import rekey_objects_task as registered_task
+    registered_task.delay()
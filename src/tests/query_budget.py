@@ -0,0 +1,77 @@
+import sqlite3
+from contextlib import contextmanager
+from typing import Generator, Iterable, Iterator
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
+import entities  # noqa: F401  registers every table on the metadata
+from infrastructure.db.mysql import mysql
+
+
+class _CountingCursor(sqlite3.Cursor):
+    def fetchone(self):
+        row = super().fetchone()
+        self.connection.fetched += row is not None
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        self.connection.fetched += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self.connection.fetched += len(rows)
+        return rows
+
+
+class _CountingConnection(sqlite3.Connection):
+    fetched = 0
+
+    def cursor(self, factory=_CountingCursor):
+        return super().cursor(factory)
+
+
+class QueryBudget:
+    """
+    An in-memory SQLite database with the app's tables that counts the statements run and the rows
+    fetched, so tests can hold an endpoint to a budget of both and fail when its SQL grows.
+
+    Override `mysql.get_db` with `get_db` to run the app on it.
+    """
+
+    def __init__(self) -> None:
+        self.engine = create_engine("sqlite://", poolclass=StaticPool,
+                                    connect_args={"check_same_thread": False, "factory": _CountingConnection})
+        mysql.Base.metadata.create_all(self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.statements: list[str] = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+
+    @property
+    def _connection(self) -> _CountingConnection:
+        return self.engine.raw_connection().driver_connection
+
+    def get_db(self) -> Generator[Session, None, None]:
+        db = self.SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def budget(self, queries: int, rows: int, unread: Iterable[str] = ()) -> Iterator[None]:
+        """
+        Fail if the block runs more than `queries` statements, fetches more than `rows` rows, or
+        selects any of the `unread` columns (as `table.column`).
+        """
+        self.statements.clear()
+        self._connection.fetched = 0
+        yield
+        listing = "\n".join(self.statements)
+        assert len(self.statements) <= queries, f"{len(self.statements)} queries, budget {queries}:\n{listing}"
+        assert self._connection.fetched <= rows, f"{self._connection.fetched} rows, budget {rows}:\n{listing}"
+        for column in unread:
+            assert not any(statement.lstrip().upper().startswith("SELECT") and column in statement
+                           for statement in self.statements), f"{column} was read:\n{listing}"
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.routes import file as file_routes
+from infrastructure.executors import async_repo
+from core.config import config
+from main import create_application
+from repositories.async_file_repository import AsyncFileRepo
+from services.file_service import FileService
+from utils import make_etag
+
+
+class RecordingSession(AsyncSession):
+    """An AsyncSession answering every query with canned rows, keeping the SQL it was asked to run."""
+
+    def __init__(self, rows=(), scalar=None):
+        super().__init__()
+        self.rows = list(rows)
+        self.scalar_value = scalar
+        self.statements = []
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(str(statement))
+        rows = self.rows
+        return SimpleNamespace(first=lambda: rows[0] if rows else None, all=lambda: rows,
+                               scalars=lambda: SimpleNamespace(first=lambda: rows[0] if rows else None,
+                                                               all=lambda: rows))
+
+    async def scalar(self, statement, *args, **kwargs):
+        self.statements.append(str(statement))
+        return self.scalar_value
+
+
+def stored_file(id="f1", **extra):
+    return SimpleNamespace(**{"id": id, "filename": "report.pdf", "content_type": "application/pdf", "size": 10,
+                              "sha256": None, "virus_scan_status": "clean", "is_quarantined": False,
+                              "quarantine_reason": None, "path": "public/report.pdf", "credential": None,
+                              "detail": None, "version": 2, "created_at": datetime(2026, 1, 1), **extra})
+
+
+def test_async_repositories_are_awaited_directly():
+    session = RecordingSession(rows=[(2, None)])
+    repo = AsyncFileRepo(db=session)
+    assert async_repo(repo) is repo
+
+    etag = asyncio.run(FileService(repo=repo).get_file_etag(id="f1", credential={}))
+
+    assert etag == make_etag("file", "f1", 2)
+    assert "SELECT files.version, files.credential" in session.statements[0]
+
+
+def test_listing_route_runs_on_the_async_session(monkeypatch):
+    session = RecordingSession(rows=[stored_file(appointment_name="checkup")], scalar=4)
+    app = create_application()
+    app.dependency_overrides[file_routes.get_read_db] = lambda: session
+
+    async def get_download_links(self, files):
+        return [f"https://files/{file.id}" for file in files]
+    monkeypatch.setattr(FileService, "get_download_links", get_download_links)
+
+    response = TestClient(app).get("/api/v1/file/all", params={"user_id": "user1"})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == make_etag("user", "user1", 4, config.LISTING_PAGE_SIZE, None)
+    [listed] = response.json()["data"]
+    assert (listed["id"], listed["appointment_name"], listed["download_url"]) == ("f1", "checkup", "https://files/f1")
+    assert "JOIN appointments ON files.appointment_id = appointments.id" in session.statements[1]
+
+
+def test_revalidation_reads_only_the_version_row():
+    session = RecordingSession(rows=[(2, None)])
+    app = create_application()
+    app.dependency_overrides[file_routes.get_read_db] = lambda: session
+
+    response = TestClient(app).get("/api/v1/file/get/f1", headers={"If-None-Match": make_etag("file", "f1", 2)})
+
+    assert response.status_code == 304
+    assert len(session.statements) == 1
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import io
+import tarfile
+from types import SimpleNamespace
+from core.config import config
+from sqlalchemy.exc import IntegrityError
+from infrastructure.batch_reader import iter_multipart_entries, iter_tar_entries
+from infrastructure.virus_scanner import virus_scanner
+from services import file_service
+from services.file_service import FileService
+
+
+async def stream(data, size=100):
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+
+def collect(entries):
+    async def run():
+        return [entry async for entry in entries]
+    return asyncio.run(run())
+
+
+def tar_body(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w", format=tarfile.PAX_FORMAT) as archive:
+        directory = tarfile.TarInfo("scans")
+        directory.type = tarfile.DIRTYPE
+        archive.addfile(directory)
+        for name, content in files:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def multipart_body(files, boundary="batch-boundary"):
+    body = b"--%s\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nnot a file\r\n" % boundary.encode()
+    for name, content in files:
+        body += (b"--%s\r\nContent-Disposition: form-data; name=\"files\"; filename=\"%s\"\r\n"
+                 b"Content-Type: application/pdf\r\n\r\n" % (boundary.encode(), name.encode())) + content + b"\r\n"
+    return body + b"--%s--\r\n" % boundary.encode(), f"multipart/form-data; boundary={boundary}"
+
+
+def test_tar_reader_yields_regular_files_and_skips_oversized_data():
+    long_name = "scans/" + "x" * 120 + ".pdf"
+    entries = collect(iter_tar_entries(stream(tar_body([("a.pdf", b"A" * 10), (long_name, b"B" * 700),
+                                                        ("c.pdf", b"C" * 3)])), max_size=500))
+
+    assert [(entry.index, entry.filename, entry.size) for entry in entries] == [
+        (0, "a.pdf", 10), (1, "x" * 120 + ".pdf", 700), (2, "c.pdf", 3)]
+    assert [entry.data for entry in entries] == [b"A" * 10, None, b"C" * 3]
+
+
+def test_multipart_reader_yields_file_parts_only():
+    body, content_type = multipart_body([("a.pdf", b"A" * 10), ("b.pdf", b"B" * 700)])
+    entries = collect(iter_multipart_entries(stream(body, size=37), content_type, max_size=500))
+
+    assert [(entry.filename, entry.content_type, entry.size, entry.data) for entry in entries] == [
+        ("a.pdf", "application/pdf", 10, b"A" * 10), ("b.pdf", "application/pdf", 700, None)]
+
+
+class StubFileRepo:
+    def __init__(self):
+        self.db = None
+        self.batches = []
+        self.quarantined = []
+
+    def create_file(self, file):
+        self.quarantined.append(file)
+
+    def create_files(self, files):
+        self.batches.append(files)
+        return [SimpleNamespace(id=f"f{index}", **file.model_dump()) for index, file in enumerate(files)]
+
+
+def test_batch_reports_each_file_and_inserts_rows_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DEDUP_ENABLED", False)
+    monkeypatch.setattr(config, "BATCH_UPLOAD_CONCURRENCY", 2)
+    monkeypatch.setattr(file_service.minioStorage, "public_bucket", "public")
+    objects = {}
+
+    async def scan_file_content(content, filename):
+        await asyncio.sleep(0)
+        if content == b"EICAR":
+            return {"is_infected": True, "virus_name": "EICAR-Test"}
+        return {"is_infected": False, "scan_result": "OK"}
+
+    def put_object(bucket_name, object_name, data, length, **kwargs):
+        objects[object_name] = data.read()
+        return SimpleNamespace(etag=f'"{hashlib.md5(objects[object_name]).hexdigest()}"')
+
+    monkeypatch.setattr(virus_scanner, "scan_file_content", scan_file_content)
+    monkeypatch.setattr(file_service.minioStorage, "put_object", put_object)
+    repo = StubFileRepo()
+    service = FileService(repo=repo)
+    monkeypatch.setattr(service, "get_download_links", lambda files: asyncio.sleep(0, [f"/d/{f.id}" for f in files]))
+    body = tar_body([("one.pdf", b"first"), ("two.exe", b"binary"), ("bad.pdf", b"EICAR"),
+                     ("big.pdf", b"x" * (config.APP_MAX_CHUNK_SIZE + 1)), ("three.pdf", b"third")])
+
+    results = asyncio.run(service.upload_batch(iter_tar_entries(stream(body), config.APP_MAX_CHUNK_SIZE),
+                                               appointment_id="a1", user_id="user1", credential=None))
+
+    assert [(result["filename"], result["status"]) for result in results] == [
+        ("one.pdf", "stored"), ("two.exe", "failed"), ("bad.pdf", "rejected"), ("big.pdf", "failed"),
+        ("three.pdf", "stored")]
+    assert len(repo.batches) == 1
+    assert sorted(file.filename for file in repo.batches[0]) == ["one.pdf", "three.pdf"]
+    assert [file.filename for file in repo.quarantined] == ["bad.pdf"]
+    assert sorted(objects.values()) == [b"first", b"third"]
+    assert all(result["download_url"] == f"/d/{result['file_id']}" for result in results if result["status"] == "stored")
+
+
+def test_batch_removes_stored_objects_when_the_rows_are_not_created(monkeypatch):
+    monkeypatch.setattr(config, "DEDUP_ENABLED", False)
+    monkeypatch.setattr(config, "MINIO_CONTENT_ADDRESSED_KEYS", True)
+    monkeypatch.setattr(file_service.minioStorage, "public_bucket", "public")
+    objects = {}
+
+    async def scan_file_content(content, filename):
+        return {"is_infected": False, "scan_result": "OK"}
+
+    def put_object(bucket_name, object_name, data, length, **kwargs):
+        objects[object_name] = data.read()
+        return SimpleNamespace(etag=f'"{hashlib.md5(objects[object_name]).hexdigest()}"')
+
+    def create_files(files):
+        raise IntegrityError("INSERT INTO files", {}, Exception("foreign key constraint fails"))
+
+    monkeypatch.setattr(virus_scanner, "scan_file_content", scan_file_content)
+    monkeypatch.setattr(file_service.minioStorage, "put_object", put_object)
+    monkeypatch.setattr(file_service.minioStorage, "remove_object", lambda bucket_name, object_name: objects.pop(object_name))
+    repo = StubFileRepo()
+    repo.db = SimpleNamespace(commit=lambda: None)
+    repo.create_files = create_files
+    # The first file's content was stored before by an existing file, whose object must stay
+    shared = file_service.minioStorage.content_addressed_name(hashlib.sha256(b"first").hexdigest(), "pdf")
+    repo.shared_paths = lambda paths, exclude_file_ids: {path for path in paths if path == f"public/{shared}"}
+    body = tar_body([("one.pdf", b"first"), ("two.pdf", b"second")])
+
+    results = asyncio.run(FileService(repo=repo).upload_batch(
+        iter_tar_entries(stream(body), config.APP_MAX_CHUNK_SIZE), appointment_id="a1", user_id="user1",
+        credential=None))
+
+    assert [(result["filename"], result["status"]) for result in results] == [
+        ("one.pdf", "failed"), ("two.pdf", "failed")]
+    assert list(objects.values()) == [b"first"]
@@ -0,0 +1,74 @@
+import asyncio
+import base64
+import hashlib
+import json
+import pytest
+from core.config import config
+from dto.file_dto import UploadChunkDTO
+from exceptions.http_exception import ChunkChecksumMismatchException
+from infrastructure.checksums import crc32c, parse_checksum
+from services.file_service import FileService
+
+
+class StubUploadFile:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        end = len(self.data) if size < 0 else self.position + size
+        data = self.data[self.position:end]
+        self.position += len(data)
+        return data
+
+
+def upload(upload_id: str, data: bytes, **checksum) -> dict:
+    payload = UploadChunkDTO.model_construct(chunk_size=len(data), file=StubUploadFile(data), upload_id=upload_id,
+                                             chunk_index=0, checksum_algorithm=checksum.get("algorithm"),
+                                             checksum=checksum.get("value"))
+    return asyncio.run(FileService(repo=None).upload_chunk(payload))
+
+
+def test_crc32c_and_checksum_encodings():
+    assert crc32c(b"123456789") == 0xE3069283
+    assert crc32c(b"56789", crc32c(b"1234")) == 0xE3069283
+    assert parse_checksum("crc32c", base64.b64encode(bytes.fromhex("e3069283")).decode()) == "e3069283"
+    assert parse_checksum("CRC32C", "E3069283") == "e3069283"
+    with pytest.raises(ValueError):
+        parse_checksum("md5", "00")
+
+
+def test_verified_chunk_is_staged_with_its_digests(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "APP_UPLOAD_READ_SIZE", 4)
+    (tmp_path / "u1").mkdir()
+    data = b"123456789"
+
+    digest = upload("u1", data, algorithm="crc32c", value="e3069283")
+
+    assert digest == {"size": 9, "sha256": hashlib.sha256(data).hexdigest(), "crc32c": "e3069283"}
+    assert (tmp_path / "u1" / "0.part").read_bytes() == data
+    assert json.loads((tmp_path / "u1" / "0.part.json").read_text()) == {**digest, "crc32": "cbf43926"}
+
+
+def test_checksum_mismatch_keeps_previous_chunk(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "u1").mkdir()
+    upload("u1", b"good")
+
+    with pytest.raises(ChunkChecksumMismatchException) as exc:
+        upload("u1", b"corrupted", algorithm="sha256", value=hashlib.sha256(b"expected").hexdigest())
+
+    assert exc.value.chunk_index == 0
+    assert (tmp_path / "u1" / "0.part").read_bytes() == b"good"
+    assert sorted(path.name for path in (tmp_path / "u1").iterdir()) == ["0.part", "0.part.json"]
+
+
+def test_assembly_detects_chunk_corrupted_after_staging(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "u1").mkdir()
+    upload("u1", b"original")
+    (tmp_path / "u1" / "0.part").write_bytes(b"bitflip!")
+
+    with pytest.raises(ChunkChecksumMismatchException):
+        asyncio.run(FileService(repo=None)._assemble_chunks_for_scanning(str(tmp_path / "u1"), 1))
@@ -0,0 +1,111 @@
+import io
+import random
+from datetime import datetime
+from types import SimpleNamespace
+from core.config import config
+from infrastructure.chunker import Chunker
+from infrastructure.minio import minioStorage
+from services.chunk_store_service import ChunkStoreService
+
+KIB = 1024
+
+
+def test_chunks_respect_bounds_and_reassemble():
+    data = random.Random(1).randbytes(512 * KIB)
+    chunker = Chunker(4 * KIB, 16 * KIB, 64 * KIB)
+
+    chunks = list(chunker.iter_chunks(io.BytesIO(data)))
+
+    assert b"".join(chunks) == data
+    assert all(4 * KIB <= len(chunk) <= 64 * KIB for chunk in chunks[:-1])
+
+
+def test_insertion_only_changes_nearby_chunks():
+    data = random.Random(2).randbytes(512 * KIB)
+    edited = data[:100 * KIB] + b"inserted" + data[100 * KIB:]
+    chunker = Chunker(4 * KIB, 16 * KIB, 64 * KIB)
+
+    original = list(chunker.iter_chunks(io.BytesIO(data)))
+    revised = list(chunker.iter_chunks(io.BytesIO(edited)))
+
+    assert len(set(revised) - set(original)) <= 2
+
+
+class StubChunkRepo:
+    def __init__(self):
+        self.chunks = {}
+        self.manifests = {}
+
+    def get_manifest(self, bucket, object_name):
+        return self.manifests.get((bucket, object_name))
+
+    def get_by_hash(self, bucket, sha256):
+        return self.chunks.get((bucket, sha256))
+
+    def touch(self, id):
+        return True
+
+    def create_chunk(self, id, bucket, sha256, size):
+        self.chunks[(bucket, sha256)] = SimpleNamespace(id=id, sha256=sha256)
+        return self.chunks[(bucket, sha256)]
+
+    def create_manifest(self, bucket, object_name, size, sha256, entries):
+        ids = {chunk.id: chunk.sha256 for chunk in self.chunks.values()}
+        manifest = SimpleNamespace(id=object_name, size=size, sha256=sha256, created_at=datetime.utcnow(),
+                                   entries=[(offset, chunk_size, ids[chunk_id], chunk_id)
+                                            for chunk_id, offset, chunk_size in entries])
+        self.manifests[(bucket, object_name)] = manifest
+        return manifest
+
+    def get_range_entries(self, manifest_id, start, end):
+        manifest = next(m for m in self.manifests.values() if m.id == manifest_id)
+        return [entry for entry in manifest.entries if entry[0] <= end and entry[0] + entry[1] > start]
+
+
+class StubObjectResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def stream(self, amount):
+        for index in range(0, len(self.data), amount):
+            yield self.data[index:index + amount]
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+def test_store_uploads_only_new_chunks_and_reassembles_ranges(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CHUNK_STORE_MIN_SIZE", 4 * KIB)
+    monkeypatch.setattr(config, "CHUNK_STORE_AVG_SIZE", 16 * KIB)
+    monkeypatch.setattr(config, "CHUNK_STORE_MAX_SIZE", 64 * KIB)
+    objects = {}
+
+    def put_object(bucket_name, object_name, data, length, **kwargs):
+        objects[(bucket_name, object_name)] = data.read()
+
+    def get_object(bucket_name, object_name, offset=0, length=0):
+        data = objects[(bucket_name, object_name)]
+        return StubObjectResponse(data[offset:offset + length] if length else data[offset:])
+
+    monkeypatch.setattr(minioStorage, "put_object", put_object)
+    monkeypatch.setattr(minioStorage, "get_object", get_object)
+
+    data = random.Random(3).randbytes(256 * KIB)
+    revision = data[:50 * KIB] + b"edit" + data[60 * KIB:]
+    (tmp_path / "v1").write_bytes(data)
+    (tmp_path / "v2").write_bytes(revision)
+    store = ChunkStoreService(repo=StubChunkRepo())
+
+    store.store("public", "cdc/v1.bin", str(tmp_path / "v1"))
+    stored_after_first = sum(len(value) for value in objects.values())
+    store.store("public", "cdc/v2.bin", str(tmp_path / "v2"))
+    added = sum(len(value) for value in objects.values()) - stored_after_first
+
+    assert stored_after_first == len(data)
+    assert added < len(revision) / 2
+    assert store.stat("public", "cdc/v2.bin").size == len(revision)
+    assert b"".join(store.iter_range("public", "cdc/v2.bin", 0, len(revision) - 1)) == revision
+    assert b"".join(store.iter_range("public", "cdc/v2.bin", 40 * KIB, 70 * KIB)) == revision[40 * KIB:70 * KIB + 1]
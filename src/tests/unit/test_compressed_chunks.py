@@ -0,0 +1,93 @@
+import gzip
+import hashlib
+import pytest
+import random
+import zstandard
+from fastapi.testclient import TestClient
+from core.config import config
+from infrastructure.content_encoding import StreamDecoder, ContentEncodingError, DecompressedSizeExceeded
+from main import create_application
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "u1").mkdir()
+    return TestClient(create_application())
+
+
+@pytest.mark.parametrize("encoding, compress", [
+    ("gzip", gzip.compress),
+    ("zstd", zstandard.ZstdCompressor().compress),
+])
+def test_encoded_chunk_is_staged_decoded(client, tmp_path, encoding, compress):
+    data = b"id,name\n" + b"1,row\n" * 100
+
+    response = client.put("/api/v1/file/upload/u1/chunk/0", content=compress(data),
+                          headers={"Content-Encoding": encoding, "X-Checksum": hashlib.sha256(data).hexdigest()})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["size"] == len(data)
+    assert (tmp_path / "u1" / "0.part").read_bytes() == data
+
+
+def test_decompression_bomb_is_stopped_by_the_ratio_limit(client, tmp_path, monkeypatch):
+    # A real bomb passes the ratio limit long before the chunk size limit
+    monkeypatch.setattr(config, "APP_MAX_CHUNK_SIZE", 8 * 1024 * 1024)
+    bomb = zstandard.ZstdCompressor(level=19).compress(b"\0" * (64 * 1024 * 1024))
+
+    response = client.put("/api/v1/file/upload/u1/chunk/0", content=bomb, headers={"Content-Encoding": "zstd"})
+
+    assert response.status_code == 400
+    assert not any((tmp_path / "u1").iterdir())
+
+
+def test_decoded_size_is_held_to_the_chunk_limit(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_MAX_CHUNK_SIZE", 64 * 1024)
+    data = b"id,name\n" + b"".join(b"%d,row\n" % index for index in range(20_000))
+
+    response = client.put("/api/v1/file/upload/u1/chunk/0", content=gzip.compress(data),
+                          headers={"Content-Encoding": "gzip"})
+
+    assert response.status_code == 422
+    assert not any((tmp_path / "u1").iterdir())
+
+
+def test_unsupported_encoding_lists_accepted_ones(client):
+    response = client.put("/api/v1/file/upload/u1/chunk/0", content=b"data", headers={"Content-Encoding": "br"})
+
+    assert response.status_code == 415
+    assert "gzip" in response.headers["accept-encoding"]
+
+
+def test_decoder_enforces_ratio_and_completeness():
+    ratio_bomb = gzip.compress(b"\0" * (4 * 1024 * 1024))
+    with pytest.raises(ContentEncodingError) as exc_info:
+        StreamDecoder("gzip", max_size=64 * 1024 * 1024, max_ratio=100).decompress(ratio_bomb)
+    assert not isinstance(exc_info.value, DecompressedSizeExceeded)
+
+    decoder = StreamDecoder("gzip", max_size=1024, max_ratio=100)
+    decoder.decompress(gzip.compress(b"a" * 100)[:-4])
+    with pytest.raises(ContentEncodingError):
+        decoder.finish()
+
+    decoder = StreamDecoder("gzip", max_size=1024, max_ratio=100)
+    assert b"".join(decoder.decompress(gzip.compress(b"one") + gzip.compress(b"two"))) == b"onetwo"
+    decoder.finish()
+
+
+def test_zstd_frames_cut_at_a_frame_boundary():
+    # Incompressible data makes a raw frame; pick a size whose frame is exactly one 256-byte feed slice
+    data = random.Random(0).randbytes(300)
+    compressor = zstandard.ZstdCompressor()
+    first = next(compressor.compress(data[:n]) for n in range(200, 300) if len(compressor.compress(data[:n])) == 256)
+    second = compressor.compress(b"second frame")
+    expected = zstandard.ZstdDecompressor().decompressobj().decompress(first) + b"second frame"
+
+    decoder = StreamDecoder("zstd", max_size=1024, max_ratio=100)
+    assert b"".join(decoder.decompress(first + second)) == expected
+    decoder.finish()
+
+    decoder = StreamDecoder("zstd", max_size=1024, max_ratio=100)
+    assert b"".join(decoder.decompress(first) + decoder.decompress(second)) == expected
+    decoder.finish()
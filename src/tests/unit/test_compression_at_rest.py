@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from core.config import config
+from handlers.file_handler import FileHandler
+from infrastructure.compression import compress_file, should_compress
+from services.file_service import FileService
+
+DATA = b"".join(b"%d,row %d,%d\n" % (i, i, i * 7) for i in range(5000))
+
+
+def test_policy_matches_extension_or_text_content_type(monkeypatch):
+    monkeypatch.setattr(config, "COMPRESSION_AT_REST_ENABLED", True)
+
+    assert should_compress("csv", "application/octet-stream", 64 * 1024)
+    assert should_compress("bin", "text/plain; charset=utf-8", 64 * 1024)
+    assert not should_compress("jpg", "image/jpeg", 64 * 1024)
+    assert not should_compress("csv", "text/csv", 100)
+
+    monkeypatch.setattr(config, "COMPRESSION_AT_REST_ENABLED", False)
+    assert not should_compress("csv", "text/csv", 64 * 1024)
+
+
+class StubFileService:
+    """Serves a compressed object from a local path, through the real streaming helpers."""
+
+    def __init__(self, stored_path, stored_size):
+        self.stored_path = stored_path
+        self.file = SimpleNamespace(content_type="text/csv", filename="rows.csv", path="public/u1.csv.zst",
+                                    size=len(DATA), content_encoding="zstd")
+        self.stat = SimpleNamespace(size=stored_size, etag="abc123", last_modified=datetime(2025, 8, 1, tzinfo=timezone.utc))
+        self.service = FileService(repo=None)
+
+    async def get_download_object(self, id, credential):
+        return self.file, self.stat
+
+    async def get_cached_object_path(self, file, stat, wait=True):
+        return self.stored_path
+
+    def release_cached_object(self, cached_path):
+        pass
+
+    def get_content_disposition(self, file):
+        return 'attachment; filename="rows.csv"'
+
+    def iter_cached_object(self, cached_path, start, end):
+        return self.service.iter_cached_object(cached_path, start, end)
+
+    def iter_decompressed(self, file, cached_path, start, end):
+        return self.service.iter_decompressed(file, cached_path, start, end)
+
+
+def download(service, range_header=None, accept_encoding=None):
+    async def run():
+        response = await FileHandler(service=service).download_file("id", {}, range_header, None, accept_encoding)
+        if hasattr(response, "path"):
+            # Whole stored object, handed to the server as a file
+            with open(response.path, "rb") as stored:
+                return response, stored.read()
+        body = b""
+        async for chunk in response.body_iterator:
+            body += chunk
+        return response, body
+    return asyncio.run(run())
+
+
+def test_compressed_file_is_sent_as_stored_or_decompressed(tmp_path):
+    (tmp_path / "rows.csv").write_bytes(DATA)
+    stored_size, _ = compress_file(str(tmp_path / "rows.csv"), str(tmp_path / "rows.csv.zst"), 3)
+    service = StubFileService(str(tmp_path / "rows.csv.zst"), stored_size)
+    assert stored_size < len(DATA) / 3
+
+    response, body = download(service, accept_encoding="gzip, zstd")
+    assert response.headers["content-encoding"] == "zstd"
+    assert body == (tmp_path / "rows.csv.zst").read_bytes()
+
+    response, body = download(service, accept_encoding="gzip, zstd;q=0")
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-length"] == str(len(DATA))
+    assert body == DATA
+
+    response, body = download(service, range_header="bytes=70000-70099")
+    assert response.status_code == 206
+    assert body == DATA[70000:70100]
+    assert response.headers["etag"] == '"abc123-identity"'
@@ -0,0 +1,69 @@
+import asyncio
+from handlers.file_handler import FileHandler
+from datetime import datetime, timezone
+from utils import make_etag, etag_matches, presign_window
+
+
+def test_etag_depends_on_version():
+    assert make_etag("file", "a", 1) == make_etag("file", "a", 1)
+    assert make_etag("file", "a", 1) != make_etag("file", "a", 2)
+    assert make_etag("user", "a", 1) != make_etag("appointment", "a", 1)
+
+
+def test_presign_window_is_the_utc_day():
+    assert presign_window(datetime(2026, 3, 1, 23, 59, tzinfo=timezone.utc)) == datetime(2026, 3, 1, tzinfo=timezone.utc)
+    assert presign_window(datetime(2026, 3, 2, 0, 1, tzinfo=timezone.utc)) == datetime(2026, 3, 2, tzinfo=timezone.utc)
+
+
+def test_if_none_match_comparison():
+    etag = make_etag("file", "a", 1)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+class StubFileService:
+    def __init__(self):
+        self.loaded = False
+
+    async def get_file_etag(self, id, credential):
+        return make_etag("file", id, 3)
+
+    async def get_appointment_files_etag(self, appointment_id, *page):
+        return make_etag("appointment", appointment_id, 7)
+
+    async def get_files_by_appointment(self, appointment_id, limit, cursor=None):
+        self.loaded = True
+        return [], None
+
+    async def get_download_links(self, files):
+        return []
+
+    async def get_file(self, id, credential):
+        self.loaded = True
+        raise AssertionError("revalidation must not load the file")
+
+
+def test_matching_if_none_match_skips_loading_and_serialization():
+    service = StubFileService()
+    handler = FileHandler(service=service)
+
+    response = asyncio.run(handler.get_file("f1", {}, if_none_match=make_etag("file", "f1", 3)))
+    assert response.status_code == 304
+    assert response.headers["etag"] == make_etag("file", "f1", 3)
+    assert "cache-control" in response.headers
+
+    response = asyncio.run(handler.get_files_by_appointment("a1", if_none_match=make_etag("appointment", "a1", 7)))
+    assert response.status_code == 304
+    assert not service.loaded
+
+
+def test_stale_if_none_match_returns_listing_with_etag():
+    service = StubFileService()
+    response = asyncio.run(FileHandler(service=service).get_files_by_appointment("a1", if_none_match='"stale"'))
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == make_etag("appointment", "a1", 7)
+    assert service.loaded
@@ -0,0 +1,40 @@
+import asyncio
+from types import SimpleNamespace
+from infrastructure.minio import minioStorage, PresignEngine
+from services.file_service import FileService
+
+DIGEST = "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+
+
+def test_content_addressed_name():
+    name = minioStorage.content_addressed_name(DIGEST, "pdf")
+    assert name == f"sha256/9f/{DIGEST}.pdf"
+    assert minioStorage.is_content_addressed(name)
+    assert not minioStorage.is_content_addressed("0b9c1e1a-8f0e-4b43-9e53-1d6f0e0c2a11.pdf")
+
+
+def test_public_content_addressed_urls_are_stable():
+    service = FileService(repo=None)
+    file = SimpleNamespace(path=f"public/sha256/9f/{DIGEST}.pdf", credential=None,
+                           content_type="application/pdf", filename="report.pdf")
+
+    first = asyncio.run(service.get_download_links([file]))
+    second = asyncio.run(service.get_download_links([file]))
+
+    assert first == second
+    assert "X-Amz-Signature" not in first[0]
+    assert first[0].endswith(f"/public/sha256/9f/{DIGEST}.pdf")
+
+
+def test_presigned_urls_are_stable_within_the_presign_window(monkeypatch):
+    monkeypatch.setattr(minioStorage, "presigner", PresignEngine("files.example.com", "minioadmin", "minioadmin", True,
+                                                                   "us-east-1"))
+    service = FileService(repo=None)
+    file = SimpleNamespace(path="private/report.pdf", credential={"token": "t"},
+                           content_type="application/pdf", filename="report.pdf")
+
+    first = asyncio.run(service.get_download_links([file]))
+    second = asyncio.run(service.get_download_links([file]))
+
+    assert first == second
+    assert "X-Amz-Signature" in first[0]
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from core.config import config
+from dto.file_dto import UploadFileDTO
+from infrastructure.virus_scanner import virus_scanner
+from repositories import file_repository
+from repositories.file_repository import FileRepo
+from services import file_service
+from services.file_service import FileService
+
+
+class StubQuery:
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return None
+
+
+class StubFileRepo:
+    def __init__(self):
+        self.db = SimpleNamespace(query=lambda *args: StubQuery())
+        self.created = []
+
+    def create_file(self, file):
+        self.created.append(file)
+        return SimpleNamespace(id="f2", **file.model_dump())
+
+
+class StubBlobRepo:
+    def __init__(self, blob=None, remaining=None):
+        self.blob = blob
+        self.remaining = remaining or {}
+        self.hits = []
+        self.created = []
+
+    def acquire(self, sha256, bucket, scan_statuses, size):
+        blob = self.blob
+        if not blob or (blob.sha256, blob.bucket) != (sha256, bucket) or not blob.stored_at \
+                or blob.virus_scan_status not in scan_statuses:
+            return None
+        self.hits.append((blob.id, size))
+        return blob
+
+    def create_blob(self, **fields):
+        self.created.append(fields)
+        return SimpleNamespace(id="b2", **fields)
+
+    def release(self, id):
+        self.remaining[id] -= 1
+        return self.remaining[id] == 0
+
+
+def test_identical_upload_references_existing_blob(tmp_path, monkeypatch):
+    content = b"same bytes"
+    upload_dir = tmp_path / "u2"
+    upload_dir.mkdir()
+    (upload_dir / "0.part").write_bytes(content)
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+
+    blob = SimpleNamespace(id="b1", sha256=hashlib.sha256(content).hexdigest(), bucket="public",
+                           path="public/u1.pdf", virus_scan_status="clean", celery_task_id="t1",
+                           stored_at=datetime(2026, 1, 1))
+    blobs = StubBlobRepo(blob=blob)
+    monkeypatch.setattr(FileService, "blob_repo", property(lambda self: blobs))
+
+    async def no_scan(path):
+        raise AssertionError("deduplicated content must not be scanned again")
+    monkeypatch.setattr(virus_scanner, "scan_file", no_scan)
+    monkeypatch.setattr(file_service.taskDispatcher, "submit",
+                        lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("nothing to upload")))
+    monkeypatch.setattr(file_service.minioStorage, "public_bucket", "public")
+
+    repo = StubFileRepo()
+    payload = UploadFileDTO(upload_id="u2", total_chunks=1, total_size=len(content), file_extension="pdf",
+                            content_type="application/pdf", size=len(content), detail=None, credential=None,
+                            appointment_id="a1", user_id="user1", filename="copy.pdf")
+    file = asyncio.run(FileService(repo=repo).upload_complete(payload))
+
+    assert file.path == "public/u1.pdf"
+    assert file.blob_id == "b1"
+    assert file.celery_task_id == "t1"
+    assert blobs.hits == [("b1", len(content))]
+    assert not os.path.exists(upload_dir)
+
+
+def test_upload_is_not_deduplicated_against_an_unconfirmed_blob(tmp_path, monkeypatch):
+    content = b"same bytes"
+    upload_dir = tmp_path / "u2"
+    upload_dir.mkdir()
+    (upload_dir / "0.part").write_bytes(content)
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "DEDUP_ENABLED", True)
+    monkeypatch.setattr(config, "MINIO_CONTENT_ADDRESSED_KEYS", False)
+    monkeypatch.setattr(config, "CHUNK_STORE_ENABLED", False)
+
+    # The first upload of this content is still being stored, or its task failed
+    blob = SimpleNamespace(id="b1", sha256=hashlib.sha256(content).hexdigest(), bucket="public",
+                           path="public/u1.pdf", virus_scan_status="clean", celery_task_id="t1", stored_at=None)
+    blobs = StubBlobRepo(blob=blob)
+    monkeypatch.setattr(FileService, "blob_repo", property(lambda self: blobs))
+
+    async def clean(path):
+        return {"is_infected": False, "scan_result": "CLEAN"}
+    monkeypatch.setattr(virus_scanner, "scan_file", clean)
+    submitted = []
+
+    async def submit(task, **kwargs):
+        # The new blob must exist before the task can run and confirm it
+        submitted.append((kwargs["task_id"], len(blobs.created)))
+        return kwargs["task_id"]
+    monkeypatch.setattr(file_service.taskDispatcher, "submit", submit)
+    monkeypatch.setattr(file_service.minioStorage, "public_bucket", "public")
+
+    repo = StubFileRepo()
+    payload = UploadFileDTO(upload_id="u2", total_chunks=1, total_size=len(content), file_extension="pdf",
+                            content_type="application/pdf", size=len(content), detail=None, credential=None,
+                            appointment_id="a1", user_id="user1", filename="copy.pdf")
+    file = asyncio.run(FileService(repo=repo).upload_complete(payload))
+
+    assert blobs.hits == []
+    assert file.path == "public/u2.pdf"
+    assert submitted == [(file.celery_task_id, 1)]
+    assert blobs.created[0]["celery_task_id"] == file.celery_task_id
+    assert not blobs.created[0]["stored"]
+
+
+def test_release_objects_reports_only_unreferenced_paths(monkeypatch):
+    blobs = StubBlobRepo(remaining={"b1": 3, "b2": 1})
+    monkeypatch.setattr(file_repository, "BlobRepo", lambda db: blobs)
+    repo = FileRepo(db=None)
+    monkeypatch.setattr(repo, "shared_paths",
+                        lambda paths, exclude_file_ids: {path for path in paths if path == "public/legacy-shared.pdf"})
+
+    files = [
+        SimpleNamespace(id="f1", blob_id="b1", path="public/one.pdf"),
+        SimpleNamespace(id="f2", blob_id="b1", path="public/one.pdf"),
+        SimpleNamespace(id="f3", blob_id="b2", path="public/two.pdf"),
+        SimpleNamespace(id="f4", blob_id=None, path="public/legacy.pdf"),
+        SimpleNamespace(id="f5", blob_id=None, path="public/legacy-shared.pdf"),
+    ]
+
+    assert repo.release_objects(files) == {"public/two.pdf", "public/legacy.pdf"}
+    assert blobs.remaining == {"b1": 1, "b2": 0}
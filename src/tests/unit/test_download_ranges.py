@@ -0,0 +1,216 @@
+import asyncio
+import io
+import threading
+import pytest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from handlers.file_handler import FileHandler
+from infrastructure.compression import compress_bytes
+from services import file_service
+from services.file_service import FileService
+from utils import parse_range_header
+
+DATA = bytes(range(256)) * 4
+SIZE = len(DATA)
+
+
+def test_parse_single_and_open_ended_ranges():
+    assert parse_range_header("bytes=0-99", SIZE, 16) == [(0, 99)]
+    assert parse_range_header("bytes=1000-", SIZE, 16) == [(1000, SIZE - 1)]
+    assert parse_range_header("bytes=-24", SIZE, 16) == [(SIZE - 24, SIZE - 1)]
+    assert parse_range_header("bytes=1000-5000", SIZE, 16) == [(1000, SIZE - 1)]
+
+
+def test_parse_coalesces_overlapping_ranges():
+    assert parse_range_header("bytes=500-600, 0-9,5-20,601-700", SIZE, 16) == [(0, 20), (500, 700)]
+
+
+def test_parse_ignores_invalid_headers():
+    assert parse_range_header("items=0-1", SIZE, 16) is None
+    assert parse_range_header("bytes=9-1", SIZE, 16) is None
+    assert parse_range_header("bytes=abc", SIZE, 16) is None
+    assert parse_range_header("bytes=0-1,2-3,4-5", SIZE, 2) is None
+
+
+def test_parse_reports_unsatisfiable_ranges():
+    assert parse_range_header(f"bytes={SIZE}-", SIZE, 16) == []
+    assert parse_range_header("bytes=-0", SIZE, 16) == []
+
+
+class StubFileService:
+    def __init__(self):
+        self.file = SimpleNamespace(content_type="video/mp4", filename="clip.mp4", path="private/clip.mp4",
+                                    content_encoding=None)
+        self.stat = SimpleNamespace(size=SIZE, etag="abc123", last_modified=datetime(2025, 8, 1, tzinfo=timezone.utc))
+
+    async def get_download_object(self, id, credential):
+        return self.file, self.stat
+
+    async def get_cached_object_path(self, file, stat, wait=True):
+        return None
+
+    def get_content_disposition(self, file):
+        return 'inline; filename="clip.mp4"'
+
+    async def iter_object(self, file, start, end):
+        for offset in range(start, end + 1, 100):
+            yield DATA[offset:min(offset + 100, end + 1)]
+
+
+def download(range_header=None, if_range=None):
+    async def run():
+        response = await FileHandler(service=StubFileService()).download_file("id", {}, range_header, if_range)
+        body = b""
+        if hasattr(response, "body_iterator"):
+            async for chunk in response.body_iterator:
+                body += chunk
+        else:
+            body = response.body
+        return response, body
+    return asyncio.run(run())
+
+
+def test_download_full_object():
+    response, body = download()
+    assert response.status_code == 200
+    assert body == DATA
+    assert response.headers["content-length"] == str(SIZE)
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_download_single_range():
+    response, body = download("bytes=10-309")
+    assert response.status_code == 206
+    assert body == DATA[10:310]
+    assert response.headers["content-range"] == f"bytes 10-309/{SIZE}"
+    assert response.headers["content-length"] == "300"
+
+
+def test_download_multi_range():
+    response, body = download("bytes=0-4,100-199")
+    boundary = response.headers["content-type"].split("boundary=")[1]
+    assert response.status_code == 206
+    assert int(response.headers["content-length"]) == len(body)
+    assert body == (
+        f"--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 0-4/{SIZE}\r\n\r\n".encode() + DATA[0:5]
+        + f"\r\n--{boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 100-199/{SIZE}\r\n\r\n".encode()
+        + DATA[100:200] + f"\r\n--{boundary}--\r\n".encode()
+    )
+
+
+def test_download_if_range_mismatch_returns_full_object():
+    response, body = download("bytes=0-9", if_range='"stale"')
+    assert response.status_code == 200
+    assert body == DATA
+    response, body = download("bytes=0-9", if_range='"abc123"')
+    assert response.status_code == 206
+
+
+def test_download_unsatisfiable_range():
+    response, _ = download(f"bytes={SIZE + 10}-")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{SIZE}"
+
+
+def test_abandoned_download_is_closed_when_the_response_finishes():
+    service = StubFileService()
+    closed = []
+
+    async def iter_object(file, start, end):
+        try:
+            for offset in range(start, end + 1, 100):
+                yield DATA[offset:min(offset + 100, end + 1)]
+        finally:
+            closed.append((start, end))
+    service.iter_object = iter_object
+
+    async def run():
+        response = await FileHandler(service=service).download_file("id", {}, "bytes=0-4,100-999", None)
+        # The client goes away after the first part
+        await response.body_iterator.__anext__()
+        await response.body_iterator.__anext__()
+        await response.background()
+
+    asyncio.run(run())
+    assert closed == [(0, 4)]
+
+
+class BlockingObject:
+    """A MinIO response whose read blocks until released."""
+
+    def __init__(self):
+        self.reading = threading.Event()
+        self.release = threading.Event()
+        self.closed = threading.Event()
+
+    def read(self, size):
+        self.reading.set()
+        self.release.wait(5)
+        return b"x" * size
+
+    def close(self):
+        self.closed.set()
+
+    def release_conn(self):
+        pass
+
+
+def test_object_response_is_not_closed_under_a_running_read(monkeypatch):
+    stored = BlockingObject()
+
+    async def get_object(bucket_name, object_name, offset=0, length=0):
+        return stored
+    monkeypatch.setattr(file_service.asyncMinioStorage, "get_object", get_object)
+    file = SimpleNamespace(path="private/clip.mp4")
+
+    async def run():
+        stream = FileService(repo=None).iter_object(file, 0, SIZE - 1)
+        reader = asyncio.ensure_future(stream.__anext__())
+        await asyncio.get_running_loop().run_in_executor(None, stored.reading.wait, 5)
+        # The client disconnects while the executor is reading
+        reader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await reader
+        assert not stored.closed.is_set()
+        stored.release.set()
+        await asyncio.get_running_loop().run_in_executor(None, stored.closed.wait, 5)
+
+    asyncio.run(run())
+    assert stored.closed.is_set()
+
+
+class BlockingCompressedObject(BlockingObject):
+    """A compressed MinIO response whose reads block until released."""
+
+    def __init__(self, data):
+        super().__init__()
+        self.data = io.BytesIO(data)
+
+    def read(self, size=-1):
+        self.reading.set()
+        self.release.wait(5)
+        return self.data.read(size)
+
+
+def test_compressed_object_is_not_closed_under_a_running_read(monkeypatch):
+    stored = BlockingCompressedObject(compress_bytes(DATA, 3)[0])
+
+    async def get_object(bucket_name, object_name):
+        return stored
+    monkeypatch.setattr(file_service.asyncMinioStorage, "get_object", get_object)
+    file = SimpleNamespace(path="private/scan.pdf.zst")
+
+    async def run():
+        stream = FileService(repo=None).iter_decompressed(file, None, 0, SIZE - 1)
+        reader = asyncio.ensure_future(stream.__anext__())
+        await asyncio.get_running_loop().run_in_executor(None, stored.reading.wait, 5)
+        # The client disconnects while the threadpool is decompressing
+        reader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await reader
+        assert not stored.closed.is_set()
+        stored.release.set()
+        await asyncio.get_running_loop().run_in_executor(None, stored.closed.wait, 5)
+
+    asyncio.run(run())
+    assert stored.closed.is_set()
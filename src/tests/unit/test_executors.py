@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from core.config import config
+from infrastructure import executors as executors_module
+from infrastructure.executors import Executors, AsyncProxy, async_repo, MINIO
+from infrastructure.blocking_detector import BlockingDetector
+
+
+@pytest.fixture
+def executors(monkeypatch):
+    monkeypatch.setattr(config, "EXECUTOR_MINIO_WORKERS", 2)
+    monkeypatch.setattr(Executors, "_instance", None)
+    fresh = Executors()
+    monkeypatch.setattr(executors_module, "executors", fresh)
+    yield fresh
+    fresh.shutdown()
+
+
+class StubRepo:
+    def __init__(self):
+        self.db = SimpleNamespace(info={})
+        self.active = 0
+        self.overlapped = False
+        self.threads = set()
+
+    def get_file(self, id):
+        self.active += 1
+        self.overlapped = self.overlapped or self.active > 1
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.02)
+        self.active -= 1
+        return id
+
+
+def test_repository_calls_leave_the_loop_one_at_a_time_per_session(executors):
+    repo = StubRepo()
+
+    async def run():
+        return await asyncio.gather(*(async_repo(repo).get_file(id=n) for n in range(5)))
+
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]
+    assert not repo.overlapped
+    assert all(name.startswith("db-io") for name in repo.threads)
+
+
+def test_each_dependency_is_bounded_by_its_own_pool(executors):
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def stat_object(bucket_name, object_name):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return object_name
+
+    storage = AsyncProxy(SimpleNamespace(stat_object=stat_object, public_bucket="public"), MINIO)
+
+    async def run():
+        return await asyncio.gather(*(storage.stat_object("public", f"o{n}") for n in range(6)))
+
+    assert asyncio.run(run()) == [f"o{n}" for n in range(6)]
+    assert peak[0] == 2
+    assert storage.public_bucket == "public"
+    assert executors.stats()["minio"] == {"workers": 2, "pending": 0}
+
+
+def test_blocking_calls_are_logged_with_their_stack(monkeypatch, caplog):
+    monkeypatch.setattr(config, "BLOCKING_DETECTOR_MS", 50)
+    monkeypatch.setattr(BlockingDetector, "_instance", None)
+    detector = BlockingDetector()
+
+    def hog_the_loop():
+        time.sleep(0.3)
+
+    async def run():
+        watching = asyncio.create_task(detector.run())
+        await asyncio.sleep(0.1)
+        hog_the_loop()
+        await asyncio.sleep(0.1)
+        watching.cancel()
+
+    with caplog.at_level(logging.WARNING, logger="infrastructure.blocking_detector"):
+        asyncio.run(run())
+
+    assert detector.stalls == 1
+    assert "hog_the_loop" in caplog.text
+    assert "Event loop was blocked for" in caplog.text
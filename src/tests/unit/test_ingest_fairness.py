@@ -0,0 +1,73 @@
+import asyncio
+import time
+import pytest
+from core.config import config
+from infrastructure.ingest_scheduler import IngestScheduler
+from services import file_service
+from services.file_service import FileService
+
+PIECE = 4096
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(config, "INGEST_MAX_BYTES_PER_SECOND", 400_000)
+    monkeypatch.setattr(config, "INGEST_BURST_SECONDS", 0.02)
+    monkeypatch.setattr(IngestScheduler, "_instance", None)
+    fresh = IngestScheduler()
+    monkeypatch.setattr(file_service, "ingestScheduler", fresh)
+    return fresh
+
+
+def simulate(scheduler, clients, seconds):
+    """Run `clients` (user, parallel streams) sending as fast as allowed; returns bytes received per user."""
+    sent = {user: 0 for user, _ in clients}
+    total_streams = sum(streams for _, streams in clients)
+
+    async def stream(user, connected, started):
+        async with scheduler.stream(user) as throttle:
+            connected.append(user)
+            if len(connected) == total_streams:
+                started.set_result(time.monotonic() + seconds)
+            deadline = await started
+            while time.monotonic() < deadline:
+                await throttle(PIECE)
+                if time.monotonic() <= deadline:
+                    sent[user] += PIECE
+
+    async def run():
+        # All clients connect before any sends, so shares are measured in the steady state
+        connected, started = [], asyncio.get_running_loop().create_future()
+        await asyncio.gather(*(stream(user, connected, started) for user, streams in clients for _ in range(streams)))
+
+    asyncio.run(run())
+    return sent
+
+
+def test_parallel_streams_do_not_take_more_than_a_fair_share(scheduler):
+    sent = simulate(scheduler, [("greedy", 20), ("modest", 1)], seconds=1.0)
+
+    assert 0.8 < sent["greedy"] / sent["modest"] < 1.25
+    assert sum(sent.values()) <= 400_000 * 1.1
+
+
+def test_a_lone_user_gets_the_whole_bandwidth(scheduler):
+    sent = simulate(scheduler, [("alone", 4)], seconds=0.5)
+
+    assert 400_000 * 0.5 * 0.8 < sent["alone"] <= 400_000 * 0.5 * 1.1
+
+
+def test_chunk_bodies_are_slowed_down_rather_than_refused(scheduler, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "APP_MAX_CHUNK_SIZE", 200_000)
+    (tmp_path / "u1").mkdir()
+
+    async def body():
+        for _ in range(40):
+            yield b"x" * PIECE
+
+    started = time.monotonic()
+    digest = asyncio.run(FileService(repo=None).stage_chunk("u1", 0, body()))
+
+    assert digest["size"] == 40 * PIECE
+    assert time.monotonic() - started >= 40 * PIECE / 400_000 - 0.05
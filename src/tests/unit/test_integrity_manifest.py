@@ -0,0 +1,101 @@
+import hashlib
+import pytest
+from types import SimpleNamespace
+from celery.exceptions import Ignore
+from core.config import config
+from infrastructure.checksums import MultipartETag
+from minio import S3Error
+from tasks import integrity_verifier_task as verifier
+from tasks import file_upload_task as task_module
+from tasks.file_upload_task import upload_file_task
+
+
+def test_multipart_etag_matches_s3_rules():
+    single = MultipartETag(4)
+    single.update(b"abcd")
+    assert single.hexdigest() == hashlib.md5(b"abcd").hexdigest()
+
+    multi = MultipartETag(4)
+    multi.update(b"ab")
+    multi.update(b"cdefghi")
+    parts = b"".join(hashlib.md5(part).digest() for part in (b"abcd", b"efgh", b"i"))
+    assert multi.hexdigest() == f"{hashlib.md5(parts).hexdigest()}-3"
+
+
+@pytest.fixture
+def staged_upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "u1").mkdir()
+    (tmp_path / "u1" / "0.part").write_bytes(b"hello ")
+    (tmp_path / "u1" / "1.part").write_bytes(b"world")
+    (tmp_path / "u1" / "completed").write_bytes(b"")
+    statuses = []
+    states = []
+    stored = []
+    monkeypatch.setattr(task_module, "set_integrity_status", lambda upload_id, status: statuses.append(status))
+    monkeypatch.setattr(task_module, "set_blob_stored", stored.append)
+    monkeypatch.setattr(upload_file_task, "update_state", lambda state, meta: states.append(state))
+    monkeypatch.setattr(task_module.minioStorage, "put_object", lambda *args, **kwargs: None)
+    return SimpleNamespace(path=tmp_path / "u1", statuses=statuses, states=states, stored=stored,
+                           sha256=hashlib.sha256(b"hello world").hexdigest())
+
+
+def run_task(upload, **kwargs):
+    upload_file_task.run(bucket="public", upload_id="u1", total_chunks=2, filename="u1.txt",
+                         expected_sha256=upload.sha256, expected_size=11, **kwargs)
+
+
+def test_stored_object_matching_manifest_is_verified(staged_upload, monkeypatch):
+    monkeypatch.setattr(task_module.minioStorage, "stat_object", lambda bucket, name: SimpleNamespace(
+        etag=hashlib.md5(b"hello world").hexdigest(), size=11))
+
+    run_task(staged_upload)
+
+    assert staged_upload.statuses == ["verified"]
+    assert staged_upload.stored == ["public/u1.txt"]
+    assert not staged_upload.path.exists()
+
+
+def test_stored_object_mismatch_is_flagged_and_staging_kept(staged_upload, monkeypatch):
+    monkeypatch.setattr(task_module.minioStorage, "stat_object", lambda bucket, name: SimpleNamespace(
+        etag="0" * 32, size=11))
+
+    with pytest.raises(Ignore):
+        run_task(staged_upload)
+
+    assert staged_upload.statuses == ["mismatch"]
+    assert staged_upload.states == ["CORRUPTED"]
+    # Identical uploads must not be deduplicated against the corrupt object
+    assert staged_upload.stored == []
+    assert (staged_upload.path / "0.part").exists()
+    # Released to the staging janitor until a retry claims it again
+    assert not (staged_upload.path / "completed").exists()
+
+
+def test_verifier_records_missing_objects_and_skips_transient_errors(monkeypatch):
+    files = [SimpleNamespace(id="f1", path="public/gone.pdf", sha256="0" * 64, size=1, integrity_status="verified"),
+             SimpleNamespace(id="f2", path="public/queued.pdf", sha256="0" * 64, size=1, integrity_status="pending"),
+             SimpleNamespace(id="f3", path="public/busy.pdf", sha256="0" * 64, size=1, integrity_status="verified")]
+    codes = {"public/gone.pdf": "NoSuchKey", "public/queued.pdf": "NoSuchKey", "public/busy.pdf": "SlowDown"}
+    statuses = []
+
+    class StubFileRepo:
+        def __init__(self, db):
+            pass
+
+        def list_files_to_verify(self, limit):
+            return files
+
+        def set_integrity_status(self, status, file_id):
+            statuses.append((file_id, status))
+
+    def read_stored_object(db, path):
+        raise S3Error(codes[path], "error", path, "request", "host", None)
+
+    monkeypatch.setattr(verifier, "FileRepo", StubFileRepo)
+    monkeypatch.setattr(verifier, "read_stored_object", read_stored_object)
+    monkeypatch.setattr(verifier.mysql, "get_db", lambda: iter([SimpleNamespace(close=lambda: None)]))
+
+    assert verifier.verify_objects_task.run() == 2
+    # Missing objects are recorded, so the verifier moves on instead of selecting them again
+    assert statuses == [("f1", "missing"), ("f2", "pending")]
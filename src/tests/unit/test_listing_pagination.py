@@ -0,0 +1,72 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+from api.routes import file as file_routes
+from main import create_application
+from services.file_service import FileService
+from utils import encode_cursor, decode_cursor
+from tests.unit.test_async_repositories import RecordingSession, stored_file
+
+
+def listing_client(monkeypatch, rows):
+    session = RecordingSession(rows=rows, scalar=1)
+    app = create_application()
+    app.dependency_overrides[file_routes.get_read_db] = lambda: session
+    presigned = []
+
+    async def get_download_links(self, files):
+        presigned.extend(file.id for file in files)
+        return [f"https://files/{file.id}" for file in files]
+    monkeypatch.setattr(FileService, "get_download_links", get_download_links)
+    return TestClient(app), session, presigned
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 12, 30, 5, 120000)
+    assert decode_cursor(encode_cursor(created_at, "f1")) == (created_at, "f1")
+
+
+def test_page_reads_one_row_more_and_presigns_only_the_page(monkeypatch):
+    rows = [stored_file(f"f{index}", appointment_name="checkup", created_at=datetime(2026, 1, index + 1))
+            for index in range(3)]
+    client, session, presigned = listing_client(monkeypatch, rows)
+
+    response = client.get("/api/v1/file/all", params={"user_id": "user1", "limit": 2})
+
+    assert response.status_code == 200
+    assert [listed["id"] for listed in response.json()["data"]] == ["f0", "f1"]
+    assert presigned == ["f0", "f1"]
+    assert decode_cursor(response.headers["x-next-cursor"]) == (datetime(2026, 1, 2), "f1")
+    listing = session.statements[1]
+    assert "ORDER BY files.created_at, files.id" in listing and "LIMIT" in listing
+    # Projection only: the large JSON columns are never read for a listing
+    assert "files.virus_scan_result" not in listing and "files.detail" not in listing
+
+
+def test_next_page_starts_after_the_cursor(monkeypatch):
+    rows = [stored_file("f9", created_at=datetime(2026, 1, 9))]
+    client, session, _ = listing_client(monkeypatch, rows)
+
+    response = client.get("/api/v1/file/appointment/a1",
+                          params={"limit": 2, "cursor": encode_cursor(datetime(2026, 1, 2), "f1")})
+
+    assert response.status_code == 200
+    assert "x-next-cursor" not in response.headers
+    assert "files.created_at >" in session.statements[1]
+
+
+def test_pages_have_their_own_etags(monkeypatch):
+    client, _, _ = listing_client(monkeypatch, [])
+
+    first = client.get("/api/v1/file/all", params={"user_id": "user1", "limit": 2})
+    second = client.get("/api/v1/file/all", params={"user_id": "user1", "limit": 2,
+                                                    "cursor": encode_cursor(datetime(2026, 1, 2), "f1")})
+
+    assert first.headers["etag"] != second.headers["etag"]
+
+
+def test_malformed_cursor_is_rejected(monkeypatch):
+    client, _, _ = listing_client(monkeypatch, [])
+
+    response = client.get("/api/v1/file/all", params={"user_id": "user1", "cursor": "not-a-cursor"})
+
+    assert response.status_code == 422
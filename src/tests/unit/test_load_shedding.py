@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+from core.config import config
+from infrastructure import load_monitor
+from infrastructure.load_monitor import LoadMonitor, route_class
+from main import create_application
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monkeypatch.setattr(config, "LOAD_SHED_LAG_MS", 100)
+    monkeypatch.setattr(config, "LOAD_SHED_QUEUE_DEPTH", 1000)
+    monkeypatch.setattr(config, "LOAD_SHED_MAX_INFLIGHT", 10)
+    monkeypatch.setattr(LoadMonitor, "_instance", None)
+    fresh = LoadMonitor()
+    monkeypatch.setattr(load_monitor, "loadMonitor", fresh)
+    monkeypatch.setattr("api.load_shedding.loadMonitor", fresh)
+    monkeypatch.setattr("api.routes.metrics.loadMonitor", fresh)
+    return fresh
+
+
+def test_requests_are_classified_by_priority():
+    assert route_class("GET", "/api/v1/file/appointment/a1") == "listing"
+    assert route_class("GET", "/api/v1/users/") == "listing"
+    assert route_class("PUT", "/api/v1/file/upload/u1/chunk/3") == "chunk"
+    assert route_class("POST", "/api/v1/file/upload/chunk/") == "chunk"
+    assert route_class("POST", "/api/v1/file/upload/complete/") == "complete"
+    assert route_class("GET", "/api/v1/file/download/f1") is None
+    assert route_class("GET", "/api/v1/metrics/load") is None
+
+
+def test_low_priority_work_is_shed_first(monitor):
+    shed = lambda: [name for name in ("listing", "chunk", "complete") if monitor.should_shed(name)]
+
+    monitor.lag_ms = 50
+    assert shed() == []
+    monitor.lag_ms = 120
+    assert shed() == ["listing"]
+    monitor.queue_depth = 1600
+    assert shed() == ["listing", "chunk"]
+    with monitor.track("chunk"), monitor.track(None):
+        monitor.inflight_total += 18
+        assert shed() == ["listing", "chunk", "complete"]
+        assert monitor.stats()["inflight"] == {"listing": 0, "chunk": 1, "complete": 0, "total": 20}
+    assert monitor.stats()["shed"] == {"listing": 3, "chunk": 2, "complete": 1}
+
+
+def test_shed_requests_get_503_with_retry_after(monitor, monkeypatch):
+    monkeypatch.setattr(config, "LOAD_SHED_RETRY_AFTER_SECONDS", 7)
+    monitor.lag_ms = 120
+    client = TestClient(create_application())
+
+    shed = client.get("/api/v1/file/all", params={"user_id": "user1"})
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "7"
+
+    stats = client.get("/api/v1/metrics/load").json()["data"]
+    assert stats["shedding"] == ["listing"]
+    assert stats["shed"]["listing"] == 1
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import pytest
+from infrastructure.object_cache import objectCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(objectCache, "enabled", True)
+    monkeypatch.setattr(objectCache, "directory", str(tmp_path))
+    monkeypatch.setattr(objectCache, "max_bytes", 300)
+    monkeypatch.setattr(objectCache, "max_entry_bytes", 200)
+    monkeypatch.setattr(objectCache, "_entries", type(objectCache._entries)())
+    monkeypatch.setattr(objectCache, "_inflight", {})
+    monkeypatch.setattr(objectCache, "_pins", {})
+    monkeypatch.setattr(objectCache, "_retired", set())
+    monkeypatch.setattr(objectCache, "_fills", set())
+    for counter in ("current_bytes", "hits", "misses", "evictions", "bytes_saved"):
+        monkeypatch.setattr(objectCache, counter, 0)
+    return objectCache
+
+
+def writer(payload: bytes, calls: list):
+    async def fetch(path):
+        calls.append(path)
+        await asyncio.sleep(0.01)
+        with open(path, "wb") as f:
+            f.write(payload)
+    return fetch
+
+
+def test_concurrent_misses_collapse_into_one_fetch(cache):
+    calls = []
+
+    async def run():
+        return await asyncio.gather(*[cache.get_path("public/a.pdf", "e1", 100, writer(b"a" * 100, calls))
+                                      for _ in range(10)])
+
+    paths = asyncio.run(run())
+    assert len(calls) == 1
+    assert len(set(paths)) == 1
+    assert open(paths[0], "rb").read() == b"a" * 100
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 9
+    assert cache.stats()["bytes_saved"] == 900
+
+
+def test_lru_eviction_respects_byte_budget(cache):
+    calls = []
+
+    async def run():
+        a = await cache.get_path("public/a", "e", 100, writer(b"a" * 100, calls))
+        await cache.get_path("public/b", "e", 100, writer(b"b" * 100, calls))
+        await cache.get_path("public/a", "e", 100, writer(b"a" * 100, calls))
+        await cache.get_path("public/c", "e", 150, writer(b"c" * 150, calls))
+        return a
+
+    a_path = asyncio.run(run())
+    assert cache.current_bytes == 250
+    assert cache.evictions == 1
+    assert os.path.exists(a_path)
+    assert set(cache._entries) == {cache._key("public/a", "e"), cache._key("public/c", "e")}
+
+
+def test_etag_change_and_evict(cache):
+    calls = []
+
+    async def run():
+        first = await cache.get_path("private/x", "v1", 10, writer(b"1" * 10, calls))
+        second = await cache.get_path("private/x", "v2", 10, writer(b"2" * 10, calls))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first != second
+    cache.release(first)
+    cache.release(second)
+    cache.evict("private/x")
+    assert cache.current_bytes == 0
+    assert not os.path.exists(first) and not os.path.exists(second)
+
+
+def test_pinned_entry_outlives_its_eviction(cache):
+    calls = []
+    path = asyncio.run(cache.get_path("public/a", "e", 100, writer(b"a" * 100, calls)))
+
+    cache.evict("public/a")
+    assert cache.current_bytes == 0
+    assert open(path, "rb").read() == b"a" * 100
+
+    cache.release(path)
+    assert not os.path.exists(path)
+    assert cache.stats()["pinned"] == 0
+
+
+def test_background_fill(cache):
+    calls = []
+
+    async def run():
+        assert cache.lookup("public/a", "e", 100) is None
+        cache.fill("public/a", "e", 100, writer(b"a" * 100, calls))
+        await asyncio.gather(*cache._fills)
+        return cache.lookup("public/a", "e", 100)
+
+    path = asyncio.run(run())
+    assert open(path, "rb").read() == b"a" * 100
+    assert cache._pins == {path: 1}
+
+
+def test_entries_of_an_earlier_process_are_adopted(cache, tmp_path):
+    key = cache._key("public/a", "e")
+    (tmp_path / key).write_bytes(b"a" * 100)
+    (tmp_path / f"{key}.0123.tmp").write_bytes(b"partial")
+    (tmp_path / cache._key("public/big", "e")).write_bytes(b"b" * 201)
+
+    cache._adopt_existing()
+
+    assert os.listdir(tmp_path) == [key]
+    assert cache.lookup("public/a", "e", 100) == str(tmp_path / key)
+    assert cache.current_bytes == 100
+
+
+def test_adopted_entries_are_evicted_without_a_lookup(cache, tmp_path):
+    key = cache._key("public/a", "e")
+    (tmp_path / key).write_bytes(b"a" * 100)
+    (tmp_path / cache._key("public/ab", "e")).write_bytes(b"b" * 100)
+    # Named by the previous key format, which does not tell the object
+    (tmp_path / ("0" * 64)).write_bytes(b"c" * 100)
+    cache._adopt_existing()
+
+    cache.evict("public/ab")
+
+    assert os.listdir(tmp_path) == [key]
+    assert cache.current_bytes == 100
+
+
+def test_oversized_objects_bypass_cache(cache):
+    calls = []
+    assert asyncio.run(cache.get_path("public/big", "e", 201, writer(b"", calls))) is None
+    assert calls == []
+
+
+def test_failed_fetch_is_not_cached(cache):
+    async def failing(path):
+        raise RuntimeError("minio down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_path("public/a", "e", 10, failing))
+    assert cache._entries == {} and cache._inflight == {}
+    assert os.listdir(cache.directory) == []
+
+
+def test_evict_from_worker_threads_while_the_loop_serves(cache, monkeypatch):
+    monkeypatch.setattr(cache, "max_bytes", 10 ** 6)
+    calls = []
+
+    async def run():
+        for n in range(50):
+            cache.release(await cache.get_path(f"public/{n}", "e", 10, writer(b"x" * 10, calls)))
+        evictions = [asyncio.get_running_loop().run_in_executor(None, cache.evict, f"public/{n}") for n in range(50)]
+        for _ in range(20):
+            for n in range(50):
+                path = cache.lookup(f"public/{n}", "e", 10)
+                if path:
+                    cache.release(path)
+            await asyncio.sleep(0)
+        await asyncio.gather(*evictions)
+
+    asyncio.run(run())
+    assert cache.stats()["entries"] == 0
+    assert cache.current_bytes == 0
+    assert cache._pins == {} and cache._retired == set()
+    assert os.listdir(cache.directory) == []
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from minio import Minio
+from infrastructure.minio import PresignEngine
+import pytest
+
+ACCESS_KEY = "minioadmin"
+SECRET_KEY = "minioadmin"
+REGION = "us-east-1"
+REQUEST_DATE = datetime(2025, 8, 14, 22, 30, 5, tzinfo=timezone.utc)
+DISPOSITION = "inline; filename=\"scan 01.pdf\"; filename*=UTF-8''scan%2001.pdf"
+
+
+def sdk_url(endpoint, secure, bucket, object_name, response_headers=None, extra_query_params=None,
+            expires=timedelta(days=7)):
+    client = Minio(endpoint, access_key=ACCESS_KEY, secret_key=SECRET_KEY, secure=secure, region=REGION)
+    return client.get_presigned_url("GET", bucket, object_name, expires, response_headers, REQUEST_DATE,
+                                    extra_query_params=dict(extra_query_params) if extra_query_params else None)
+
+
+@pytest.mark.parametrize("endpoint,secure", [
+    ("minio:9000", False),
+    ("files.example.com", True),
+    ("files.example.com:443", True),
+    ("localhost:9001", True),
+])
+@pytest.mark.parametrize("object_name,response_headers,extra_query_params", [
+    ("0b9c1e1a-8f0e-4b43-9e53-1d6f0e0c2a11.pdf", None, None),
+    ("0b9c1e1a.pdf", {"response-content-disposition": DISPOSITION}, None),
+    ("nested/dir/é ~file+1.txt", {"response-content-disposition": DISPOSITION}, {"user": "42", "token": "a=b&c"}),
+])
+def test_presign_matches_sdk(endpoint, secure, object_name, response_headers, extra_query_params):
+    engine = PresignEngine(endpoint, ACCESS_KEY, SECRET_KEY, secure=secure, region=REGION)
+    query_params = dict(extra_query_params or {})
+    query_params.update(response_headers or {})
+
+    url = engine.presign("GET", "private", object_name, query_params=query_params, request_date=REQUEST_DATE)
+
+    assert url == sdk_url(endpoint, secure, "private", object_name, response_headers, extra_query_params)
+
+
+def test_presign_batch_matches_sdk():
+    engine = PresignEngine("minio:9000", ACCESS_KEY, SECRET_KEY, secure=False, region=REGION)
+    items = [(f"{i}.jpg", {"response-content-disposition": f"attachment; filename=\"{i}.jpg\""}) for i in range(50)]
+
+    urls = engine.presign_batch("GET", "public", items, expires=timedelta(hours=1), request_date=REQUEST_DATE)
+
+    assert urls == [sdk_url("minio:9000", False, "public", name, headers, expires=timedelta(hours=1))
+                    for name, headers in items]
+
+
+def test_signing_key_is_rederived_on_new_day():
+    engine = PresignEngine("minio:9000", ACCESS_KEY, SECRET_KEY, secure=False, region=REGION)
+    next_day = REQUEST_DATE + timedelta(days=1)
+
+    engine.presign("GET", "public", "a.txt", request_date=REQUEST_DATE)
+    url = engine.presign("GET", "public", "a.txt", request_date=next_day)
+
+    client = Minio("minio:9000", access_key=ACCESS_KEY, secret_key=SECRET_KEY, secure=False, region=REGION)
+    assert url == client.get_presigned_url("GET", "public", "a.txt", request_date=next_day)
+
+
+def test_presign_rejects_invalid_expiry():
+    engine = PresignEngine("minio:9000", ACCESS_KEY, SECRET_KEY, secure=False, region=REGION)
+    with pytest.raises(ValueError):
+        engine.presign("GET", "public", "a.txt", expires=timedelta(days=8))
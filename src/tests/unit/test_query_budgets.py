@@ -0,0 +1,97 @@
+import pytest
+from fastapi.testclient import TestClient
+from api.routes import file as file_routes
+from entities import User, Appointment, File
+from infrastructure.db.mysql import mysql
+from main import create_application
+from services import appointment_service, user_service
+from services.file_service import FileService
+from tests.query_budget import QueryBudget
+
+APPOINTMENTS = 3
+FILES_PER_APPOINTMENT = 4
+JSON_COLUMNS = ("files.virus_scan_result", "files.credential", "files.detail")
+# Listings presign with the credential
+LISTING_UNREAD = ("files.virus_scan_result", "files.detail")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = QueryBudget()
+    session = db.SessionLocal()
+    user = User(id="u1", name="user")
+    session.add(user)
+    for a in range(APPOINTMENTS):
+        session.add(Appointment(id=f"a{a}", name=f"appointment {a}", user_id="u1"))
+        for f in range(FILES_PER_APPOINTMENT):
+            session.add(File(id=f"f{a}-{f}", upload_id=f"up{a}-{f}", filename=f"{f}.pdf", appointment_id=f"a{a}",
+                             user_id="u1", path=f"public/{a}-{f}.pdf", content_type="application/pdf", size=10,
+                             virus_scan_status="clean", virus_scan_result={"engine": "x" * 1000},
+                             detail={"notes": "x" * 1000}))
+    session.commit()
+    session.close()
+
+    async def get_download_links(self, files):
+        return [f"https://files/{file.id}" for file in files]
+    monkeypatch.setattr(FileService, "get_download_links", get_download_links)
+    for module in (appointment_service, user_service):
+        monkeypatch.setattr(module.minioStorage, "remove_object", lambda bucket_name, object_name: None)
+        monkeypatch.setattr(module.objectCache, "evict", lambda path: None)
+    return db
+
+
+@pytest.fixture
+def client(db):
+    app = create_application()
+    app.dependency_overrides[mysql.get_db] = db.get_db
+    app.dependency_overrides[file_routes.get_read_db] = db.get_db
+    return TestClient(app)
+
+
+def test_appointment_listing_reads_no_files(db, client):
+    with db.budget(queries=1, rows=APPOINTMENTS, unread=("files.",)):
+        response = client.get("/api/v1/appointments/", params={"user_id": "u1"})
+
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == APPOINTMENTS
+
+
+def test_file_listings_read_one_page(db, client):
+    with db.budget(queries=2, rows=1 + FILES_PER_APPOINTMENT, unread=LISTING_UNREAD):
+        response = client.get("/api/v1/file/appointment/a0")
+    assert len(response.json()["data"]) == FILES_PER_APPOINTMENT
+
+    # The page and the row telling whether there is another one
+    with db.budget(queries=2, rows=1 + 5 + 1, unread=LISTING_UNREAD):
+        response = client.get("/api/v1/file/all", params={"user_id": "u1", "limit": 5})
+    assert len(response.json()["data"]) == 5
+
+
+def test_appointment_delete_loads_files_once(db, client):
+    # Appointment, its files in one SELECT ... IN, which of their paths other files share,
+    # the two listing version bumps and two DELETEs
+    with db.budget(queries=7, rows=1 + FILES_PER_APPOINTMENT, unread=JSON_COLUMNS):
+        response = client.delete("/api/v1/appointments/a0")
+
+    assert response.status_code == 200
+
+
+def test_appointment_delete_invalidates_the_user_listing(db, client):
+    etag = client.get("/api/v1/file/all", params={"user_id": "u1"}).headers["etag"]
+
+    assert client.delete("/api/v1/appointments/a0").status_code == 200
+    response = client.get("/api/v1/file/all", params={"user_id": "u1"}, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()["data"]) == (APPOINTMENTS - 1) * FILES_PER_APPOINTMENT
+
+
+def test_user_delete_loads_files_once(db, client):
+    # The user, its appointments, its files along both relationships the delete cascades through,
+    # the shared paths and three DELETEs; nothing per appointment or per file
+    files = APPOINTMENTS * FILES_PER_APPOINTMENT
+    with db.budget(queries=8, rows=1 + APPOINTMENTS + 2 * files, unread=JSON_COLUMNS):
+        response = client.delete("/api/v1/users/u1")
+
+    assert response.status_code == 200
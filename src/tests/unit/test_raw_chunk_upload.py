@@ -0,0 +1,32 @@
+import hashlib
+from fastapi.testclient import TestClient
+from core.config import config
+from infrastructure.db.mysql import mysql
+from main import create_application
+
+
+def test_raw_chunk_is_staged_without_a_database_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "u1").mkdir()
+    app = create_application()
+    app.dependency_overrides[mysql.get_db] = lambda: (_ for _ in ()).throw(AssertionError("no session expected"))
+    client = TestClient(app)
+    data = b"raw chunk body"
+
+    response = client.put("/api/v1/file/upload/u1/chunk/3", content=data,
+                          headers={"X-Checksum": hashlib.sha256(data).hexdigest()})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["sha256"] == hashlib.sha256(data).hexdigest()
+    assert (tmp_path / "u1" / "3.part").read_bytes() == data
+
+
+def test_raw_chunk_over_the_limit_is_refused_up_front(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "u1").mkdir()
+    client = TestClient(create_application())
+
+    response = client.put("/api/v1/file/upload/u1/chunk/0", content=b"x" * (config.APP_MAX_CHUNK_SIZE + 1))
+
+    assert response.status_code == 413
+    assert not (tmp_path / "u1" / "0.part").exists()
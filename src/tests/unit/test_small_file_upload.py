@@ -0,0 +1,75 @@
+import asyncio
+import hashlib
+from types import SimpleNamespace
+import zstandard
+from core.config import config
+from dto.file_dto import UploadFileDTO
+from infrastructure.virus_scanner import virus_scanner
+from services import file_service
+from services.file_service import FileService
+
+
+class StubFileRepo:
+    def __init__(self):
+        self.db = None
+        self.created = []
+
+    def create_file(self, file):
+        self.created.append(file)
+        return SimpleNamespace(id="f1", **file.model_dump())
+
+
+def small_upload(content, file_extension="pdf", content_type="application/pdf"):
+    return UploadFileDTO(upload_id="u1", total_chunks=1, total_size=len(content), file_extension=file_extension,
+                         content_type=content_type, size=len(content), detail=None, credential=None,
+                         appointment_id="a1", user_id="user1", filename=f"small.{file_extension}")
+
+
+def stub_storage(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "DEDUP_ENABLED", False)
+    monkeypatch.setattr(file_service.minioStorage, "public_bucket", "public")
+    monkeypatch.setattr(file_service.taskDispatcher, "submit",
+                        lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("no task expected")))
+    scanned, objects = [], {}
+
+    async def scan_file_content(content, filename):
+        scanned.append(content)
+        return {"is_infected": False, "scan_result": "OK"}
+
+    def put_object(bucket_name, object_name, data, length, **kwargs):
+        objects[(bucket_name, object_name)] = data.read()
+        return SimpleNamespace(etag=f'"{hashlib.md5(objects[(bucket_name, object_name)]).hexdigest()}"')
+
+    monkeypatch.setattr(virus_scanner, "scan_file_content", scan_file_content)
+    monkeypatch.setattr(file_service.minioStorage, "put_object", put_object)
+    return scanned, objects
+
+
+def test_small_file_is_scanned_stored_and_recorded_in_one_request(tmp_path, monkeypatch):
+    scanned, objects = stub_storage(monkeypatch, tmp_path)
+    content = b"%PDF-1.4 small file"
+    repo = StubFileRepo()
+
+    file = asyncio.run(FileService(repo=repo).upload_small(small_upload(content), content))
+
+    assert scanned == [content]
+    assert objects == {("public", "u1.pdf"): content}
+    assert file.path == "public/u1.pdf"
+    assert file.sha256 == hashlib.sha256(content).hexdigest()
+    assert file.integrity_status == "verified"
+    assert file.celery_task_id == ""
+    assert not any(tmp_path.iterdir())
+
+
+def test_small_file_follows_compression_policy(tmp_path, monkeypatch):
+    _, objects = stub_storage(monkeypatch, tmp_path)
+    monkeypatch.setattr(config, "COMPRESSION_AT_REST_ENABLED", True)
+    monkeypatch.setattr(config, "COMPRESSION_AT_REST_MIN_SIZE", 0)
+    content = b"id,value\n" * 1000
+
+    file = asyncio.run(FileService(repo=StubFileRepo()).upload_small(small_upload(content, "csv", "text/csv"), content))
+
+    stored = objects[("public", "u1.csv.zst")]
+    assert zstandard.ZstdDecompressor().decompress(stored) == content
+    assert (file.content_encoding, file.size, file.stored_size) == ("zstd", len(content), len(stored))
@@ -0,0 +1,93 @@
+import asyncio
+import os
+from collections import namedtuple
+import pytest
+from core.config import config
+from exceptions.http_exception import StagingAreaFullException
+from infrastructure import staging_area
+from infrastructure.staging_area import stagingArea
+from infrastructure.upload_session import COMPLETED_FILE
+from services.file_service import FileService
+
+NOW = 1_000_000_000
+DiskUsage = namedtuple("DiskUsage", "total used free")
+
+
+def staged(root, upload_id, age, files=("0.part", "session.json")):
+    upload_dir = root / upload_id
+    upload_dir.mkdir()
+    for name in files:
+        (upload_dir / name).write_bytes(b"x" * 100)
+        os.utime(upload_dir / name, (NOW - age, NOW - age))
+    return upload_dir
+
+
+@pytest.fixture
+def staging(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "STAGING_SESSION_TTL_SECONDS", 86400)
+    monkeypatch.setattr(config, "STAGING_PRESSURE_TTL_SECONDS", 3600)
+    monkeypatch.setattr(config, "STAGING_ARTIFACT_TTL_SECONDS", 3600)
+    monkeypatch.setattr(config, "STAGING_HIGH_WATERMARK_FREE_PERCENT", 20)
+    monkeypatch.setattr(config, "STAGING_LOW_WATERMARK_FREE_PERCENT", 5)
+    disk = {"free": 50}
+    monkeypatch.setattr(staging_area.shutil, "disk_usage", lambda path: DiskUsage(100, 100 - disk["free"], disk["free"]))
+    return tmp_path, disk
+
+
+def test_idle_uploads_and_stale_artifacts_are_removed(staging):
+    root, _ = staging
+    abandoned = staged(root, "abandoned", age=2 * 86400)
+    failed = staged(root, "failed", age=600, files=("0.part", "final_file"))
+    os.utime(failed / "final_file", (NOW - 7200, NOW - 7200))
+    active = staged(root, "active", age=60, files=("0.part", "1.part.abc.tmp"))
+
+    stagingArea.sweep(now=NOW)
+
+    assert not abandoned.exists()
+    assert sorted(os.listdir(failed)) == ["0.part"]
+    assert sorted(os.listdir(active)) == ["0.part", "1.part.abc.tmp"]
+
+
+def test_disk_pressure_expires_oldest_uploads_until_the_high_watermark(staging, monkeypatch):
+    root, disk = staging
+    disk["free"] = 10
+    oldest = staged(root, "oldest", age=5 * 3600)
+    older = staged(root, "older", age=3 * 3600)
+    recent = staged(root, "recent", age=600)
+    removed = []
+
+    def remove(path):
+        removed.append(os.path.basename(path))
+        disk["free"] += 10
+
+    monkeypatch.setattr(stagingArea, "_remove", remove)
+    stagingArea.sweep(now=NOW)
+
+    assert removed == ["oldest"]
+    assert older.exists() and recent.exists() and oldest.exists()
+
+
+def test_completed_uploads_are_kept_until_their_task_is_done(staging):
+    root, disk = staging
+    disk["free"] = 10
+    # Sent to a worker, so no longer in the dispatcher's queue, but not stored yet
+    completed = staged(root, "completed", age=2 * 86400, files=("0.part", "session.json", COMPLETED_FILE))
+    failed = staged(root, "failed", age=2 * 86400)
+
+    stagingArea.sweep(now=NOW)
+
+    assert completed.exists()
+    assert not failed.exists()
+
+
+def test_new_uploads_are_refused_below_the_low_watermark(staging):
+    _, disk = staging
+    disk["free"] = 4
+
+    with pytest.raises(StagingAreaFullException):
+        asyncio.run(FileService(repo=None).upload_initialize(total_size=10))
+
+    disk["free"] = 6
+    upload_id, _ = asyncio.run(FileService(repo=None).upload_initialize(total_size=10))
+    assert os.path.isdir(os.path.join(config.APP_UPLOAD_DIR, upload_id))
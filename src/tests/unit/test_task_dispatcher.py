@@ -0,0 +1,144 @@
+import asyncio
+import os
+import pytest
+from types import SimpleNamespace
+from core.config import config
+from infrastructure import task_dispatcher
+from infrastructure.task_dispatcher import TaskDispatcher, QueuedTask, DISPATCH_FILE, QUEUE_DIR, INTERACTIVE, BULK
+from infrastructure.staging_area import StagingArea
+
+TASK = SimpleNamespace(name="tasks.file_upload_task.upload_file_task")
+SMALL, LARGE = 1024, 1024 ** 3
+STEP = 0.1
+
+
+@pytest.fixture
+def dispatcher(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "TASK_FAIR_QUEUE_ENABLED", True)
+    monkeypatch.setattr(config, "TASK_FAIR_QUEUE_WINDOW", 4)
+    monkeypatch.setattr(config, "TASK_FAIR_QUEUE_MAX_PER_TENANT", 3)
+    monkeypatch.setattr(config, "TASK_FAIR_QUEUE_INTERACTIVE_MAX_BYTES", 16 * 1024 * 1024)
+    monkeypatch.setattr(config, "TASK_FAIR_QUEUE_INTERACTIVE_WEIGHT", 4)
+    monkeypatch.setattr(config, "TASK_FAIR_QUEUE_INTERACTIVE_RESERVED", 1)
+    monkeypatch.setattr(TaskDispatcher, "_instance", None)
+    return TaskDispatcher()
+
+
+def simulate(dispatcher, arrivals, seconds):
+    """
+    Run Celery workers (one per window slot) over `arrivals` of (time, tenant, size, duration);
+    returns the seconds each task waited for a worker, per tenant.
+    """
+    arrivals = sorted(arrivals, key=lambda arrival: arrival[0])
+    submitted, durations, ends, waits = {}, {}, {}, {}
+    now = 0.0
+    while now < seconds:
+        while arrivals and arrivals[0][0] <= now:
+            _, tenant, size, duration = arrivals.pop(0)
+            task_id = asyncio.run(dispatcher.submit(TASK, tenant=tenant, size=size, kwargs={}))
+            submitted[task_id], durations[task_id] = now, duration
+        for task_id in [task_id for task_id, end in ends.items() if end <= now]:
+            del ends[task_id]
+            dispatcher.finished(task_id)
+        while queued := dispatcher.next_task(now):
+            ends[queued.task_id] = now + durations[queued.task_id]
+            waits.setdefault(queued.tenant, []).append(now - submitted[queued.task_id])
+        now = round(now + STEP, 6)
+    return waits
+
+
+def test_light_users_wait_boundedly_during_a_heavy_burst(dispatcher):
+    # An import of 500 large files at once, and five users uploading a small file every few seconds
+    heavy = [(0.0, "importer", LARGE, 10.0)] * 500
+    light = [(t, f"user{n}", SMALL, 0.5) for n in range(5) for t in range(n, 300, 7)]
+    waits = simulate(dispatcher, heavy + light, seconds=300)
+
+    light_waits = [wait for tenant, tenant_waits in waits.items() if tenant != "importer" for wait in tenant_waits]
+    assert len(light_waits) == len(light)
+    assert max(light_waits) <= 1.0
+    # Fed to a shared FIFO, the last of them would have waited behind the whole import
+    assert len(waits["importer"]) < 500
+    # The importer still gets every slot small uploads do not need
+    assert len(waits["importer"]) >= 3 * 300 / 10.0 - 3
+
+
+def test_bulk_users_take_turns_under_the_per_tenant_cap(dispatcher):
+    arrivals = [(0.0, "importer", LARGE, 10.0)] * 100 + [(50.0, "other", LARGE, 10.0)] * 5
+    waits = simulate(dispatcher, arrivals, seconds=120)
+
+    # The second importer waits for one running task to end, not for the first import, then takes turns
+    assert waits["other"][0] <= 10.0
+    assert len(waits["other"]) == 5
+    assert waits["other"][-1] <= 30.0
+
+
+def test_tasks_are_sent_with_their_ids_and_persisted_until_sent(dispatcher, monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    (tmp_path / "u1").mkdir()
+    sent = []
+    monkeypatch.setattr(task_dispatcher.celery, "send_task",
+                        lambda name, kwargs, task_id: sent.append((name, kwargs, task_id)))
+
+    task_id = asyncio.run(dispatcher.submit(TASK, tenant="user1", size=SMALL, kwargs={"upload_id": "u1"},
+                                            upload_id="u1"))
+    assert os.path.exists(tmp_path / "u1" / DISPATCH_FILE)
+
+    # A restarted process queues it again
+    monkeypatch.setattr(TaskDispatcher, "_instance", None)
+    restarted = TaskDispatcher()
+    restarted.restore_from_staging()
+    assert restarted.stats()["queued"] == {INTERACTIVE: 1, BULK: 0}
+
+    asyncio.run(restarted._dispatch())
+    assert sent == [(TASK.name, {"upload_id": "u1"}, task_id)]
+    assert not os.path.exists(tmp_path / "u1" / DISPATCH_FILE)
+    assert restarted.stats()["running"] == 1
+
+
+def test_retries_without_a_staging_directory_survive_a_restart(dispatcher, monkeypatch, tmp_path):
+    sent = []
+    monkeypatch.setattr(task_dispatcher.celery, "send_task",
+                        lambda name, kwargs, task_id: sent.append((name, kwargs, task_id)))
+
+    asyncio.run(dispatcher.submit(TASK, tenant="user1", size=SMALL, kwargs={"upload_id": "stored"},
+                                  upload_id="stored", task_id="t1"))
+    assert os.listdir(tmp_path / QUEUE_DIR) == ["t1.json"]
+
+    monkeypatch.setattr(TaskDispatcher, "_instance", None)
+    restarted = TaskDispatcher()
+    restarted.restore_from_staging()
+    asyncio.run(restarted._dispatch())
+
+    assert sent == [(TASK.name, {"upload_id": "stored"}, "t1")]
+    assert os.listdir(tmp_path / QUEUE_DIR) == []
+
+
+def test_janitor_keeps_uploads_whose_task_is_queued(dispatcher, monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "STAGING_SESSION_TTL_SECONDS", 60)
+    monkeypatch.setattr(StagingArea, "_instance", None)
+    for upload_id in ("queued", "abandoned"):
+        (tmp_path / upload_id).mkdir()
+        (tmp_path / upload_id / "0.part").write_bytes(b"x")
+    QueuedTask(task_id="t1", task_name=TASK.name, tenant="user1", size=1, kwargs={}, upload_id="queued").save()
+    old = os.path.getmtime(tmp_path / "queued" / "0.part") - 3600
+    for path in (tmp_path / "queued" / "0.part", tmp_path / "queued" / DISPATCH_FILE, tmp_path / "abandoned" / "0.part"):
+        os.utime(path, (old, old))
+
+    StagingArea().sweep()
+
+    assert sorted(os.listdir(tmp_path)) == ["queued"]
+
+
+def test_corrupted_and_failed_tasks_free_their_slots(monkeypatch):
+    monkeypatch.setattr(config, "TASK_FAIR_QUEUE_LEASE_SECONDS", 3600)
+    # CORRUPTED is a custom state set before raising Ignore; `ready()` is false for it
+    task_states = {"t1": "PENDING", "t2": "STARTED", "t3": "RETRY", "t4": "SUCCESS", "t5": "FAILURE",
+                   "t6": "CORRUPTED"}
+    monkeypatch.setattr(task_dispatcher.celery, "AsyncResult",
+                        lambda task_id: SimpleNamespace(state=task_states[task_id], ready=lambda: False))
+
+    finished = TaskDispatcher._finished_task_ids([(task_id, 0.0) for task_id in task_states], 1.0)
+
+    assert finished == ["t4", "t5", "t6"]
@@ -0,0 +1,93 @@
+import asyncio
+import shutil
+import pytest
+from core.config import config
+from exceptions.http_exception import UploadBudgetExceededException
+from handlers.file_handler import FileHandler
+from infrastructure.upload_admission import AdmissionRejected, UploadAdmission
+from infrastructure.upload_session import UploadTooLarge
+from services import file_service
+from services.file_service import FileService
+
+
+@pytest.fixture
+def admission(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "UPLOAD_INFLIGHT_MAX_BYTES", 1000)
+    monkeypatch.setattr(config, "UPLOAD_INFLIGHT_MAX_BYTES_PER_USER", 600)
+    monkeypatch.setattr(UploadAdmission, "_instance", None)
+    fresh = UploadAdmission()
+    monkeypatch.setattr(file_service, "uploadAdmission", fresh)
+    return fresh
+
+
+def initialize(total_size, user_id):
+    return asyncio.run(FileService(repo=None).upload_initialize(total_size=total_size, user_id=user_id))
+
+
+def test_uploads_are_admitted_within_global_and_user_budgets(admission, tmp_path):
+    first, _ = initialize(500, "alice")
+    with pytest.raises(UploadBudgetExceededException) as rejected:
+        initialize(200, "alice")
+    assert rejected.value.scope == "user"
+    initialize(400, "bob")
+    with pytest.raises(UploadBudgetExceededException) as rejected:
+        initialize(200, "carol")
+    assert rejected.value.scope == "global"
+    with pytest.raises(UploadTooLarge):
+        initialize(700, "dave")
+
+    # Stored (or expired) uploads lose their staging directory, and with it their reservation
+    shutil.rmtree(tmp_path / first)
+    initialize(200, "alice")
+
+    stats = admission.stats()
+    assert (stats["reservations"], stats["reserved_bytes"], stats["users"]) == (2, 600, 2)
+    assert (stats["admitted"], stats["rejected_user"], stats["rejected_global"]) == (3, 1, 1)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_reservations_survive_a_restart(admission, monkeypatch):
+    initialize(500, "alice")
+    monkeypatch.setattr(UploadAdmission, "_instance", None)
+    restarted = UploadAdmission()
+
+    restarted.restore_from_staging()
+
+    assert restarted.stats()["reserved_bytes"] == 500
+    with pytest.raises(AdmissionRejected):
+        restarted.reserve("u2", "alice", 200)
+
+
+def test_rejected_upload_is_told_when_to_retry(admission, monkeypatch):
+    monkeypatch.setattr(config, "UPLOAD_ADMISSION_RETRY_AFTER_SECONDS", 42)
+    initialize(600, "alice")
+
+    response = asyncio.run(FileHandler(service=FileService(repo=None)).upload_initialize(100, None, "alice"))
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "42"
+
+
+def test_uploads_without_a_declared_size_are_charged_as_chunks_arrive(admission, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_MAX_CHUNK_SIZE", 250)
+
+    def stage(upload_id, chunk_index, size):
+        async def body():
+            yield b"x" * size
+        return asyncio.run(FileService(repo=None).stage_chunk(upload_id, chunk_index, body()))
+
+    upload_id, _ = initialize(None, "alice")
+    assert admission.stats()["reserved_bytes"] == 250
+
+    stage(upload_id, 0, 250)
+    stage(upload_id, 1, 250)
+    # A resent chunk replaces its earlier copy
+    stage(upload_id, 1, 250)
+    assert admission.stats()["reserved_bytes"] == 500
+    with pytest.raises(UploadBudgetExceededException) as rejected:
+        stage(upload_id, 2, 250)
+
+    assert rejected.value.scope == "user"
+    assert not (tmp_path / upload_id / "2.part").exists()
+    assert admission.stats()["reserved_bytes"] == 500
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from fastapi.exceptions import RequestValidationError
+from core.config import config
+from infrastructure.upload_session import (MAX_PARTS, MIN_PART_SIZE, UploadSession, UploadTooLarge,
+                                           multipart_part_size, negotiate)
+from services.file_service import FileService
+
+MiB = 1024 * 1024
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(config, "APP_MAX_CHUNK_SIZE", 10 * MiB)
+    monkeypatch.setattr(config, "UPLOAD_MAX_CHUNK_SIZE", 64 * MiB)
+    monkeypatch.setattr(config, "UPLOAD_TARGET_CHUNKS", 64)
+    monkeypatch.setattr(config, "UPLOAD_MAX_PARALLEL_STREAMS", 4)
+
+
+def test_chunk_size_grows_with_the_file_within_multipart_limits(limits):
+    small = negotiate(3 * MiB, load=0)
+    assert (small.chunk_size, small.total_chunks, small.parallel_streams) == (3 * MiB, 1, 1)
+
+    medium = negotiate(100 * MiB, load=0)
+    assert (medium.chunk_size, medium.total_chunks, medium.parallel_streams) == (10 * MiB, 10, 4)
+
+    large = negotiate(4 * 1024 * MiB, load=0)
+    assert (large.chunk_size, large.total_chunks) == (64 * MiB, 64)
+
+    huge = negotiate(500 * 1024 * MiB, load=0)
+    assert huge.chunk_size == 64 * MiB and huge.total_chunks == 8000
+    with pytest.raises(UploadTooLarge):
+        negotiate(MAX_PARTS * 64 * MiB + 1, load=0)
+
+    assert negotiate(None, load=0).chunk_size == config.APP_MAX_CHUNK_SIZE
+    assert multipart_part_size(10 * MiB, 10 * MiB) == 10 * MiB
+    assert multipart_part_size(200 * 1024 * MiB, 10 * MiB) == 21 * MiB >= MIN_PART_SIZE
+
+
+def test_parallel_streams_shrink_under_load(limits):
+    assert [negotiate(1024 * MiB, load=load).parallel_streams for load in (0, 0.5, 0.9, 3)] == [4, 2, 1, 1]
+
+
+def test_staged_chunks_are_validated_against_the_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "APP_UPLOAD_DIR", str(tmp_path))
+    service = FileService(repo=None)
+    upload_id, session = asyncio.run(service.upload_initialize(total_size=10, content_type="text/plain"))
+    assert UploadSession.load(str(tmp_path / upload_id)) == session
+
+    async def body(data):
+        yield data
+
+    assert asyncio.run(service.stage_chunk(upload_id, 0, body(b"x" * 10)))["size"] == 10
+    with pytest.raises(RequestValidationError):
+        asyncio.run(service.stage_chunk(upload_id, 0, body(b"x" * 11)))
+    with pytest.raises(RequestValidationError):
+        asyncio.run(service.stage_chunk(upload_id, 1, body(b"x")))
@@ -1,7 +1,10 @@
+import base64
 import json
+import hashlib
+from datetime import datetime, timezone
 from fastapi.exceptions import RequestValidationError
 from constants.errors import ValidatonErrors
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 
 def parse_json_to_dict(json_string: str, body: str) -> Dict[str, str]:
@@ -15,3 +18,125 @@ def parse_json_to_dict(json_string: str, body: str) -> Dict[str, str]:
         }],
             body={body: "invalid_format"})
     return {str(key): str(value) for key, value in parsed_dict.items()}
+
+
+def parse_range_header(range_header: str, size: int, max_ranges: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse an HTTP `Range` header into inclusive `(start, end)` byte ranges.
+
+    Returns `None` when the header should be ignored (not a `bytes` range,
+    malformed, or more ranges than `max_ranges`) and an empty list when no
+    range is satisfiable for an object of `size` bytes. Overlapping and
+    adjacent ranges are coalesced.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if first == "":
+                # Suffix range: the final N bytes
+                suffix = int(last)
+                if suffix <= 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+            else:
+                start = int(first)
+                if last and start > int(last):
+                    return None
+                end = min(int(last), size - 1) if last else size - 1
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, end))
+    if len(ranges) > max_ranges:
+        return None
+
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def presign_window(now: Optional[datetime] = None) -> datetime:
+    """
+    Signing date of presigned URLs: the start of the current UTC day.
+
+    Within a window the same object presigns to the same URL, and a URL served
+    at any time in it stays valid for its full expiry minus at most a day.
+    """
+    return (now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(hour=0, minute=0, second=0,
+                                                                                microsecond=0)
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Build a strong ETag from version parts.
+
+    The presign window is mixed in, so a body embedding presigned URLs is only
+    revalidated while those URLs are the ones it would be served with.
+    """
+    window = presign_window().strftime("%Y%m%d")
+    digest = hashlib.sha256(":".join([window, *map(str, parts)]).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an `If-None-Match` header against an ETag, as RFC 9110 requires for GET."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return etag in [candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates]
+
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    """Whether an `Accept-Encoding` header allows `encoding`, honouring `q=0` and `*` (RFC 9110 12.5.3)."""
+    if not accept_encoding:
+        return False
+    wildcard = None
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        name = name.strip().lower()
+        if name == encoding:
+            return quality > 0
+        if name == "*":
+            wildcard = quality > 0
+    return bool(wildcard)
+
+
+def encode_cursor(created_at: datetime, id: str) -> str:
+    """Opaque cursor of a listing page ending at the row `(created_at, id)`."""
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """The `(created_at, id)` of the row a cursor from `encode_cursor` points after."""
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), str(id)
+    except (ValueError, TypeError):
+        raise RequestValidationError(errors=[{
+            'loc': ('query', 'cursor'),
+            'msg': ValidatonErrors.INVALID_CURSOR,
+            'type': 'value_error'
+        }])